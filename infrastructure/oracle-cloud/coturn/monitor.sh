@@ -19,7 +19,11 @@ set -euo pipefail
 
 COTURN_SERVICE="coturn"
 TURN_API_SERVICE="turn-api"
+TURN_API_URL="${TURN_API_URL:-http://localhost:8080}"
 LOG_FILE="/var/log/turnserver.log"
+LOG_TAILER="${LOG_TAILER:-/opt/turn-api/log_tailer.py}"
+LOG_TAILER_PYTHON="${LOG_TAILER_PYTHON:-/opt/turn-api/bin/python}"
+LOG_TAILER_CHECKPOINT="${LOG_TAILER_CHECKPOINT:-/var/lib/turn-log-tailer/checkpoint.json}"
 HEALTH_LOG="/var/log/turn-health.log"
 MAX_LOG_SIZE=10485760  # 10MB
 
@@ -138,24 +142,30 @@ check_api_health() {
     fi
 }
 
+check_api_ready() {
+    # Cached STUN probe verdict; always 200 unless STUN_PROBE_ENABLED is set
+    local response
+    response=$(curl -s -o /dev/null -w "%{http_code}" http://localhost:8080/ready 2>/dev/null)
+
+    if [ "$response" = "200" ]; then
+        echo "✓ coturn listeners answer STUN probes"
+        return 0
+    else
+        echo "✗ coturn listeners down or slow (/ready HTTP $response)"
+        return 1
+    fi
+}
+
 ###############################################################################
 # METRICS FUNCTIONS (PROMETHEUS FORMAT)
 ###############################################################################
 
 get_connection_metrics() {
-    # Parse connection count from logs
-    local connections
-    connections=$(grep -c "session allocated" "$LOG_FILE" 2>/dev/null || echo "0")
-
     # Parse active allocations
     local active
     active=$(netstat -anp 2>/dev/null | grep :3478 | grep ESTABLISHED | wc -l)
 
     cat << METRICS
-# HELP turn_connections_total Total number of TURN connections
-# TYPE turn_connections_total gauge
-turn_connections_total $connections
-
 # HELP turn_connections_active Currently active TURN connections
 # TYPE turn_connections_active gauge
 turn_connections_active $active
@@ -194,7 +204,26 @@ turn_disk_usage_percent $disk_usage
 METRICS
 }
 
-get_error_metrics() {
+get_log_metrics() {
+    # Allocation, auth failure and error counters from the coturn log.
+    # The tailer reads only bytes appended since its last checkpoint, so
+    # the cost of a scrape does not grow with the log file.
+    if [ -f "$LOG_TAILER" ]; then
+        local python="$LOG_TAILER_PYTHON"
+        [ -x "$python" ] || python="python3"
+        if (cd "$(dirname "$LOG_TAILER")" && "$python" "$LOG_TAILER" \
+                --log "$LOG_FILE" --checkpoint "$LOG_TAILER_CHECKPOINT") 2>/dev/null; then
+            return 0
+        fi
+    fi
+    get_legacy_log_metrics
+}
+
+get_legacy_log_metrics() {
+    # Fallback when the tailer is not installed: rescans the log each call
+    local connections
+    connections=$(grep -c "session allocated" "$LOG_FILE" 2>/dev/null || echo "0")
+
     # Count errors in last hour
     local error_count
     error_count=$(tail -n 1000 "$LOG_FILE" 2>/dev/null | grep -c "error\|Error\|ERROR" || echo "0")
@@ -204,6 +233,10 @@ get_error_metrics() {
     auth_failures=$(tail -n 1000 "$LOG_FILE" 2>/dev/null | grep -c "401\|unauthorized\|Forbidden" || echo "0")
 
     cat << METRICS
+# HELP turn_connections_total Total number of TURN connections
+# TYPE turn_connections_total gauge
+turn_connections_total $connections
+
 # HELP turn_errors_total Total errors in log
 # TYPE turn_errors_total gauge
 turn_errors_total $error_count
@@ -214,6 +247,13 @@ turn_auth_failures_total $auth_failures
 METRICS
 }
 
+get_api_metrics() {
+    # Native Prometheus metrics exported by the TURN Credentials API
+    # (request counters, latency histograms, issuance and auth failures)
+    curl -sf --max-time 2 "$TURN_API_URL/metrics" 2>/dev/null \
+        || echo "# TURN API metrics unavailable ($TURN_API_URL/metrics)"
+}
+
 ###############################################################################
 # DIAGNOSTIC FUNCTIONS
 ###############################################################################
@@ -307,6 +347,7 @@ main() {
             check_listening_ports || exit_code=1
             check_tls_certificate || exit_code=1
             check_api_health || exit_code=1
+            check_api_ready || exit_code=1
             exit "$exit_code"
             ;;
         metrics)
@@ -317,7 +358,9 @@ main() {
             echo ""
             get_system_metrics
             echo ""
-            get_error_metrics
+            get_log_metrics
+            echo ""
+            get_api_metrics
             ;;
         diagnostics)
             run_diagnostics
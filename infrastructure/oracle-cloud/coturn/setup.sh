@@ -322,7 +322,27 @@ create_credentials_api() {
     python3 -m venv /opt/turn-api
     source /opt/turn-api/bin/activate
     pip install --upgrade pip
-    pip install fastapi uvicorn gunicorn
+
+    # Deploy the API from this repository when it sits next to this script,
+    # otherwise fall back to a minimal inline application
+    local api_src
+    api_src="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/turn-credentials-api"
+    local exec_start
+
+    if [[ -f "$api_src/main.py" && -f "$api_src/serve.py" ]]; then
+        log_info "Deploying TURN API from $api_src"
+        cp "$api_src"/*.py "$api_src/requirements.txt" /opt/turn-api/
+        rm -f /opt/turn-api/test_*.py
+        # Static ICE configuration served by /ice-config (ICE_CONFIG_PATH)
+        cp "$api_src/../../../../shared/constants/turn-config.json" /opt/turn-api/turn-config.json
+        pip install -r /opt/turn-api/requirements.txt
+
+        # gunicorn + uvicorn workers sized to the host, app preloaded
+        exec_start="/opt/turn-api/bin/python /opt/turn-api/serve.py"
+    else
+        log_warn "turn-credentials-api not found next to setup.sh - using inline API"
+        pip install fastapi "uvicorn[standard]" gunicorn
+        exec_start="/opt/turn-api/bin/gunicorn -w $(nproc) -k uvicorn.workers.UvicornWorker --preload --keep-alive 75 main:app --bind 0.0.0.0:8080"
 
     # Create API application
     cat > /opt/turn-api/main.py << API_EOF
@@ -387,6 +407,7 @@ if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
 API_EOF
+    fi
 
     # Create systemd service
     cat > /etc/systemd/system/turn-api.service << SERVICE_EOF
@@ -400,7 +421,12 @@ User=www-data
 WorkingDirectory=/opt/turn-api
 Environment="DOMAIN=$DOMAIN"
 Environment="TURN_SECRET=$TURN_SECRET"
-ExecStart=/opt/turn-api/bin/gunicorn -w 2 -k uvicorn.workers.UvicornWorker main:app --bind 0.0.0.0:8080
+Environment="ICE_CONFIG_PATH=/opt/turn-api/turn-config.json"
+ExecStart=$exec_start
+# Graceful rolling restart of workers (see serve.py for code upgrades)
+ExecReload=/bin/kill -s HUP \$MAINPID
+KillMode=mixed
+TimeoutStopSec=35
 Restart=always
 RestartSec=10
 
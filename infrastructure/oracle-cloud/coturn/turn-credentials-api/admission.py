@@ -0,0 +1,234 @@
+"""
+Admission Control for TURN Credentials API
+
+Global (per-process) concurrency limit with a bounded wait queue in
+front of the credential routes. When every slot is busy a request waits
+in FIFO order for a slot, unless the instance is already overloaded:
+
+    queue_full   the wait queue holds max_queue requests
+    latency      in-service latency (EWMA over completed requests) is
+                 above the target, so waiting would only add to it
+    timeout      no slot freed up within queue_timeout
+
+In those cases the request is answered immediately with 503 and a
+Retry-After hint, so SDKs fail over instead of every caller timing out
+behind a backlog. Paths outside the guarded prefixes (/health, /metrics,
+...) are never queued or shed.
+
+Everything runs on the worker's event loop, so no locks are needed.
+Under gunicorn each worker enforces its own limit.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_MAX_QUEUE = 128
+DEFAULT_QUEUE_TIMEOUT = 0.5        # seconds a request may wait for a slot
+DEFAULT_TARGET_LATENCY = 0.25      # seconds of in-service latency before shedding
+LATENCY_SMOOTHING = 0.2            # EWMA weight of the newest sample
+
+SHED_REASONS = ("queue_full", "latency", "timeout")
+
+
+###############################################################################
+# ADMISSION CONTROLLER
+###############################################################################
+
+class Overloaded(Exception):
+    """Request shed by the admission controller"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency slots, a FIFO wait queue and an in-service latency EWMA.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        target_latency: float = DEFAULT_TARGET_LATENCY
+    ):
+        """
+        Args:
+            max_concurrency: Requests served at once
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Longest wait for a slot in seconds
+            target_latency: In-service latency (seconds) above which
+                requests that would have to wait are shed instead
+        """
+        if max_concurrency < 1 or max_queue < 0:
+            raise ValueError("max_concurrency must be at least 1 and max_queue not negative")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+
+        self.in_flight = 0
+        self.latency = 0.0
+        self.admitted = 0
+        self.shed: Dict[str, int] = {reason: 0 for reason in SHED_REASONS}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained (at least 1)"""
+        backlog = self.in_flight + self.queued
+        return max(1, math.ceil(backlog / self.max_concurrency * self.latency))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.shed[reason] += 1
+        return Overloaded(reason, self.retry_after())
+
+    async def acquire(self) -> None:
+        """
+        Take a slot, waiting in line if allowed.
+
+        Raises:
+            Overloaded: The request is shed; reason is one of SHED_REASONS
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        if self.latency > self.target_latency:
+            raise self._reject("latency")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait expired: keep it
+                self.admitted += 1
+                return
+            waiter.cancel()
+            raise self._reject("timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self.admitted += 1
+
+    def release(self, service_time: Optional[float]) -> None:
+        """
+        Return a slot, handing it straight to the next waiter if any.
+
+        Args:
+            service_time: Seconds the request held the slot (None = do not
+                record, e.g. a slot handed to a request that went away)
+        """
+        if service_time is not None:
+            self.latency += LATENCY_SMOOTHING * (service_time - self.latency)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)      # slot passes over, in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of controller state.
+
+        Returns:
+            Dict with in_flight, queued, latency, admitted and shed by reason
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "latency": self.latency,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+###############################################################################
+# ASGI MIDDLEWARE
+###############################################################################
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying an AdmissionController to HTTP requests
+    whose path starts with one of the guarded prefixes.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        controller: Callable[[], Optional[AdmissionController]],
+        prefixes: Sequence[str]
+    ):
+        """
+        Args:
+            app: Wrapped ASGI application
+            controller: Returns the active controller, or None when
+                admission control is disabled
+            prefixes: Path prefixes to guard
+        """
+        self.app = app
+        self.controller = controller
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        controller = self.controller() if scope["type"] == "http" else None
+        if controller is None or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await controller.acquire()
+        except Overloaded as e:
+            await self._shed(send, e.retry_after)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - start)
+
+    @staticmethod
+    async def _shed(send: Callable, retry_after: int) -> None:
+        body = json.dumps({"error": "Service overloaded", "status_code": 503}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
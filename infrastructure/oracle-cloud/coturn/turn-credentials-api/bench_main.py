@@ -0,0 +1,503 @@
+"""
+Benchmark Suite for TURN Credentials API
+
+Drives the ASGI application in-process (no sockets, no HTTP client) at a
+configurable concurrency and reports throughput and latency percentiles
+for the public routes, plus micro-benchmarks of credential minting.
+
+Usage:
+    python bench_main.py                              # Text report
+    python bench_main.py --format json -o bench.json  # Machine-readable
+    python bench_main.py --baseline bench.json        # Fail on regression
+    python bench_main.py --thresholds limits.json     # Fail on absolute limits
+
+Thresholds file format (every key optional):
+    {"post_credentials": {"min_rps": 500, "max_p99_ms": 20}}
+
+Exit status is 1 when a threshold or baseline comparison fails.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+import main
+from main import app, benchmark_credential_minting, generate_turn_credentials
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_REQUESTS = 2000
+DEFAULT_CONCURRENCY = 16
+DEFAULT_WARMUP = 100
+DEFAULT_MICRO_ITERATIONS = 20000
+DEFAULT_MAX_REGRESSION = 0.20
+
+BENCH_API_KEY = "bench-api-key"
+
+
+###############################################################################
+# IN-PROCESS ASGI DRIVER
+###############################################################################
+
+async def call_asgi(
+    method: str,
+    path: str,
+    query: str = "",
+    headers: Optional[Dict[str, str]] = None,
+    body: bytes = b""
+) -> Tuple[int, bytes]:
+    """
+    Send one request straight into the ASGI app.
+
+    Args:
+        method: HTTP method
+        path: Request path
+        query: Raw query string without the leading '?'
+        headers: Request headers
+        body: Request body
+
+    Returns:
+        Tuple of (status code, response body)
+    """
+    raw_headers = [(b"host", b"bench")]
+    if body:
+        raw_headers.append((b"content-type", b"application/json"))
+        raw_headers.append((b"content-length", str(len(body)).encode()))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode(), value.encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    status_code = 0
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status_code, b"".join(chunks)
+
+
+###############################################################################
+# SCENARIOS
+###############################################################################
+
+class Scenario:
+    """An HTTP request shape and the status code it must return"""
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        path: str,
+        expected_status: int,
+        query: str = "",
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None
+    ):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.expected_status = expected_status
+        self.query = query
+        self.body = body
+        self.headers = headers or {"X-API-Key": BENCH_API_KEY}
+
+    async def run(self) -> bool:
+        """Issue the request once; True if the status matched"""
+        status_code, _ = await call_asgi(self.method, self.path, self.query, self.headers, self.body)
+        return status_code == self.expected_status
+
+
+def default_scenarios() -> List[Scenario]:
+    """HTTP scenarios covered by the suite"""
+    return [
+        Scenario(
+            "post_credentials", "POST", "/turn-credentials", 200,
+            body=json.dumps({"username": "bench-user", "ttl": 3600}).encode()
+        ),
+        Scenario(
+            "get_credentials", "GET", "/turn-credentials", 200,
+            query="username=bench-user&ttl=3600"
+        ),
+        Scenario("health", "GET", "/health", 200),
+        Scenario(
+            "auth_failure", "POST", "/turn-credentials", 401,
+            body=json.dumps({"username": "bench-user", "ttl": 3600}).encode(),
+            headers={"X-API-Key": "wrong-key"}
+        ),
+    ]
+
+
+###############################################################################
+# MEASUREMENT
+###############################################################################
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Values in ascending order
+        fraction: Percentile as a fraction (0.99 for p99)
+
+    Returns:
+        float: Percentile value, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ns: List[int], elapsed: float, errors: int) -> Dict[str, float]:
+    """
+    Reduce raw latencies to the reported statistics.
+
+    Args:
+        latencies_ns: Per-request latency in nanoseconds
+        elapsed: Wall-clock duration of the run in seconds
+        errors: Requests that returned an unexpected status
+
+    Returns:
+        Dict with requests, errors, rps, mean/p50/p95/p99/max in ms
+    """
+    values = sorted(value / 1e6 for value in latencies_ns)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": count / elapsed if elapsed else 0.0,
+        "mean_ms": sum(values) / count if count else 0.0,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0,
+    }
+
+
+async def run_load(
+    request: Callable[[], Any],
+    total_requests: int,
+    concurrency: int,
+    warmup: int = DEFAULT_WARMUP
+) -> Dict[str, float]:
+    """
+    Run a closed-loop load test against an async request callable.
+
+    Args:
+        request: Coroutine function returning True on success
+        total_requests: Measured requests to issue
+        concurrency: Number of concurrent in-flight requests
+        warmup: Unmeasured requests issued first
+
+    Returns:
+        Dict of summary statistics (see summarize)
+    """
+    for _ in range(warmup):
+        await request()
+
+    latencies: List[int] = []
+    errors = 0
+    remaining = total_requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter_ns()
+            ok = await request()
+            latencies.append(time.perf_counter_ns() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def run_micro(iterations: int) -> Dict[str, Dict[str, float]]:
+    """
+    Micro-benchmark credential generation outside the HTTP stack.
+
+    Args:
+        iterations: Calls per measurement
+
+    Returns:
+        Dict keyed by benchmark name
+    """
+    start = time.perf_counter()
+    for i in range(iterations):
+        generate_turn_credentials(f"user{i}", 3600)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "generate_turn_credentials": {
+            "iterations": iterations,
+            "ns_per_call": elapsed / iterations * 1e9,
+            "calls_per_sec": iterations / elapsed if elapsed else 0.0,
+        },
+        "credential_minting": benchmark_credential_minting(iterations),
+    }
+
+
+@contextmanager
+def bench_environment(with_logging: bool) -> Iterator[None]:
+    """
+    Configure the app for benchmarking and restore it afterwards.
+
+    A secret and API key are always set so every scenario exercises the
+    real code path; request logging is silenced unless with_logging is set.
+    """
+    logger = logging.getLogger(main.__name__)
+    previous_level = logger.level
+    if not with_logging:
+        logger.setLevel(logging.ERROR)
+    try:
+        with patch.object(main, "API_KEY", BENCH_API_KEY):
+            if main.TURN_SECRET:
+                yield
+            else:
+                with patch.object(main, "TURN_SECRET", "bench-secret"):
+                    yield
+    finally:
+        logger.setLevel(previous_level)
+
+
+def run_suite(
+    total_requests: int = DEFAULT_REQUESTS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    micro_iterations: int = DEFAULT_MICRO_ITERATIONS,
+    scenarios: Optional[List[Scenario]] = None,
+    with_logging: bool = False,
+    warmup: int = DEFAULT_WARMUP
+) -> Dict[str, Any]:
+    """
+    Run every scenario and micro-benchmark.
+
+    Args:
+        total_requests: Measured requests per HTTP scenario
+        concurrency: Concurrent in-flight requests per HTTP scenario
+        micro_iterations: Iterations per micro-benchmark
+        scenarios: HTTP scenarios to run (default: default_scenarios())
+        with_logging: Keep request logging enabled while measuring
+        warmup: Unmeasured requests before each HTTP scenario
+
+    Returns:
+        Report dict with meta, http, and micro sections
+    """
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "requests": total_requests,
+            "concurrency": concurrency,
+            "with_logging": with_logging,
+            "fast_response_mode": main.FAST_RESPONSE_MODE,
+            "credential_cache_enabled": main.CREDENTIAL_CACHE_ENABLED,
+        },
+        "http": {},
+        "micro": {},
+    }
+
+    with bench_environment(with_logging):
+        for scenario in scenarios or default_scenarios():
+            report["http"][scenario.name] = asyncio.run(
+                run_load(scenario.run, total_requests, concurrency, warmup)
+            )
+        report["micro"] = run_micro(micro_iterations)
+
+    return report
+
+
+###############################################################################
+# REGRESSION CHECKS
+###############################################################################
+
+def check_thresholds(report: Dict[str, Any], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Compare HTTP results against absolute limits.
+
+    Supported keys per scenario: min_rps, max_p50_ms, max_p95_ms,
+    max_p99_ms, max_errors.
+
+    Args:
+        report: Output of run_suite
+        thresholds: Limits keyed by scenario name
+
+    Returns:
+        List of human-readable violations (empty when all pass)
+    """
+    violations = []
+    for name, limits in thresholds.items():
+        result = report["http"].get(name)
+        if result is None:
+            violations.append(f"{name}: scenario missing from report")
+            continue
+        for key, limit in limits.items():
+            kind, _, metric = key.partition("_")
+            value = result.get(metric)
+            if value is None or kind not in ("min", "max"):
+                violations.append(f"{name}: unknown threshold {key}")
+            elif kind == "min" and value < limit:
+                violations.append(f"{name}: {metric}={value:.2f} below minimum {limit}")
+            elif kind == "max" and value > limit:
+                violations.append(f"{name}: {metric}={value:.2f} above maximum {limit}")
+    return violations
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float = DEFAULT_MAX_REGRESSION
+) -> List[str]:
+    """
+    Flag scenarios that got slower than a previous run.
+
+    A scenario regresses when its throughput drops, or its p99 latency
+    grows, by more than max_regression (a fraction of the baseline).
+
+    Args:
+        report: Output of run_suite
+        baseline: Earlier output of run_suite
+        max_regression: Allowed relative slowdown
+
+    Returns:
+        List of human-readable regressions (empty when none)
+    """
+    regressions = []
+    for name, previous in baseline.get("http", {}).items():
+        current = report["http"].get(name)
+        if current is None:
+            continue
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: rps {current['rps']:.0f} vs baseline {previous['rps']:.0f}"
+            )
+        if previous["p99_ms"] and current["p99_ms"] > previous["p99_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']:.3f}ms vs baseline {previous['p99_ms']:.3f}ms"
+            )
+    return regressions
+
+
+###############################################################################
+# OUTPUT
+###############################################################################
+
+def format_text(report: Dict[str, Any]) -> str:
+    """Render a report as an aligned text table"""
+    meta = report["meta"]
+    lines = [
+        f"TURN Credentials API benchmark "
+        f"(requests={meta['requests']}, concurrency={meta['concurrency']}, "
+        f"python={meta['python']})",
+        "",
+        f"{'scenario':<20}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}",
+    ]
+    for name, result in report["http"].items():
+        lines.append(
+            f"{name:<20}{result['rps']:>10.0f}{result['p50_ms']:>10.3f}"
+            f"{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['errors']:>8}"
+        )
+    lines.append("")
+    generate = report["micro"]["generate_turn_credentials"]
+    minting = report["micro"]["credential_minting"]
+    lines.append(f"generate_turn_credentials: {generate['ns_per_call']:.0f} ns/call")
+    lines.append(
+        f"credential minting: {minting['engine_ns_per_call']:.0f} ns/call "
+        f"(baseline {minting['baseline_ns_per_call']:.0f} ns, {minting['speedup']:.2f}x)"
+    )
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit status"""
+    parser = argparse.ArgumentParser(description="Benchmark the TURN Credentials API in-process")
+    parser.add_argument("-n", "--requests", type=int, default=DEFAULT_REQUESTS,
+                        help="measured requests per HTTP scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="concurrent in-flight requests")
+    parser.add_argument("--micro-iterations", type=int, default=DEFAULT_MICRO_ITERATIONS,
+                        help="iterations per micro-benchmark")
+    parser.add_argument("--format", choices=["text", "json"], default="text",
+                        help="stdout format")
+    parser.add_argument("-o", "--output", help="also write the JSON report to this file")
+    parser.add_argument("--thresholds", help="JSON file of absolute limits per scenario")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION,
+                        help="allowed relative slowdown versus --baseline")
+    parser.add_argument("--with-logging", action="store_true",
+                        help="keep request logging enabled while measuring")
+    args = parser.parse_args(argv)
+
+    report = run_suite(
+        total_requests=args.requests,
+        concurrency=args.concurrency,
+        micro_iterations=args.micro_iterations,
+        with_logging=args.with_logging,
+    )
+
+    failures: List[str] = []
+    if args.thresholds:
+        with open(args.thresholds) as f:
+            failures += check_thresholds(report, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare_to_baseline(report, json.load(f), args.max_regression)
+    report["failures"] = failures
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_text(report))
+        for failure in failures:
+            print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
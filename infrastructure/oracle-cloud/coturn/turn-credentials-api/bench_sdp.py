@@ -0,0 +1,171 @@
+"""
+Compact SDP Codec Benchmark
+
+Encodes every SDP in a corpus directory (default: sdp_corpus/, captured
+Chrome, Firefox, Safari and Android offers/answers) and reports, per file
+and in total, the size of each representation a signaling message could
+carry plus the codec's encode and decode cost:
+
+    raw        SDP text as sent today
+    base64     raw SDP base64-encoded (what a naive binary field costs)
+    compact    sdp_codec binary form
+    text       sdp_codec "sdpz1:" base64url form (fits the JSON "sdp" field)
+    zlib       raw SDP through zlib level 9, for reference
+
+Every file is round-tripped; a mismatch is reported and fails the run.
+
+Usage:
+    python bench_sdp.py                            # Text report
+    python bench_sdp.py --corpus captures/ -n 500  # Own corpus
+    python bench_sdp.py --format json -o sdp.json
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+import sdp_codec
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sdp_corpus")
+DEFAULT_ITERATIONS = 200
+
+SIZE_COLUMNS = ("raw", "base64", "compact", "text", "zlib")
+
+
+###############################################################################
+# MEASUREMENT
+###############################################################################
+
+def load_corpus(directory: str) -> Dict[str, str]:
+    """
+    Read every *.sdp file in a directory, keeping line endings intact.
+
+    Returns:
+        Dict of file name to SDP text, in name order
+    """
+    corpus = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".sdp"):
+            with open(os.path.join(directory, name), encoding="utf-8", newline="") as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def _mean_us(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations / 1000.0
+
+
+def measure(sdp: str, iterations: int = DEFAULT_ITERATIONS) -> Dict[str, Any]:
+    """
+    Sizes and codec timings for one SDP.
+
+    Args:
+        sdp: SDP text
+        iterations: Encode/decode repetitions for the timings
+
+    Returns:
+        Dict with byte sizes per representation, ratio, encode_us,
+        decode_us and round_trip (bool)
+    """
+    raw = sdp.encode("utf-8")
+    compact = sdp_codec.encode(sdp)
+    text = sdp_codec.encode_text(sdp)
+    return {
+        "raw": len(raw),
+        "base64": len(base64.b64encode(raw)),
+        "compact": len(compact),
+        "text": len(text),
+        "zlib": len(zlib.compress(raw, 9)),
+        "ratio": round(len(raw) / len(compact), 2) if compact else 0.0,
+        "encode_us": round(_mean_us(lambda: sdp_codec.encode(sdp), iterations), 2),
+        "decode_us": round(_mean_us(lambda: sdp_codec.decode(compact), iterations), 2),
+        "round_trip": sdp_codec.decode(compact) == sdp and sdp_codec.decode_text(text) == sdp,
+    }
+
+
+def run_suite(corpus_dir: str = DEFAULT_CORPUS, iterations: int = DEFAULT_ITERATIONS) -> Dict[str, Any]:
+    """
+    Measure every SDP in the corpus.
+
+    Returns:
+        Report with "meta", per-file "files" and aggregate "total"
+    """
+    corpus = load_corpus(corpus_dir)
+    files = {name: measure(sdp, iterations) for name, sdp in corpus.items()}
+
+    total: Dict[str, Any] = {column: sum(result[column] for result in files.values()) for column in SIZE_COLUMNS}
+    total["ratio"] = round(total["raw"] / total["compact"], 2) if total["compact"] else 0.0
+    total["encode_us"] = round(sum(result["encode_us"] for result in files.values()), 2)
+    total["decode_us"] = round(sum(result["decode_us"] for result in files.values()), 2)
+    total["round_trip"] = all(result["round_trip"] for result in files.values())
+
+    return {
+        "meta": {"corpus": corpus_dir, "files": len(files), "iterations": iterations},
+        "files": files,
+        "total": total,
+    }
+
+
+###############################################################################
+# REPORTING
+###############################################################################
+
+def format_text(report: Dict[str, Any]) -> str:
+    """Render a report as an aligned text table"""
+    meta = report["meta"]
+    lines = [
+        f"Compact SDP benchmark (corpus={meta['corpus']}, files={meta['files']}, "
+        f"iterations={meta['iterations']})",
+        "",
+        f"{'file':<28}" + "".join(f"{column:>9}" for column in SIZE_COLUMNS)
+        + f"{'ratio':>8}{'enc us':>10}{'dec us':>10}{'ok':>5}",
+    ]
+    rows = list(report["files"].items()) + [("TOTAL", report["total"])]
+    for name, result in rows:
+        lines.append(
+            f"{name:<28}" + "".join(f"{result[column]:>9}" for column in SIZE_COLUMNS)
+            + f"{result['ratio']:>8.2f}{result['encode_us']:>10.1f}{result['decode_us']:>10.1f}"
+            + f"{'yes' if result['round_trip'] else 'NO':>5}"
+        )
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit status"""
+    parser = argparse.ArgumentParser(description="Benchmark the compact SDP codec over a corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory of *.sdp files")
+    parser.add_argument("-n", "--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help="encode/decode repetitions per file")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="stdout format")
+    parser.add_argument("-o", "--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run_suite(corpus_dir=args.corpus, iterations=args.iterations)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_text(report))
+    return 0 if report["total"]["round_trip"] and report["meta"]["files"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,386 @@
+"""
+Call Setup Benchmark for the WebSocket Signaling Hub
+
+Plays complete call setups against /signaling/{session_id}: both peers
+join, the caller sends an offer and trickles ICE candidates, the callee
+answers and trickles its own. Two latencies are measured per call from
+the moment the offer is sent:
+
+    offer_to_answer   caller holds the answer
+    setup             both peers also hold every remote candidate
+
+By default the ASGI app is driven in-process (no sockets), which
+isolates the hub's own cost; --url runs the same flow over real
+WebSockets against a deployed API. To compare with Firestore signaling,
+time the same two points in the SDK (FirestoreDataSource) and pass the
+samples with --firestore; the report then includes both paths.
+
+Usage:
+    python bench_signaling.py                               # In-process
+    python bench_signaling.py --url ws://host:8080 --api-key KEY
+    python bench_signaling.py --firestore firestore.json    # {"setup_ms": [...], "offer_to_answer_ms": [...]}
+    python bench_signaling.py --format json -o signaling.json
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import main
+from bench_main import BENCH_API_KEY, summarize
+from main import app
+from signaling_hub import SignalingHub
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_CALLS = 500
+DEFAULT_CONCURRENCY = 16
+DEFAULT_CANDIDATES = 8           # per peer, typical host + srflx + relay set
+DEFAULT_SDP_BYTES = 4000         # typical audio+video offer
+PHASES = ("offer_to_answer", "setup")
+
+
+###############################################################################
+# CONNECTIONS
+###############################################################################
+
+class AsgiWebSocket:
+    """WebSocket client that talks to the ASGI app in-process"""
+
+    def __init__(self, path: str, query: str = ""):
+        self.path = path
+        self.query = query
+        self._inbound: asyncio.Queue = asyncio.Queue()
+        self._outbound: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> "AsgiWebSocket":
+        """Run the app for this connection and wait for it to accept"""
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": self.query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"bench"), (b"x-api-key", BENCH_API_KEY.encode())],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(app(scope, self._inbound.get, self._outbound.put))
+        await self._inbound.put({"type": "websocket.connect"})
+        message = await self._outbound.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"Signaling socket refused: {message}")
+        return self
+
+    async def send(self, text: str) -> None:
+        await self._inbound.put({"type": "websocket.receive", "text": text})
+
+    async def recv(self) -> str:
+        message = await self._outbound.get()
+        if message["type"] != "websocket.send":
+            raise ConnectionError(f"Signaling socket closed: {message}")
+        return message["text"]
+
+    async def close(self) -> None:
+        await self._inbound.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            await self._task
+
+
+class RemoteWebSocket:
+    """WebSocket client for a deployed API (uses the websockets package)"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._socket = None
+
+    async def connect(self) -> "RemoteWebSocket":
+        import websockets
+
+        self._socket = await websockets.connect(self.url, max_size=None)
+        return self
+
+    async def send(self, text: str) -> None:
+        await self._socket.send(text)
+
+    async def recv(self) -> str:
+        return await self._socket.recv()
+
+    async def close(self) -> None:
+        await self._socket.close()
+
+
+def in_process_factory() -> Callable[[str], Any]:
+    """Connection factory for the in-process ASGI app"""
+    return lambda session_id: AsgiWebSocket(f"/signaling/{session_id}")
+
+
+def remote_factory(url: str, api_key: str = "") -> Callable[[str], Any]:
+    """Connection factory for a deployed API at a ws:// or wss:// base URL"""
+    query = f"?api_key={api_key}" if api_key else ""
+    return lambda session_id: RemoteWebSocket(f"{url.rstrip('/')}/signaling/{session_id}{query}")
+
+
+###############################################################################
+# CALL SETUP
+###############################################################################
+
+def _candidate(role: str, n: int) -> str:
+    return json.dumps({
+        "type": "ice-candidate",
+        "sdpMid": "0",
+        "sdpMLineIndex": 0,
+        "sdpCandidate": f"candidate:{n} 1 udp {2122260223 - n} 10.0.{0 if role == 'caller' else 1}.{n} {50000 + n} typ host",
+    })
+
+
+async def _receive_until(socket: Any, done: Callable[[Dict[str, Any]], bool]) -> None:
+    """Read messages until done() returns True; raise on a hub error"""
+    while True:
+        message = json.loads(await socket.recv())
+        if message["type"] == "error":
+            raise RuntimeError(f"{message['code']}: {message['message']}")
+        if done(message):
+            return
+
+
+async def run_call(
+    connect: Callable[[str], Any],
+    candidates: int = DEFAULT_CANDIDATES,
+    sdp_bytes: int = DEFAULT_SDP_BYTES
+) -> Dict[str, int]:
+    """
+    Play one call setup.
+
+    Args:
+        connect: Factory returning an unconnected socket for a session id
+        candidates: ICE candidates trickled by each peer
+        sdp_bytes: Size of the offer and answer SDP
+
+    Returns:
+        Dict of phase name to latency in nanoseconds
+    """
+    session_id = str(uuid.uuid4())
+    caller = await connect(session_id).connect()
+    callee = await connect(session_id).connect()
+    sdp = "v=0\r\n" + "a=x\r\n" * max(0, (sdp_bytes - 5) // 5)
+    try:
+        await caller.send(json.dumps({"type": "join", "userId": "caller", "callerId": "caller", "calleeId": "callee"}))
+        await _receive_until(caller, lambda m: m["type"] == "joined")
+        await callee.send(json.dumps({"type": "join", "userId": "callee"}))
+        await _receive_until(callee, lambda m: m["type"] == "joined")
+
+        received = {"caller": 0, "callee": 0}
+        answered_at = 0
+
+        def counter(role: str, finish: Callable[[Dict[str, Any]], bool]) -> Callable[[Dict[str, Any]], bool]:
+            def done(message: Dict[str, Any]) -> bool:
+                if message["type"] == "ice-candidates":
+                    received[role] += len(message["candidates"])
+                return finish(message) and received[role] >= candidates
+            return done
+
+        async def callee_side() -> None:
+            await _receive_until(callee, lambda m: m["type"] == "offer")
+            await callee.send(json.dumps({"type": "answer", "sdp": sdp}))
+            for n in range(candidates):
+                await callee.send(_candidate("callee", n))
+            await _receive_until(callee, counter("callee", lambda m: True))
+
+        def caller_done(message: Dict[str, Any]) -> bool:
+            nonlocal answered_at
+            if message["type"] == "answer":
+                answered_at = time.perf_counter_ns()
+            return answered_at > 0
+
+        start = time.perf_counter_ns()
+        await caller.send(json.dumps({"type": "offer", "sdp": sdp}))
+        for n in range(candidates):
+            await caller.send(_candidate("caller", n))
+        await asyncio.gather(callee_side(), _receive_until(caller, counter("caller", caller_done)))
+        end = time.perf_counter_ns()
+
+        await caller.send(json.dumps({"type": "hangup", "reason": "bench"}))
+        return {"offer_to_answer": answered_at - start, "setup": end - start}
+    finally:
+        await caller.close()
+        await callee.close()
+
+
+async def run_calls(
+    connect: Callable[[str], Any],
+    calls: int,
+    concurrency: int,
+    candidates: int = DEFAULT_CANDIDATES,
+    sdp_bytes: int = DEFAULT_SDP_BYTES
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run call setups, concurrency at a time.
+
+    Returns:
+        Dict of phase name to summary statistics (see bench_main.summarize)
+    """
+    latencies: Dict[str, List[int]] = {phase: [] for phase in PHASES}
+    errors = 0
+    remaining = calls
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            try:
+                result = await run_call(connect, candidates, sdp_bytes)
+            except (RuntimeError, ConnectionError):
+                errors += 1
+                continue
+            for phase in PHASES:
+                latencies[phase].append(result[phase])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start
+    return {phase: summarize(latencies[phase], elapsed, errors) for phase in PHASES}
+
+
+def summarize_samples(samples_ms: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """
+    Summarize externally measured setup latencies (e.g. the Firestore path).
+
+    Args:
+        samples_ms: Phase name to latencies in milliseconds
+
+    Returns:
+        Dict of phase name to summary statistics
+    """
+    return {
+        phase: summarize([int(value * 1e6) for value in samples_ms[f"{phase}_ms"]], 0.0, 0)
+        for phase in PHASES if samples_ms.get(f"{phase}_ms")
+    }
+
+
+def run_suite(
+    calls: int = DEFAULT_CALLS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    candidates: int = DEFAULT_CANDIDATES,
+    sdp_bytes: int = DEFAULT_SDP_BYTES,
+    url: str = "",
+    api_key: str = "",
+    firestore: Optional[Dict[str, List[float]]] = None
+) -> Dict[str, Any]:
+    """
+    Benchmark call setup over the hub, optionally next to Firestore samples.
+
+    Returns:
+        Report dict with meta, hub and (with firestore) firestore and
+        speedup sections
+    """
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "target": url or "in-process",
+            "calls": calls,
+            "concurrency": concurrency,
+            "candidates": candidates,
+            "sdp_bytes": sdp_bytes,
+        },
+    }
+    if url:
+        report["hub"] = asyncio.run(run_calls(remote_factory(url, api_key), calls, concurrency, candidates, sdp_bytes))
+    else:
+        with patch.object(main, "SIGNALING_ENABLED", True), \
+             patch.object(main, "API_KEY", BENCH_API_KEY), \
+             patch.object(main, "signaling_hub", SignalingHub(max_sessions=max(calls, 1))):
+            report["hub"] = asyncio.run(
+                run_calls(in_process_factory(), calls, concurrency, candidates, sdp_bytes)
+            )
+
+    if firestore:
+        report["firestore"] = summarize_samples(firestore)
+        report["speedup"] = {
+            f"{phase}_p50": report["firestore"][phase]["p50_ms"] / report["hub"][phase]["p50_ms"]
+            for phase in report["firestore"] if report["hub"][phase]["p50_ms"]
+        }
+    return report
+
+
+###############################################################################
+# OUTPUT
+###############################################################################
+
+def format_text(report: Dict[str, Any]) -> str:
+    """Render a report as an aligned text table"""
+    meta = report["meta"]
+    lines = [
+        f"Signaling call setup benchmark (target={meta['target']}, calls={meta['calls']}, "
+        f"concurrency={meta['concurrency']}, candidates={meta['candidates']})",
+        "",
+        f"{'path':<12}{'phase':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}",
+    ]
+    for path in ("hub", "firestore"):
+        for phase, result in report.get(path, {}).items():
+            lines.append(
+                f"{path:<12}{phase:<18}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+                f"{result['p99_ms']:>10.3f}{result['errors']:>8}"
+            )
+    for name, ratio in report.get("speedup", {}).items():
+        lines.append(f"speedup {name}: {ratio:.1f}x")
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit status"""
+    parser = argparse.ArgumentParser(description="Benchmark call setup over the signaling hub")
+    parser.add_argument("-n", "--calls", type=int, default=DEFAULT_CALLS, help="call setups to run")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="concurrent call setups")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES,
+                        help="ICE candidates trickled by each peer")
+    parser.add_argument("--sdp-bytes", type=int, default=DEFAULT_SDP_BYTES, help="offer/answer size")
+    parser.add_argument("--url", default="", help="ws:// base URL of a deployed API (default: in-process)")
+    parser.add_argument("--api-key", default="", help="API key for --url")
+    parser.add_argument("--firestore", help="JSON file of Firestore-path latencies in ms to compare against")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="stdout format")
+    parser.add_argument("-o", "--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    firestore = None
+    if args.firestore:
+        with open(args.firestore) as f:
+            firestore = json.load(f)
+
+    report = run_suite(
+        calls=args.calls,
+        concurrency=args.concurrency,
+        candidates=args.candidates,
+        sdp_bytes=args.sdp_bytes,
+        url=args.url,
+        api_key=args.api_key,
+        firestore=firestore,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_text(report))
+    return 1 if report["hub"]["setup"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,673 @@
+"""
+TURN Allocation Load Generator for coturn
+
+Drives a coturn instance the way clients do, to compare turnserver.conf
+settings (io-thread-count, relay-thread-count, total-quota, user-quota,
+max-bps, ...) with data instead of guesswork. Credentials are minted with
+the API's own CredentialMinter, so coturn must share the secret
+(static-auth-secret / use-auth-secret) passed with --secret.
+
+Clients are run in pairs over UDP or TCP. Each pair:
+
+    1. Allocates a relay per client (the 401 challenge round trip is
+       part of the measured Allocate latency, as clients experience it)
+    2. CreatePermission and ChannelBind towards the other's relay address
+    3. Sends ChannelData both ways at --rate packets per second for
+       --duration seconds; each packet carries its send time, so relay
+       latency is measured end to end through coturn
+    4. Releases both allocations (Refresh with LIFETIME 0)
+
+--concurrency pairs run at once, so 2 x concurrency allocations are held
+concurrently. The report gives per-operation latency percentiles and
+rates, relay packet loss, latency and throughput, and failures by
+operation and STUN error code (e.g. allocate:486 when a quota is hit).
+
+Against a local coturn the peers are loopback addresses, which the
+shipped configuration refuses (no-loopback-peers, allowed-peer-ip):
+run the instance under test with --allow-loopback-peers and without
+the peer restrictions, e.g.
+
+    turnserver -n --use-auth-secret --static-auth-secret=SECRET \\
+        --realm=bench --allow-loopback-peers --listening-ip=127.0.0.1
+
+Usage:
+    python bench_turn.py --secret SECRET                       # UDP, 100 pairs
+    python bench_turn.py --secret SECRET -n 2000 -c 1000 --transport udp,tcp
+    python bench_turn.py --secret SECRET --format json -o turn.json
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import struct
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bench_main import summarize
+from main import CredentialMinter
+from stun_probe import (
+    ATTR_NONCE,
+    ATTR_REALM,
+    ATTR_USERNAME,
+    HEADER,
+    build_message,
+    encode_xor_address,
+    error_code,
+    long_term_key,
+    parse_message,
+    xor_address,
+)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 3478
+DEFAULT_PAIRS = 100
+DEFAULT_CONCURRENCY = 50
+DEFAULT_DURATION = 5.0           # seconds of relay traffic per pair
+DEFAULT_RATE = 50                # packets per second per client (20 ms audio frames)
+DEFAULT_PACKET_SIZE = 160        # bytes per packet, roughly one Opus frame
+DEFAULT_TIMEOUT = 5.0            # seconds per transaction, retransmits included
+DEFAULT_LIFETIME = 600
+INITIAL_RTO = 0.5                # UDP retransmission timeout, doubled per retry
+DRAIN_SECONDS = 0.5              # wait for in-flight packets before releasing
+
+OPERATIONS = ("allocate", "create_permission", "channel_bind", "refresh")
+TRANSPORTS = ("udp", "tcp")
+CHANNEL = 0x4000
+
+###############################################################################
+# TURN MESSAGES (RFC 8656)
+###############################################################################
+
+ALLOCATE = 0x0003
+REFRESH = 0x0004
+CREATE_PERMISSION = 0x0008
+CHANNEL_BIND = 0x0009
+DATA_INDICATION = 0x0017
+
+SUCCESS = 0x0100
+ERROR = 0x0110
+
+ATTR_CHANNEL_NUMBER = 0x000C
+ATTR_LIFETIME = 0x000D
+ATTR_XOR_PEER_ADDRESS = 0x0012
+ATTR_DATA = 0x0013
+ATTR_XOR_RELAYED_ADDRESS = 0x0016
+ATTR_REQUESTED_TRANSPORT = 0x0019
+
+REQUESTED_UDP = struct.pack("!B3x", 17)
+PAYLOAD_HEADER = struct.Struct("!QI")    # send time (perf_counter_ns), sequence
+
+
+class TurnError(Exception):
+    """A TURN transaction failed; code is the STUN error code or "timeout"/"closed" """
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+###############################################################################
+# CLIENT
+###############################################################################
+
+class TurnClient:
+    """
+    One TURN client (one 5-tuple, at most one allocation) over UDP or TCP.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        transport: str,
+        username: str,
+        password: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        on_data: Optional[Callable[[bytes], None]] = None
+    ):
+        """
+        Args:
+            host: coturn address
+            port: coturn listening port
+            transport: "udp" or "tcp"
+            username: TURN REST username (expiry:user)
+            password: Matching HMAC password
+            timeout: Seconds per transaction, retransmits included
+            on_data: Called with every relayed payload received
+        """
+        self.host = host
+        self.port = port
+        self.transport = transport
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.on_data = on_data
+        self.relayed: Optional[Tuple[str, int]] = None
+
+        self._realm: Optional[bytes] = None
+        self._nonce: Optional[bytes] = None
+        self._key: Optional[bytes] = None
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._send: Callable[[bytes], None] = lambda data: None
+        self._closer: Callable[[], None] = lambda: None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    ###########################################################################
+    # CONNECTION
+    ###########################################################################
+
+    async def connect(self) -> None:
+        """Open the UDP socket or TCP connection to coturn"""
+        loop = asyncio.get_running_loop()
+        if self.transport == "udp":
+            client = self
+
+            class Protocol(asyncio.DatagramProtocol):
+                def datagram_received(self, data: bytes, addr: Any) -> None:
+                    client._dispatch(data)
+
+                def error_received(self, exc: Exception) -> None:
+                    client._fail_pending("closed")
+
+            transport, _ = await loop.create_datagram_endpoint(Protocol, remote_addr=(self.host, self.port))
+            self._send = transport.sendto
+            self._closer = transport.close
+        else:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+            self._send = writer.write
+            self._closer = writer.close
+            self._reader_task = loop.create_task(self._read_stream(reader))
+
+    async def _read_stream(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                head = await reader.readexactly(4)
+                length = struct.unpack_from("!H", head, 2)[0]
+                if head[0] & 0xC0 == 0x40:
+                    # ChannelData over TCP is padded to a multiple of 4
+                    rest = await reader.readexactly(length + (-length % 4))
+                    self._dispatch(head + rest[:length])
+                else:
+                    self._dispatch(head + await reader.readexactly(HEADER.size - 4 + length))
+        except (asyncio.IncompleteReadError, OSError):
+            self._fail_pending("closed")
+
+    def close(self) -> None:
+        """Close the socket; an allocation left behind expires on coturn"""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self._closer()
+        self._fail_pending("closed")
+
+    def _fail_pending(self, code: str) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(TurnError(code))
+
+    def _dispatch(self, data: bytes) -> None:
+        if len(data) >= 4 and data[0] & 0xC0 == 0x40:
+            if self.on_data is not None:
+                self.on_data(data[4:4 + struct.unpack_from("!H", data, 2)[0]])
+            return
+        try:
+            msg_type, transaction_id, attributes = parse_message(data)
+        except ValueError:
+            return
+        if msg_type == DATA_INDICATION:
+            if self.on_data is not None:
+                for attr_type, value in attributes:
+                    if attr_type == ATTR_DATA:
+                        self.on_data(value)
+            return
+        future = self._pending.get(transaction_id)
+        if future is not None and not future.done():
+            future.set_result((msg_type, attributes))
+
+    ###########################################################################
+    # TRANSACTIONS
+    ###########################################################################
+
+    async def _transact(self, message: bytes, transaction_id: bytes) -> Tuple[int, List[Tuple[int, bytes]]]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction_id] = future
+        deadline = time.monotonic() + self.timeout
+        rto = INITIAL_RTO
+        try:
+            while True:
+                self._send(message)
+                wait = deadline - time.monotonic()
+                if self.transport == "udp":
+                    wait = min(rto, wait)
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), max(0.0, wait))
+                except asyncio.TimeoutError:
+                    if self.transport != "udp" or time.monotonic() >= deadline:
+                        raise TurnError("timeout")
+                    rto *= 2
+        finally:
+            del self._pending[transaction_id]
+
+    async def request(self, method: int, attributes: List[Tuple[int, bytes]]) -> List[Tuple[int, bytes]]:
+        """
+        Send an authenticated request, answering 401/438 challenges.
+
+        Args:
+            method: TURN method (ALLOCATE, REFRESH, ...)
+            attributes: Method attributes, without credentials
+
+        Returns:
+            Attributes of the success response
+
+        Raises:
+            TurnError: Error response code, "timeout" or "closed"
+        """
+        for _ in range(3):
+            transaction_id = secrets.token_bytes(12)
+            if self._key is None:
+                message = build_message(method, transaction_id, attributes, fingerprint=True)
+            else:
+                credentials = [(ATTR_USERNAME, self.username.encode()), (ATTR_REALM, self._realm), (ATTR_NONCE, self._nonce)]
+                message = build_message(method, transaction_id, attributes + credentials, key=self._key, fingerprint=True)
+            msg_type, response = await self._transact(message, transaction_id)
+            if msg_type == method | SUCCESS:
+                return response
+            code = error_code(response)
+            challenge = {attr_type: value for attr_type, value in response if attr_type in (ATTR_REALM, ATTR_NONCE)}
+            if code in (401, 438) and ATTR_NONCE in challenge and (code == 438 or self._key is None):
+                self._nonce = challenge[ATTR_NONCE]
+                self._realm = challenge.get(ATTR_REALM, self._realm)
+                if self._realm is None:
+                    break
+                self._key = long_term_key(self.username, self._realm.decode(), self.password)
+                continue
+            raise TurnError(str(code) if code is not None else "invalid")
+        raise TurnError("401")
+
+    async def allocate(self, lifetime: int = DEFAULT_LIFETIME) -> Tuple[str, int]:
+        """Allocate a UDP relay; returns the relayed transport address"""
+        response = await self.request(ALLOCATE, [
+            (ATTR_REQUESTED_TRANSPORT, REQUESTED_UDP),
+            (ATTR_LIFETIME, struct.pack("!I", lifetime)),
+        ])
+        for attr_type, value in response:
+            if attr_type == ATTR_XOR_RELAYED_ADDRESS:
+                # The transaction ID is not needed: IPv4 only uses the cookie
+                self.relayed = xor_address(value, b"\x00" * 12)
+                return self.relayed
+        raise TurnError("invalid")
+
+    async def create_permission(self, peer: Tuple[str, int]) -> None:
+        """Install a permission for a peer address"""
+        await self.request(CREATE_PERMISSION, [(ATTR_XOR_PEER_ADDRESS, self._peer(peer))])
+
+    async def channel_bind(self, channel: int, peer: Tuple[str, int]) -> None:
+        """Bind a channel number to a peer address"""
+        await self.request(CHANNEL_BIND, [
+            (ATTR_CHANNEL_NUMBER, struct.pack("!H2x", channel)),
+            (ATTR_XOR_PEER_ADDRESS, self._peer(peer)),
+        ])
+
+    async def release(self) -> None:
+        """Delete the allocation (Refresh with LIFETIME 0)"""
+        await self.request(REFRESH, [(ATTR_LIFETIME, struct.pack("!I", 0))])
+        self.relayed = None
+
+    def send_channel_data(self, channel: int, payload: bytes) -> None:
+        """Send one ChannelData message (padded to 4 bytes over TCP)"""
+        padding = b"\x00" * (-len(payload) % 4) if self.transport == "tcp" else b""
+        self._send(struct.pack("!HH", channel, len(payload)) + payload + padding)
+
+    @staticmethod
+    def _peer(peer: Tuple[str, int]) -> bytes:
+        # XOR-PEER-ADDRESS for IPv4 does not depend on the transaction ID
+        return encode_xor_address(peer[0], peer[1], b"\x00" * 12)
+
+
+###############################################################################
+# LOAD
+###############################################################################
+
+class LoadStats:
+    """Counters and samples shared by every pair of one run"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[int]] = {operation: [] for operation in OPERATIONS}
+        self.failures: Counter = Counter()
+        self.pairs_completed = 0
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+        self.relay_latencies: List[int] = []
+        self.first_send: Optional[int] = None
+        self.last_receive: Optional[int] = None
+
+    async def timed(self, operation: str, call: Awaitable[Any]) -> Any:
+        """Await call, recording its latency or its failure code"""
+        start = time.perf_counter_ns()
+        try:
+            result = await call
+        except TurnError as e:
+            self.failures[f"{operation}:{e.code}"] += 1
+            raise
+        self.latencies[operation].append(time.perf_counter_ns() - start)
+        return result
+
+    def received(self, payload: bytes) -> None:
+        """on_data callback: account one relayed packet"""
+        now = time.perf_counter_ns()
+        if len(payload) >= PAYLOAD_HEADER.size:
+            sent_at, _ = PAYLOAD_HEADER.unpack_from(payload)
+            self.relay_latencies.append(now - sent_at)
+        self.packets_received += 1
+        self.bytes_received += len(payload)
+        self.last_receive = now
+
+
+def _operation_failures(stats: LoadStats, operation: str) -> int:
+    return sum(count for key, count in stats.failures.items() if key.startswith(operation + ":"))
+
+
+async def _pump(client: TurnClient, stats: LoadStats, duration: float, rate: float, packet_size: int) -> None:
+    padding = b"\x00" * max(0, packet_size - PAYLOAD_HEADER.size)
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    for sequence in range(int(duration * rate)):
+        now = time.perf_counter_ns()
+        if stats.first_send is None:
+            stats.first_send = now
+        client.send_channel_data(CHANNEL, PAYLOAD_HEADER.pack(now, sequence) + padding)
+        stats.packets_sent += 1
+        await asyncio.sleep(max(0.0, start + (sequence + 1) * interval - time.perf_counter()))
+
+
+async def _both(first: Awaitable[Any], second: Awaitable[Any]) -> List[Any]:
+    # Unlike a plain gather, the sibling of a failed step still completes,
+    # so its outcome (and failure code) is recorded before the pair is torn down
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+async def run_pair(
+    new_client: Callable[[str], TurnClient],
+    stats: LoadStats,
+    index: int,
+    duration: float = DEFAULT_DURATION,
+    rate: float = DEFAULT_RATE,
+    packet_size: int = DEFAULT_PACKET_SIZE
+) -> bool:
+    """
+    Run one pair of clients through allocation, relay traffic and release.
+
+    Args:
+        new_client: Builds an unconnected client for a username
+        stats: Run-wide statistics to record into
+        index: Pair number, used in the usernames
+        duration: Seconds of relay traffic
+        rate: Packets per second per client
+        packet_size: Bytes per packet
+
+    Returns:
+        bool: True if the pair completed every step
+    """
+    a, b = new_client(f"pair{index}a"), new_client(f"pair{index}b")
+    a.on_data = b.on_data = stats.received
+    try:
+        await _both(a.connect(), b.connect())
+        relay_a, relay_b = await _both(
+            stats.timed("allocate", a.allocate()), stats.timed("allocate", b.allocate())
+        )
+        await _both(
+            stats.timed("create_permission", a.create_permission(relay_b)),
+            stats.timed("create_permission", b.create_permission(relay_a)),
+        )
+        await _both(
+            stats.timed("channel_bind", a.channel_bind(CHANNEL, relay_b)),
+            stats.timed("channel_bind", b.channel_bind(CHANNEL, relay_a)),
+        )
+        if duration > 0 and rate > 0:
+            await _both(
+                _pump(a, stats, duration, rate, packet_size), _pump(b, stats, duration, rate, packet_size)
+            )
+            await asyncio.sleep(DRAIN_SECONDS)
+        await _both(stats.timed("refresh", a.release()), stats.timed("refresh", b.release()))
+        stats.pairs_completed += 1
+        return True
+    except TurnError:
+        return False
+    except OSError as e:
+        stats.failures[f"connect:{type(e).__name__}"] += 1
+        return False
+    finally:
+        for client in (a, b):
+            if client.relayed is not None:
+                try:
+                    await client.release()
+                except TurnError:
+                    pass
+            client.close()
+
+
+async def run_load(
+    new_client: Callable[[str], TurnClient],
+    pairs: int,
+    concurrency: int,
+    duration: float = DEFAULT_DURATION,
+    rate: float = DEFAULT_RATE,
+    packet_size: int = DEFAULT_PACKET_SIZE
+) -> Dict[str, Any]:
+    """
+    Run pairs, concurrency at a time, and summarize the run.
+
+    Returns:
+        Dict with operations (summary per operation, see
+        bench_main.summarize), relay, failures and pairs counts
+    """
+    stats = LoadStats()
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < pairs:
+            index = next_index
+            next_index += 1
+            await run_pair(new_client, stats, index, duration, rate, packet_size)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, pairs)))))
+    elapsed = time.perf_counter() - start
+
+    failed = sum(stats.failures.values())
+    relay_seconds = (
+        (stats.last_receive - stats.first_send) / 1e9
+        if stats.first_send is not None and stats.last_receive is not None else 0.0
+    )
+    relay = summarize(stats.relay_latencies, relay_seconds, 0)
+    relay.update({
+        "packets_sent": stats.packets_sent,
+        "packets_received": stats.packets_received,
+        "loss": 1 - stats.packets_received / stats.packets_sent if stats.packets_sent else 0.0,
+        "bytes_received": stats.bytes_received,
+        "throughput_mbps": stats.bytes_received * 8 / relay_seconds / 1e6 if relay_seconds else 0.0,
+    })
+    return {
+        "elapsed": elapsed,
+        "pairs": {"requested": pairs, "completed": stats.pairs_completed},
+        "operations": {
+            operation: summarize(stats.latencies[operation], elapsed, _operation_failures(stats, operation))
+            for operation in OPERATIONS
+        },
+        "relay": relay,
+        "failures": dict(sorted(stats.failures.items())),
+        "failed": failed,
+    }
+
+
+def client_factory(
+    host: str,
+    port: int,
+    transport: str,
+    secret: str,
+    ttl: int = 3600,
+    prefix: str = "loadgen",
+    timeout: float = DEFAULT_TIMEOUT
+) -> Callable[[str], TurnClient]:
+    """
+    Build clients whose credentials are minted like generate_turn_credentials.
+
+    Args:
+        host: coturn address
+        port: coturn listening port
+        transport: "udp" or "tcp"
+        secret: coturn static-auth-secret (the API's TURN_SECRET)
+        ttl: Credential lifetime in seconds
+        prefix: Prepended to every username, to tell load apart in logs
+        timeout: Seconds per transaction
+
+    Returns:
+        Callable mapping a username suffix to an unconnected TurnClient
+    """
+    minter = CredentialMinter(secret, host, port)
+
+    def new_client(name: str) -> TurnClient:
+        credential = minter.mint(f"{prefix}-{name}", ttl)
+        return TurnClient(host, port, transport, credential.username, credential.password, timeout)
+
+    return new_client
+
+
+def run_suite(
+    secret: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    transports: Tuple[str, ...] = ("udp",),
+    pairs: int = DEFAULT_PAIRS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    duration: float = DEFAULT_DURATION,
+    rate: float = DEFAULT_RATE,
+    packet_size: int = DEFAULT_PACKET_SIZE,
+    timeout: float = DEFAULT_TIMEOUT
+) -> Dict[str, Any]:
+    """
+    Load coturn once per transport.
+
+    Returns:
+        Report dict with meta and one run_load() result per transport
+    """
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "target": f"{host}:{port}",
+            "pairs": pairs,
+            "concurrency": concurrency,
+            "duration": duration,
+            "rate": rate,
+            "packet_size": packet_size,
+        },
+        "transports": {},
+    }
+    for transport in transports:
+        new_client = client_factory(host, port, transport, secret, timeout=timeout)
+        report["transports"][transport] = asyncio.run(
+            run_load(new_client, pairs, concurrency, duration, rate, packet_size)
+        )
+    return report
+
+
+###############################################################################
+# OUTPUT
+###############################################################################
+
+def format_text(report: Dict[str, Any]) -> str:
+    """Render a report as aligned text tables"""
+    meta = report["meta"]
+    lines = [
+        f"TURN load benchmark (target={meta['target']}, pairs={meta['pairs']}, "
+        f"concurrency={meta['concurrency']}, {meta['rate']} pps x {meta['packet_size']} B "
+        f"for {meta['duration']}s)",
+    ]
+    for transport, result in report["transports"].items():
+        relay = result["relay"]
+        lines += [
+            "",
+            f"[{transport}] pairs completed {result['pairs']['completed']}/{result['pairs']['requested']} "
+            f"in {result['elapsed']:.1f}s",
+            f"{'operation':<20}{'count':>8}{'per s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}",
+        ]
+        for operation, summary in result["operations"].items():
+            lines.append(
+                f"{operation:<20}{summary['requests']:>8}{summary['rps']:>10.1f}{summary['p50_ms']:>10.2f}"
+                f"{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}{summary['errors']:>8}"
+            )
+        lines.append(
+            f"{'relay':<20}{relay['packets_received']:>8}{relay['rps']:>10.1f}{relay['p50_ms']:>10.2f}"
+            f"{relay['p95_ms']:>10.2f}{relay['p99_ms']:>10.2f}"
+            f"   loss {relay['loss'] * 100:.2f}%, {relay['throughput_mbps']:.2f} Mbit/s"
+        )
+        for failure, count in result["failures"].items():
+            lines.append(f"  failure {failure}: {count}")
+    return "\n".join(lines)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit status"""
+    parser = argparse.ArgumentParser(description="Load a coturn instance with TURN allocations and relay traffic")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="coturn address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="coturn listening port")
+    parser.add_argument("--transport", default="udp",
+                        help="comma-separated transports to run, from: " + ", ".join(TRANSPORTS))
+    parser.add_argument("--secret", default=os.environ.get("TURN_SECRET", ""),
+                        help="coturn static-auth-secret (default: $TURN_SECRET)")
+    parser.add_argument("-n", "--pairs", type=int, default=DEFAULT_PAIRS, help="client pairs to run")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="pairs active at once (each holds two allocations)")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of relay traffic per pair")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="packets per second per client")
+    parser.add_argument("--size", type=int, default=DEFAULT_PACKET_SIZE, help="bytes per relay packet")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per transaction")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="stdout format")
+    parser.add_argument("-o", "--output", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    transports = tuple(t.strip() for t in args.transport.split(",") if t.strip())
+    if not args.secret or not transports or any(t not in TRANSPORTS for t in transports):
+        parser.error("--secret (or TURN_SECRET) and --transport from udp,tcp are required")
+
+    report = run_suite(
+        args.secret,
+        host=args.host,
+        port=args.port,
+        transports=transports,
+        pairs=args.pairs,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        rate=args.rate,
+        packet_size=args.size,
+        timeout=args.timeout,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_text(report))
+    return 0 if all(result["pairs"]["completed"] for result in report["transports"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,323 @@
+"""
+Static ICE Configuration for TURN Credentials API
+
+Serves shared/constants/turn-config.json (STUN servers, ICE transport
+policy, candidate pool size, timeouts, NAT traversal hints) together with
+a freshly minted TURN credential, so a call setup needs one request
+instead of two.
+
+The file is parsed and serialized once per change: a snapshot holds the
+compact JSON of the static part, minus its closing brace, and the static
+fields of the TURN server entry. A request only appends the credential:
+
+    {"config_version":"…",<static fields>,"turn_servers":[{<static
+     entry fields>,"urls":[…],"username":"…","credential":"…","ttl":…}]}
+
+Snapshots also hold the same prefixes pre-encoded as MessagePack and
+CBOR (see binary_codec), for SDKs that negotiate a binary body.
+
+config_version is a hash of the static part. SDKs that still hold that
+version pass it back and get the credential only, and can fetch the
+static part on its own with ETag revalidation.
+
+The file is re-checked (stat only) at most once per check_interval and
+reloaded when its modification time, size or inode changes. A file that
+fails to parse is logged and the previous snapshot stays in service.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from binary_codec import CODECS, Codec
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+CONFIG_FILE = "turn-config.json"
+
+
+def default_path(module_dir: str) -> str:
+    """
+    turn-config.json to serve when ICE_CONFIG_PATH is not set.
+
+    In a checkout this is shared/constants/turn-config.json; setup.sh
+    deploys the API flat into /opt/turn-api and copies the file next to
+    the modules, where the repository path does not exist.
+
+    Args:
+        module_dir: Directory holding this module
+
+    Returns:
+        str: Path of the configuration file
+    """
+    shared = os.path.join(module_dir, "..", "..", "..", "..", "shared", "constants", CONFIG_FILE)
+    if os.path.exists(shared):
+        return os.path.normpath(shared)
+    return os.path.join(module_dir, CONFIG_FILE)
+
+
+DEFAULT_PATH = default_path(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CHECK_INTERVAL = 1.0       # seconds between stat() calls
+
+# Schema metadata is not configuration; turn_servers is rebuilt per request
+EXCLUDED_FIELDS = ("$schema", "$id", "title", "description", "turn_servers")
+# Per-request fields of a TURN server entry; the rest of the entry is static
+CREDENTIAL_FIELDS = ("urls", "username", "credential", "ttl")
+
+_encode_json_string = json.encoder.encode_basestring
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+###############################################################################
+# SNAPSHOT
+###############################################################################
+
+class EncodedSnapshot(NamedTuple):
+    """The static parts of a snapshot in one binary encoding"""
+    static: bytes          # complete static document, config_version first
+    prefix: bytes          # full document up to the TURN server entry's credential fields
+    slim_prefix: bytes     # the same with config_version as the only static field
+
+
+class IceConfigSnapshot(NamedTuple):
+    """One parsed and pre-serialized version of the configuration file"""
+    version: str
+    static_json: bytes     # complete static document, config_version first
+    prefix: bytes          # static_json without its closing brace
+    entry_prefix: bytes    # opening of a TURN server entry with its static fields
+    encoded: Dict[str, EncodedSnapshot]    # by codec name
+    file_key: Tuple[int, int, int]
+
+
+def _encode_pairs(codec: Codec, mapping: Dict[str, Any]) -> bytes:
+    """Key/value pairs of a map, without the map header"""
+    return b"".join(codec.encode(key) + codec.encode(value) for key, value in mapping.items())
+
+
+def _encode_snapshot(codec: Codec, version: str, static: Dict[str, Any], entry: Dict[str, Any]) -> EncodedSnapshot:
+    version_pair = _encode_pairs(codec, {"config_version": version})
+    static_pairs = _encode_pairs(codec, static)
+    # One TURN server entry, whose credential fields are appended per request
+    turn_servers = (
+        codec.encode("turn_servers")
+        + codec.array_header(1)
+        + codec.map_header(len(entry) + len(CREDENTIAL_FIELDS))
+        + _encode_pairs(codec, entry)
+    )
+    return EncodedSnapshot(
+        static=codec.map_header(len(static) + 1) + version_pair + static_pairs,
+        prefix=codec.map_header(len(static) + 2) + version_pair + static_pairs + turn_servers,
+        slim_prefix=codec.map_header(2) + version_pair + turn_servers,
+    )
+
+
+def build_snapshot(document: Dict[str, Any], file_key: Tuple[int, int, int] = (0, 0, 0)) -> IceConfigSnapshot:
+    """
+    Pre-serialize a parsed turn-config.json document.
+
+    Args:
+        document: Parsed configuration file
+        file_key: (mtime_ns, size, inode) the document was read with
+
+    Returns:
+        IceConfigSnapshot
+
+    Raises:
+        ValueError: If the document is not an object or its turn_servers
+            entry is malformed
+    """
+    if not isinstance(document, dict):
+        raise ValueError("ICE configuration must be a JSON object")
+    turn_servers = document.get("turn_servers") or [{}]
+    if not isinstance(turn_servers, list) or not isinstance(turn_servers[0], dict):
+        raise ValueError("turn_servers must be a list of objects")
+
+    static = {key: value for key, value in document.items() if key not in EXCLUDED_FIELDS}
+    # Only the first entry's shape is kept: the API mints for one TURN service
+    entry = {key: value for key, value in turn_servers[0].items() if key not in CREDENTIAL_FIELDS}
+
+    canonical = json.dumps([static, entry], sort_keys=True, separators=(",", ":")).encode()
+    digest = hashlib.blake2b(canonical, digest_size=9).digest()
+    version = base64.urlsafe_b64encode(digest).decode()
+
+    body = _compact(static)[1:-1]
+    prefix = f'{{"config_version":"{version}"' + (f",{body}" if body else "")
+    entry_body = _compact(entry)[1:-1]
+    return IceConfigSnapshot(
+        version=version,
+        static_json=(prefix + "}").encode(),
+        prefix=prefix.encode(),
+        entry_prefix=("{" + (f"{entry_body}," if entry_body else "")).encode(),
+        encoded={codec.name: _encode_snapshot(codec, version, static, entry) for codec in CODECS},
+        file_key=file_key,
+    )
+
+
+def render_ice_config(
+    snapshot: IceConfigSnapshot,
+    username: str,
+    password: str,
+    ttl: int,
+    uris_json: str,
+    known_version: Optional[str] = None
+) -> bytes:
+    """
+    Splice a TURN credential into a snapshot.
+
+    Args:
+        snapshot: Current configuration snapshot
+        username: TURN username (expiry:user)
+        password: TURN password
+        ttl: Credential lifetime in seconds
+        uris_json: Compact JSON array of the credential's TURN URIs
+        known_version: config_version the client already holds; when it is
+            current the static fields are left out
+
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    entry = (
+        snapshot.entry_prefix
+        + f'"urls":{uris_json},"username":{_encode_json_string(username)},'
+          f'"credential":"{password}","ttl":{ttl}}}'.encode()
+    )
+    if known_version == snapshot.version:
+        head = f'{{"config_version":"{snapshot.version}"'.encode()
+    else:
+        head = snapshot.prefix
+    return head + b',"turn_servers":[' + entry + b"]}"
+
+
+def render_ice_config_binary(
+    snapshot: IceConfigSnapshot,
+    codec: Codec,
+    username: str,
+    password: str,
+    ttl: int,
+    uris: List[str],
+    known_version: Optional[str] = None
+) -> bytes:
+    """
+    Splice a TURN credential into a snapshot's binary encoding.
+
+    The result decodes to the same document render_ice_config produces.
+
+    Args:
+        snapshot: Current configuration snapshot
+        codec: Negotiated binary encoding
+        username: TURN username (expiry:user)
+        password: TURN password
+        ttl: Credential lifetime in seconds
+        uris: The credential's TURN URIs
+        known_version: config_version the client already holds; when it is
+            current the static fields are left out
+
+    Returns:
+        bytes: Encoded document
+    """
+    encoded = snapshot.encoded[codec.name]
+    head = encoded.slim_prefix if known_version == snapshot.version else encoded.prefix
+    return head + _encode_pairs(codec, {"urls": uris, "username": username, "credential": password, "ttl": ttl})
+
+
+###############################################################################
+# RELOADING SOURCE
+###############################################################################
+
+class IceConfig:
+    """
+    The configuration file's current snapshot, reloaded when the file changes.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """
+        Args:
+            path: turn-config.json to serve
+            check_interval: Seconds between checks for a changed file
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot: Optional[IceConfigSnapshot] = None
+        self.reloads = 0
+        self.errors = 0
+        self._checked_at = float("-inf")
+        self._failed_key: Optional[Tuple[int, int, int]] = None
+
+    def _file_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def load(self) -> bool:
+        """
+        (Re)load the file now.
+
+        Returns:
+            bool: True if a new snapshot is in service; on failure the
+            previous snapshot (if any) is kept
+        """
+        key = self._file_key()
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = build_snapshot(json.load(f), key or (0, 0, 0))
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            self._failed_key = key
+            logger.warning(f"ICE configuration {self.path} not loaded: {e}")
+            return False
+        if self.snapshot is not None and snapshot.version != self.snapshot.version:
+            logger.info(f"ICE configuration reloaded: version {snapshot.version}")
+        self.snapshot = snapshot
+        self.reloads += 1
+        self._failed_key = None
+        return True
+
+    def current(self, now: Optional[float] = None) -> Optional[IceConfigSnapshot]:
+        """
+        Snapshot to serve, after reloading the file if it changed.
+
+        Args:
+            now: Override for the monotonic clock (default: time.monotonic())
+
+        Returns:
+            The current snapshot, or None if the file never loaded
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            key = self._file_key()
+            known = self.snapshot.file_key if self.snapshot is not None else None
+            # A broken file is retried only once it changes again
+            if key is not None and key != known and key != self._failed_key:
+                self.load()
+        return self.snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Loader state.
+
+        Returns:
+            Dict with path, version (None until loaded), reloads and errors
+        """
+        return {
+            "path": self.path,
+            "version": self.snapshot.version if self.snapshot is not None else None,
+            "reloads": self.reloads,
+            "errors": self.errors,
+        }
@@ -0,0 +1,263 @@
+"""
+Issuance Event Log for TURN Credentials API
+
+Structured NDJSON event stream for credential issuance and rejected API
+keys. Request handlers only append a tuple to an in-memory queue; a
+background thread formats events and writes them in batches, rotating
+the file by size. When the queue is full, events are dropped (and
+counted) rather than blocking the request.
+
+Several processes may share one path (every gunicorn worker started by
+serve.py runs its own writer): rotation and append happen under an
+exclusive flock on path.lock, so only one process rotates a full file
+and no backup generation is shifted twice.
+
+Record format (one JSON object per line):
+    {"ts":1737910400.123,"event":"issued","user":"alice","ttl":3600,"turn_username":"1737914000:alice","source":"single"}
+    {"ts":1737910400.456,"event":"auth_failure","key_fp":"9f86d081"}
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import fcntl
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# (event, timestamp, fields) as queued by the request path
+QueuedEvent = Tuple[str, float, Dict[str, object]]
+
+
+###############################################################################
+# EVENT LOG
+###############################################################################
+
+class IssuanceEventLog:
+    """
+    Bounded in-memory queue drained by a batching background writer.
+
+    The log is disabled when path is empty; emit() is then a cheap no-op so
+    callers can keep their fallback logging.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        sample_rate: float = 1.0
+    ):
+        """
+        Args:
+            path: NDJSON output file; empty disables the log
+            max_queue: Queued events beyond which new events are dropped
+            batch_size: Events per write; a full batch wakes the writer early
+            flush_interval: Maximum seconds an event waits in the queue
+            max_bytes: Rotate once the file would exceed this size (0 disables)
+            backup_count: Rotated files to keep (path.1 ... path.N)
+            sample_rate: Fraction of "issued" events recorded (0.0-1.0)
+        """
+        self.path = path
+        self.enabled = bool(path)
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+
+        self.emitted = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.rotations = 0
+
+        self._queue: Deque[QueuedEvent] = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._random = random.random
+
+    ###########################################################################
+    # REQUEST PATH
+    ###########################################################################
+
+    def emit(self, event: str, sampled: bool = False, **fields: object) -> bool:
+        """
+        Queue one event without blocking.
+
+        Args:
+            event: Event type, e.g. "issued" or "auth_failure"
+            sampled: Apply sample_rate to this event
+            **fields: Event payload
+
+        Returns:
+            bool: True if queued, False if disabled, sampled out or dropped
+        """
+        if not self.enabled:
+            return False
+        if sampled and self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+
+        self._queue.append((event, time.time(), fields))
+        self.emitted += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    ###########################################################################
+    # BACKGROUND WRITER
+    ###########################################################################
+
+    def start(self) -> None:
+        """Start the background writer thread (idempotent)"""
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="issuance-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the writer after flushing everything still queued.
+
+        Args:
+            timeout: Seconds to wait for the writer thread
+        """
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def flush(self) -> int:
+        """
+        Write every queued event now, on the calling thread.
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        while self._queue:
+            written += self._write_batch()
+        return written
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error(f"Issuance log write failed: {str(e)}")
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error(f"Issuance log final flush failed: {str(e)}")
+
+    def _write_batch(self) -> int:
+        lines: List[str] = []
+        queue = self._queue
+        while queue and len(lines) < self.batch_size:
+            event, timestamp, fields = queue.popleft()
+            record = {"ts": round(timestamp, 3), "event": event}
+            record.update(fields)
+            lines.append(json.dumps(record, separators=(",", ":")))
+        if not lines:
+            return 0
+
+        data = ("\n".join(lines) + "\n").encode()
+        with self._write_lock:
+            lock_fd = self._process_lock()
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            try:
+                self._rotate_if_needed(len(data))
+                with open(self.path, "ab") as f:
+                    f.write(data)
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        self.written += len(lines)
+        return len(lines)
+
+    def _process_lock(self) -> int:
+        # Opened lazily so each forked worker gets its own open file
+        # description; flock does not exclude processes sharing one
+        if self._lock_fd is None:
+            self._lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        return self._lock_fd
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        if self.max_bytes <= 0:
+            return
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= self.max_bytes:
+            return
+
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    ###########################################################################
+    # STATISTICS
+    ###########################################################################
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of event log counters.
+
+        Returns:
+            Dict with queued, emitted, written, dropped, sampled_out, rotations
+        """
+        return {
+            "queued": len(self._queue),
+            "emitted": self.emitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "rotations": self.rotations,
+        }
@@ -0,0 +1,491 @@
+"""
+Offline coturn Log Analyzer
+
+Capacity-planning summary of (rotated) coturn logs: per-user allocation
+counts, session durations and relayed bytes.
+
+Each log is memory-mapped and split on line boundaries into chunks that
+a process pool scans in parallel. A chunk is parsed with one compiled
+bytes regex run directly over the mmap, so only the captured fields of
+session lines become Python objects; other lines are skipped inside the
+regex engine. Workers return partial aggregates that are merged by
+session id, so sessions spanning chunks or rotated files are joined.
+
+Session ids and the leading timestamp (coturn's uptime) both start over
+when coturn restarts, so over weeks of logs an id is reused by
+unrelated sessions. A "new" line for an id that is already open, or a
+timestamp lower than the previous line's (a restart, which ends every
+open session), starts a new aggregate. Reports list the later sessions
+of a reused id as "<id>#2", "<id>#3", ...
+
+Relayed bytes come from the client-side "usage" lines only. coturn also
+logs "peer usage" for the relay-to-peer leg, which carries the same
+payload a second time, so those lines are skipped rather than counted
+twice.
+
+TURN usernames are minted as "expiry:username" (see CredentialMinter);
+they are split back so statistics are reported per API username, with
+the number of distinct credentials each user allocated with.
+
+Parsed coturn lines (leading uptime timestamp optional):
+    12: session 001: new, realm=<r>, username=<1737914000:alice>, lifetime=600
+    12: session 001: realm <r> user <1737914000:alice>: incoming packet ALLOCATE processed, success
+    40: session 001: usage: realm=<r>, username=<1737914000:alice>, rp=10, rb=1200, sp=9, sb=1100
+    99: session 001: closed (2nd stage), user <1737914000:alice> realm <r> origin <>, ...
+
+Usage:
+    python log_analyzer.py /var/log/turnserver.log* -o report/
+    python log_analyzer.py turnserver.log --workers 4 --format json
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+MIN_CHUNK_SIZE = 4 * 1024 * 1024
+PERCENTILES = (50, 95, 99)
+
+SESSION_LINE = re.compile(
+    rb"^(?:(?P<ts>\d+)(?:\.\d+)?: )?[^\n]*?session (?P<sid>\d+): (?:"
+    rb"new, realm=<[^>\n]*>, username=<(?P<new>[^>\n]*)>"
+    rb"|realm <[^>\n]*> user <(?P<alloc>[^>\n]*)>: incoming packet ALLOCATE processed, success"
+    rb"|usage: realm=<[^>\n]*>, username=<(?P<usage>[^>\n]*)>, "
+    rb"rp=\d+, rb=(?P<rb>\d+), sp=\d+, sb=(?P<sb>\d+)"
+    rb"|closed[^\n]*?user <(?P<closed>[^>\n]*)>"
+    rb")",
+    re.M
+)
+
+# session id -> [turn username, first ts, last ts, allocations, relayed bytes, closed]
+SessionAggregate = List[object]
+_USER, _START, _END, _ALLOCATIONS, _BYTES, _CLOSED = range(6)
+
+
+###############################################################################
+# PARSING
+###############################################################################
+
+def split_turn_username(turn_username: str) -> Tuple[Optional[int], str]:
+    """
+    Split a minted TURN username back into expiry and API username.
+
+    Args:
+        turn_username: "expiry:username" as minted, or a plain username
+
+    Returns:
+        (expiry UNIX time or None, username)
+    """
+    expiry, sep, username = turn_username.partition(":")
+    if sep and expiry.isdigit():
+        return int(expiry), username
+    return None, turn_username
+
+
+def _new_session() -> SessionAggregate:
+    return ["", None, None, 0, 0, False]
+
+
+class ChunkSessions:
+    """
+    Session aggregates of one stretch of log, split by what the stretch
+    alone can tell about them.
+    """
+
+    def __init__(self):
+        # Lines of sessions that may have started before the stretch: seen
+        # before any "new" line for their id and before any restart
+        self.head: Dict[str, SessionAggregate] = {}
+        # coturn restarted inside the stretch (after the head lines)
+        self.restarted = False
+        # Sessions known to have ended, oldest first
+        self.finished: List[Tuple[str, SessionAggregate]] = []
+        # Sessions started in the stretch and still open at its end
+        self.open: Dict[str, SessionAggregate] = {}
+        self.first_ts: Optional[int] = None
+        self.last_ts: Optional[int] = None
+
+    def finish_all(self) -> None:
+        """End every open session (coturn restarted)"""
+        self.finished.extend(self.open.items())
+        self.open = {}
+
+    def sessions(self) -> Dict[str, SessionAggregate]:
+        """
+        Every session, oldest first, keyed by session id; later sessions
+        of a reused id are keyed "<id>#2", "<id>#3", ...
+
+        Returns:
+            Dict of session key to SessionAggregate
+        """
+        result: Dict[str, SessionAggregate] = {}
+        seen: Dict[str, int] = {}
+        for sid, session in self._all():
+            count = seen[sid] = seen.get(sid, 0) + 1
+            result[sid if count == 1 else f"{sid}#{count}"] = session
+        return result
+
+    def _all(self) -> Iterable[Tuple[str, SessionAggregate]]:
+        yield from self.head.items()
+        yield from self.finished
+        yield from self.open.items()
+
+
+def parse_chunk(data, start: int = 0, end: Optional[int] = None) -> ChunkSessions:
+    """
+    Aggregate coturn session lines in data[start:end] by session.
+
+    Args:
+        data: bytes or mmap holding complete lines in [start, end)
+        start: First byte (at a line start)
+        end: Byte after the last line (default: len(data))
+
+    Returns:
+        ChunkSessions of the range
+    """
+    chunk = ChunkSessions()
+    end = len(data) if end is None else end
+    for match in SESSION_LINE.finditer(data, start, end):
+        ts, sid, new, alloc, usage, rb, sb, closed = match.groups()
+        sid = sid.decode()
+        if ts is not None:
+            ts = int(ts)
+            if chunk.last_ts is not None and ts < chunk.last_ts:
+                chunk.finish_all()
+                chunk.restarted = True
+            if chunk.first_ts is None:
+                chunk.first_ts = ts
+            chunk.last_ts = ts
+
+        if new is not None:
+            if sid in chunk.open:
+                chunk.finished.append((sid, chunk.open.pop(sid)))
+            session = chunk.open[sid] = _new_session()
+        else:
+            session = chunk.open.get(sid)
+            if session is None:
+                if chunk.restarted:
+                    session = chunk.open[sid] = _new_session()
+                else:
+                    session = chunk.head.setdefault(sid, _new_session())
+
+        user = new or alloc or usage or closed
+        if user and not session[_USER]:
+            session[_USER] = user.decode(errors="replace")
+        if ts is not None:
+            if session[_START] is None:
+                session[_START] = ts
+            session[_END] = ts
+        if alloc is not None:
+            session[_ALLOCATIONS] += 1
+        elif usage is not None:
+            session[_BYTES] += int(rb) + int(sb)
+        elif closed is not None:
+            session[_CLOSED] = True
+    return chunk
+
+
+def _extend(current: SessionAggregate, later: SessionAggregate) -> None:
+    """Fold a later part of the same session into current"""
+    if not current[_USER]:
+        current[_USER] = later[_USER]
+    if current[_START] is None:
+        current[_START] = later[_START]
+    if later[_END] is not None:
+        current[_END] = later[_END]
+    current[_ALLOCATIONS] += later[_ALLOCATIONS]
+    current[_BYTES] += later[_BYTES]
+    current[_CLOSED] = current[_CLOSED] or later[_CLOSED]
+
+
+def merge_sessions(into: ChunkSessions, partial: ChunkSessions) -> ChunkSessions:
+    """
+    Merge the next stretch of log into everything before it.
+
+    The head of partial continues the sessions open in into, unless the
+    timestamps went backwards between the two (coturn restarted at the
+    boundary). Sessions partial started replace open ones with the same
+    id, and a restart inside partial ends all of them.
+
+    Args:
+        into: Aggregates of everything before the stretch (modified)
+        partial: Aggregates of the stretch
+
+    Returns:
+        into
+    """
+    if into.last_ts is not None and partial.first_ts is not None and partial.first_ts < into.last_ts:
+        into.finish_all()
+    for sid, session in partial.head.items():
+        current = into.open.get(sid)
+        if current is None:
+            into.open[sid] = session
+        else:
+            _extend(current, session)
+    if partial.restarted:
+        into.finish_all()
+
+    # An id partial started anew ends the open session with that id
+    restarted_ids = [sid for sid, _ in partial.finished] + list(partial.open)
+    for sid in restarted_ids:
+        if sid in into.open:
+            into.finished.append((sid, into.open.pop(sid)))
+    into.finished.extend(partial.finished)
+    into.open.update(partial.open)
+
+    if into.first_ts is None:
+        into.first_ts = partial.first_ts
+    if partial.last_ts is not None:
+        into.last_ts = partial.last_ts
+    return into
+
+
+###############################################################################
+# PARALLEL SCAN
+###############################################################################
+
+def chunk_boundaries(path: str, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into about chunks byte ranges that start at line starts.
+
+    Args:
+        path: Log file
+        chunks: Desired number of ranges
+
+    Returns:
+        List of (start, end) byte offsets covering the whole file
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    step = max(MIN_CHUNK_SIZE, -(-size // max(1, chunks)))
+    if step >= size:
+        return [(0, size)]
+
+    bounds = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = min(size, start + step)
+            if end < size:
+                newline = mm.find(b"\n", end)
+                end = size if newline < 0 else newline + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def scan_range(task: Tuple[str, int, int]) -> ChunkSessions:
+    """
+    Worker entry point: parse one byte range of one file via mmap.
+
+    Args:
+        task: (path, start, end)
+
+    Returns:
+        ChunkSessions of the range
+    """
+    path, start, end = task
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return parse_chunk(mm, start, end)
+
+
+def analyze_logs(paths: Sequence[str], workers: int = 0) -> Dict[str, SessionAggregate]:
+    """
+    Parse every log in parallel and merge the results.
+
+    Pass paths oldest first (e.g. turnserver.log.3 ... turnserver.log) so
+    session start and end times are taken from the right lines.
+
+    Args:
+        paths: Log files in chronological order
+        workers: Worker processes (0 = one per CPU; 1 = no pool)
+
+    Returns:
+        Dict of session key (see ChunkSessions.sessions) to SessionAggregate
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (path, start, end)
+        for path in paths
+        for start, end in chunk_boundaries(path, workers)
+    ]
+
+    merged = ChunkSessions()
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            merge_sessions(merged, scan_range(task))
+        return merged.sessions()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in task order, which keeps the merge chronological
+        for partial in pool.map(scan_range, tasks):
+            merge_sessions(merged, partial)
+    return merged.sessions()
+
+
+###############################################################################
+# SUMMARY
+###############################################################################
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 if empty)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, -(-len(values) * pct // 100) - 1))
+    return float(values[int(index)])
+
+
+def summarize_users(sessions: Dict[str, SessionAggregate]) -> List[Dict[str, object]]:
+    """
+    Per API username totals, busiest first.
+
+    Args:
+        sessions: Merged session aggregates
+
+    Returns:
+        List of dicts with user, sessions, allocations, credentials,
+        relayed_bytes and duration_seconds
+    """
+    users: Dict[str, Dict[str, object]] = {}
+    credentials: Dict[str, set] = {}
+    for session in sessions.values():
+        expiry, user = split_turn_username(session[_USER] or "")
+        row = users.get(user)
+        if row is None:
+            row = users[user] = {
+                "user": user, "sessions": 0, "allocations": 0,
+                "credentials": 0, "relayed_bytes": 0, "duration_seconds": 0,
+            }
+            credentials[user] = set()
+        row["sessions"] += 1
+        row["allocations"] += session[_ALLOCATIONS]
+        row["relayed_bytes"] += session[_BYTES]
+        if session[_START] is not None:
+            row["duration_seconds"] += session[_END] - session[_START]
+        if expiry is not None:
+            credentials[user].add(expiry)
+    for user, row in users.items():
+        row["credentials"] = len(credentials[user])
+    return sorted(users.values(), key=lambda row: (-row["allocations"], row["user"]))
+
+
+def summarize(sessions: Dict[str, SessionAggregate]) -> Dict[str, object]:
+    """
+    Fleet-wide totals and distributions.
+
+    Args:
+        sessions: Merged session aggregates
+
+    Returns:
+        Dict with counts plus duration and relayed-bytes percentiles
+    """
+    durations = sorted(
+        s[_END] - s[_START] for s in sessions.values() if s[_START] is not None and s[_CLOSED]
+    )
+    relayed = sorted(s[_BYTES] for s in sessions.values())
+    summary: Dict[str, object] = {
+        "sessions": len(sessions),
+        "closed_sessions": sum(1 for s in sessions.values() if s[_CLOSED]),
+        "allocations": sum(s[_ALLOCATIONS] for s in sessions.values()),
+        "users": len({split_turn_username(s[_USER] or "")[1] for s in sessions.values()}),
+        "relayed_bytes": sum(relayed),
+    }
+    for pct in PERCENTILES:
+        summary[f"duration_p{pct}_seconds"] = percentile(durations, pct)
+        summary[f"relayed_bytes_p{pct}"] = percentile(relayed, pct)
+    return summary
+
+
+def write_reports(sessions: Dict[str, SessionAggregate], directory: str) -> List[str]:
+    """
+    Write users.csv, sessions.csv and summary.json into directory.
+
+    Args:
+        sessions: Merged session aggregates
+        directory: Output directory (created if missing)
+
+    Returns:
+        List of written file paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+
+    users_path = os.path.join(directory, "users.csv")
+    rows = summarize_users(sessions)
+    with open(users_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["user"])
+        writer.writeheader()
+        writer.writerows(rows)
+    written.append(users_path)
+
+    sessions_path = os.path.join(directory, "sessions.csv")
+    with open(sessions_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["session", "user", "expiry", "start", "end", "allocations", "relayed_bytes", "closed"])
+        for sid, s in sessions.items():
+            expiry, user = split_turn_username(s[_USER] or "")
+            writer.writerow([sid, user, expiry, s[_START], s[_END], s[_ALLOCATIONS], s[_BYTES], int(s[_CLOSED])])
+    written.append(sessions_path)
+
+    summary_path = os.path.join(directory, "summary.json")
+    with open(summary_path, "w") as f:
+        json.dump(summarize(sessions), f, indent=2)
+    written.append(summary_path)
+    return written
+
+
+###############################################################################
+# MAIN
+###############################################################################
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Summarize coturn logs for capacity planning")
+    parser.add_argument("logs", nargs="+", help="Log files, oldest first")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Worker processes (0 = CPU count)")
+    parser.add_argument("-o", "--output", help="Directory for users.csv, sessions.csv and summary.json")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.logs if not os.path.isfile(path)]
+    if missing:
+        print(f"Log file not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    sessions = analyze_logs(args.logs, args.workers)
+    if args.output:
+        for path in write_reports(sessions, args.output):
+            print(f"Wrote {path}", file=sys.stderr)
+
+    summary = summarize(sessions)
+    if args.format == "json":
+        print(json.dumps(summary, indent=2))
+    else:
+        for key, value in summary.items():
+            print(f"{key:28} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,323 @@
+"""
+Incremental coturn Log Tailer
+
+Reads only the bytes appended to the coturn log since the previous run
+and folds them into running counters, so a metrics scrape costs time
+proportional to the new log lines instead of the whole file.
+
+The read offset, the file's inode and the counters are kept in a JSON
+checkpoint. When logrotate renames the log (new inode), the rest of the
+old file is drained from its rotated name before reading the new file
+from the start; when it truncates in place (copytruncate), reading
+restarts at offset 0.
+
+Counted events (same patterns monitor.sh used to grep for):
+    allocations     lines containing "session allocated"
+    auth_failures   lines containing 401, unauthorized or Forbidden
+    errors          lines containing error, Error or ERROR
+
+Usage:
+    python log_tailer.py                      # Print Prometheus metrics
+    python log_tailer.py --follow -o FILE     # Rewrite FILE every interval
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+from metrics import Counter, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_LOG_PATH = "/var/log/turnserver.log"
+DEFAULT_CHECKPOINT_PATH = "/var/lib/turn-log-tailer/checkpoint.json"
+DEFAULT_FOLLOW_INTERVAL = 15.0
+READ_CHUNK_SIZE = 1024 * 1024
+
+# (counter name, line pattern); each matching line counts once
+EVENT_PATTERNS: Tuple[Tuple[str, Pattern[bytes]], ...] = (
+    ("allocations", re.compile(rb"^.*session allocated.*$", re.M)),
+    ("auth_failures", re.compile(rb"^.*(?:401|unauthorized|Forbidden).*$", re.M)),
+    ("errors", re.compile(rb"^.*(?:error|Error|ERROR).*$", re.M)),
+)
+
+
+###############################################################################
+# PARSING
+###############################################################################
+
+def count_events(data: bytes) -> Dict[str, int]:
+    """
+    Count matching lines in a block of complete log lines.
+
+    Args:
+        data: Log bytes, ideally ending at a line boundary
+
+    Returns:
+        Dict of counter name to matching line count, plus "lines"
+    """
+    counts = {"lines": data.count(b"\n")}
+    for name, pattern in EVENT_PATTERNS:
+        counts[name] = sum(1 for _ in pattern.finditer(data))
+    return counts
+
+
+###############################################################################
+# TAILER
+###############################################################################
+
+class CoturnLogTailer:
+    """
+    Checkpointed incremental reader of one log file.
+
+    poll() reads new complete lines, updates the counters and saves the
+    checkpoint. A trailing partial line is left unread until the line is
+    finished.
+    """
+
+    def __init__(
+        self,
+        log_path: str = DEFAULT_LOG_PATH,
+        checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+        rotated_paths: Optional[Sequence[str]] = None
+    ):
+        """
+        Args:
+            log_path: Live coturn log file
+            checkpoint_path: JSON checkpoint file (created on first save)
+            rotated_paths: Names a rotated log may have (default: log_path.1)
+        """
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path
+        self.rotated_paths = list(rotated_paths) if rotated_paths is not None else [f"{log_path}.1"]
+
+        self.inode: Optional[int] = None
+        self.offset = 0
+        self.counters: Dict[str, int] = {"lines": 0, "rotations": 0}
+        for name, _ in EVENT_PATTERNS:
+            self.counters[name] = 0
+        self.bytes_read = 0
+
+    ###########################################################################
+    # CHECKPOINT
+    ###########################################################################
+
+    def load_checkpoint(self) -> None:
+        """Restore offset, inode and counters; a missing or corrupt file starts fresh"""
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+            self.inode = state.get("inode")
+            self.offset = int(state.get("offset", 0))
+            for name, value in state.get("counters", {}).items():
+                self.counters[name] = int(value)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {str(e)}")
+
+    def save_checkpoint(self) -> None:
+        """Atomically write the checkpoint"""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"inode": self.inode, "offset": self.offset, "counters": self.counters}, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Serialize concurrent runs (e.g. overlapping scrapes) on the checkpoint"""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.checkpoint_path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    ###########################################################################
+    # READING
+    ###########################################################################
+
+    def poll(self) -> int:
+        """
+        Consume everything appended since the last poll.
+
+        Returns:
+            int: Bytes consumed by this poll
+        """
+        consumed = 0
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            # Rotated away and not yet recreated: finish the old file
+            return self._drain_rotated()
+
+        if self.inode is not None and stat.st_ino != self.inode:
+            consumed += self._drain_rotated()
+        elif stat.st_size < self.offset:
+            # Truncated in place (copytruncate)
+            self.counters["rotations"] += 1
+            self.offset = 0
+        self.inode = stat.st_ino
+
+        if stat.st_size > self.offset:
+            read, self.offset = self._consume(self.log_path, self.offset, complete_lines_only=True)
+            consumed += read
+        self.bytes_read += consumed
+        return consumed
+
+    def _drain_rotated(self) -> int:
+        if self.inode is None:
+            return 0
+        self.counters["rotations"] += 1
+        for path in self.rotated_paths:
+            try:
+                if os.stat(path).st_ino != self.inode:
+                    continue
+            except FileNotFoundError:
+                continue
+            read, _ = self._consume(path, self.offset, complete_lines_only=False)
+            self.inode, self.offset = None, 0
+            return read
+        logger.warning(f"Rotated log for inode {self.inode} not found; unread lines skipped")
+        self.inode, self.offset = None, 0
+        return 0
+
+    def _consume(self, path: str, offset: int, complete_lines_only: bool) -> Tuple[int, int]:
+        start = offset
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                end = len(chunk)
+                if complete_lines_only:
+                    newline = chunk.rfind(b"\n")
+                    if newline >= 0:
+                        end = newline + 1
+                    elif len(chunk) < READ_CHUNK_SIZE:
+                        break  # Only a partial line so far
+                    # else: one line longer than a chunk; count it in pieces
+                self._count(chunk[:end])
+                offset += end
+                if end < len(chunk):
+                    f.seek(offset)
+                    if len(chunk) < READ_CHUNK_SIZE:
+                        break
+        return offset - start, offset
+
+    def _count(self, data: bytes) -> None:
+        counters = self.counters
+        for name, value in count_events(data).items():
+            counters[name] += value
+
+    ###########################################################################
+    # OUTPUT
+    ###########################################################################
+
+    def render_metrics(self) -> str:
+        """
+        Render the counters in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition body ending in a newline
+        """
+        registry = MetricsRegistry()
+        metrics = (
+            ("turn_connections_total", "TURN allocations logged by coturn", "allocations"),
+            ("turn_auth_failures_total", "Authentication failures logged by coturn", "auth_failures"),
+            ("turn_errors_total", "Error lines logged by coturn", "errors"),
+            ("turn_log_lines_total", "coturn log lines processed by the tailer", "lines"),
+            ("turn_log_rotations_total", "coturn log rotations seen by the tailer", "rotations"),
+        )
+        for name, documentation, key in metrics:
+            registry.register(Counter(name, documentation)).set(self.counters[key])
+        return registry.render()
+
+    def run_once(self) -> str:
+        """
+        Load the checkpoint, poll, save, and render, holding the lock.
+
+        Returns:
+            str: Prometheus metrics after this poll
+        """
+        with self.locked():
+            self.load_checkpoint()
+            self.poll()
+            self.save_checkpoint()
+            return self.render_metrics()
+
+
+###############################################################################
+# MAIN
+###############################################################################
+
+def write_atomically(path: str, content: str) -> None:
+    """Replace path with content so readers never see a partial file"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Process exit code
+    """
+    parser = argparse.ArgumentParser(description="Incremental coturn log tailer")
+    parser.add_argument("--log", default=os.environ.get("TURN_LOG_FILE", DEFAULT_LOG_PATH))
+    parser.add_argument("--checkpoint", default=os.environ.get("TURN_LOG_CHECKPOINT", DEFAULT_CHECKPOINT_PATH))
+    parser.add_argument("--rotated", action="append", help="Rotated log name (repeatable; default: LOG.1)")
+    parser.add_argument("--follow", action="store_true", help="Keep polling every --interval seconds")
+    parser.add_argument("--interval", type=float, default=DEFAULT_FOLLOW_INTERVAL)
+    parser.add_argument("-o", "--output", help="Write metrics to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    tailer = CoturnLogTailer(args.log, args.checkpoint, args.rotated)
+    while True:
+        try:
+            metrics = tailer.run_once()
+        except OSError as e:
+            logger.error(f"Log tailer failed: {str(e)}")
+            if not args.follow:
+                return 1
+        else:
+            if args.output:
+                write_atomically(args.output, metrics)
+            else:
+                sys.stdout.write(metrics)
+                sys.stdout.flush()
+        if not args.follow:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(main_cli())
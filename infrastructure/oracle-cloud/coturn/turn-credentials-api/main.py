@@ -10,18 +10,56 @@ Author: WebRTC-Lite
 Version: 1.0.0
 """
 
-from fastapi import FastAPI, HTTPException, status, Depends
+from fastapi import FastAPI, Header, HTTPException, Request, status, Depends, WebSocket
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import APIKeyHeader
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationError, validator
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, Union
 import hmac
+import math
 import hashlib
 import base64
+import binascii
+import json
 import os
+import re
 import secrets
+import threading
+import time
 import logging
+import asyncio
+import numpy as np
 from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from admission import AdmissionController, AdmissionMiddleware
+from binary_codec import CBOR_MEDIA_TYPE, CODECS, MSGPACK_MEDIA_TYPE, Codec, negotiate
+from ice_config import (
+    DEFAULT_PATH as DEFAULT_ICE_CONFIG_PATH,
+    IceConfig,
+    IceConfigSnapshot,
+    render_ice_config,
+    render_ice_config_binary,
+)
+from issuance_log import IssuanceEventLog
+from metrics import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+)
+from quality_rollups import QualityRollups
+from quality_stats import FIELD_NAMES, QualityStatsStore
+from rate_limit import TokenBucketLimiter
+from shared_metrics import SharedMetrics
+from signaling_hub import CLOSE_POLICY_VIOLATION, SignalingHub
+from stun_probe import RTT_BUCKETS, StunProber, prober_from_conf
+from turn_pool import TurnServerPool, parse_turn_servers, prometheus_load_source
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +72,14 @@ logger = logging.getLogger(__name__)
 # CONFIGURATION
 ###############################################################################
 
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean feature flag from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 # Load environment variables
 TURN_SECRET = os.environ.get('TURN_SECRET', '')
 TURN_SERVER = os.environ.get('TURN_SERVER', 'turn.example.com:5349')
@@ -42,6 +88,364 @@ API_KEY = os.environ.get('API_KEY', '')
 DEFAULT_TTL = int(os.environ.get('DEFAULT_TTL', 86400))
 MAX_TTL = int(os.environ.get('MAX_TTL', 86400))
 MIN_TTL = int(os.environ.get('MIN_TTL', 60))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+BATCH_STREAM_CHUNK = int(os.environ.get('BATCH_STREAM_CHUNK', 64))
+CREDENTIAL_CACHE_ENABLED = _env_flag('CREDENTIAL_CACHE_ENABLED')
+CREDENTIAL_CACHE_SIZE = int(os.environ.get('CREDENTIAL_CACHE_SIZE', 10000))
+CREDENTIAL_CACHE_BUCKET = int(os.environ.get('CREDENTIAL_CACHE_BUCKET', 60))
+# Matches the SDKs' refresh buffer (Android REFRESH_BUFFER_MS = 5 minutes)
+CREDENTIAL_ROTATION_OVERLAP = int(os.environ.get('CREDENTIAL_ROTATION_OVERLAP', 300))
+FAST_RESPONSE_MODE = _env_flag('FAST_RESPONSE_MODE')
+# Align expiries to CREDENTIAL_CACHE_BUCKET and send ETag/Cache-Control/304
+HTTP_CACHE_ENABLED = _env_flag('HTTP_CACHE_ENABLED')
+ISSUANCE_LOG_PATH = os.environ.get('ISSUANCE_LOG_PATH', '')
+ISSUANCE_LOG_SAMPLE_RATE = float(os.environ.get('ISSUANCE_LOG_SAMPLE_RATE', 1.0))
+ISSUANCE_LOG_MAX_BYTES = int(os.environ.get('ISSUANCE_LOG_MAX_BYTES', 50 * 1024 * 1024))
+ISSUANCE_LOG_BACKUPS = int(os.environ.get('ISSUANCE_LOG_BACKUPS', 5))
+ISSUANCE_LOG_QUEUE_SIZE = int(os.environ.get('ISSUANCE_LOG_QUEUE_SIZE', 10000))
+TURN_SERVERS = os.environ.get('TURN_SERVERS', '')
+TURN_POOL_REFRESH_INTERVAL = float(os.environ.get('TURN_POOL_REFRESH_INTERVAL', 5.0))
+TURN_POOL_MAX_SERVERS = int(os.environ.get('TURN_POOL_MAX_SERVERS', 0))
+TURN_POOL_METRICS_PORT = int(os.environ.get('TURN_POOL_METRICS_PORT', 9641))
+STATS_WINDOW_SAMPLES = int(os.environ.get('STATS_WINDOW_SAMPLES', 300))
+# Ring buffers preallocate STATS_WINDOW_SAMPLES x 56 bytes per session: ~8.4 MB
+# per worker at the defaults
+STATS_MAX_SESSIONS = int(os.environ.get('STATS_MAX_SESSIONS', 500))
+STATS_SESSION_IDLE = float(os.environ.get('STATS_SESSION_IDLE', 600))
+STATS_MAX_BATCH = int(os.environ.get('STATS_MAX_BATCH', 600))
+# Rollups preallocate ~0.85 MiB per group, at most 1 + 2 x (this + 1) groups:
+# ~9.3 MiB per worker at the default
+STATS_ROLLUP_MAX_GROUPS = int(os.environ.get('STATS_ROLLUP_MAX_GROUPS', 4))
+RATE_LIMIT_ENABLED = _env_flag('RATE_LIMIT_ENABLED')
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', 1.0))
+RATE_LIMIT_USER_BURST = float(os.environ.get('RATE_LIMIT_USER_BURST', 10))
+RATE_LIMIT_KEY_RATE = float(os.environ.get('RATE_LIMIT_KEY_RATE', 200))
+RATE_LIMIT_KEY_BURST = float(os.environ.get('RATE_LIMIT_KEY_BURST', 1000))
+RATE_LIMIT_MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', 100000))
+ADMISSION_ENABLED = _env_flag('ADMISSION_ENABLED')
+ADMISSION_MAX_CONCURRENCY = int(os.environ.get('ADMISSION_MAX_CONCURRENCY', 64))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 128))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 0.5))
+ADMISSION_TARGET_LATENCY = float(os.environ.get('ADMISSION_TARGET_LATENCY', 0.25))
+STUN_PROBE_ENABLED = _env_flag('STUN_PROBE_ENABLED')
+STUN_PROBE_CONF = os.environ.get('STUN_PROBE_CONF', '/etc/turnserver.conf')
+STUN_PROBE_HOST = os.environ.get('STUN_PROBE_HOST', '') or None
+STUN_PROBE_TRANSPORTS = os.environ.get('STUN_PROBE_TRANSPORTS', 'udp,tcp,tls')
+STUN_PROBE_INTERVAL = float(os.environ.get('STUN_PROBE_INTERVAL', 5.0))
+STUN_PROBE_TIMEOUT = float(os.environ.get('STUN_PROBE_TIMEOUT', 1.0))
+STUN_PROBE_SLOW_THRESHOLD = float(os.environ.get('STUN_PROBE_SLOW_THRESHOLD', 0.25))
+STUN_PROBE_FAILURE_THRESHOLD = int(os.environ.get('STUN_PROBE_FAILURE_THRESHOLD', 2))
+SHARED_METRICS_ENABLED = _env_flag('SHARED_METRICS_ENABLED')
+SHARED_METRICS_SLOTS = int(os.environ.get('SHARED_METRICS_SLOTS', 4096))
+SHARED_METRICS_MAX_WORKERS = int(os.environ.get('SHARED_METRICS_MAX_WORKERS', 32))
+SHARED_METRICS_INTERVAL = float(os.environ.get('SHARED_METRICS_INTERVAL', 1.0))
+ICE_CONFIG_PATH = os.environ.get('ICE_CONFIG_PATH', DEFAULT_ICE_CONFIG_PATH)
+ICE_CONFIG_CHECK_INTERVAL = float(os.environ.get('ICE_CONFIG_CHECK_INTERVAL', 1.0))
+SIGNALING_ENABLED = _env_flag('SIGNALING_ENABLED')
+SIGNALING_MAX_SESSIONS = int(os.environ.get('SIGNALING_MAX_SESSIONS', 10000))
+SIGNALING_SESSION_TTL = float(os.environ.get('SIGNALING_SESSION_TTL', 300))
+SIGNALING_QUEUE_SIZE = int(os.environ.get('SIGNALING_QUEUE_SIZE', 256))
+SIGNALING_MAX_CANDIDATES = int(os.environ.get('SIGNALING_MAX_CANDIDATES', 128))
+
+# Allow alphanumeric, underscore, hyphen, dot
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9._-]+$')
+PLATFORM_PATTERN = re.compile(r'^[a-z0-9_-]{1,32}$')
+
+
+###############################################################################
+# METRICS
+###############################################################################
+
+metrics_registry = MetricsRegistry()
+
+request_counter = metrics_registry.register(Counter(
+    "turn_api_requests_total",
+    "HTTP requests by route template, method and status code",
+    ("route", "method", "status")
+))
+request_latency = metrics_registry.register(Histogram(
+    "turn_api_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("route",)
+))
+credentials_issued_counter = metrics_registry.register(Counter(
+    "turn_api_credentials_issued_total",
+    "TURN credentials issued by TTL bucket",
+    ("ttl_bucket",)
+))
+auth_failures_counter = metrics_registry.register(Counter(
+    "turn_api_auth_failures_total",
+    "Requests rejected by verify_api_key"
+))
+errors_counter = metrics_registry.register(Counter(
+    "turn_api_errors_total",
+    "Responses produced by the exception handlers",
+    ("handler", "status")
+))
+credential_cache_size_gauge = metrics_registry.register(Gauge(
+    "turn_api_credential_cache_entries",
+    "Credentials currently held in the credential cache"
+))
+credential_cache_counter = metrics_registry.register(Counter(
+    "turn_api_credential_cache_events_total",
+    "Credential cache lookups and evictions by outcome",
+    ("event",)
+))
+credentials_not_modified_counter = metrics_registry.register(Counter(
+    "turn_api_credentials_not_modified_total",
+    "Credential requests answered 304 Not Modified from If-None-Match"
+))
+response_encoding_counter = metrics_registry.register(Counter(
+    "turn_api_response_encoding_total",
+    "Credential and ICE configuration responses by Accept-negotiated encoding",
+    ("encoding",)
+))
+
+issuance_log_events_counter = metrics_registry.register(Counter(
+    "turn_api_issuance_log_events_total",
+    "Issuance event log records by outcome",
+    ("outcome",)
+))
+issuance_log_queue_gauge = metrics_registry.register(Gauge(
+    "turn_api_issuance_log_queue_depth",
+    "Issuance events waiting for the background writer"
+))
+quality_stats_sessions_gauge = metrics_registry.register(Gauge(
+    "turn_api_quality_stats_sessions",
+    "Call sessions held in the quality stats store"
+))
+quality_stats_samples_counter = metrics_registry.register(Counter(
+    "turn_api_quality_stats_samples_total",
+    "Client quality samples ingested"
+))
+quality_stats_buffer_gauge = metrics_registry.register(Gauge(
+    "turn_api_quality_stats_buffer_bytes",
+    "Bytes preallocated for quality stats ring buffers"
+))
+rate_limited_counter = metrics_registry.register(Counter(
+    "turn_api_rate_limited_total",
+    "Requests rejected with 429 by rate limit scope",
+    ("scope",)
+))
+rate_limit_buckets_gauge = metrics_registry.register(Gauge(
+    "turn_api_rate_limit_buckets",
+    "Token buckets currently tracked by rate limit scope",
+    ("scope",)
+))
+admission_shed_counter = metrics_registry.register(Counter(
+    "turn_api_admission_shed_total",
+    "Credential requests shed with 503 by admission control, by reason",
+    ("reason",)
+))
+admission_in_flight_gauge = metrics_registry.register(Gauge(
+    "turn_api_admission_in_flight",
+    "Credential requests currently holding an admission slot"
+))
+admission_queue_gauge = metrics_registry.register(Gauge(
+    "turn_api_admission_queue_depth",
+    "Credential requests waiting for an admission slot"
+))
+admission_latency_gauge = metrics_registry.register(Gauge(
+    "turn_api_admission_latency_seconds",
+    "Smoothed in-service latency of admitted credential requests",
+    aggregate="max"
+))
+signaling_sessions_gauge = metrics_registry.register(Gauge(
+    "turn_api_signaling_sessions",
+    "Session rooms held by the signaling hub"
+))
+signaling_peers_gauge = metrics_registry.register(Gauge(
+    "turn_api_signaling_peers",
+    "WebSocket connections attached to the signaling hub"
+))
+signaling_messages_counter = metrics_registry.register(Counter(
+    "turn_api_signaling_messages_total",
+    "Signaling messages received by type",
+    ("type",)
+))
+signaling_errors_counter = metrics_registry.register(Counter(
+    "turn_api_signaling_errors_total",
+    "Signaling messages rejected by error code",
+    ("code",)
+))
+signaling_backpressure_counter = metrics_registry.register(Counter(
+    "turn_api_signaling_backpressure_total",
+    "Slow peers closed and ICE candidates coalesced by the signaling hub",
+    ("event",)
+))
+signaling_setup_histogram = metrics_registry.register(Histogram(
+    "turn_api_signaling_setup_seconds",
+    "Time from offer to connected for sessions on the signaling hub",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+stun_probe_rtt_histogram = metrics_registry.register(Histogram(
+    "turn_api_stun_probe_rtt_seconds",
+    "STUN Binding round-trip time per coturn listener",
+    ("listener",),
+    buckets=RTT_BUCKETS
+))
+stun_probe_failures_counter = metrics_registry.register(Counter(
+    "turn_api_stun_probe_failures_total",
+    "Failed STUN Binding probes by listener and reason",
+    ("listener", "reason")
+))
+ready_gauge = metrics_registry.register(Gauge(
+    "turn_api_ready",
+    "Cached readiness served by /ready (1=ready, 0=not ready)",
+    aggregate="min"
+))
+ice_config_loads_counter = metrics_registry.register(Counter(
+    "turn_api_ice_config_loads_total",
+    "Loads of the static ICE configuration file by result",
+    ("result",)
+))
+turn_node_load_gauge = metrics_registry.register(Gauge(
+    "turn_api_turn_node_load",
+    "Last reported load (allocations) of each TURN pool node",
+    ("node",),
+    aggregate="max"
+))
+turn_node_healthy_gauge = metrics_registry.register(Gauge(
+    "turn_api_turn_node_healthy",
+    "1 if the TURN pool node passed its last probe, else 0",
+    ("node",),
+    aggregate="min"
+))
+shared_metrics_slots_gauge = metrics_registry.register(Gauge(
+    "turn_api_shared_metrics_slots",
+    "Shared-memory metric slots by state (used/free)",
+    ("state",),
+    aggregate="max"
+))
+shared_metrics_workers_gauge = metrics_registry.register(Gauge(
+    "turn_api_shared_metrics_workers",
+    "Live workers publishing into shared-memory metrics",
+    aggregate="max"
+))
+
+# When SHARED_METRICS_ENABLED is set, the region is allocated here, at
+# import: with preload_app that is the gunicorn master, before the fork.
+# Workers publish into their own row and /metrics serves the sum
+shared_metrics: Optional[SharedMetrics] = (
+    SharedMetrics(SHARED_METRICS_SLOTS, SHARED_METRICS_MAX_WORKERS)
+    if SHARED_METRICS_ENABLED else None
+)
+
+
+def _collect_shared_metrics_metrics() -> None:
+    """Mirror shared-memory region usage into the metrics registry"""
+    if shared_metrics is None:
+        return
+    stats = shared_metrics.stats()
+    shared_metrics_slots_gauge.set(stats["used"], "used")
+    shared_metrics_slots_gauge.set(stats["slots"] - stats["used"], "free")
+    shared_metrics_workers_gauge.set(stats["workers"])
+
+
+metrics_registry.add_collector(_collect_shared_metrics_metrics)
+
+# (upper bound in seconds, label) for turn_api_credentials_issued_total
+TTL_BUCKETS = ((300, "5m"), (3600, "1h"), (21600, "6h"), (86400, "24h"))
+
+
+def ttl_bucket_label(ttl: int) -> str:
+    """Map a TTL to its turn_api_credentials_issued_total bucket label"""
+    for bound, label in TTL_BUCKETS:
+        if ttl <= bound:
+            return label
+    return "over_24h"
+
+
+###############################################################################
+# ISSUANCE EVENT LOG
+###############################################################################
+
+# When ISSUANCE_LOG_PATH is set, issuance and auth-failure events go to this
+# queued NDJSON stream instead of synchronous per-request log lines
+issuance_log = IssuanceEventLog(
+    path=ISSUANCE_LOG_PATH,
+    max_queue=ISSUANCE_LOG_QUEUE_SIZE,
+    max_bytes=ISSUANCE_LOG_MAX_BYTES,
+    backup_count=ISSUANCE_LOG_BACKUPS,
+    sample_rate=ISSUANCE_LOG_SAMPLE_RATE
+)
+
+
+def _collect_issuance_log_metrics() -> None:
+    """Mirror issuance_log counters into the metrics registry"""
+    stats = issuance_log.stats()
+    issuance_log_queue_gauge.set(stats["queued"])
+    for outcome in ("written", "dropped", "sampled_out"):
+        issuance_log_events_counter.set(stats[outcome], outcome)
+
+
+metrics_registry.add_collector(_collect_issuance_log_metrics)
+
+
+def api_key_fingerprint(api_key: Optional[str]) -> str:
+    """Short SHA-256 fingerprint of an API key, safe to log"""
+    if not api_key:
+        return "none"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+###############################################################################
+# QUALITY STATS
+###############################################################################
+
+# Per-session columnar ring buffers of SDK RTCStatsReport samples; memory is
+# bounded by STATS_WINDOW_SAMPLES x STATS_MAX_SESSIONS
+quality_stats = QualityStatsStore(
+    window=STATS_WINDOW_SAMPLES,
+    max_sessions=STATS_MAX_SESSIONS,
+    idle_seconds=STATS_SESSION_IDLE
+)
+
+# Incremental 1s/1m/1h rollups per fleet, platform and TURN node; dashboards
+# query these instead of the raw samples
+quality_rollups = QualityRollups(max_groups=STATS_ROLLUP_MAX_GROUPS)
+
+
+def _collect_quality_stats_metrics() -> None:
+    """Mirror quality_stats counters into the metrics registry"""
+    stats = quality_stats.stats()
+    quality_stats_sessions_gauge.set(stats["sessions"])
+    quality_stats_samples_counter.set(stats["samples_received"])
+    quality_stats_buffer_gauge.set(stats["buffer_bytes"])
+
+
+metrics_registry.add_collector(_collect_quality_stats_metrics)
+
+
+###############################################################################
+# SIGNALING HUB
+###############################################################################
+
+# Enabled by SIGNALING_ENABLED; session rooms are per process, so both peers
+# of a call must reach the same worker
+signaling_hub = SignalingHub(
+    max_sessions=SIGNALING_MAX_SESSIONS,
+    session_ttl=SIGNALING_SESSION_TTL,
+    queue_size=SIGNALING_QUEUE_SIZE,
+    max_candidates=SIGNALING_MAX_CANDIDATES,
+    on_setup=signaling_setup_histogram.observe
+)
+
+
+def _collect_signaling_metrics() -> None:
+    """Mirror signaling_hub counters into the metrics registry"""
+    stats = signaling_hub.stats()
+    signaling_sessions_gauge.set(stats["sessions"])
+    signaling_peers_gauge.set(stats["peers"])
+    for message_type, count in stats["messages"].items():
+        signaling_messages_counter.set(count, message_type)
+    for code, count in stats["errors"].items():
+        signaling_errors_counter.set(count, code)
+    signaling_backpressure_counter.set(stats["slow_consumers"], "slow_consumer_closed")
+    signaling_backpressure_counter.set(stats["candidates_coalesced"], "candidate_coalesced")
+
+
+metrics_registry.add_collector(_collect_signaling_metrics)
 
 
 ###############################################################################
@@ -54,6 +458,12 @@ class TURNCredentials(BaseModel):
     password: str = Field(..., description="HMAC-SHA1 generated password")
     ttl: int = Field(..., ge=60, le=86400, description="Credential lifetime in seconds")
     uris: List[str] = Field(..., description="TURN server URIs")
+    refresh_at: Optional[int] = Field(
+        None, description="UNIX time to switch to next (rotate requests only)"
+    )
+    next: Optional["TURNCredentials"] = Field(
+        None, description="Pre-minted successor, valid now; its ttl counts from refresh_at"
+    )
 
     class Config:
         json_schema_extra = {
@@ -70,22 +480,109 @@ class TURNCredentials(BaseModel):
         }
 
 
+TURNCredentials.model_rebuild()
+
+
 class CredentialsRequest(BaseModel):
     """Request model for TURN credentials"""
     username: str = Field(..., min_length=1, max_length=128, description="Username")
     ttl: Optional[int] = Field(DEFAULT_TTL, ge=MIN_TTL, le=MAX_TTL, description="TTL in seconds")
+    rotate: bool = Field(False, description="Also return a pre-minted next credential and refresh_at")
 
     @validator('username')
     def validate_username(cls, v):
         """Validate username contains only safe characters"""
         if not v or len(v.strip()) == 0:
             raise ValueError('Username cannot be empty')
-        # Allow alphanumeric, underscore, hyphen, dot
-        import re
-        if not re.match(r'^[a-zA-Z0-9._-]+$', v):
+        if not USERNAME_PATTERN.match(v):
             raise ValueError('Username contains invalid characters')
         return v
 
+    @validator('ttl', pre=True)
+    def default_null_ttl(cls, v):
+        """Treat an explicit null TTL like an omitted one"""
+        return DEFAULT_TTL if v is None else v
+
+
+class BatchCredentialsRequest(BaseModel):
+    """Request model for batch TURN credentials"""
+    requests: List[CredentialsRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Usernames and TTLs to generate credentials for"
+    )
+
+
+class BatchCredentialsResponse(BaseModel):
+    """Batch TURN credentials response model"""
+    credentials: List[TURNCredentials] = Field(
+        ...,
+        description="Generated credentials, in request order"
+    )
+
+
+class StatsReportBatch(BaseModel):
+    """Batched RTCStatsReport samples for one call session"""
+    session_id: str = Field(..., min_length=1, max_length=128, description="Call session identifier")
+    platform: str = Field("unknown", description="Client platform, e.g. android or ios")
+    turn_node: str = Field("", max_length=255, description="TURN node relaying the session, if any")
+    samples: List[List[float]] = Field(
+        ...,
+        min_length=1,
+        max_length=STATS_MAX_BATCH,
+        description="Samples as positional arrays: " + ", ".join(FIELD_NAMES)
+    )
+
+    @validator('session_id')
+    def validate_session_id(cls, v):
+        """Validate session id contains only safe characters"""
+        if not USERNAME_PATTERN.match(v):
+            raise ValueError('Session id contains invalid characters')
+        return v
+
+    @validator('platform')
+    def validate_platform(cls, v):
+        """Keep platform labels short and lowercase"""
+        if not PLATFORM_PATTERN.match(v):
+            raise ValueError('Platform must be 1-32 lowercase letters, digits, _ or -')
+        return v
+
+
+class StatsIngestResponse(BaseModel):
+    """Stats ingestion response"""
+    accepted: int
+    fields: List[str]
+
+
+class SessionStatsResponse(BaseModel):
+    """Recent samples of one call session"""
+    session_id: str
+    platform: str
+    turn_node: str
+    fields: List[str]
+    samples: List[List[float]] = Field(
+        ...,
+        description="Samples as positional arrays in fields order, oldest first"
+    )
+
+
+class QualityRollupResponse(BaseModel):
+    """Time-bucketed quality rollups"""
+    resolution: str
+    group_by: str
+    groups: Dict[str, List[Dict[str, Any]]] = Field(
+        ...,
+        description="Buckets per group value, oldest first"
+    )
+
+
+class QualitySummaryResponse(BaseModel):
+    """Quality averages and percentiles over a trailing window"""
+    group_by: str
+    window: int
+    groups: Dict[str, Dict[str, Any]]
+
 
 class HealthResponse(BaseModel):
     """Health check response"""
@@ -94,6 +591,24 @@ class HealthResponse(BaseModel):
     timestamp: datetime
 
 
+class ListenerProbeStatus(BaseModel):
+    """Latest STUN probe outcome for one coturn listener"""
+    listener: str = Field(..., description="transport/port, e.g. udp/3478")
+    host: str
+    status: str = Field(..., description="up, slow, down or pending")
+    rtt_ms: Optional[float] = Field(None, description="Last successful round-trip time")
+    consecutive_failures: int
+    last_failure: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response"""
+    ready: bool
+    checked_at: Optional[float] = Field(None, description="UNIX time of the last probe round")
+    reason: Optional[str] = None
+    listeners: List[ListenerProbeStatus] = []
+
+
 class APIInfo(BaseModel):
     """API information"""
     service: str
@@ -111,7 +626,11 @@ api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 async def verify_api_key(api_key: str = Depends(api_key_header)):
     """Verify API key if configured"""
     if API_KEY and api_key != API_KEY:
-        logger.warning(f"Invalid API key attempt from {api_key}")
+        auth_failures_counter.inc()
+        if issuance_log.enabled:
+            issuance_log.emit("auth_failure", key_fp=api_key_fingerprint(api_key))
+        else:
+            logger.warning(f"Invalid API key attempt (key fingerprint={api_key_fingerprint(api_key)})")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
@@ -119,20 +638,454 @@ async def verify_api_key(api_key: str = Depends(api_key_header)):
     return api_key
 
 
+###############################################################################
+# RATE LIMITING
+###############################################################################
+
+# Enabled by RATE_LIMIT_ENABLED; per process, so each gunicorn worker
+# enforces its own buckets
+user_rate_limiter = TokenBucketLimiter(
+    RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST, RATE_LIMIT_MAX_BUCKETS
+)
+key_rate_limiter = TokenBucketLimiter(
+    RATE_LIMIT_KEY_RATE, RATE_LIMIT_KEY_BURST, RATE_LIMIT_MAX_BUCKETS
+)
+
+
+def _collect_rate_limit_metrics() -> None:
+    """Mirror rate limiter counters into the metrics registry"""
+    for scope, limiter in (("user", user_rate_limiter), ("api_key", key_rate_limiter)):
+        stats = limiter.stats()
+        rate_limited_counter.set(stats["rejected"], scope)
+        rate_limit_buckets_gauge.set(stats["buckets"], scope)
+
+
+metrics_registry.add_collector(_collect_rate_limit_metrics)
+
+
+def enforce_rate_limits(usernames: List[str], api_key: Optional[str]) -> None:
+    """
+    Charge one token per credential to the API key and one to each username.
+
+    The key is only limited when one was sent, so deployments without
+    API_KEY are not throttled as a single shared client. Every bucket is
+    checked before any is charged: a rejected request (or batch) takes
+    no tokens and counts as one rejection, on the key's scope if the key
+    is out of tokens and on the user scope otherwise.
+
+    Args:
+        usernames: Usernames credentials are requested for
+        api_key: X-API-Key header value, if any
+
+    Raises:
+        HTTPException: 429 with Retry-After when any bucket is empty
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    now = time.monotonic()
+    costs: Dict[str, int] = {}
+    for username in usernames:
+        costs[username] = costs.get(username, 0) + 1
+
+    limiter = key_rate_limiter
+    retry_after = key_rate_limiter.peek(api_key, len(usernames), now) if api_key else 0.0
+    if not retry_after:
+        limiter = user_rate_limiter
+        for username, cost in costs.items():
+            retry_after = max(retry_after, user_rate_limiter.peek(username, cost, now))
+    if retry_after:
+        limiter.reject()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))}
+        )
+
+    if api_key:
+        key_rate_limiter.acquire(api_key, len(usernames), now)
+    for username, cost in costs.items():
+        user_rate_limiter.acquire(username, cost, now)
+
+
+###############################################################################
+# ADMISSION CONTROL
+###############################################################################
+
+# Enabled by ADMISSION_ENABLED; per process like the rate limiters. Only
+# ADMISSION_PATHS are guarded, so /health and /metrics always answer
+ADMISSION_PATHS = ("/turn-credentials", "/ice-config")
+
+admission_controller = AdmissionController(
+    max_concurrency=ADMISSION_MAX_CONCURRENCY,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    target_latency=ADMISSION_TARGET_LATENCY
+)
+
+
+def _active_admission_controller() -> Optional[AdmissionController]:
+    return admission_controller if ADMISSION_ENABLED else None
+
+
+def _collect_admission_metrics() -> None:
+    """Mirror admission controller state into the metrics registry"""
+    stats = admission_controller.stats()
+    for reason, count in stats["shed"].items():
+        admission_shed_counter.set(count, reason)
+    admission_in_flight_gauge.set(stats["in_flight"])
+    admission_queue_gauge.set(stats["queued"])
+    admission_latency_gauge.set(stats["latency"])
+
+
+metrics_registry.add_collector(_collect_admission_metrics)
+
+
 ###############################################################################
 # HELPER FUNCTIONS
 ###############################################################################
 
-def generate_turn_credentials(username: str, ttl: int = DEFAULT_TTL) -> TURNCredentials:
+class MintedCredential(NamedTuple):
+    """Lightweight credential record used on the issuance hot path"""
+    username: str
+    password: str
+    ttl: int
+    uris: Tuple[str, ...]
+
+
+class RotatingCredential(NamedTuple):
+    """Current credential plus its pre-minted successor"""
+    current: MintedCredential
+    next: MintedCredential
+    refresh_at: int
+
+
+def credential_expiry(credentials: MintedCredential) -> int:
+    """UNIX expiry embedded in a credential's TURN username"""
+    return int(credentials.username.partition(":")[0])
+
+
+class CredentialMinter:
     """
-    Generate time-limited TURN credentials using HMAC-SHA1.
+    Credential-minting engine built once at startup.
+
+    Everything that does not depend on the request is computed in the
+    constructor: the keyed HMAC-SHA1 object (hmac.new runs the key
+    schedule once) and the immutable URI tuple (also kept pre-serialized
+    as JSON for fast responses). Minting a credential then costs one
+    HMAC state copy, one short update and one base64 encode.
+    """
+
+    __slots__ = ("_mac", "uris", "uris_json")
+
+    def __init__(self, secret: str, server: str, port: int):
+        """
+        Args:
+            secret: Shared secret configured as static-auth-secret in coturn
+            server: TURN server host used in the URIs
+            port: TURN server port for the plain UDP/TCP URIs
+        """
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha1)
+        self.uris: Tuple[str, ...] = (
+            f"turn:{server}:{port}?transport=udp",
+            f"turn:{server}:{port}?transport=tcp",
+            f"turns:{server}:5349?transport=tcp",
+        )
+        self.uris_json: str = json.dumps(list(self.uris), separators=(",", ":"))
+
+    def sign(self, turn_username: str) -> str:
+        """
+        Compute the base64 HMAC-SHA1 password for a TURN username.
+
+        Args:
+            turn_username: Username in coturn's timestamp:username form
+
+        Returns:
+            str: Base64-encoded HMAC-SHA1 digest
+        """
+        mac = self._mac.copy()
+        mac.update(turn_username.encode())
+        return binascii.b2a_base64(mac.digest(), newline=False).decode()
+
+    def mint(
+        self,
+        username: str,
+        ttl: int,
+        now: Optional[float] = None,
+        uris: Optional[Tuple[str, ...]] = None
+    ) -> MintedCredential:
+        """
+        Mint a credential that expires ttl seconds from now.
+
+        Args:
+            username: The username to generate credentials for
+            ttl: Time to live in seconds
+            now: Override for the current UNIX time (default: time.time())
+            uris: URIs to hand out instead of the single configured server
+
+        Returns:
+            MintedCredential: Username, password, ttl, and URIs
+        """
+        expiry = int(time.time() if now is None else now) + ttl
+        turn_username = f"{expiry}:{username}"
+        return MintedCredential(turn_username, self.sign(turn_username), ttl, uris or self.uris)
+
+
+class CredentialCache:
+    """
+    Bounded LRU cache of minted credentials keyed by expiry bucket.
+
+    Entries are keyed by (username, ttl, bucket) where bucket is the current
+    time divided by bucket_seconds, so a client that re-fetches within the
+    same bucket receives the identical credential. A cached credential's
+    remaining lifetime is therefore up to bucket_seconds shorter than ttl.
+    Entries from past buckets are never hit again and age out through LRU
+    eviction.
+    """
+
+    def __init__(self, max_size: int, bucket_seconds: int):
+        """
+        Args:
+            max_size: Maximum number of cached credentials
+            bucket_seconds: Width of the expiry bucket in seconds
+        """
+        self.max_size = max_size
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], MintedCredential]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_mint(
+        self,
+        username: str,
+        ttl: int,
+        minter: CredentialMinter,
+        now: Optional[float] = None,
+        pool: Optional[TurnServerPool] = None
+    ) -> MintedCredential:
+        """
+        Return the cached credential for this bucket, minting it on a miss.
+
+        With a TURN pool, URIs are selected only when minting, so a hit
+        does not count an assignment against a node. A cached credential
+        whose primary node is no longer selectable is treated as a miss
+        and re-minted with a fresh selection.
+
+        Args:
+            username: The username to generate credentials for
+            ttl: Time to live in seconds
+            minter: Engine used to mint on a cache miss
+            now: Override for the current UNIX time (default: time.time())
+            pool: TURN pool to select URIs from (default: the minter's URIs)
+
+        Returns:
+            MintedCredential: Cached or freshly minted credential
+        """
+        if now is None:
+            now = time.time()
+        key = (username, ttl, int(now // self.bucket_seconds))
+
+        with self._lock:
+            credential = self._entries.get(key)
+            if credential is not None and (pool is None or pool.is_current(credential.uris)):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return credential
+
+        uris = pool.select_uris() if pool is not None else None
+        credential = minter.mint(username, ttl, now, uris)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = credential
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return credential
+
+    def clear(self) -> None:
+        """Drop every cached credential and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of cache counters.
+
+        Returns:
+            Dict with size, max_size, hits, misses, and evictions
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+credential_minter = CredentialMinter(TURN_SECRET, TURN_SERVER, TURN_PORT)
+credential_cache = CredentialCache(CREDENTIAL_CACHE_SIZE, CREDENTIAL_CACHE_BUCKET)
+
+
+def _collect_credential_cache_metrics() -> None:
+    """Mirror credential_cache counters into the metrics registry"""
+    stats = credential_cache.stats()
+    credential_cache_size_gauge.set(stats["size"])
+    credential_cache_counter.set(stats["hits"], "hit")
+    credential_cache_counter.set(stats["misses"], "miss")
+    credential_cache_counter.set(stats["evictions"], "eviction")
+
+
+metrics_registry.add_collector(_collect_credential_cache_metrics)
+
+# When TURN_SERVERS lists several coturn nodes sharing TURN_SECRET, URIs are
+# ordered per credential by node load instead of naming TURN_SERVER alone
+turn_pool: Optional[TurnServerPool] = (
+    TurnServerPool(
+        parse_turn_servers(TURN_SERVERS, TURN_PORT),
+        prometheus_load_source(TURN_POOL_METRICS_PORT),
+        refresh_interval=TURN_POOL_REFRESH_INTERVAL,
+        max_nodes=TURN_POOL_MAX_SERVERS
+    )
+    if TURN_SERVERS else None
+)
+
+
+# When STUN_PROBE_ENABLED is set, every listener in STUN_PROBE_CONF is
+# probed in the background and /ready serves the cached verdict
+stun_prober: Optional[StunProber] = (
+    prober_from_conf(
+        STUN_PROBE_CONF,
+        host=STUN_PROBE_HOST,
+        transports=[t.strip() for t in STUN_PROBE_TRANSPORTS.split(",") if t.strip()],
+        interval=STUN_PROBE_INTERVAL,
+        timeout=STUN_PROBE_TIMEOUT,
+        slow_threshold=STUN_PROBE_SLOW_THRESHOLD,
+        failure_threshold=STUN_PROBE_FAILURE_THRESHOLD,
+        rtt_histogram=stun_probe_rtt_histogram
+    )
+    if STUN_PROBE_ENABLED else None
+)
+
+
+def _collect_stun_probe_metrics() -> None:
+    """Mirror STUN prober failures and readiness into the metrics registry"""
+    if stun_prober is None:
+        return
+    for listener, reason, count in stun_prober.failure_counts():
+        if count:
+            stun_probe_failures_counter.set(count, listener, reason)
+    ready_gauge.set(1 if stun_prober.status()["ready"] else 0)
+
+
+metrics_registry.add_collector(_collect_stun_probe_metrics)
+
+
+# Static part of /ice-config: parsed and pre-serialized once, reloaded
+# when ICE_CONFIG_PATH changes; with preload the master loads it once
+ice_config = IceConfig(ICE_CONFIG_PATH, ICE_CONFIG_CHECK_INTERVAL)
+ice_config.load()
+
+
+def _collect_ice_config_metrics() -> None:
+    """Mirror ICE configuration loads into the metrics registry"""
+    ice_config_loads_counter.set(ice_config.reloads, "ok")
+    ice_config_loads_counter.set(ice_config.errors, "error")
+
+
+metrics_registry.add_collector(_collect_ice_config_metrics)
+
+
+def _collect_turn_pool_metrics() -> None:
+    """Mirror TURN pool node state into the metrics registry"""
+    if turn_pool is None:
+        return
+    for node in turn_pool.snapshot():
+        turn_node_load_gauge.set(node["load"], node["node"])
+        turn_node_healthy_gauge.set(1 if node["healthy"] else 0, node["node"])
+
+
+metrics_registry.add_collector(_collect_turn_pool_metrics)
+
+
+def _issue_credentials(username: str, ttl: int) -> MintedCredential:
+    """
+    Mint TURN credentials without configuration checks or logging.
+
+    Shared by the single and batch issuance paths so that a batch pays for
+    validation and logging once rather than once per credential. When
+    CREDENTIAL_CACHE_ENABLED is set, repeated requests within the same
+    expiry bucket are served from credential_cache. When turn_pool is
+    configured, the URIs list the least-loaded healthy node first; a
+    cached credential is only reused while its first node stays healthy.
+    When HTTP_CACHE_ENABLED is set, credentials are minted as of the start
+    of the current expiry bucket, so every worker returns the same
+    credential (and ETag) for a username and TTL until the bucket ends.
+
+    Args:
+        username: The username to generate credentials for
+        ttl: Time to live in seconds
+
+    Returns:
+        MintedCredential with username, password, ttl, and URIs
+    """
+    credentials_issued_counter.inc(ttl_bucket_label(ttl))
+    now = None
+    if HTTP_CACHE_ENABLED:
+        now = time.time() // credential_cache.bucket_seconds * credential_cache.bucket_seconds
+    if CREDENTIAL_CACHE_ENABLED:
+        return credential_cache.get_or_mint(username, ttl, credential_minter, now, turn_pool)
+    uris = turn_pool.select_uris() if turn_pool is not None else None
+    return credential_minter.mint(username, ttl, now, uris)
+
+
+def rotate_credentials(current: MintedCredential) -> RotatingCredential:
+    """
+    Pre-mint the successor of a credential for local rotation.
+
+    refresh_at lies CREDENTIAL_ROTATION_OVERLAP seconds (at most half the
+    TTL) before the current credential expires. The successor is minted as
+    of refresh_at, so it stays valid for a full TTL after the switch; coturn
+    only checks the expiry, so it is accepted from the moment it is issued
+    and both credentials work during the overlap. Minting is deterministic,
+    so a cached or bucket-aligned current credential always yields the same
+    successor.
+
+    Args:
+        current: Credential being returned to the client
+
+    Returns:
+        RotatingCredential with current, next and refresh_at
+    """
+    expiry = credential_expiry(current)
+    refresh_at = expiry - min(CREDENTIAL_ROTATION_OVERLAP, current.ttl // 2)
+    username = current.username.partition(":")[2]
+    successor = credential_minter.mint(username, current.ttl, refresh_at, current.uris)
+    return RotatingCredential(current, successor, refresh_at)
+
+
+def issue_credentials(
+    username: str,
+    ttl: int = DEFAULT_TTL,
+    rotate: bool = False
+) -> Union[MintedCredential, RotatingCredential]:
+    """
+    Issue time-limited TURN credentials without building a response model.
 
     Args:
         username: The username to generate credentials for
         ttl: Time to live in seconds (default: 86400)
+        rotate: Also pre-mint the next credential (see rotate_credentials)
 
     Returns:
-        TURNCredentials object with username, password, ttl, and URIs
+        MintedCredential with username, password, ttl, and URIs, or a
+        RotatingCredential when rotate is set
 
     Raises:
         ValueError: If TURN_SECRET is not configured
@@ -141,35 +1094,427 @@ def generate_turn_credentials(username: str, ttl: int = DEFAULT_TTL) -> TURNCred
         logger.error("TURN_SECRET environment variable not set")
         raise ValueError("TURN server secret not configured")
 
-    # Calculate timestamp for expiry
-    timestamp = int(datetime.now().timestamp()) + ttl
-    turn_username = f"{timestamp}:{username}"
+    credentials = _issue_credentials(username, ttl)
+    rotating = rotate_credentials(credentials) if rotate else None
+
+    if issuance_log.enabled:
+        fields = {"next_turn_username": rotating.next.username} if rotating else {}
+        issuance_log.emit(
+            "issued",
+            sampled=True,
+            user=username,
+            ttl=ttl,
+            turn_username=credentials.username,
+            source="single",
+            **fields
+        )
+    else:
+        logger.info(f"Generated credentials for user={username}, ttl={ttl}s")
+
+    return rotating or credentials
+
 
-    # Generate HMAC-SHA1 signature
-    hmac_obj = hmac.new(
-        TURN_SECRET.encode(),
-        turn_username.encode(),
-        hashlib.sha1
+def _credentials_model(minted: MintedCredential) -> TURNCredentials:
+    return TURNCredentials(
+        username=minted.username,
+        password=minted.password,
+        ttl=minted.ttl,
+        uris=list(minted.uris)
     )
-    password = base64.b64encode(hmac_obj.digest()).decode()
 
-    # Build TURN server URIs
-    uris = [
-        f"turn:{TURN_SERVER}:{TURN_PORT}?transport=udp",
-        f"turn:{TURN_SERVER}:{TURN_PORT}?transport=tcp",
-        f"turns:{TURN_SERVER}:5349?transport=tcp"
-    ]
 
-    logger.info(f"Generated credentials for user={username}, ttl={ttl}s")
+def generate_turn_credentials(
+    username: str,
+    ttl: int = DEFAULT_TTL,
+    rotate: bool = False
+) -> TURNCredentials:
+    """
+    Generate time-limited TURN credentials using HMAC-SHA1.
 
-    return TURNCredentials(
-        username=turn_username,
-        password=password,
-        ttl=ttl,
-        uris=uris
+    Args:
+        username: The username to generate credentials for
+        ttl: Time to live in seconds (default: 86400)
+        rotate: Also include the pre-minted next credential and refresh_at
+
+    Returns:
+        TURNCredentials object with username, password, ttl, and URIs
+
+    Raises:
+        ValueError: If TURN_SECRET is not configured
+    """
+    minted = issue_credentials(username, ttl, rotate)
+    if isinstance(minted, RotatingCredential):
+        credentials = _credentials_model(minted.current)
+        credentials.refresh_at = minted.refresh_at
+        credentials.next = _credentials_model(minted.next)
+        return credentials
+    return _credentials_model(minted)
+
+
+_encode_json_string = json.encoder.encode_basestring
+
+
+@lru_cache(maxsize=256)
+def _encode_uris(uris: Tuple[str, ...]) -> str:
+    """Compact JSON for a URI tuple; a pool yields only a few distinct orderings"""
+    return json.dumps(list(uris), separators=(",", ":"))
+
+
+def _credential_uris_json(credentials: MintedCredential) -> str:
+    if credentials.uris is credential_minter.uris:
+        return credential_minter.uris_json
+    return _encode_uris(credentials.uris)
+
+
+def render_credentials_json(credentials: Union[MintedCredential, RotatingCredential]) -> bytes:
+    """
+    Serialize credentials to the exact JSON body FastAPI produces.
+
+    Field order and compact separators match TURNCredentials serialized
+    through response_model, so clients cannot tell the two modes apart.
+
+    Args:
+        credentials: Minted credentials (or a rotating pair) to serialize
+
+    Returns:
+        bytes: UTF-8 encoded JSON document
+    """
+    if isinstance(credentials, RotatingCredential):
+        return (
+            render_credentials_json(credentials.current)[:-1]
+            + f',"refresh_at":{credentials.refresh_at},"next":'.encode()
+            + render_credentials_json(credentials.next)
+            + b"}"
+        )
+    return (
+        f'{{"username":{_encode_json_string(credentials.username)},'
+        f'"password":"{credentials.password}",'
+        f'"ttl":{credentials.ttl},'
+        f'"uris":{_credential_uris_json(credentials)}}}'
+    ).encode()
+
+
+@lru_cache(maxsize=None)
+def _encoded_keys(codec: Codec) -> Tuple[bytes, ...]:
+    """Credential map headers and keys, encoded once per codec"""
+    return (
+        codec.map_header(4),
+        codec.map_header(6),
+        *(codec.encode(key) for key in ("username", "password", "ttl", "refresh_at", "next")),
     )
 
 
+@lru_cache(maxsize=256)
+def _encoded_uris(codec: Codec, uris: Tuple[str, ...]) -> bytes:
+    # The minter's URIs, or one of the pool's few combinations
+    return codec.encode("uris") + codec.encode(uris)
+
+
+def render_credentials(
+    credentials: Union[MintedCredential, RotatingCredential],
+    codec: Optional[Codec] = None
+) -> bytes:
+    """
+    Serialize credentials in the negotiated encoding.
+
+    Binary bodies decode to the JSON document, keys in the same order; as
+    with the JSON rendering, keys and URI lists are encoded once and only
+    the username, password and numbers per call.
+
+    Args:
+        credentials: Minted credentials (or a rotating pair) to serialize
+        codec: Binary encoding, or None for JSON
+
+    Returns:
+        bytes: Response body
+    """
+    if codec is None:
+        return render_credentials_json(credentials)
+    pair, rotating, username, password, ttl, refresh_at, next_key = _encoded_keys(codec)
+    encode = codec.encode
+
+    def fields(credential: MintedCredential) -> bytes:
+        return (
+            username + encode(credential.username)
+            + password + encode(credential.password)
+            + ttl + encode(credential.ttl)
+            + _encoded_uris(codec, credential.uris)
+        )
+
+    if isinstance(credentials, RotatingCredential):
+        return (
+            rotating + fields(credentials.current)
+            + refresh_at + encode(credentials.refresh_at)
+            + next_key + pair + fields(credentials.next)
+        )
+    return pair + fields(credentials)
+
+
+def negotiate_encoding(accept: Optional[str]) -> Optional[Codec]:
+    """
+    Negotiate the response encoding from an Accept header and count it.
+
+    Args:
+        accept: Accept request header, if sent
+
+    Returns:
+        The binary Codec to use, or None for JSON
+    """
+    codec = negotiate(accept)
+    response_encoding_counter.inc(codec.name if codec is not None else "json")
+    return codec
+
+
+def _media_type(codec: Optional[Codec]) -> str:
+    return codec.media_type if codec is not None else "application/json"
+
+
+# OpenAPI: the same document is also served in the binary encodings
+BINARY_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    200: {"content": {MSGPACK_MEDIA_TYPE: {}, CBOR_MEDIA_TYPE: {}}}
+}
+
+
+def credential_cache_headers(
+    credentials: Union[MintedCredential, RotatingCredential],
+    now: Optional[float] = None,
+    body: Optional[bytes] = None
+) -> Dict[str, str]:
+    """
+    HTTP cache headers for a credential response.
+
+    The ETag is a hash of the exact response body, so each encoding of
+    the same credential has its own; max-age is the credential's
+    remaining lifetime, taken from the expiry embedded in its TURN
+    username. A rotating pair is cacheable until refresh_at.
+
+    Args:
+        credentials: Credential (or rotating pair) being returned
+        now: Override for the current UNIX time (default: time.time())
+        body: Response body, if not the JSON rendering of credentials
+
+    Returns:
+        Dict with ETag, Cache-Control and Vary
+    """
+    if body is None:
+        body = render_credentials_json(credentials)
+    digest = hashlib.blake2b(body, digest_size=12).digest()
+    if isinstance(credentials, RotatingCredential):
+        expiry = credentials.refresh_at
+    else:
+        expiry = credential_expiry(credentials)
+    remaining = max(0, expiry - int(time.time() if now is None else now))
+    return {
+        "ETag": f'"{base64.urlsafe_b64encode(digest).decode()}"',
+        "Cache-Control": f"private, max-age={remaining}",
+        "Vary": "X-API-Key, Accept",
+    }
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+
+    Args:
+        if_none_match: Header value ("*" or a comma-separated list of tags)
+        etag: Current entity tag, quoted
+
+    Returns:
+        bool: True if the client already holds this representation
+    """
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_credentials_request(body: bytes) -> CredentialsRequest:
+    """
+    Parse a POST /turn-credentials body.
+
+    In FAST_RESPONSE_MODE a well-formed body (string username matching
+    USERNAME_PATTERN, integer TTL in range) is accepted without running
+    pydantic. Anything else goes through CredentialsRequest validation,
+    and errors are raised exactly as FastAPI reports an invalid body, so
+    both modes answer invalid input with the same 422.
+
+    Args:
+        body: Raw request body
+
+    Returns:
+        CredentialsRequest: Validated (or, on the fast path, constructed) request
+
+    Raises:
+        RequestValidationError: If the body is missing, not JSON or invalid
+    """
+    if not body:
+        raise RequestValidationError(
+            [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}]
+        )
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError(
+            [{
+                "type": "json_invalid",
+                "loc": ("body", e.pos),
+                "msg": "JSON decode error",
+                "input": {},
+                "ctx": {"error": e.msg},
+            }],
+            body=e.doc
+        )
+
+    if FAST_RESPONSE_MODE and type(data) is dict and data.keys() <= {"username", "ttl"}:
+        username = data.get("username")
+        ttl = data.get("ttl", DEFAULT_TTL)
+        if (
+            type(username) is str
+            and len(username) <= 128
+            and USERNAME_PATTERN.match(username)
+            and type(ttl) is int
+            and MIN_TTL <= ttl <= MAX_TTL
+        ):
+            return CredentialsRequest.model_construct(username=username, ttl=ttl)
+
+    try:
+        return CredentialsRequest.model_validate(data, from_attributes=True)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=data
+        )
+
+
+async def stream_batch_credentials(
+    requests: List[CredentialsRequest],
+    codec: Optional[Codec] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream a batch credentials response body as JSON or a binary encoding.
+
+    Credentials are minted lazily and flushed every BATCH_STREAM_CHUNK
+    entries, so large batches never hold the whole body in memory. The
+    binary encodings stream too: their array header only needs the
+    number of requests, which is known upfront.
+
+    Args:
+        requests: Validated credential requests, in response order
+        codec: Binary encoding, or None for JSON
+
+    Yields:
+        bytes: Consecutive fragments of a BatchCredentialsResponse document
+    """
+    if codec is None:
+        chunk = [b'{"credentials":[']
+    else:
+        chunk = [codec.map_header(1) + codec.encode("credentials") + codec.array_header(len(requests))]
+    for index, item in enumerate(requests):
+        if index and codec is None:
+            chunk.append(b",")
+        credentials = _issue_credentials(item.username, item.ttl)
+        rotating = rotate_credentials(credentials) if item.rotate else None
+        fields = {"next_turn_username": rotating.next.username} if rotating else {}
+        issuance_log.emit(
+            "issued",
+            sampled=True,
+            user=item.username,
+            ttl=item.ttl,
+            turn_username=credentials.username,
+            source="batch",
+            **fields
+        )
+        chunk.append(render_credentials(rotating or credentials, codec))
+        if len(chunk) >= BATCH_STREAM_CHUNK:
+            yield b"".join(chunk)
+            chunk = []
+    if codec is None:
+        chunk.append(b"]}")
+    yield b"".join(chunk)
+
+
+def benchmark_credential_minting(iterations: int = 100_000) -> Dict[str, float]:
+    """
+    Micro-benchmark the precomputed minting engine against per-call setup.
+
+    The baseline reproduces the original hot path: encode the secret, build
+    a new keyed hmac object and format the URI list for every credential.
+
+    Args:
+        iterations: Number of credentials to mint per variant
+
+    Returns:
+        Dict with ns_per_call for each variant and the resulting speedup
+    """
+    secret = TURN_SECRET or "benchmark-secret"
+    minter = CredentialMinter(secret, TURN_SERVER, TURN_PORT)
+    now = time.time()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        turn_username = f"{int(now) + 3600}:user{i}"
+        base64.b64encode(hmac.new(secret.encode(), turn_username.encode(), hashlib.sha1).digest()).decode()
+        [
+            f"turn:{TURN_SERVER}:{TURN_PORT}?transport=udp",
+            f"turn:{TURN_SERVER}:{TURN_PORT}?transport=tcp",
+            f"turns:{TURN_SERVER}:5349?transport=tcp"
+        ]
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        minter.mint(f"user{i}", 3600, now)
+    engine = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "baseline_ns_per_call": baseline / iterations * 1e9,
+        "engine_ns_per_call": engine / iterations * 1e9,
+        "speedup": baseline / engine if engine else float("inf"),
+    }
+
+
+def benchmark_response_encodings(iterations: int = 10_000, rotate: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Compare body size and encode time of a credential in each encoding.
+
+    JSON is the hand-rendered body of FAST_RESPONSE_MODE and
+    HTTP_CACHE_ENABLED, the cheapest JSON path the API has.
+
+    Args:
+        iterations: Encodes per encoding
+        rotate: Measure a rotating pair instead of a single credential
+
+    Returns:
+        Dict by encoding (json, msgpack, cbor) with bytes and ns_per_call
+    """
+    minter = CredentialMinter(TURN_SECRET or "benchmark-secret", TURN_SERVER, TURN_PORT)
+    now = time.time()
+    credentials: Union[MintedCredential, RotatingCredential] = minter.mint("benchmark-user", DEFAULT_TTL, now)
+    if rotate:
+        refresh_at = int(now) + credentials.ttl // 2
+        credentials = RotatingCredential(
+            credentials, minter.mint("benchmark-user", credentials.ttl, refresh_at), refresh_at
+        )
+
+    results = {}
+    for codec in (None, *CODECS):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body = render_credentials(credentials, codec)
+        elapsed = time.perf_counter() - start
+        results[codec.name if codec is not None else "json"] = {
+            "bytes": len(body),
+            "ns_per_call": elapsed / iterations * 1e9,
+        }
+    return results
+
+
 ###############################################################################
 # LIFECYCLE MANAGEMENT
 ###############################################################################
@@ -185,9 +1530,28 @@ async def lifespan(app: FastAPI):
     if not API_KEY:
         logger.warning("API_KEY not set - endpoint is not protected")
 
+    if issuance_log.enabled:
+        issuance_log.start()
+        logger.info(f"Issuance events written to {ISSUANCE_LOG_PATH}")
+    if turn_pool is not None:
+        turn_pool.start()
+        logger.info(f"TURN pool of {len(turn_pool.nodes)} nodes, refreshed every {TURN_POOL_REFRESH_INTERVAL}s")
+    if stun_prober is not None:
+        stun_prober.start()
+        logger.info(f"Probing {len(stun_prober.listeners)} coturn listeners every {STUN_PROBE_INTERVAL}s")
+    if shared_metrics is not None:
+        shared_metrics.start(metrics_registry, SHARED_METRICS_INTERVAL)
+
     logger.info("TURN Credentials API started successfully")
     yield
     logger.info("TURN Credentials API shutting down...")
+    if turn_pool is not None:
+        await turn_pool.stop()
+    if stun_prober is not None:
+        await stun_prober.stop()
+    if shared_metrics is not None:
+        await shared_metrics.stop(metrics_registry)
+    issuance_log.stop()
 
 
 ###############################################################################
@@ -203,6 +1567,38 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+_route_templates: Dict[object, str] = {}
+
+
+def _route_label(scope: dict) -> Optional[str]:
+    """Path template of the route that handled scope, for metric labels"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return None
+    template = _route_templates.get(endpoint)
+    if template is None:
+        _route_templates.update({
+            route.endpoint: route.path
+            for route in app.routes
+            if hasattr(route, "endpoint")
+        })
+        template = _route_templates.get(endpoint)
+    return template
+
+
+app.add_middleware(
+    MetricsMiddleware,
+    requests=request_counter,
+    latency=request_latency,
+    route_label=_route_label
+)
+# Added last so it runs outermost: shed requests skip routing and metrics
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=_active_admission_controller,
+    prefixes=ADMISSION_PATHS
+)
+
 
 ###############################################################################
 # ENDPOINTS
@@ -238,9 +1634,70 @@ async def health_check() -> HealthResponse:
     )
 
 
-@app.post("/turn-credentials", response_model=TURNCredentials, tags=["Credentials"])
+@app.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse, "description": "coturn listeners down or slow"}},
+    tags=["Health"]
+)
+async def readiness_check() -> Response:
+    """
+    Readiness check backed by STUN probes of the local coturn listeners
+
+    Serves the verdict of the last background probe round, so frequent
+    load balancer checks never trigger probes. Without STUN_PROBE_ENABLED
+    the instance is always ready.
+
+    Returns:
+        Response: ReadinessResponse JSON, 200 when ready and 503 otherwise
+    """
+    if stun_prober is None:
+        return JSONResponse(content={"ready": True, "checked_at": None, "listeners": []})
+    result = stun_prober.status()
+    return JSONResponse(
+        content=result,
+        status_code=status.HTTP_200_OK if result["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+@app.get("/metrics", tags=["Health"])
+async def prometheus_metrics(worker: bool = False) -> Response:
+    """
+    Prometheus metrics endpoint
+
+    Exposes per-route request counters and latency histograms, credentials
+    issued by TTL bucket, authentication failures, exception handler
+    responses and credential cache statistics. With SHARED_METRICS_ENABLED
+    the values are aggregated over every gunicorn worker.
+
+    Args:
+        worker: Only this worker's own values, even when shared
+
+    Returns:
+        Response: Prometheus text exposition format
+    """
+    if shared_metrics is None or worker:
+        body = metrics_registry.render()
+    else:
+        body = shared_metrics.render(metrics_registry)
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post(
+    "/turn-credentials",
+    response_model=TURNCredentials,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+    tags=["Credentials"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CredentialsRequest.model_json_schema()}},
+        }
+    }
+)
 async def get_turn_credentials(
-    request: CredentialsRequest,
+    request: Request,
     api_key: str = Depends(verify_api_key)
 ) -> TURNCredentials:
     """
@@ -248,24 +1705,84 @@ async def get_turn_credentials(
 
     This endpoint generates time-limited TURN credentials using HMAC-SHA1
     authentication. The credentials include a username with embedded timestamp
-    and a password generated using the TURN server secret.
+    and a password generated using the TURN server secret. Accept:
+    application/msgpack or application/cbor selects a binary body.
 
     Args:
-        request: Credentials request with username and optional TTL
+        request: HTTP request whose body is a CredentialsRequest
         api_key: API key for authentication (if configured)
 
     Returns:
         TURNCredentials: Generated TURN credentials
 
     Raises:
-        HTTPException: If request validation fails
+        RequestValidationError: If the request body is invalid
+        HTTPException: If a rate limit is hit
+    """
+    return await credentials_response(
+        parse_credentials_request(await request.body()),
+        api_key,
+        request.headers.get("if-none-match"),
+        request.headers.get("accept")
+    )
+
+
+async def credentials_response(
+    request: CredentialsRequest,
+    api_key: Optional[str],
+    if_none_match: Optional[str] = None,
+    accept: Optional[str] = None
+) -> TURNCredentials:
+    """
+    Issue credentials for a validated request in the configured response mode.
+
+    With HTTP_CACHE_ENABLED the body is pre-rendered (byte-identical to
+    the response_model output) and sent with ETag and Cache-Control; a
+    matching If-None-Match is answered 304 with no body. A binary
+    encoding negotiated from accept is always pre-rendered.
+
+    Args:
+        request: Credentials request with username and TTL
+        api_key: API key the request was authenticated with, if any
+        if_none_match: If-None-Match request header, if sent
+        accept: Accept request header, if sent
+
+    Returns:
+        TURNCredentials, or a pre-rendered Response in FAST_RESPONSE_MODE,
+        with HTTP_CACHE_ENABLED or for a binary encoding
+
+    Raises:
+        HTTPException: If a rate limit is hit or credentials cannot be issued
     """
+    enforce_rate_limits([request.username], api_key)
+    codec = negotiate_encoding(accept)
     try:
-        credentials = generate_turn_credentials(
-            username=request.username,
-            ttl=request.ttl
-        )
-        logger.info(f"CREDENTIALS_ISSUED: user={request.username}, ttl={request.ttl}s")
+        if HTTP_CACHE_ENABLED:
+            minted = issue_credentials(request.username, request.ttl, request.rotate)
+            body = render_credentials(minted, codec)
+            headers = credential_cache_headers(minted, body=body)
+            if if_none_match is not None and etag_matches(if_none_match, headers["ETag"]):
+                credentials_not_modified_counter.inc()
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            credentials = Response(content=body, media_type=_media_type(codec), headers=headers)
+        elif FAST_RESPONSE_MODE or codec is not None:
+            # Hand-built body; returning a Response skips response_model
+            credentials = Response(
+                content=render_credentials(
+                    issue_credentials(request.username, request.ttl, request.rotate),
+                    codec
+                ),
+                media_type=_media_type(codec),
+                headers={"Vary": "Accept"} if codec is not None else None
+            )
+        else:
+            credentials = generate_turn_credentials(
+                username=request.username,
+                ttl=request.ttl,
+                rotate=request.rotate
+            )
+        if not issuance_log.enabled:
+            logger.info(f"CREDENTIALS_ISSUED: user={request.username}, ttl={request.ttl}s")
         return credentials
 
     except ValueError as e:
@@ -282,11 +1799,20 @@ async def get_turn_credentials(
         )
 
 
-@app.get("/turn-credentials", response_model=TURNCredentials, tags=["Credentials"])
+@app.get(
+    "/turn-credentials",
+    response_model=TURNCredentials,
+    response_model_exclude_none=True,
+    responses=BINARY_RESPONSES,
+    tags=["Credentials"]
+)
 async def get_turn_credentials_get(
     username: str,
     ttl: int = DEFAULT_TTL,
-    api_key: str = Depends(verify_api_key)
+    rotate: bool = False,
+    api_key: str = Depends(verify_api_key),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    accept: Optional[str] = Header(None, include_in_schema=False)
 ) -> TURNCredentials:
     """
     Generate TURN credentials (GET method for testing)
@@ -296,7 +1822,10 @@ async def get_turn_credentials_get(
     Args:
         username: Username to generate credentials for
         ttl: Time to live in seconds (default: 86400)
+        rotate: Also return the pre-minted next credential and refresh_at
         api_key: API key for authentication (if configured)
+        if_none_match: If-None-Match header, answered 304 when it matches
+        accept: Accept header; msgpack or CBOR selects a binary body
 
     Returns:
         TURNCredentials: Generated TURN credentials
@@ -313,35 +1842,405 @@ async def get_turn_credentials_get(
             detail=f"TTL must be between {MIN_TTL} and {MAX_TTL} seconds"
         )
 
-    return await get_turn_credentials(
-        CredentialsRequest(username=username, ttl=ttl),
-        api_key
+    if FAST_RESPONSE_MODE and USERNAME_PATTERN.match(username):
+        request = CredentialsRequest.model_construct(username=username, ttl=ttl, rotate=rotate)
+    else:
+        # Invalid characters escape as a ValidationError, as in default mode
+        request = CredentialsRequest(username=username, ttl=ttl, rotate=rotate)
+    return await credentials_response(request, api_key, if_none_match, accept)
+
+
+@app.post(
+    "/turn-credentials/batch",
+    response_model=BatchCredentialsResponse,
+    responses=BINARY_RESPONSES,
+    tags=["Credentials"]
+)
+async def get_turn_credentials_batch(
+    request: BatchCredentialsRequest,
+    api_key: str = Depends(verify_api_key),
+    accept: Optional[str] = Header(None, include_in_schema=False)
+) -> StreamingResponse:
+    """
+    Generate TURN credentials for many WebRTC clients in one call
+
+    Intended for conference backends that provision every participant when
+    a room starts. The API key is checked once for the whole batch and the
+    response body is streamed as credentials are minted.
+
+    Args:
+        request: Batch request with usernames and optional TTLs
+        api_key: API key for authentication (if configured)
+        accept: Accept header; msgpack or CBOR selects a binary body
+
+    Returns:
+        StreamingResponse: BatchCredentialsResponse body
+
+    Raises:
+        HTTPException: If the TURN server secret is not configured or a rate
+            limit is hit
+    """
+    enforce_rate_limits([item.username for item in request.requests], api_key)
+    if not TURN_SECRET:
+        logger.error("Configuration error: TURN server secret not configured")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="TURN server configuration error"
+        )
+
+    codec = negotiate_encoding(accept)
+    logger.info(f"CREDENTIALS_ISSUED_BATCH: count={len(request.requests)}")
+    return StreamingResponse(
+        stream_batch_credentials(request.requests, codec),
+        media_type=_media_type(codec),
+        headers={"Vary": "Accept"} if codec is not None else None
     )
 
 
+def _current_ice_config() -> IceConfigSnapshot:
+    snapshot = ice_config.current()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ICE configuration unavailable"
+        )
+    return snapshot
+
+
+@app.post(
+    "/ice-config",
+    responses=BINARY_RESPONSES,
+    tags=["Credentials"],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CredentialsRequest.model_json_schema()}},
+        }
+    }
+)
+async def get_ice_config(
+    request: Request,
+    known_version: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+) -> Response:
+    """
+    Full ICE configuration with a TURN credential in one call
+
+    Returns the static configuration (STUN servers, ICE policy, timeouts)
+    pre-serialized at startup, with a credential for the requested user
+    spliced into turn_servers. When known_version equals the current
+    config_version only config_version and turn_servers are returned.
+    Accept: application/msgpack or application/cbor selects a binary
+    body, pre-encoded the same way.
+
+    Args:
+        request: HTTP request whose body is a CredentialsRequest
+        known_version: config_version the client already holds
+        api_key: API key for authentication (if configured)
+
+    Returns:
+        Response: ICE configuration document
+
+    Raises:
+        RequestValidationError: If the request body is invalid
+        HTTPException: If a rate limit is hit, the configuration file is
+            unavailable or credentials cannot be issued
+    """
+    credentials_request = parse_credentials_request(await request.body())
+    enforce_rate_limits([credentials_request.username], api_key)
+    snapshot = _current_ice_config()
+    try:
+        # rotate is a /turn-credentials option; one credential is spliced in
+        minted = issue_credentials(credentials_request.username, credentials_request.ttl)
+    except ValueError as e:
+        logger.error(f"Configuration error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="TURN server configuration error"
+        )
+    codec = negotiate_encoding(request.headers.get("accept"))
+    if codec is not None:
+        return Response(
+            content=render_ice_config_binary(
+                snapshot,
+                codec,
+                minted.username,
+                minted.password,
+                minted.ttl,
+                list(minted.uris),
+                known_version
+            ),
+            media_type=codec.media_type,
+            headers={"Vary": "Accept"}
+        )
+    return Response(
+        content=render_ice_config(
+            snapshot,
+            minted.username,
+            minted.password,
+            minted.ttl,
+            _credential_uris_json(minted),
+            known_version
+        ),
+        media_type="application/json"
+    )
+
+
+@app.get("/ice-config/static", responses=BINARY_RESPONSES, tags=["Credentials"])
+async def get_ice_config_static(
+    api_key: str = Depends(verify_api_key),
+    if_none_match: Optional[str] = Header(None, include_in_schema=False),
+    accept: Optional[str] = Header(None, include_in_schema=False)
+) -> Response:
+    """
+    Static part of the ICE configuration, without a credential
+
+    The ETag is the config_version (suffixed with the encoding name for
+    a binary body), so SDKs revalidate with If-None-Match and get 304
+    until the configuration file changes.
+
+    Args:
+        api_key: API key for authentication (if configured)
+        if_none_match: If-None-Match header, answered 304 when it matches
+        accept: Accept header; msgpack or CBOR selects a binary body
+
+    Returns:
+        Response: Static configuration document, or 304 with no body
+    """
+    snapshot = _current_ice_config()
+    codec = negotiate_encoding(accept)
+    if codec is None:
+        etag, body = snapshot.version, snapshot.static_json
+    else:
+        etag, body = f"{snapshot.version}.{codec.name}", snapshot.encoded[codec.name].static
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache", "Vary": "Accept"}
+    if if_none_match is not None and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=_media_type(codec), headers=headers)
+
+
+@app.post(
+    "/stats",
+    response_model=StatsIngestResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["Stats"]
+)
+async def ingest_quality_stats(
+    report: StatsReportBatch,
+    api_key: str = Depends(verify_api_key)
+) -> StatsIngestResponse:
+    """
+    Ingest client quality statistics
+
+    Accepts the RTCStatsReport samples an SDK collected since its last
+    upload, as compact positional arrays, and appends them to the
+    session's ring buffer.
+
+    Args:
+        report: Session identity and samples
+        api_key: API key for authentication (if configured)
+
+    Returns:
+        StatsIngestResponse: Number of samples stored and the field order
+
+    Raises:
+        HTTPException: If a sample is malformed
+    """
+    try:
+        accepted = quality_stats.ingest(
+            report.session_id,
+            report.samples,
+            platform=report.platform,
+            turn_node=report.turn_node
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    columns = np.asarray(report.samples, dtype=np.float64)
+    quality_rollups.add(
+        columns[:, FIELD_NAMES.index("timestamp")],
+        columns[:, FIELD_NAMES.index("rtt")],
+        columns[:, FIELD_NAMES.index("packet_loss")],
+        columns[:, FIELD_NAMES.index("bitrate")],
+        platform=report.platform,
+        turn_node=report.turn_node
+    )
+    return StatsIngestResponse(accepted=accepted, fields=list(FIELD_NAMES))
+
+
+@app.get("/stats/sessions/{session_id}", response_model=SessionStatsResponse, tags=["Stats"])
+async def get_session_stats(
+    session_id: str,
+    last: Optional[int] = None,
+    api_key: str = Depends(verify_api_key)
+) -> SessionStatsResponse:
+    """
+    Recent quality samples of one call session
+
+    Reads the session's ring buffer, e.g. to inspect a call a user
+    reported as poor while its samples are still retained.
+
+    Args:
+        session_id: Call session identifier
+        last: Return only the most recent samples (default: whole window)
+        api_key: API key for authentication (if configured)
+
+    Returns:
+        SessionStatsResponse: Session identity and samples
+
+    Raises:
+        HTTPException: If the session is unknown or was evicted
+    """
+    if last is not None and last <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="last must be positive")
+    series = quality_stats.get(session_id)
+    if series is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return SessionStatsResponse(
+        session_id=series.session_id,
+        platform=series.platform,
+        turn_node=series.turn_node,
+        fields=list(FIELD_NAMES),
+        samples=series.rows(last)
+    )
+
+
+@app.get("/stats/rollups", response_model=QualityRollupResponse, tags=["Stats"])
+async def get_quality_rollups(
+    resolution: str = "1m",
+    group_by: str = "all",
+    window: Optional[int] = None,
+    api_key: str = Depends(verify_api_key)
+) -> QualityRollupResponse:
+    """
+    Time-bucketed fleet quality rollups
+
+    Each bucket carries the sample count, average RTT/loss/bitrate/score,
+    SDK quality-state counts and p50/p95/p99 per metric.
+
+    Args:
+        resolution: Bucket width: 1s, 1m or 1h
+        group_by: all, platform or turn_node
+        window: Seconds to look back (default: whole retention)
+        api_key: API key for authentication (if configured)
+
+    Returns:
+        QualityRollupResponse: Buckets per group
+
+    Raises:
+        HTTPException: On an unknown resolution or dimension
+    """
+    try:
+        groups = quality_rollups.rollup(resolution, group_by, window)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return QualityRollupResponse(resolution=resolution, group_by=group_by, groups=groups)
+
+
+@app.get("/stats/summary", response_model=QualitySummaryResponse, tags=["Stats"])
+async def get_quality_summary(
+    group_by: str = "all",
+    window: int = 3600,
+    api_key: str = Depends(verify_api_key)
+) -> QualitySummaryResponse:
+    """
+    Fleet quality percentiles over a trailing window
+
+    Merges precomputed rollup buckets, so cost does not grow with the
+    number of stored samples.
+
+    Args:
+        group_by: all, platform or turn_node
+        window: Seconds to look back (default: 3600)
+        api_key: API key for authentication (if configured)
+
+    Returns:
+        QualitySummaryResponse: Summary per group
+
+    Raises:
+        HTTPException: On an unknown dimension or non-positive window
+    """
+    if window <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="window must be positive")
+    try:
+        groups = quality_rollups.summary(group_by, window)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return QualitySummaryResponse(group_by=group_by, window=window, groups=groups)
+
+
+@app.websocket("/signaling/{session_id}")
+async def signaling_socket(websocket: WebSocket, session_id: str) -> None:
+    """
+    WebSocket signaling for one call session
+
+    Peers join the session room, then exchange offer, answer and ICE
+    candidates through signaling_hub. The API key is read from the
+    X-API-Key header or, for browsers, the api_key query parameter.
+
+    Args:
+        websocket: Client connection
+        session_id: Call session identifier
+    """
+    if not SIGNALING_ENABLED:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION, reason="Signaling disabled")
+        return
+    api_key = websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")
+    if API_KEY and api_key != API_KEY:
+        auth_failures_counter.inc()
+        logger.warning(f"Invalid API key on signaling socket (key fingerprint={api_key_fingerprint(api_key)})")
+        await websocket.close(code=CLOSE_POLICY_VIOLATION, reason="Invalid API key")
+        return
+
+    await websocket.accept()
+
+    async def close(code: int) -> None:
+        await websocket.close(code=code)
+
+    peer = signaling_hub.attach(session_id, websocket.send_text, close)
+    writer = asyncio.create_task(peer.pump())
+    try:
+        while not peer.closed:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            text = message.get("text")
+            if text is None:
+                text = (message.get("bytes") or b"").decode("utf-8", "replace")
+            signaling_hub.receive(peer, text)
+    finally:
+        signaling_hub.detach(peer)
+        writer.cancel()
+
+
 ###############################################################################
 # ERROR HANDLERS
 ###############################################################################
 
-from fastapi.responses import JSONResponse
-
-
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """HTTP exception handler"""
-    logger.warning(f"HTTP {exc.status_code}: {exc.detail}")
+    errors_counter.inc("http_exception", str(exc.status_code))
+    # Throttled clients are counted, not logged, so abuse cannot flood the log
+    if exc.status_code != status.HTTP_429_TOO_MANY_REQUESTS:
+        logger.warning(f"HTTP {exc.status_code}: {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=exc.headers
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """General exception handler"""
+    errors_counter.inc("unhandled", "500")
     logger.error(f"Unhandled exception: {str(exc)}")
     return JSONResponse(
         status_code=500,
@@ -357,9 +2256,15 @@ async def general_exception_handler(request, exc):
 ###############################################################################
 
 if __name__ == "__main__":
+    import sys
+
+    if "--benchmark-minting" in sys.argv:
+        print(json.dumps(benchmark_credential_minting(), indent=2))
+        sys.exit(0)
+
     import uvicorn
 
-    # Run the application
+    # Development server; production runs under gunicorn via serve.py
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
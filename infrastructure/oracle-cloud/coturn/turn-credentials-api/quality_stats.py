@@ -0,0 +1,264 @@
+"""
+Client Quality Stats Store for TURN Credentials API
+
+Keeps the RTCStatsReport samples that the SDKs' RTCStatsCollector
+produces every second, per call session, in preallocated columnar ring
+buffers. Each session owns one typed array per field (stdlib array
+module, contiguous machine values), so a sample costs ~56 bytes instead
+of a dict and ten boxed numbers. Each session holds at most window
+samples, and the store holds at most max_sessions sessions; idle
+sessions are evicted first, so memory is bounded by configuration.
+
+Samples arrive positionally, in RTCStatsReport field order:
+    [timestamp_ms, rtt_ms, packet_loss_pct, bitrate_bps,
+     width, height, bytes_received, bytes_sent, frames_decoded, frames_encoded]
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_WINDOW = 300           # samples per session (5 minutes at 1 Hz)
+DEFAULT_MAX_SESSIONS = 500    # x window x BYTES_PER_SAMPLE = ~8.4 MB
+DEFAULT_IDLE_SECONDS = 600.0
+
+# (field, array typecode) in RTCStatsReport order
+STATS_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("timestamp", "d"),        # UNIX time in milliseconds
+    ("rtt", "f"),              # milliseconds
+    ("packet_loss", "f"),      # percent
+    ("bitrate", "f"),          # bits per second
+    ("width", "H"),
+    ("height", "H"),
+    ("bytes_received", "q"),
+    ("bytes_sent", "q"),
+    ("frames_decoded", "q"),
+    ("frames_encoded", "q"),
+)
+FIELD_NAMES: Tuple[str, ...] = tuple(name for name, _ in STATS_FIELDS)
+BYTES_PER_SAMPLE = sum(array(code).itemsize for _, code in STATS_FIELDS)
+
+_INTEGER_TYPECODES = frozenset("bBhHiIlLqQ")
+
+
+###############################################################################
+# SESSION SERIES
+###############################################################################
+
+class SessionSeries:
+    """Fixed-capacity columnar ring buffer of one session's samples"""
+
+    __slots__ = ("session_id", "platform", "turn_node", "columns", "capacity", "head", "count", "last_seen")
+
+    def __init__(self, session_id: str, platform: str, turn_node: str, capacity: int):
+        """
+        Args:
+            session_id: Client-chosen call session identifier
+            platform: Client platform, e.g. "android" or "ios"
+            turn_node: TURN node relaying the session ("" if direct)
+            capacity: Samples kept; older samples are overwritten
+        """
+        self.session_id = session_id
+        self.platform = platform
+        self.turn_node = turn_node
+        self.capacity = capacity
+        self.columns: Tuple[array, ...] = tuple(
+            array(code, bytes(array(code).itemsize * capacity)) for _, code in STATS_FIELDS
+        )
+        self.head = 0      # next write position
+        self.count = 0
+        self.last_seen = 0.0
+
+    def append(self, rows: Sequence[Sequence[float]]) -> int:
+        """
+        Append samples, overwriting the oldest once full.
+
+        Args:
+            rows: Samples in STATS_FIELDS order
+
+        Returns:
+            int: Number of samples written
+
+        Raises:
+            ValueError: If a row has the wrong length or a value is out of range
+        """
+        width = len(STATS_FIELDS)
+        if any(len(row) != width for row in rows):
+            raise ValueError(f"Each sample must have {width} values")
+        rows = rows[-self.capacity:]
+        n = len(rows)
+        if not n:
+            return 0
+
+        # Convert per column first so a bad value leaves the buffer untouched
+        try:
+            converted = [
+                array(code, map(int, values) if code in _INTEGER_TYPECODES else values)
+                for (_, code), values in zip(STATS_FIELDS, zip(*rows))
+            ]
+        except (OverflowError, TypeError) as e:
+            raise ValueError(f"Invalid sample value: {str(e)}")
+
+        head, capacity = self.head, self.capacity
+        first = min(n, capacity - head)
+        for column, values in zip(self.columns, converted):
+            column[head:head + first] = values[:first]
+            if first < n:
+                column[:n - first] = values[first:]
+        self.head = (head + n) % capacity
+        self.count = min(capacity, self.count + n)
+        return n
+
+    def column(self, name: str) -> array:
+        """
+        One field's samples, oldest first (a copy).
+
+        Args:
+            name: Field name from FIELD_NAMES
+        """
+        data = self.columns[FIELD_NAMES.index(name)]
+        if self.count < self.capacity:
+            return data[:self.count]
+        return data[self.head:] + data[:self.head]
+
+    def rows(self, last: Optional[int] = None) -> List[List[float]]:
+        """
+        Stored samples as positional rows, oldest first.
+
+        Args:
+            last: Return only the most recent last samples (default: all)
+
+        Returns:
+            List of samples in STATS_FIELDS order, as ingested
+        """
+        columns = [self.column(name) for name in FIELD_NAMES]
+        if last is not None:
+            columns = [column[max(0, len(column) - last):] for column in columns]
+        return [list(row) for row in zip(*columns)]
+
+
+###############################################################################
+# STORE
+###############################################################################
+
+class QualityStatsStore:
+    """Bounded set of SessionSeries, least recently updated evicted first"""
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS
+    ):
+        """
+        Args:
+            window: Samples kept per session
+            max_sessions: Sessions kept before the least recently updated is dropped
+            idle_seconds: Drop sessions that sent nothing for this long
+        """
+        self.window = max(1, window)
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+
+        self.samples_received = 0
+        self.sessions_evicted = 0
+
+        self._sessions: "OrderedDict[str, SessionSeries]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def ingest(
+        self,
+        session_id: str,
+        rows: Sequence[Sequence[float]],
+        platform: str = "unknown",
+        turn_node: str = "",
+        now: Optional[float] = None
+    ) -> int:
+        """
+        Store a batch of samples for one session.
+
+        Args:
+            session_id: Call session identifier
+            rows: Samples in STATS_FIELDS order
+            platform: Client platform
+            turn_node: TURN node relaying the session
+            now: Override for the monotonic clock (default: time.monotonic())
+
+        Returns:
+            int: Number of samples stored
+
+        Raises:
+            ValueError: If a sample is malformed
+        """
+        if now is None:
+            now = time.monotonic()
+        sessions = self._sessions
+
+        with self._lock:
+            series = sessions.get(session_id)
+            if series is None:
+                series = SessionSeries(session_id, platform, turn_node, self.window)
+            written = series.append(rows)
+            # Only keep a new session once its first batch is valid
+            sessions[session_id] = series
+            sessions.move_to_end(session_id)
+            series.last_seen = now
+            if turn_node:
+                series.turn_node = turn_node
+            self.samples_received += written
+            self._evict(now)
+        return written
+
+    def _evict(self, now: float) -> None:
+        sessions = self._sessions
+        idle_before = now - self.idle_seconds
+        while sessions:
+            session_id, series = next(iter(sessions.items()))
+            if series.last_seen >= idle_before and len(sessions) <= self.max_sessions:
+                break
+            del sessions[session_id]
+            self.sessions_evicted += 1
+
+    def get(self, session_id: str) -> Optional[SessionSeries]:
+        """Series for one session, or None"""
+        return self._sessions.get(session_id)
+
+    def sessions(self) -> List[SessionSeries]:
+        """Snapshot list of every stored session"""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def clear(self) -> None:
+        """Drop every session and reset the counters"""
+        with self._lock:
+            self._sessions.clear()
+            self.samples_received = self.sessions_evicted = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of store counters.
+
+        Returns:
+            Dict with sessions, samples, samples_received,
+            sessions_evicted and buffer_bytes
+        """
+        sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "samples": sum(series.count for series in sessions),
+            "samples_received": self.samples_received,
+            "sessions_evicted": self.sessions_evicted,
+            "buffer_bytes": len(sessions) * self.window * BYTES_PER_SAMPLE,
+        }
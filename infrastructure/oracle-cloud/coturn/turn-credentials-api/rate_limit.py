@@ -0,0 +1,174 @@
+"""
+Token-Bucket Rate Limiting for TURN Credentials API
+
+In-memory token buckets keyed by an arbitrary string (username, API
+key). Each check is O(1): refill the key's bucket from the elapsed time
+and take tokens if enough are available. Buckets are kept in access
+order, so idle ones are evicted from the front without scanning; a
+bucket idle long enough to refill completely is indistinguishable from
+a new one, so dropping it loses nothing.
+
+Limits are per process. Under gunicorn each worker enforces its own
+buckets, so the effective limit is roughly rate x workers.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_MAX_BUCKETS = 100000
+
+
+###############################################################################
+# TOKEN BUCKET LIMITER
+###############################################################################
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets refilled at rate tokens/second up to burst.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_buckets: int = DEFAULT_MAX_BUCKETS,
+        idle_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity, i.e. requests allowed back to back
+            max_buckets: Buckets kept before the least recently used is dropped
+            idle_seconds: Drop buckets untouched this long (default: time
+                to refill an empty bucket)
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max(1, max_buckets)
+        self.idle_seconds = idle_seconds if idle_seconds is not None else burst / rate
+
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+        # key -> [tokens, last refill time], least recently used first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: str, cost: float = 1, now: Optional[float] = None) -> float:
+        """
+        Take cost tokens from key's bucket.
+
+        Args:
+            key: Bucket identifier
+            cost: Tokens this request consumes
+            now: Override for the monotonic clock (default: time.monotonic())
+
+        Returns:
+            float: 0.0 if allowed, otherwise seconds until cost tokens are
+                available (infinite if cost exceeds burst)
+        """
+        if now is None:
+            now = time.monotonic()
+        buckets = self._buckets
+
+        with self._lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [self.burst, now]
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            self._evict(now)
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                self.allowed += 1
+                return 0.0
+
+            self.rejected += 1
+            if cost > self.burst:
+                return float("inf")
+            return (cost - bucket[0]) / self.rate
+
+    def peek(self, key: str, cost: float = 1, now: Optional[float] = None) -> float:
+        """
+        Check whether key's bucket holds cost tokens, without taking them.
+
+        Neither the bucket nor the allowed/rejected counters change, so a
+        request limited by several buckets can check all of them before
+        charging any.
+
+        Args:
+            key: Bucket identifier
+            cost: Tokens the request would consume
+            now: Override for the monotonic clock (default: time.monotonic())
+
+        Returns:
+            float: 0.0 if acquire would succeed, otherwise seconds until
+                cost tokens are available (infinite if cost exceeds burst)
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        if tokens >= cost:
+            return 0.0
+        if cost > self.burst:
+            return float("inf")
+        return (cost - tokens) / self.rate
+
+    def reject(self) -> None:
+        """Count a request rejected after a failed peek"""
+        with self._lock:
+            self.rejected += 1
+
+    def _evict(self, now: float) -> None:
+        # Oldest bucket first: stop at the first one still in use
+        buckets = self._buckets
+        idle_before = now - self.idle_seconds
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket[1] >= idle_before and len(buckets) <= self.max_buckets:
+                break
+            del buckets[key]
+            self.evicted += 1
+
+    def clear(self) -> None:
+        """Drop every bucket and reset the counters"""
+        with self._lock:
+            self._buckets.clear()
+            self.allowed = self.rejected = self.evicted = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Snapshot of limiter counters.
+
+        Returns:
+            Dict with buckets, allowed, rejected, and evicted
+        """
+        return {
+            "buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+        }
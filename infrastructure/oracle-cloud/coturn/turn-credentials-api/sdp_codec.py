@@ -0,0 +1,512 @@
+"""
+Compact SDP Codec for WebRTC-Lite Signaling
+
+Browser and Android SDPs are mostly the same few hundred lines with
+different numbers in them: rtcp-fb feedback per payload type, rtx apt
+mappings, extmap URIs, a fingerprint repeated in every m-section. This
+codec splits an SDP into lines and encodes each one as the cheapest of:
+
+    template   a DICTIONARY entry plus its slot values
+               ("a=rtcp-fb:96 nack pli" is one op byte and one varint)
+    backref    an earlier line repeated verbatim (ice-ufrag, ice-pwd,
+               fingerprint and msid lines recur in every m-section)
+    literal    the raw line, for anything the dictionary does not cover
+
+The encoding is lossless for any input string, SDP or not: line
+terminators (CRLF, LF or none) are recorded per line, and slot values
+only match when re-rendering them reproduces the original text exactly.
+
+Wire format (version 1):
+
+    MAGIC VERSION token* END
+    token   = varint(kind << 1 | alt) [term byte if alt] payload
+    kind    = 0 END, 1 literal, 2 backref, 3 + k dictionary entry k
+    alt     = 1 when the line terminator is not CRLF
+
+Integers are unsigned LEB128 varints; strings are varint length plus
+UTF-8. encode_text() wraps the bytes as "sdpz1:" + unpadded base64url so
+a compact SDP can travel in the JSON "sdp" field of signaling messages.
+
+DICTIONARY is append-only: existing entries keep their index forever,
+otherwise previously encoded SDPs decode to different text.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import base64
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+MAGIC = 0xD5
+VERSION = 1
+TEXT_PREFIX = "sdpz1:"
+
+# Slot syntax inside DICTIONARY entries:
+#   {}  canonical unsigned integer (no leading zeros)
+#   {#} colon-separated uppercase hex bytes (DTLS fingerprints)
+#   {*} any string
+DICTIONARY: Tuple[str, ...] = (
+    # Session level
+    "v=0",
+    "s=-",
+    "t=0 0",
+    "o=- {} {} IN IP4 127.0.0.1",
+    "o={*}",
+    "a=group:BUNDLE {*}",
+    "a=extmap-allow-mixed",
+    "a=msid-semantic: WMS {*}",
+    "a=msid-semantic:WMS {*}",
+    # Media sections
+    "m=audio {} UDP/TLS/RTP/SAVPF {*}",
+    "m=video {} UDP/TLS/RTP/SAVPF {*}",
+    "m=application {} UDP/DTLS/SCTP webrtc-datachannel",
+    "c=IN IP4 0.0.0.0",
+    "a=rtcp:9 IN IP4 0.0.0.0",
+    "a=mid:{}",
+    "a=ice-ufrag:{*}",
+    "a=ice-pwd:{*}",
+    "a=ice-options:trickle",
+    "a=ice-options:trickle renomination",
+    "a=fingerprint:sha-256 {#}",
+    "a=setup:actpass",
+    "a=setup:active",
+    "a=setup:passive",
+    "a=sendrecv",
+    "a=sendonly",
+    "a=recvonly",
+    "a=inactive",
+    "a=rtcp-mux",
+    "a=rtcp-rsize",
+    "a=msid:{*}",
+    "a=sctp-port:{}",
+    "a=max-message-size:{}",
+    # Header extensions
+    "a=extmap:{} urn:ietf:params:rtp-hdrext:ssrc-audio-level",
+    "a=extmap:{} urn:ietf:params:rtp-hdrext:toffset",
+    "a=extmap:{} urn:ietf:params:rtp-hdrext:sdes:mid",
+    "a=extmap:{} urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id",
+    "a=extmap:{} urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id",
+    "a=extmap:{} urn:3gpp:video-orientation",
+    "a=extmap:{} http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time",
+    "a=extmap:{} http://www.webrtc.org/experiments/rtp-hdrext/playout-delay",
+    "a=extmap:{} http://www.webrtc.org/experiments/rtp-hdrext/video-content-type",
+    "a=extmap:{} http://www.webrtc.org/experiments/rtp-hdrext/video-timing",
+    "a=extmap:{} http://www.webrtc.org/experiments/rtp-hdrext/color-space",
+    "a=extmap:{} http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01",
+    "a=extmap:{} {*}",
+    # Codecs
+    "a=rtpmap:{} opus/48000/2",
+    "a=rtpmap:{} red/48000/2",
+    "a=rtpmap:{} telephone-event/{}",
+    "a=rtpmap:{} VP8/90000",
+    "a=rtpmap:{} VP9/90000",
+    "a=rtpmap:{} AV1/90000",
+    "a=rtpmap:{} H264/90000",
+    "a=rtpmap:{} rtx/90000",
+    "a=rtpmap:{} red/90000",
+    "a=rtpmap:{} ulpfec/90000",
+    "a=rtpmap:{} {*}",
+    "a=rtcp-fb:{} goog-remb",
+    "a=rtcp-fb:{} transport-cc",
+    "a=rtcp-fb:{} ccm fir",
+    "a=rtcp-fb:{} nack",
+    "a=rtcp-fb:{} nack pli",
+    "a=rtcp-fb:{} {*}",
+    "a=fmtp:{} apt={}",
+    "a=fmtp:{} minptime=10;useinbandfec=1",
+    "a=fmtp:{} profile-id={}",
+    "a=fmtp:{} level-asymmetry-allowed=1;packetization-mode={};profile-level-id={*}",
+    "a=fmtp:{} {*}",
+    # Sources and candidates
+    "a=ssrc:{} cname:{*}",
+    "a=ssrc:{} msid:{*}",
+    "a=ssrc-group:FID {} {}",
+    "a=candidate:{*}",
+    "a=end-of-candidates",
+)
+
+_SLOT_PATTERNS = {
+    "{}": r"(0|[1-9][0-9]*)",
+    "{#}": r"((?:[0-9A-F]{2}:)*[0-9A-F]{2})",
+    "{*}": r"(.*)",
+}
+_SLOT_SPLIT = re.compile(r"(\{\}|\{#\}|\{\*\})")
+
+_TERMINATORS = ("\r\n", "\n", "")
+_TERM_CRLF, _TERM_LF, _TERM_NONE = 0, 1, 2
+
+_KIND_END = 0
+_KIND_LITERAL = 1
+_KIND_BACKREF = 2
+_KIND_DICTIONARY = 3
+
+
+###############################################################################
+# DICTIONARY COMPILATION
+###############################################################################
+
+class _Template:
+    """One DICTIONARY entry compiled for matching and rendering"""
+
+    def __init__(self, index: int, source: str):
+        parts = _SLOT_SPLIT.split(source)
+        self.index = index
+        self.source = source
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+        self.pattern: Pattern[str] = re.compile("".join(
+            _SLOT_PATTERNS[part] if i % 2 else re.escape(part) for i, part in enumerate(parts)
+        ))
+
+    def render(self, values: List[str]) -> str:
+        out = [self.literals[0]]
+        for value, literal in zip(values, self.literals[1:]):
+            out.append(value)
+            out.append(literal)
+        return "".join(out)
+
+
+def _bucket_key(line: str) -> str:
+    """Lines only need to be tried against entries sharing this prefix"""
+    if line.startswith("a="):
+        colon = line.find(":")
+        if colon > 0:
+            return line[:colon + 1]
+    return line[:2]
+
+
+def _compile_dictionary() -> Tuple[List[_Template], Dict[str, int], Dict[str, List[_Template]]]:
+    templates = [_Template(i, source) for i, source in enumerate(DICTIONARY)]
+    exact: Dict[str, int] = {}
+    buckets: Dict[str, List[_Template]] = {}
+    for template in templates:
+        if not template.slots:
+            exact[template.source] = template.index
+        else:
+            buckets.setdefault(_bucket_key(template.literals[0]), []).append(template)
+    return templates, exact, buckets
+
+
+_TEMPLATES, _EXACT, _BUCKETS = _compile_dictionary()
+
+
+###############################################################################
+# PRIMITIVES
+###############################################################################
+
+class _Incomplete(Exception):
+    """More input is needed before the next token can be decoded"""
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_string(out: bytearray, value: str) -> None:
+    data = value.encode("utf-8")
+    _put_varint(out, len(data))
+    out += data
+
+
+class _Reader:
+    """Cursor over a byte buffer that raises _Incomplete on overrun"""
+
+    def __init__(self, data: bytearray, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def byte(self) -> int:
+        if self.pos >= len(self.data):
+            raise _Incomplete()
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def raw(self, length: int) -> bytes:
+        end = self.pos + length
+        if end > len(self.data):
+            raise _Incomplete()
+        value = bytes(self.data[self.pos:end])
+        self.pos = end
+        return value
+
+    def string(self) -> str:
+        try:
+            return self.raw(self.varint()).decode("utf-8")
+        except UnicodeDecodeError:
+            raise ValueError("Compact SDP contains invalid UTF-8")
+
+
+###############################################################################
+# STREAMING ENCODER / DECODER
+###############################################################################
+
+class SdpEncoder:
+    """
+    Incremental encoder: feed() SDP text in arbitrary chunks, each call
+    returns the bytes for every line completed so far; finish() flushes
+    the trailing partial line and the END marker.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._seen: Dict[str, int] = {}
+        self._started = False
+        self._finished = False
+
+    def feed(self, text: str) -> bytes:
+        """
+        Encode the complete lines in text plus any buffered partial line.
+
+        Args:
+            text: Next chunk of SDP text
+
+        Returns:
+            bytes: Encoded output for the lines completed by this chunk
+        """
+        if self._finished:
+            raise ValueError("Encoder already finished")
+        out = self._header()
+        data = self._pending + text
+        start = 0
+        while True:
+            newline = data.find("\n", start)
+            if newline < 0:
+                break
+            if newline > start and data[newline - 1] == "\r":
+                self._line(out, data[start:newline - 1], _TERM_CRLF)
+            else:
+                self._line(out, data[start:newline], _TERM_LF)
+            start = newline + 1
+        self._pending = data[start:]
+        return bytes(out)
+
+    def finish(self) -> bytes:
+        """
+        Flush the trailing unterminated line and write the END marker.
+
+        Returns:
+            bytes: Final encoded output
+        """
+        if self._finished:
+            raise ValueError("Encoder already finished")
+        out = self._header()
+        if self._pending:
+            self._line(out, self._pending, _TERM_NONE)
+            self._pending = ""
+        _put_varint(out, _KIND_END << 1)
+        self._finished = True
+        return bytes(out)
+
+    def _header(self) -> bytearray:
+        out = bytearray()
+        if not self._started:
+            out.append(MAGIC)
+            out.append(VERSION)
+            self._started = True
+        return out
+
+    def _op(self, out: bytearray, kind: int, term: int) -> None:
+        if term == _TERM_CRLF:
+            _put_varint(out, kind << 1)
+        else:
+            _put_varint(out, kind << 1 | 1)
+            out.append(term)
+
+    def _line(self, out: bytearray, line: str, term: int) -> None:
+        index = _EXACT.get(line)
+        if index is not None:
+            self._op(out, _KIND_DICTIONARY + index, term)
+            return
+
+        ref = self._seen.get(line)
+        if ref is not None:
+            self._op(out, _KIND_BACKREF, term)
+            _put_varint(out, ref)
+            return
+
+        self._seen[line] = len(self._seen)
+        for template in _BUCKETS.get(_bucket_key(line), ()):
+            match = template.pattern.fullmatch(line)
+            if match is None:
+                continue
+            self._op(out, _KIND_DICTIONARY + template.index, term)
+            for slot, value in zip(template.slots, match.groups()):
+                if slot == "{}":
+                    _put_varint(out, int(value))
+                elif slot == "{#}":
+                    raw = bytes.fromhex(value.replace(":", ""))
+                    _put_varint(out, len(raw))
+                    out += raw
+                else:
+                    _put_string(out, value)
+            return
+
+        self._op(out, _KIND_LITERAL, term)
+        _put_string(out, line)
+
+
+class SdpDecoder:
+    """
+    Incremental decoder: feed() encoded bytes in arbitrary chunks, each
+    call returns the SDP text for every token completed so far; finish()
+    verifies that the END marker arrived.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._history: List[str] = []
+        self._header_read = False
+        self._ended = False
+
+    def feed(self, data: bytes) -> str:
+        """
+        Decode every complete token in the buffered input.
+
+        Args:
+            data: Next chunk of encoded bytes
+
+        Returns:
+            str: SDP text for the tokens completed by this chunk
+
+        Raises:
+            ValueError: Bad magic/version, unknown op or data after END
+        """
+        if self._ended:
+            if data:
+                raise ValueError("Data after end of compact SDP")
+            return ""
+        self._buffer += data
+        reader = _Reader(self._buffer)
+        out: List[str] = []
+        try:
+            if not self._header_read:
+                if reader.byte() != MAGIC:
+                    raise ValueError("Not a compact SDP")
+                if reader.byte() != VERSION:
+                    raise ValueError("Unsupported compact SDP version")
+                self._header_read = True
+                del self._buffer[:reader.pos]
+                reader.pos = 0
+            while not self._ended:
+                text = self._token(reader)
+                del self._buffer[:reader.pos]
+                reader.pos = 0
+                if text is not None:
+                    out.append(text)
+        except _Incomplete:
+            pass
+        if self._ended and self._buffer:
+            raise ValueError("Data after end of compact SDP")
+        return "".join(out)
+
+    def finish(self) -> None:
+        """
+        Raises:
+            ValueError: Input ended before the END marker
+        """
+        if not self._ended:
+            raise ValueError("Truncated compact SDP")
+
+    def _token(self, reader: _Reader) -> Optional[str]:
+        op = reader.varint()
+        kind, alt = op >> 1, op & 1
+        term = reader.byte() if alt else _TERM_CRLF
+        if term >= len(_TERMINATORS):
+            raise ValueError(f"Unknown line terminator {term}")
+
+        if kind == _KIND_END:
+            self._ended = True
+            return None
+        if kind == _KIND_LITERAL:
+            line = reader.string()
+            self._history.append(line)
+        elif kind == _KIND_BACKREF:
+            ref = reader.varint()
+            if ref >= len(self._history):
+                raise ValueError(f"Back-reference {ref} out of range")
+            line = self._history[ref]
+        else:
+            index = kind - _KIND_DICTIONARY
+            if index >= len(_TEMPLATES):
+                raise ValueError(f"Unknown dictionary entry {index}")
+            template = _TEMPLATES[index]
+            values = []
+            for slot in template.slots:
+                if slot == "{}":
+                    values.append(str(reader.varint()))
+                elif slot == "{#}":
+                    values.append(":".join(f"{b:02X}" for b in reader.raw(reader.varint())))
+                else:
+                    values.append(reader.string())
+            line = template.render(values)
+            if template.slots:
+                self._history.append(line)
+        return line + _TERMINATORS[term]
+
+
+###############################################################################
+# ONE-SHOT HELPERS
+###############################################################################
+
+def encode(sdp: str) -> bytes:
+    """Encode a complete SDP to compact bytes"""
+    encoder = SdpEncoder()
+    return encoder.feed(sdp) + encoder.finish()
+
+
+def decode(data: bytes) -> str:
+    """
+    Decode compact bytes back to the original SDP text.
+
+    Raises:
+        ValueError: Corrupt or truncated input
+    """
+    decoder = SdpDecoder()
+    text = decoder.feed(data)
+    decoder.finish()
+    return text
+
+
+def encode_text(sdp: str) -> str:
+    """Encode a complete SDP to the "sdpz1:" base64url text form"""
+    return TEXT_PREFIX + base64.urlsafe_b64encode(encode(sdp)).rstrip(b"=").decode("ascii")
+
+
+def is_compact(value: str) -> bool:
+    """True if value is in the compact text form"""
+    return value.startswith(TEXT_PREFIX)
+
+
+def decode_text(value: str) -> str:
+    """
+    Decode the "sdpz1:" text form back to the original SDP text.
+
+    Raises:
+        ValueError: Missing prefix, bad base64 or corrupt payload
+    """
+    if not is_compact(value):
+        raise ValueError("Not a compact SDP")
+    payload = value[len(TEXT_PREFIX):]
+    try:
+        data = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("Compact SDP is not valid base64url")
+    return decode(data)
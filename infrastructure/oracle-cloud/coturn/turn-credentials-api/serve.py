@@ -0,0 +1,189 @@
+"""
+Production Launcher for TURN Credentials API
+
+Runs main:app under gunicorn with uvicorn workers sized to the host:
+one worker per usable CPU core, capped by available memory. The app is
+preloaded in the master so workers fork with the imports already done,
+uvloop/httptools are used when installed, and HTTP keep-alive is held
+longer than nginx's upstream keep-alive so nginx always closes first.
+
+Usage:
+    python serve.py              # Start the server
+    python serve.py --print-config
+
+Process control (systemd ExecReload sends HUP):
+    kill -HUP <master>   Graceful rolling restart of workers and config.
+                         With preload the app code is NOT re-imported.
+    kill -USR2 <master>  Start a new master with fresh code alongside the
+                         old one; then send WINCH and QUIT to the old
+                         master to complete a zero-downtime upgrade.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, Optional
+
+from uvicorn.workers import UvicornWorker
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+API_BIND = os.environ.get('API_BIND', '0.0.0.0:8080')
+API_WORKERS = int(os.environ.get('API_WORKERS', 0))  # 0 = size to the host
+API_WORKER_MEMORY_MB = int(os.environ.get('API_WORKER_MEMORY_MB', 80))
+API_MEMORY_FRACTION = float(os.environ.get('API_MEMORY_FRACTION', 0.5))
+API_KEEPALIVE = int(os.environ.get('API_KEEPALIVE', 75))
+API_GRACEFUL_TIMEOUT = int(os.environ.get('API_GRACEFUL_TIMEOUT', 30))
+API_MAX_REQUESTS = int(os.environ.get('API_MAX_REQUESTS', 0))
+API_FORWARDED_ALLOW_IPS = os.environ.get('API_FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+###############################################################################
+# HOST SIZING
+###############################################################################
+
+def usable_cpu_count() -> int:
+    """Number of CPU cores this process may run on"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def total_memory_mb(meminfo_path: str = "/proc/meminfo") -> Optional[int]:
+    """
+    Total physical memory in MiB, or None when it cannot be read.
+
+    Args:
+        meminfo_path: Path to a /proc/meminfo style file
+    """
+    try:
+        with open(meminfo_path) as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def worker_count(
+    cpus: Optional[int] = None,
+    memory_mb: Optional[int] = None,
+    override: int = API_WORKERS
+) -> int:
+    """
+    Size the worker pool to the host.
+
+    Credential minting is CPU-bound and each uvicorn worker runs its own
+    event loop, so one worker per core saturates the CPU. On the 1 GB
+    free-tier shapes memory runs out first, so the count is also capped to
+    API_MEMORY_FRACTION of RAM at API_WORKER_MEMORY_MB per worker.
+
+    Args:
+        cpus: Usable cores (default: detected)
+        memory_mb: Total memory in MiB (default: detected)
+        override: Explicit worker count; 0 means size automatically
+
+    Returns:
+        int: Number of workers, at least 1
+    """
+    if override > 0:
+        return override
+    workers = cpus if cpus is not None else usable_cpu_count()
+    if memory_mb is None:
+        memory_mb = total_memory_mb()
+    if memory_mb:
+        workers = min(workers, int(memory_mb * API_MEMORY_FRACTION) // API_WORKER_MEMORY_MB)
+    return max(1, workers)
+
+
+###############################################################################
+# WORKER
+###############################################################################
+
+class TurnApiWorker(UvicornWorker):
+    """
+    Uvicorn worker tuned for running behind nginx.
+
+    loop/http "auto" select uvloop and httptools when installed. Keep-alive
+    outlasts nginx's upstream keepalive_timeout (60s) so idle upstream
+    connections are always closed by nginx, never reset mid-request.
+    """
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "loop": "auto",
+        "http": "auto",
+        "timeout_keep_alive": API_KEEPALIVE,
+        "proxy_headers": True,
+        "forwarded_allow_ips": API_FORWARDED_ALLOW_IPS,
+        "server_header": False,
+    }
+
+
+###############################################################################
+# GUNICORN SETTINGS
+###############################################################################
+
+def gunicorn_options() -> Dict[str, Any]:
+    """
+    Gunicorn settings for the production server.
+
+    Returns:
+        Dict of gunicorn setting names to values
+    """
+    return {
+        "bind": API_BIND,
+        "workers": worker_count(),
+        "worker_class": "serve.TurnApiWorker",
+        "preload_app": True,
+        "keepalive": API_KEEPALIVE,
+        "graceful_timeout": API_GRACEFUL_TIMEOUT,
+        "timeout": 30,
+        "max_requests": API_MAX_REQUESTS,
+        "max_requests_jitter": API_MAX_REQUESTS // 10,
+        "forwarded_allow_ips": API_FORWARDED_ALLOW_IPS,
+        "accesslog": None,
+        "errorlog": "-",
+        "loglevel": "info",
+        "proc_name": "turn-credentials-api",
+    }
+
+
+def run(options: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Start gunicorn serving main:app.
+
+    Args:
+        options: Gunicorn settings (default: gunicorn_options())
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class TurnApiApplication(BaseApplication):
+        def __init__(self, settings: Dict[str, Any]):
+            self.settings = settings
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.settings.items():
+                if value is not None and key in self.cfg.settings:
+                    self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            from main import app
+            return app
+
+    TurnApiApplication(options or gunicorn_options()).run()
+
+
+if __name__ == "__main__":
+    if "--print-config" in sys.argv:
+        print(json.dumps(gunicorn_options(), indent=2))
+        sys.exit(0)
+    run()
@@ -0,0 +1,608 @@
+"""
+Bulk Validator for Exported Session Documents
+
+Checks NDJSON exports of the webrtc_sessions collection (one document
+per line) against shared/schemas/webrtc_session.schema.json plus the
+state-machine rules the schema cannot express:
+
+    - offered needs an offer; answered/connected need offer and answer;
+      pending has neither
+    - created_at <= offer.created_at <= answer.created_at <= updated_at
+
+The schema is compiled once per process into a generated Python function
+with every check inlined (no per-document schema walk), so a document
+costs one json.loads plus straight-line isinstance/len/set lookups.
+
+Input is streamed: files are split on line boundaries into byte ranges
+that a process pool validates in parallel, each worker reading its range
+line by line through a fixed-size buffer, so memory stays constant
+whatever the export size. Violations are counted per code; the full list
+can be written as NDJSON (per-worker part files concatenated in input
+order) and a bounded sample is kept for the report.
+
+Violations use the codes in shared/constants/error-codes.json:
+
+    E101 INVALID_SDP            offer/answer malformed (sdp empty, bad type)
+    E102 SDP_TOO_LARGE          offer/answer sdp over maxLength
+    E103 INVALID_ICE_CANDIDATE  ice_candidates entries
+    E004 INVALID_SESSION_STATE  everything else, including invalid JSON
+
+Each violation records the byte offset of its line (stable across
+parallel runs), the session_id when readable, the field path and why.
+
+Usage:
+    python session_validator.py sessions.ndjson
+    python session_validator.py export-*.ndjson --workers 8 -o violations.ndjson
+    gsutil cat gs://bucket/sessions.ndjson | python session_validator.py -
+
+Exit status is 1 when any document is invalid.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import argparse
+import calendar
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, IO, List, Optional, Sequence, Tuple
+
+from log_analyzer import chunk_boundaries
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "..", "shared")
+DEFAULT_SCHEMA = os.path.join(SHARED_DIR, "schemas", "webrtc_session.schema.json")
+DEFAULT_ERROR_CODES = os.path.join(SHARED_DIR, "constants", "error-codes.json")
+
+DEFAULT_MAX_SAMPLES = 20
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Status -> SDPs the document must carry / must not carry
+REQUIRED_BY_STATUS = {
+    "pending": (),
+    "offered": ("offer",),
+    "answered": ("offer", "answer"),
+    "connected": ("offer", "answer"),
+    "ended": (),
+}
+FORBIDDEN_BY_STATUS = {
+    "pending": ("offer", "answer"),
+    "offered": ("answer",),
+}
+
+# (path, earlier, later): timestamp order enforced when both are valid
+TIMESTAMP_ORDER = (
+    ("created_at", "updated_at"),
+    ("created_at", "offer.created_at"),
+    ("offer.created_at", "answer.created_at"),
+    ("offer.created_at", "updated_at"),
+    ("answer.created_at", "updated_at"),
+)
+
+FORMATS = {
+    "uuid": re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\Z"),
+    "uri": re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:\S+\Z"),
+}
+DATE_TIME = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[Tt ](\d{2}):(\d{2}):(\d{2})(\.\d+)?(?:[Zz]|([+-])(\d{2}):(\d{2}))\Z"
+)
+
+# Schema keywords the compiler understands; anything else is an error so a
+# schema change cannot silently go unchecked
+SUPPORTED_KEYWORDS = frozenset({
+    "$schema", "$id", "$ref", "title", "description", "type", "required", "properties",
+    "definitions", "enum", "minLength", "maxLength", "minimum", "maximum", "format", "items",
+})
+
+# Violation: (error name, field path, detail)
+Violation = Tuple[str, str, str]
+
+
+###############################################################################
+# ERROR CODES
+###############################################################################
+
+def load_error_codes(path: str = DEFAULT_ERROR_CODES) -> Dict[str, str]:
+    """
+    Flatten error-codes.json to error name -> code.
+
+    Args:
+        path: error-codes.json
+
+    Returns:
+        Dict such as {"INVALID_SDP": "E101", ...}
+    """
+    with open(path) as f:
+        groups = json.load(f)["errors"]
+    return {name: entry["code"] for group in groups.values() for name, entry in group.items()}
+
+
+def error_name_for(path: str, keyword: str) -> str:
+    """
+    Error name for a schema violation at a static field path.
+
+    Args:
+        path: Dotted path with "[*]" for array items
+        keyword: Schema keyword that failed
+
+    Returns:
+        Name from error-codes.json
+    """
+    root = path.split(".", 1)[0].split("[", 1)[0]
+    if root in ("offer", "answer"):
+        if path.endswith(".sdp") and keyword == "maxLength":
+            return "SDP_TOO_LARGE"
+        return "INVALID_SDP"
+    if root == "ice_candidates":
+        return "INVALID_ICE_CANDIDATE"
+    return "INVALID_SESSION_STATE"
+
+
+###############################################################################
+# SCHEMA COMPILER
+###############################################################################
+
+def parse_date_time(value: str) -> Optional[float]:
+    """
+    RFC 3339 timestamp to UNIX time.
+
+    Returns:
+        float seconds, or None if value is not a valid date-time
+    """
+    match = DATE_TIME.match(value)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction, sign, off_h, off_m = match.groups()
+    try:
+        moment = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+    except ValueError:
+        return None
+    seconds = calendar.timegm(moment.timetuple()) + (float(fraction) if fraction else 0.0)
+    if sign:
+        offset = int(off_h) * 3600 + int(off_m) * 60
+        seconds += -offset if sign == "+" else offset
+    return seconds
+
+
+class _Compiler:
+    """Generates the source of one validation function from a JSON schema"""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {"_MISSING": object(), "_parse_date_time": parse_date_time}
+        self.counter = 0
+
+    def compile(self) -> Callable[[Any, List[Violation], Dict[str, float]], None]:
+        self.lines.append("def _check(doc, out, ts):")
+        self.node(self.schema, "doc", "", '""', 1)
+        source = "\n".join(self.lines)
+        exec(compile(source, "<session-schema>", "exec"), self.namespace)
+        check = self.namespace["_check"]
+        check.source = source
+        return check
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def const(self, value: Any) -> str:
+        name = self.name("_c")
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def fail(self, indent: int, path: str, path_expr: str, keyword: str, detail: str) -> None:
+        self.emit(indent, f"out.append(({error_name_for(path, keyword)!r}, {path_expr}, {detail}))")
+
+    def resolve(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        ref = schema.get("$ref")
+        if ref is None:
+            return schema
+        if not ref.startswith("#/"):
+            raise ValueError(f"Unsupported $ref {ref}")
+        target = self.schema
+        for part in ref[2:].split("/"):
+            target = target[part]
+        return self.resolve(target)
+
+    def node(self, schema: Dict[str, Any], value: str, path: str, path_expr: str, indent: int) -> None:
+        schema = self.resolve(schema)
+        unknown = set(schema) - SUPPORTED_KEYWORDS
+        if unknown:
+            raise ValueError(f"Unsupported schema keywords at {path or '<root>'}: {sorted(unknown)}")
+
+        kind = schema.get("type")
+        check = {
+            "object": f"isinstance({value}, dict)",
+            "array": f"isinstance({value}, list)",
+            "string": f"isinstance({value}, str)",
+            "integer": f"isinstance({value}, int) and not isinstance({value}, bool)",
+            None: None,
+        }.get(kind, "")
+        if check == "":
+            raise ValueError(f"Unsupported type {kind!r} at {path}")
+        if check is not None:
+            self.emit(indent, f"if not ({check}):")
+            self.fail(indent + 1, path, path_expr, "type", repr(f"must be {kind}"))
+            self.emit(indent, "else:")
+            indent += 1
+        body_start = len(self.lines)
+
+        if "enum" in schema:
+            allowed = self.const(frozenset(schema["enum"]))
+            self.emit(indent, f"if {value} not in {allowed}:")
+            self.fail(indent + 1, path, path_expr, "enum",
+                      repr("must be one of " + ", ".join(map(str, schema["enum"]))))
+        if "minLength" in schema:
+            self.emit(indent, f"if len({value}) < {int(schema['minLength'])}:")
+            self.fail(indent + 1, path, path_expr, "minLength",
+                      f"'length %d below {int(schema['minLength'])}' % len({value})")
+        if "maxLength" in schema:
+            self.emit(indent, f"if len({value}) > {int(schema['maxLength'])}:")
+            self.fail(indent + 1, path, path_expr, "maxLength",
+                      f"'length %d exceeds {int(schema['maxLength'])}' % len({value})")
+        if "minimum" in schema:
+            self.emit(indent, f"if {value} < {schema['minimum']!r}:")
+            self.fail(indent + 1, path, path_expr, "minimum", repr(f"below minimum {schema['minimum']}"))
+        if "maximum" in schema:
+            self.emit(indent, f"if {value} > {schema['maximum']!r}:")
+            self.fail(indent + 1, path, path_expr, "maximum", repr(f"above maximum {schema['maximum']}"))
+        if "format" in schema:
+            self.format(schema["format"], value, path, path_expr, indent)
+
+        if kind == "object":
+            for key in schema.get("required", ()):
+                self.emit(indent, f"if {key!r} not in {value}:")
+                child = f"{path}.{key}" if path else key
+                self.fail(indent + 1, child, self.join(path_expr, child, key), "required", "'missing required field'")
+            for key, sub in schema.get("properties", {}).items():
+                child_value = self.name("_v")
+                child = f"{path}.{key}" if path else key
+                self.emit(indent, f"{child_value} = {value}.get({key!r}, _MISSING)")
+                self.emit(indent, f"if {child_value} is not _MISSING:")
+                self.node(sub, child_value, child, self.join(path_expr, child, key), indent + 1)
+        elif kind == "array" and "items" in schema:
+            index, item = self.name("_i"), self.name("_v")
+            self.emit(indent, f"for {index}, {item} in enumerate({value}):")
+            self.node(schema["items"], item, path + "[*]", f"{path_expr} + '[%d]' % {index}", indent + 1)
+        if len(self.lines) == body_start:
+            self.emit(indent, "pass")
+
+    def format(self, name: str, value: str, path: str, path_expr: str, indent: int) -> None:
+        if name == "date-time":
+            parsed = self.name("_t")
+            self.emit(indent, f"{parsed} = _parse_date_time({value})")
+            self.emit(indent, f"if {parsed} is None:")
+            self.fail(indent + 1, path, path_expr, "format", "'not an RFC 3339 date-time'")
+            self.emit(indent, "else:")
+            self.emit(indent + 1, f"ts[{path!r}] = {parsed}")
+        elif name in FORMATS:
+            pattern = self.const(FORMATS[name])
+            self.emit(indent, f"if {pattern}.match({value}) is None:")
+            self.fail(indent + 1, path, path_expr, "format", repr(f"not a valid {name}"))
+        else:
+            raise ValueError(f"Unsupported format {name!r} at {path}")
+
+    @staticmethod
+    def join(path_expr: str, child: str, key: str) -> str:
+        if "[*]" not in child:
+            return repr(child)
+        return f"{path_expr} + {'.' + key!r}"
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any, List[Violation], Dict[str, float]], None]:
+    """
+    Compile a JSON schema into a checking function.
+
+    The function appends (error name, path, detail) to out for every
+    violation and records each valid date-time as UNIX time in ts under
+    its static path. Its generated source is kept on .source.
+
+    Raises:
+        ValueError: The schema uses a keyword, type or format not supported
+    """
+    return _Compiler(schema).compile()
+
+
+###############################################################################
+# DOCUMENT VALIDATION
+###############################################################################
+
+def check_consistency(doc: Dict[str, Any], ts: Dict[str, float], out: List[Violation]) -> None:
+    """
+    State-machine rules between status, SDPs and timestamps.
+
+    Args:
+        doc: Document that passed the top-level object check
+        ts: Valid timestamps by path, as recorded by the compiled schema
+        out: Violations (appended to)
+    """
+    status = doc.get("status")
+    for field in REQUIRED_BY_STATUS.get(status, ()):
+        if field not in doc:
+            out.append(("INVALID_SESSION_STATE", field, f"required when status is {status}"))
+    for field in FORBIDDEN_BY_STATUS.get(status, ()):
+        if field in doc:
+            out.append(("INVALID_SESSION_STATE", field, f"not allowed when status is {status}"))
+    for earlier, later in TIMESTAMP_ORDER:
+        if earlier in ts and later in ts and ts[later] < ts[earlier]:
+            out.append(("INVALID_SESSION_STATE", later, f"earlier than {earlier}"))
+
+
+class SessionValidator:
+    """A compiled schema plus the error-code table"""
+
+    def __init__(self, schema: Dict[str, Any], error_codes: Dict[str, str]):
+        self.check = compile_schema(schema)
+        self.error_codes = error_codes
+
+    @classmethod
+    def from_files(cls, schema_path: str = DEFAULT_SCHEMA, codes_path: str = DEFAULT_ERROR_CODES) -> "SessionValidator":
+        with open(schema_path) as f:
+            schema = json.load(f)
+        return cls(schema, load_error_codes(codes_path))
+
+    def validate(self, doc: Any) -> List[Violation]:
+        """
+        Validate one parsed document.
+
+        Returns:
+            List of (error name, path, detail); empty if valid
+        """
+        out: List[Violation] = []
+        ts: Dict[str, float] = {}
+        self.check(doc, out, ts)
+        if isinstance(doc, dict):
+            check_consistency(doc, ts, out)
+        return out
+
+    def validate_line(self, line: bytes, offset: int) -> List[Dict[str, Any]]:
+        """
+        Validate one NDJSON line.
+
+        Args:
+            line: Raw line (trailing newline allowed)
+            offset: Byte offset of the line in its file
+
+        Returns:
+            Violation records with offset, session_id, code, error, path, message
+        """
+        try:
+            doc = json.loads(line)
+        except ValueError as exc:
+            violations = [("INVALID_SESSION_STATE", "", f"invalid JSON: {exc}")]
+            doc = None
+        except RecursionError:
+            # One pathological line must not abort the whole run
+            violations = [("INVALID_SESSION_STATE", "", "invalid JSON: nested too deeply")]
+            doc = None
+        else:
+            violations = self.validate(doc)
+        if not violations:
+            return []
+        session_id = doc.get("session_id") if isinstance(doc, dict) else None
+        return [
+            {
+                "offset": offset,
+                "session_id": session_id if isinstance(session_id, str) else None,
+                "code": self.error_codes.get(name, ""),
+                "error": name,
+                "path": path,
+                "message": detail,
+            }
+            for name, path, detail in violations
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_validator(schema_path: str, codes_path: str) -> SessionValidator:
+    """Compile once per process"""
+    return SessionValidator.from_files(schema_path, codes_path)
+
+
+###############################################################################
+# STREAMING SCAN
+###############################################################################
+
+def _empty_result() -> Dict[str, Any]:
+    return {"documents": 0, "invalid": 0, "violations": {}, "samples": []}
+
+
+def validate_stream(
+    stream: IO[bytes],
+    validator: SessionValidator,
+    start: int = 0,
+    end: Optional[int] = None,
+    sink: Optional[IO[str]] = None,
+    max_samples: int = DEFAULT_MAX_SAMPLES
+) -> Dict[str, Any]:
+    """
+    Validate NDJSON lines from a binary stream.
+
+    Args:
+        stream: Buffered binary stream positioned at start
+        validator: Compiled validator
+        start: Offset of the first byte (for reporting)
+        end: Stop once a line starting at or after this offset is reached
+             (None = end of stream)
+        sink: Text stream receiving every violation as NDJSON
+        max_samples: Violations kept in the result
+
+    Returns:
+        Dict with documents, invalid, violations (code -> count) and samples
+    """
+    result = _empty_result()
+    counts: Dict[str, int] = result["violations"]
+    offset = start
+    while end is None or offset < end:
+        line = stream.readline()
+        if not line:
+            break
+        line_offset, offset = offset, offset + len(line)
+        if not line.strip():
+            continue
+        result["documents"] += 1
+        records = validator.validate_line(line, line_offset)
+        if not records:
+            continue
+        result["invalid"] += 1
+        for record in records:
+            counts[record["code"]] = counts.get(record["code"], 0) + 1
+            if len(result["samples"]) < max_samples:
+                result["samples"].append(record)
+            if sink is not None:
+                sink.write(json.dumps(record) + "\n")
+    return result
+
+
+def merge_results(into: Dict[str, Any], partial: Dict[str, Any], max_samples: int = DEFAULT_MAX_SAMPLES) -> Dict[str, Any]:
+    """Fold a later range's result into the running total"""
+    into["documents"] += partial["documents"]
+    into["invalid"] += partial["invalid"]
+    for code, count in partial["violations"].items():
+        into["violations"][code] = into["violations"].get(code, 0) + count
+    into["samples"].extend(partial["samples"][:max(0, max_samples - len(into["samples"]))])
+    return into
+
+
+def validate_range(task: Tuple[str, int, int, str, str, Optional[str], int]) -> Dict[str, Any]:
+    """
+    Worker entry point: validate one byte range of one file.
+
+    Args:
+        task: (path, start, end, schema path, error-codes path,
+               part file for violations or None, max samples)
+    """
+    path, start, end, schema_path, codes_path, part_path, max_samples = task
+    validator = get_validator(schema_path, codes_path)
+    with open(path, "rb", buffering=READ_BUFFER_SIZE) as f:
+        f.seek(start)
+        if part_path is None:
+            return validate_stream(f, validator, start, end, None, max_samples)
+        with open(part_path, "w") as sink:
+            return validate_stream(f, validator, start, end, sink, max_samples)
+
+
+def validate_files(
+    paths: Sequence[str],
+    workers: int = 0,
+    output: Optional[str] = None,
+    schema_path: str = DEFAULT_SCHEMA,
+    codes_path: str = DEFAULT_ERROR_CODES,
+    max_samples: int = DEFAULT_MAX_SAMPLES
+) -> Dict[str, Any]:
+    """
+    Validate NDJSON exports in parallel.
+
+    Args:
+        paths: NDJSON files
+        workers: Worker processes (0 = one per CPU; 1 = no pool)
+        output: File receiving every violation as NDJSON, in input order
+        schema_path: webrtc_session.schema.json
+        codes_path: error-codes.json
+        max_samples: Violations kept in the result
+
+    Returns:
+        Dict with documents, invalid, violations (code -> count) and samples
+    """
+    workers = workers or os.cpu_count() or 1
+    get_validator(schema_path, codes_path)    # fail fast on a bad schema
+    ranges = [(path, start, end) for path in paths for start, end in chunk_boundaries(path, workers)]
+
+    part_dir = tempfile.mkdtemp(prefix="session-validator-") if output else None
+    tasks = [
+        (path, start, end, schema_path, codes_path,
+         os.path.join(part_dir, f"{i:06d}.ndjson") if part_dir else None, max_samples)
+        for i, (path, start, end) in enumerate(ranges)
+    ]
+
+    result = _empty_result()
+    try:
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                merge_results(result, validate_range(task), max_samples)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for partial in pool.map(validate_range, tasks):
+                    merge_results(result, partial, max_samples)
+
+        if output:
+            with open(output, "wb") as out:
+                for task in tasks:
+                    with open(task[5], "rb") as part:
+                        shutil.copyfileobj(part, out)
+    finally:
+        if part_dir:
+            shutil.rmtree(part_dir, ignore_errors=True)
+    return result
+
+
+###############################################################################
+# MAIN
+###############################################################################
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+
+    Returns:
+        int: 0 if every document is valid, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Validate NDJSON session exports against the session schema")
+    parser.add_argument("files", nargs="+", help="NDJSON files, or - for stdin")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Worker processes (0 = CPU count)")
+    parser.add_argument("-o", "--output", help="Write every violation to this NDJSON file")
+    parser.add_argument("--schema", default=DEFAULT_SCHEMA, help="webrtc_session.schema.json")
+    parser.add_argument("--error-codes", default=DEFAULT_ERROR_CODES, help="error-codes.json")
+    parser.add_argument("--samples", type=int, default=DEFAULT_MAX_SAMPLES, help="Violations shown in the report")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    if args.files == ["-"]:
+        validator = get_validator(args.schema, args.error_codes)
+        stdin = sys.stdin.buffer
+        if args.output:
+            with open(args.output, "w") as sink:
+                result = validate_stream(stdin, validator, sink=sink, max_samples=args.samples)
+        else:
+            result = validate_stream(stdin, validator, max_samples=args.samples)
+    else:
+        missing = [path for path in args.files if not os.path.isfile(path)]
+        if missing:
+            print(f"File not found: {', '.join(missing)}", file=sys.stderr)
+            return 1
+        result = validate_files(
+            args.files, args.workers, args.output, args.schema, args.error_codes, args.samples
+        )
+
+    if args.format == "json":
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{'documents':28} {result['documents']}")
+        print(f"{'invalid':28} {result['invalid']}")
+        for code, count in sorted(result["violations"].items()):
+            print(f"{'violations ' + code:28} {count}")
+        for record in result["samples"]:
+            print(f"  @{record['offset']} {record['session_id'] or '-'} {record['code']} "
+                  f"{record['path'] or '<document>'}: {record['message']}")
+    return 1 if result["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
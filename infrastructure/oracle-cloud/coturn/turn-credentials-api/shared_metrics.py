@@ -0,0 +1,341 @@
+"""
+Shared-Memory Metrics Across gunicorn Workers
+
+Every worker keeps its own in-process metrics (see metrics.py), so a
+scrape that lands on one worker sees 1/N of the traffic, rate-limit
+rejections, cache hits, quality samples or signaling sessions. This
+module gives workers one anonymous shared mmap, allocated when main is
+imported (in the gunicorn master, with preload_app) and inherited by
+every forked worker. No Redis, no sockets, no IPC round trips.
+
+Layout (fixed at allocation):
+
+    used        int64             slots handed out so far
+    pids        int64[rows]       owner of each worker row (row 0: retired)
+    kinds       int8[slots]       how a slot aggregates (counter, gauge sum/max/min)
+    keys        [slots][KEY_SIZE] JSON [metric, labels, part] of each slot
+    values      float64[rows][slots]
+
+Each series owns one slot (a histogram series one per bucket, plus
+overflow and sum); slots are assigned once, under a lock, the first time
+any process publishes the series, and cached per process afterwards.
+Each worker only ever writes its own row, so writes need no lock: a
+publish runs the registry's collectors and copies the worker's values
+into its row every interval, and whenever that worker serves a scrape.
+
+The aggregation view sums counters and histograms over every row, and
+combines gauges over live workers only, by their aggregate (sum, max or
+min). A worker that exits keeps its row until a new worker claims it;
+its counters are then moved to the retired row, so totals stay
+monotonic across worker restarts.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_SLOTS = 4096               # series slots (a latency histogram series takes 14)
+DEFAULT_MAX_WORKERS = 32
+DEFAULT_PUBLISH_INTERVAL = 1.0     # seconds between publishes of a worker's values
+KEY_SIZE = 160                     # bytes per encoded series key
+
+KIND_COUNTER = 0                   # counters and histogram parts: sum over all rows
+KIND_GAUGE = {"sum": 1, "max": 2, "min": 3}
+RETIRED_ROW = 0
+
+SeriesKey = Tuple[str, Tuple[str, ...]]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+###############################################################################
+# SHARED METRICS
+###############################################################################
+
+class SharedMetrics:
+    """
+    Per-worker rows of metric values in one shared mmap, plus the
+    aggregation view over them.
+    """
+
+    def __init__(self, slots: int = DEFAULT_SLOTS, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Allocate the shared region; call before workers fork.
+
+        Args:
+            slots: Series slots available to all workers together
+            max_workers: Worker rows (concurrently live workers)
+        """
+        if slots < 1 or max_workers < 1:
+            raise ValueError("slots and max_workers must be at least 1")
+        self.slots = slots
+        self.rows = max_workers + 1
+
+        pids_at = 8
+        kinds_at = pids_at + 8 * self.rows
+        keys_at = _align(kinds_at + slots)
+        values_at = _align(keys_at + slots * KEY_SIZE)
+        size = values_at + 8 * self.rows * slots
+
+        # Anonymous and MAP_SHARED: forked workers see the same pages
+        self._mmap = mmap.mmap(-1, size)
+        self._used = np.frombuffer(self._mmap, np.int64, 1, 0)
+        self._pids = np.frombuffer(self._mmap, np.int64, self.rows, pids_at)
+        self._kinds = np.frombuffer(self._mmap, np.int8, slots, kinds_at)
+        self._keys = np.frombuffer(self._mmap, np.uint8, slots * KEY_SIZE, keys_at).reshape(slots, KEY_SIZE)
+        self._values = np.frombuffer(self._mmap, np.float64, self.rows * slots, values_at).reshape(self.rows, slots)
+        self._lock = multiprocessing.get_context("fork").Lock()
+
+        # Per-process caches of the shared key table
+        self._slot_of: Dict[SeriesKey, int] = {}          # -1: could not be allocated
+        self._decoded: List[Tuple[str, Tuple[str, ...], int]] = []
+        self._pid: Optional[int] = None
+        self._row: Optional[int] = None
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    ###########################################################################
+    # SLOTS
+    ###########################################################################
+
+    def _scan(self) -> None:
+        """Decode keys other processes added since the last scan"""
+        used = int(self._used[0])
+        for slot in range(len(self._decoded), used):
+            name, labels, part = json.loads(self._keys[slot].tobytes().rstrip(b"\x00"))
+            self._decoded.append((name, tuple(labels), part))
+            if part == 0:
+                self._slot_of[(name, tuple(labels))] = slot
+
+    def _slot(self, name: str, labels: Tuple[str, ...], width: int, kind: int) -> int:
+        key = (name, labels)
+        slot = self._slot_of.get(key)
+        if slot is not None:
+            return slot
+        with self._lock:
+            self._scan()
+            slot = self._slot_of.get(key)
+            if slot is not None:
+                return slot
+            used = int(self._used[0])
+            encoded = [json.dumps([name, labels, part]).encode() for part in range(width)]
+            if used + width > self.slots or max(len(e) for e in encoded) > KEY_SIZE:
+                self._slot_of[key] = -1
+                self.dropped += 1
+                logger.warning(f"Shared metrics: no slot for {name}{list(labels)}; series stays per worker")
+                return -1
+            for part, data in enumerate(encoded):
+                self._keys[used + part, :len(data)] = np.frombuffer(data, np.uint8)
+            self._kinds[used:used + width] = kind
+            if kind != KIND_COUNTER:
+                # Unreported gauges are NaN so they never drag a max/min
+                self._values[:, used:used + width] = np.nan
+            # Published last: readers only decode complete keys
+            self._used[0] = used + width
+            self._scan()
+        return self._slot_of[key]
+
+    ###########################################################################
+    # WORKER ROWS
+    ###########################################################################
+
+    def _claim_row(self) -> Optional[int]:
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._row
+        with self._lock:
+            owners = [int(owner) for owner in self._pids]
+            row = next((r for r in range(1, self.rows) if owners[r] == pid), None)
+            if row is None:
+                row = next(
+                    (r for r in range(1, self.rows) if owners[r] == 0 or not _alive(owners[r])),
+                    None
+                )
+                if row is not None:
+                    self._retire(row)
+                    self._pids[row] = pid
+        if row is None:
+            logger.warning(f"Shared metrics: all {self.rows - 1} worker rows in use; pid {pid} is not aggregated")
+        self._pid, self._row = pid, row
+        return row
+
+    def _retire(self, row: int) -> None:
+        """Move a dead worker's counters to the retired row and clear its row"""
+        used = int(self._used[0])
+        counters = self._kinds[:used] == KIND_COUNTER
+        self._values[RETIRED_ROW, :used][counters] += self._values[row, :used][counters]
+        self._values[row, :used] = np.where(counters, 0.0, np.nan)
+
+    ###########################################################################
+    # PUBLISH AND AGGREGATE
+    ###########################################################################
+
+    def publish(self, metrics: Sequence[Any]) -> bool:
+        """
+        Copy this worker's current metric values into its row.
+
+        Args:
+            metrics: Registered metrics (collectors already run)
+
+        Returns:
+            bool: False if no worker row was available
+        """
+        row = self._claim_row()
+        if row is None:
+            return False
+        values = self._values[row]
+        for metric in metrics:
+            if metric.type_name == "histogram":
+                width, kind = len(metric.buckets) + 2, KIND_COUNTER
+            elif metric.type_name == "gauge":
+                width, kind = 1, KIND_GAUGE[metric.aggregate]
+            else:
+                width, kind = 1, KIND_COUNTER
+            for labels, value in metric.series().items():
+                slot = self._slot(metric.name, labels, width, kind)
+                if slot < 0:
+                    continue
+                if width == 1:
+                    values[slot] = value
+                else:
+                    values[slot:slot + width] = value
+        return True
+
+    def aggregate(self, metrics: Sequence[Any]) -> List[Any]:
+        """
+        Fleet-wide copies of metrics, combined over every worker row.
+
+        Args:
+            metrics: Registered metrics, used as templates
+
+        Returns:
+            List of metrics (same order and types) holding aggregated series
+        """
+        self._scan()
+        used = len(self._decoded)
+        owners = [int(owner) for owner in self._pids]
+        claimed = [r for r in range(1, self.rows) if owners[r]]
+        live = [r for r in claimed if _alive(owners[r])]
+
+        values = self._values[:, :used]
+        kinds = self._kinds[:used]
+        counters = values[[RETIRED_ROW] + claimed].sum(axis=0)
+        gauges = values[live] if live else np.full((1, used), np.nan)
+        with np.errstate(invalid="ignore"):
+            combined = np.select(
+                [kinds == KIND_COUNTER, kinds == KIND_GAUGE["sum"], kinds == KIND_GAUGE["max"]],
+                [counters, np.nansum(gauges, axis=0), np.fmax.reduce(gauges, axis=0)],
+                np.fmin.reduce(gauges, axis=0)
+            )
+        reported = (kinds == KIND_COUNTER) | ~np.isnan(gauges).all(axis=0)
+
+        series: Dict[str, Dict[Tuple[str, ...], Any]] = {}
+        for slot, (name, labels, part) in enumerate(self._decoded):
+            if not reported[slot]:
+                continue
+            by_labels = series.setdefault(name, {})
+            if part == 0:
+                by_labels[labels] = float(combined[slot])
+            else:
+                first = by_labels[labels]
+                if not isinstance(first, list):
+                    first = by_labels[labels] = [first]
+                first.append(float(combined[slot]))
+
+        result = []
+        for metric in metrics:
+            view = copy.copy(metric)
+            view.set_series(series.get(metric.name, {}))
+            result.append(view)
+        return result
+
+    def render(self, registry: Any) -> str:
+        """
+        Publish this worker's values, then render the fleet-wide view.
+
+        Args:
+            registry: The worker's MetricsRegistry
+
+        Returns:
+            str: Prometheus exposition body
+        """
+        registry.collect()
+        self.publish(registry.metrics)
+        return render_metrics(self.aggregate(registry.metrics))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Shared region state.
+
+        Returns:
+            Dict with slots, used, workers (live rows), max_workers and
+            dropped (series that stay per worker for lack of a slot)
+        """
+        owners = [int(owner) for owner in self._pids[1:]]
+        return {
+            "slots": self.slots,
+            "used": int(self._used[0]),
+            "workers": sum(1 for owner in owners if owner and _alive(owner)),
+            "max_workers": self.rows - 1,
+            "dropped": self.dropped,
+        }
+
+    ###########################################################################
+    # BACKGROUND PUBLISHING
+    ###########################################################################
+
+    async def _run(self, registry: Any, interval: float) -> None:
+        while True:
+            try:
+                registry.collect()
+                self.publish(registry.metrics)
+            except Exception as e:
+                logger.error(f"Shared metrics publish failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def start(self, registry: Any, interval: float = DEFAULT_PUBLISH_INTERVAL) -> None:
+        """Publish this worker's values every interval on the running loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(registry, interval))
+
+    async def stop(self, registry: Any) -> None:
+        """Cancel background publishing after a final publish"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        registry.collect()
+        self.publish(registry.metrics)
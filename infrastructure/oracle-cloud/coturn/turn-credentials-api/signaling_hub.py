@@ -0,0 +1,611 @@
+"""
+WebSocket Signaling Hub for TURN Credentials API
+
+In-memory alternative to Firestore signaling. Peers of a call join a
+session room over one WebSocket each and exchange offer, answer and ICE
+candidates through the hub, which enforces the same session state
+machine as shared/schemas/webrtc_session.schema.json:
+
+    pending -> offered -> answered -> connected -> ended
+
+Every message is forwarded straight to the other peers in the room, so
+setup costs one WebSocket hop per message instead of a document write
+plus a snapshot listener round trip. The session document is kept in
+the schema's shape and sent to each peer when it joins, so a late or
+reconnecting peer catches up the way a Firestore listener would.
+
+The hub is transport-agnostic: a Peer wraps two coroutines (send text,
+close with a code), which makes it testable without sockets.
+
+Wire format (JSON text frames, field names as in SignalingMessage.kt):
+    -> {"type": "join", "userId": "alice", "callerId": "alice", "calleeId": "bob"}
+    <- {"type": "joined", "sessionId": ..., "role": "caller", "session": {...}}
+    -> {"type": "offer", "sdp": "..."}          (caller, pending -> offered)
+    -> {"type": "answer", "sdp": "..."}         (callee, offered -> answered)
+    -> {"type": "ice-candidate", "sdpMid": "0", "sdpMLineIndex": 0, "sdpCandidate": "..."}
+    <- {"type": "ice-candidates", "sessionId": ..., "candidates": [{...}, ...]}
+    -> {"type": "connected"}                    (answered -> connected)
+    -> {"type": "hangup", "reason": "..."}      (any -> ended)
+    <- {"type": "error", "code": "E004", "message": ..., "timestamp": ...}
+
+Backpressure: each peer has a bounded outbox drained by its own writer
+task. Candidates queued behind a slow socket are coalesced into a single
+"ice-candidates" message; a peer whose outbox still fills up is closed
+(1013) instead of letting memory grow.
+
+An "sdp" may be in the compact "sdpz1:" form (sdp_codec); it is relayed
+as sent, but must decode and its decoded size counts against the limit.
+
+Rooms live in one process: every peer of a session must reach the same
+worker (see API_REFERENCE.md).
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import sdp_codec
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_SESSION_TTL = 300.0        # seconds to reach "connected" (E002)
+DEFAULT_QUEUE_SIZE = 256           # queued messages per peer
+DEFAULT_MAX_CANDIDATES = 128       # stored ICE candidates per role
+
+SESSION_STATES = ("pending", "offered", "answered", "connected", "ended")
+ROLES = ("caller", "callee")
+MAX_SDP_LENGTH = 100000            # webrtc_session.schema.json offer/answer maxLength
+MAX_MESSAGE_LENGTH = MAX_SDP_LENGTH + 4096
+MAX_ID_LENGTH = 128
+
+# WebSocket close codes
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Subset of shared/constants/error-codes.json used by the hub; the service
+# is deployed without the shared/ tree (test_signaling_hub checks parity)
+ERROR_CODES: Dict[str, Dict[str, str]] = {
+    "SESSION_NOT_FOUND": {"code": "E001", "message": "Session not found or does not exist"},
+    "SESSION_EXPIRED": {"code": "E002", "message": "Session has expired (5 minute TTL)"},
+    "SESSION_ALREADY_EXISTS": {"code": "E003", "message": "Session with this ID already exists"},
+    "INVALID_SESSION_STATE": {"code": "E004", "message": "Invalid state transition for session"},
+    "INVALID_SDP": {"code": "E101", "message": "Invalid SDP offer or answer"},
+    "SDP_TOO_LARGE": {"code": "E102", "message": "SDP size exceeds maximum (100KB)"},
+    "INVALID_ICE_CANDIDATE": {"code": "E103", "message": "Invalid ICE candidate format"},
+    "PERMISSION_DENIED": {"code": "E304", "message": "User does not have permission for this operation"},
+    "NOT_PARTICIPANT": {"code": "E305", "message": "User is not a participant in this session"},
+    "QUOTA_EXCEEDED": {"code": "E404", "message": "Firestore quota exceeded"},
+}
+
+MESSAGE_TYPES = ("join", "offer", "answer", "ice-candidate", "ice-candidates", "connected", "hangup")
+
+# message type -> (states it is accepted in, resulting state, role allowed to send)
+TRANSITIONS: Dict[str, tuple] = {
+    "offer": (("pending",), "offered", "caller"),
+    "answer": (("offered",), "answered", "callee"),
+    "connected": (("answered", "connected"), "connected", None),
+}
+
+
+class SignalingError(Exception):
+    """A rejected message, reported to the sender as an error message"""
+
+    def __init__(self, name: str, detail: Optional[str] = None):
+        """
+        Args:
+            name: Key of ERROR_CODES
+            detail: Message overriding the standard one
+        """
+        entry = ERROR_CODES[name]
+        self.name = name
+        self.code = entry["code"]
+        self.message = detail or entry["message"]
+        super().__init__(f"{self.code}: {self.message}")
+
+    def to_message(self) -> Dict[str, Any]:
+        """Error message in the schema's error shape"""
+        return {"type": "error", "code": self.code, "message": self.message, "timestamp": _now_ms()}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+###############################################################################
+# PEERS
+###############################################################################
+
+class Peer:
+    """One WebSocket connection with a bounded, coalescing outbox"""
+
+    def __init__(
+        self,
+        session_id: str,
+        send: Callable[[str], Awaitable[None]],
+        close: Callable[[int], Awaitable[None]],
+        max_queue: int = DEFAULT_QUEUE_SIZE
+    ):
+        """
+        Args:
+            session_id: Session room the connection was opened for
+            send: Coroutine sending one text frame
+            close: Coroutine closing the connection with a close code
+            max_queue: Outbox length at which the peer is closed
+        """
+        self.session_id = session_id
+        self.user_id: Optional[str] = None
+        self.role: Optional[str] = None
+        self.outbox: Deque[Dict[str, Any]] = deque()
+        self.max_queue = max_queue
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self.coalesced = 0
+        self._send = send
+        self._close = close
+        self._wakeup = asyncio.Event()
+
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        """
+        Queue a message for the writer task.
+
+        ICE candidates join a candidate batch still waiting at the tail
+        of the outbox instead of taking a slot of their own.
+
+        Args:
+            message: Message to send
+
+        Returns:
+            bool: False if the peer is closed or its outbox overflowed
+        """
+        if self.closed:
+            return False
+        outbox = self.outbox
+        if message["type"] == "ice-candidates":
+            if outbox and outbox[-1]["type"] == "ice-candidates":
+                outbox[-1]["candidates"].extend(message["candidates"])
+                self.coalesced += len(message["candidates"])
+                return True
+            # Private copy: the tail batch may be extended later
+            message = dict(message, candidates=list(message["candidates"]))
+        if len(outbox) >= self.max_queue:
+            self.close(CLOSE_TRY_AGAIN_LATER)
+            return False
+        outbox.append(message)
+        self._wakeup.set()
+        return True
+
+    def close(self, code: int) -> None:
+        """Stop accepting messages and let the writer close the connection"""
+        if not self.closed:
+            self.closed = True
+            self.close_code = code
+            self.outbox.clear()
+            self._wakeup.set()
+
+    async def pump(self) -> None:
+        """
+        Writer task: send queued messages until the peer is closed.
+
+        Each message is serialized when it is dequeued, so candidates
+        keep coalescing while the previous send is in flight.
+        """
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                outbox = self.outbox
+                while outbox and not self.closed:
+                    await self._send(json.dumps(outbox.popleft(), separators=(",", ":")))
+                if self.closed:
+                    await self._close(self.close_code)
+                    return
+        except Exception:
+            # Connection already gone; the reader side detaches the peer
+            self.closed = True
+
+
+###############################################################################
+# SESSIONS
+###############################################################################
+
+class SignalingSession:
+    """A call session room, kept in webrtc_session.schema.json shape"""
+
+    def __init__(self, session_id: str, caller_id: str, callee_id: str, now: float):
+        self.session_id = session_id
+        self.caller_id = caller_id
+        self.callee_id = callee_id
+        self.status = "pending"
+        self.created_at = now
+        self.updated_at = now
+        self.offer: Optional[Dict[str, Any]] = None
+        self.answer: Optional[Dict[str, Any]] = None
+        self.ice_candidates: Dict[str, List[Dict[str, Any]]] = {role: [] for role in ROLES}
+        self.error: Optional[Dict[str, Any]] = None
+        self.offered_at: Optional[float] = None
+        self.peers: List[Peer] = []
+
+    def role_of(self, user_id: str) -> Optional[str]:
+        """'caller', 'callee' or None for a non-participant"""
+        if user_id == self.caller_id:
+            return "caller"
+        if user_id == self.callee_id:
+            return "callee"
+        return None
+
+    def document(self) -> Dict[str, Any]:
+        """Session snapshot as a webrtc_session.schema.json document"""
+        document: Dict[str, Any] = {
+            "session_id": self.session_id,
+            "caller_id": self.caller_id,
+            "callee_id": self.callee_id,
+            "status": self.status,
+            "created_at": _iso(self.created_at),
+            "updated_at": _iso(self.updated_at),
+            "ice_candidates": {role: list(items) for role, items in self.ice_candidates.items()},
+        }
+        for field in ("offer", "answer", "error"):
+            value = getattr(self, field)
+            if value is not None:
+                document[field] = value
+        return document
+
+
+###############################################################################
+# HUB
+###############################################################################
+
+class SignalingHub:
+    """In-memory session rooms with the signaling state machine"""
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        session_ttl: float = DEFAULT_SESSION_TTL,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        on_setup: Optional[Callable[[float], None]] = None
+    ):
+        """
+        Args:
+            max_sessions: Session rooms kept at once
+            session_ttl: Seconds a session may take to reach "connected",
+                and that an empty room is kept after its last update
+            queue_size: Outbox length per peer before it is closed
+            max_candidates: ICE candidates stored per role
+            on_setup: Called with seconds from offer to "connected"
+        """
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.queue_size = queue_size
+        self.max_candidates = max_candidates
+        self.on_setup = on_setup
+
+        self.messages: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.sessions_created = 0
+        self.sessions_expired = 0
+        self.slow_consumers = 0
+        self.candidates_coalesced = 0
+
+        # Least recently updated first
+        self._sessions: "OrderedDict[str, SignalingSession]" = OrderedDict()
+        self._peers = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[SignalingSession]:
+        """Session room by id, or None"""
+        return self._sessions.get(session_id)
+
+    def attach(
+        self,
+        session_id: str,
+        send: Callable[[str], Awaitable[None]],
+        close: Callable[[int], Awaitable[None]]
+    ) -> Peer:
+        """
+        Register a new connection; it joins a room with a "join" message.
+
+        Args:
+            session_id: Session id from the connection URL
+            send: Coroutine sending one text frame
+            close: Coroutine closing the connection with a close code
+
+        Returns:
+            Peer: Run peer.pump() as the connection's writer task
+        """
+        self._peers += 1
+        return Peer(session_id, send, close, self.queue_size)
+
+    def detach(self, peer: Peer, now: Optional[float] = None) -> None:
+        """
+        Forget a closed connection; an ended room is dropped with its last peer.
+
+        Args:
+            peer: Peer returned by attach()
+            now: Override for the current UNIX time (default: time.time())
+        """
+        self._peers -= 1
+        peer.close(CLOSE_TRY_AGAIN_LATER)
+        self.candidates_coalesced += peer.coalesced
+        peer.coalesced = 0
+        session = self._sessions.get(peer.session_id)
+        if session is not None and peer in session.peers:
+            session.peers.remove(peer)
+            if not session.peers and session.status == "ended":
+                del self._sessions[session.session_id]
+        self.sweep(time.time() if now is None else now)
+
+    def receive(self, peer: Peer, text: str, now: Optional[float] = None) -> None:
+        """
+        Handle one text frame from a peer.
+
+        Accepted messages are forwarded to the other peers in the room;
+        rejected ones produce an error message to the sender only.
+
+        Args:
+            peer: Sending peer
+            text: Raw JSON message
+            now: Override for the current UNIX time (default: time.time())
+        """
+        if now is None:
+            now = time.time()
+        try:
+            message = self._parse(text)
+            kind = message["type"]
+            label = kind if kind in MESSAGE_TYPES else "unknown"
+            self.messages[label] = self.messages.get(label, 0) + 1
+            if kind == "join":
+                self._join(peer, message, now)
+            else:
+                self._dispatch(peer, kind, message, now)
+        except SignalingError as e:
+            self.errors[e.code] = self.errors.get(e.code, 0) + 1
+            if not peer.enqueue(e.to_message()):
+                self._overflowed(peer)
+
+    def _parse(self, text: str) -> Dict[str, Any]:
+        if len(text) > MAX_MESSAGE_LENGTH:
+            raise SignalingError("SDP_TOO_LARGE")
+        try:
+            message = json.loads(text)
+        except ValueError:
+            raise SignalingError("INVALID_SESSION_STATE", "Malformed signaling message")
+        if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+            raise SignalingError("INVALID_SESSION_STATE", "Signaling message needs a type")
+        return message
+
+    def _join(self, peer: Peer, message: Dict[str, Any], now: float) -> None:
+        if peer.role is not None:
+            raise SignalingError("INVALID_SESSION_STATE", "Already joined")
+        user_id = message.get("userId")
+        if not isinstance(user_id, str) or not 0 < len(user_id) <= MAX_ID_LENGTH:
+            raise SignalingError("NOT_PARTICIPANT", "join needs a userId")
+        caller_id, callee_id = message.get("callerId"), message.get("calleeId")
+
+        session = self._sessions.get(peer.session_id)
+        if session is None:
+            if not (isinstance(caller_id, str) and isinstance(callee_id, str)
+                    and 0 < len(caller_id) <= MAX_ID_LENGTH and 0 < len(callee_id) <= MAX_ID_LENGTH):
+                raise SignalingError("SESSION_NOT_FOUND")
+            self.sweep(now)
+            if len(self._sessions) >= self.max_sessions:
+                raise SignalingError("QUOTA_EXCEEDED", "Signaling session limit reached")
+            session = SignalingSession(peer.session_id, caller_id, callee_id, now)
+            self._sessions[session.session_id] = session
+            self.sessions_created += 1
+        elif (caller_id, callee_id) != (None, None) and (caller_id, callee_id) != (session.caller_id, session.callee_id):
+            raise SignalingError("SESSION_ALREADY_EXISTS")
+
+        role = session.role_of(user_id)
+        if role is None:
+            raise SignalingError("NOT_PARTICIPANT")
+        self._check_expiry(session, now)
+        peer.user_id, peer.role = user_id, role
+        session.peers.append(peer)
+        if not peer.enqueue({
+            "type": "joined",
+            "sessionId": session.session_id,
+            "role": role,
+            "session": session.document(),
+        }):
+            self._overflowed(peer)
+
+    def _dispatch(self, peer: Peer, kind: str, message: Dict[str, Any], now: float) -> None:
+        session = self._sessions.get(peer.session_id)
+        if peer.role is None or session is None:
+            raise SignalingError("NOT_PARTICIPANT", "Send join first")
+        self._check_expiry(session, now)
+        timestamp = int(now * 1000)
+
+        if kind in ("ice-candidate", "ice-candidates"):
+            if session.status == "ended":
+                raise SignalingError("INVALID_SESSION_STATE")
+            candidates = self._candidates(message if kind == "ice-candidate" else None, message)
+            stored = session.ice_candidates[peer.role]
+            if len(stored) + len(candidates) > self.max_candidates:
+                raise SignalingError("INVALID_ICE_CANDIDATE", "Too many ICE candidates")
+            stored.extend(
+                {"candidate": c["sdpCandidate"], "sdpMid": c["sdpMid"], "sdpMLineIndex": c["sdpMLineIndex"]}
+                for c in candidates
+            )
+            forward = {"type": "ice-candidates", "sessionId": session.session_id, "candidates": candidates}
+        elif kind == "hangup":
+            if session.status == "ended":
+                return
+            session.status = "ended"
+            reason = message.get("reason")
+            forward = {
+                "type": "hangup",
+                "sessionId": session.session_id,
+                "userId": peer.user_id,
+                "reason": reason if isinstance(reason, str) else None,
+                "timestamp": timestamp,
+            }
+        elif kind in TRANSITIONS:
+            allowed, target, sender_role = TRANSITIONS[kind]
+            if sender_role is not None and peer.role != sender_role:
+                raise SignalingError("PERMISSION_DENIED", f"Only the {sender_role} sends {kind}")
+            if session.status not in allowed:
+                raise SignalingError(
+                    "INVALID_SESSION_STATE", f"Cannot {kind} a session that is {session.status}"
+                )
+            if kind == "connected":
+                if session.status == "answered" and session.offered_at is not None and self.on_setup:
+                    self.on_setup(now - session.offered_at)
+                forward = {
+                    "type": "connected",
+                    "sessionId": session.session_id,
+                    "userId": peer.user_id,
+                    "timestamp": timestamp,
+                }
+            else:
+                sdp = self._sdp(message)
+                setattr(session, kind, {"sdp": sdp, "type": kind, "created_at": _iso(now)})
+                if kind == "offer":
+                    session.offered_at = now
+                forward = {
+                    "type": kind,
+                    "sessionId": session.session_id,
+                    "sdp": sdp,
+                    "callerId" if kind == "offer" else "calleeId": peer.user_id,
+                    "timestamp": timestamp,
+                }
+            session.status = target
+        else:
+            raise SignalingError("INVALID_SESSION_STATE", f"Unknown message type {kind!r}")
+
+        session.updated_at = now
+        self._sessions.move_to_end(session.session_id)
+        self._broadcast(session, forward, exclude=peer)
+
+    @staticmethod
+    def _sdp(message: Dict[str, Any]) -> str:
+        sdp = message.get("sdp")
+        if not isinstance(sdp, str) or not sdp:
+            raise SignalingError("INVALID_SDP")
+        if len(sdp) > MAX_SDP_LENGTH:
+            raise SignalingError("SDP_TOO_LARGE")
+        if sdp_codec.is_compact(sdp):
+            try:
+                decoded = sdp_codec.decode_text(sdp)
+            except ValueError:
+                raise SignalingError("INVALID_SDP")
+            if not decoded:
+                raise SignalingError("INVALID_SDP")
+            if len(decoded) > MAX_SDP_LENGTH:
+                raise SignalingError("SDP_TOO_LARGE")
+        return sdp
+
+    @staticmethod
+    def _candidates(single: Optional[Dict[str, Any]], message: Dict[str, Any]) -> List[Dict[str, Any]]:
+        items = [single] if single is not None else message.get("candidates")
+        if not isinstance(items, list) or not items:
+            raise SignalingError("INVALID_ICE_CANDIDATE")
+        candidates = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise SignalingError("INVALID_ICE_CANDIDATE")
+            candidate, mid, index = item.get("sdpCandidate"), item.get("sdpMid"), item.get("sdpMLineIndex")
+            if (not isinstance(candidate, str) or not candidate or not isinstance(mid, str)
+                    or not isinstance(index, int) or isinstance(index, bool) or index < 0):
+                raise SignalingError("INVALID_ICE_CANDIDATE")
+            candidates.append({"sdpMid": mid, "sdpMLineIndex": index, "sdpCandidate": candidate})
+        return candidates
+
+    def _check_expiry(self, session: SignalingSession, now: float) -> None:
+        if session.status in ("connected", "ended") or now - session.created_at <= self.session_ttl:
+            return
+        error = SignalingError("SESSION_EXPIRED")
+        session.status = "ended"
+        session.error = {"code": error.code, "message": error.message, "timestamp": _iso(now)}
+        session.updated_at = now
+        self.sessions_expired += 1
+        self._broadcast(session, error.to_message(), exclude=None)
+        raise error
+
+    def _broadcast(self, session: SignalingSession, message: Dict[str, Any], exclude: Optional[Peer]) -> None:
+        for other in list(session.peers):
+            if other is not exclude and not other.enqueue(message):
+                self._overflowed(other)
+
+    def _overflowed(self, peer: Peer) -> None:
+        # enqueue() already closed the peer; its writer closes the socket
+        self.slow_consumers += 1
+        session = self._sessions.get(peer.session_id)
+        if session is not None and peer in session.peers:
+            session.peers.remove(peer)
+
+    def sweep(self, now: float) -> None:
+        """
+        Drop rooms idle for session_ttl and expire stalled setups.
+
+        Args:
+            now: Current UNIX time
+        """
+        sessions = self._sessions
+        idle_before = now - self.session_ttl
+        for _ in range(len(sessions)):
+            session_id, session = next(iter(sessions.items()))
+            if session.updated_at >= idle_before:
+                break
+            if not session.peers:
+                del sessions[session_id]
+                continue
+            if session.status not in ("connected", "ended"):
+                try:
+                    self._check_expiry(session, now)
+                except SignalingError:
+                    pass
+            # Live call with nothing left to signal: keep it, check again later
+            session.updated_at = now
+            sessions.move_to_end(session_id)
+
+    def clear(self) -> None:
+        """Drop every room and reset the counters"""
+        for session in self._sessions.values():
+            for peer in session.peers:
+                peer.close(CLOSE_TRY_AGAIN_LATER)
+        self._sessions.clear()
+        self.messages.clear()
+        self.errors.clear()
+        self.sessions_created = self.sessions_expired = 0
+        self.slow_consumers = self.candidates_coalesced = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of hub counters.
+
+        Returns:
+            Dict with sessions, peers, sessions_created, sessions_expired,
+            slow_consumers, candidates_coalesced, messages (by type) and
+            errors (by code)
+        """
+        sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "peers": self._peers,
+            "sessions_created": self.sessions_created,
+            "sessions_expired": self.sessions_expired,
+            "slow_consumers": self.slow_consumers,
+            "candidates_coalesced": self.candidates_coalesced + sum(
+                peer.coalesced for session in sessions for peer in session.peers
+            ),
+            "messages": dict(self.messages),
+            "errors": dict(self.errors),
+        }
@@ -0,0 +1,591 @@
+"""
+STUN Listener Prober for TURN Credentials API
+
+Sends STUN Binding requests (RFC 5389) to every coturn listener found in
+turnserver.conf - plain UDP and TCP on listening-port and
+alt-listening-port, TLS on tls-listening-port and alt-tls-listening-port -
+and keeps the outcome of the latest round:
+
+    * round-trip time per listener, also fed to an RTT histogram
+    * failures per listener and reason (timeout, refused, network, tls,
+      invalid, rejected)
+    * a readiness verdict computed once per round, so /ready (and the
+      load balancer polling it) only reads a cached result and never
+      triggers a probe itself
+
+A listener counts as down after failure_threshold consecutive failed
+probes, and as slow while its last RTT is above slow_threshold. The
+instance is ready only when every listener is up and fast and the last
+round is recent.
+
+TLS probes do not verify the certificate: the prober usually targets
+127.0.0.1 while the certificate names the public host, and what is being
+measured is liveness and latency, not identity.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+import socket
+import ssl
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_INTERVAL = 5.0             # seconds between probe rounds
+DEFAULT_TIMEOUT = 1.0              # seconds allowed per Binding transaction
+DEFAULT_SLOW_THRESHOLD = 0.25      # seconds of RTT above which a listener is slow
+DEFAULT_FAILURE_THRESHOLD = 2      # consecutive failures before a listener is down
+STALE_ROUNDS = 3                   # rounds without a result before readiness lapses
+
+DEFAULT_LISTENING_PORT = 3478
+DEFAULT_TLS_LISTENING_PORT = 5349
+
+RTT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+FAILURE_REASONS = ("timeout", "refused", "network", "tls", "invalid", "rejected")
+TRANSPORTS = ("udp", "tcp", "tls")
+
+
+###############################################################################
+# STUN MESSAGES
+###############################################################################
+
+MAGIC_COOKIE = 0x2112A442
+HEADER = struct.Struct("!HHI12s")
+
+BINDING_REQUEST = 0x0001
+BINDING_SUCCESS = 0x0101
+BINDING_ERROR = 0x0111
+
+ATTR_MAPPED_ADDRESS = 0x0001
+ATTR_USERNAME = 0x0006
+ATTR_MESSAGE_INTEGRITY = 0x0008
+ATTR_ERROR_CODE = 0x0009
+ATTR_REALM = 0x0014
+ATTR_NONCE = 0x0015
+ATTR_XOR_MAPPED_ADDRESS = 0x0020
+ATTR_FINGERPRINT = 0x8028
+
+FINGERPRINT_XOR = 0x5354554E
+
+
+def build_message(
+    msg_type: int,
+    transaction_id: bytes,
+    attributes: Sequence[Tuple[int, bytes]] = (),
+    key: Optional[bytes] = None,
+    fingerprint: bool = False
+) -> bytes:
+    """
+    Serialize a STUN message.
+
+    Args:
+        msg_type: Message type (method and class)
+        transaction_id: 12-byte transaction ID
+        attributes: (type, value) pairs; values are padded to 4 bytes
+        key: Append MESSAGE-INTEGRITY computed with this key
+            (see long_term_key)
+        fingerprint: Append FINGERPRINT
+
+    Returns:
+        bytes: Header followed by the attributes
+    """
+    body = bytearray()
+    for attr_type, value in attributes:
+        body += struct.pack("!HH", attr_type, len(value)) + value
+        body += b"\x00" * (-len(value) % 4)
+    if key is not None:
+        # The length in the hashed header already counts MESSAGE-INTEGRITY
+        header = HEADER.pack(msg_type, len(body) + 24, MAGIC_COOKIE, transaction_id)
+        mac = hmac.new(key, header + body, hashlib.sha1).digest()
+        body += struct.pack("!HH", ATTR_MESSAGE_INTEGRITY, 20) + mac
+    if fingerprint:
+        header = HEADER.pack(msg_type, len(body) + 8, MAGIC_COOKIE, transaction_id)
+        crc = zlib.crc32(header + body) ^ FINGERPRINT_XOR
+        body += struct.pack("!HHI", ATTR_FINGERPRINT, 4, crc)
+    return HEADER.pack(msg_type, len(body), MAGIC_COOKIE, transaction_id) + bytes(body)
+
+
+def long_term_key(username: str, realm: str, password: str) -> bytes:
+    """MESSAGE-INTEGRITY key for long-term credentials: MD5(username:realm:password)"""
+    return hashlib.md5(f"{username}:{realm}:{password}".encode()).digest()
+
+
+def parse_message(data: bytes) -> Tuple[int, bytes, List[Tuple[int, bytes]]]:
+    """
+    Parse a STUN message.
+
+    Args:
+        data: One complete message
+
+    Returns:
+        (message type, transaction ID, [(attribute type, value), ...])
+
+    Raises:
+        ValueError: If data is not a well-formed STUN message
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated STUN header")
+    msg_type, length, cookie, transaction_id = HEADER.unpack_from(data)
+    if msg_type & 0xC000 or cookie != MAGIC_COOKIE or length % 4:
+        raise ValueError("Not a STUN message")
+    if len(data) != HEADER.size + length:
+        raise ValueError("STUN length does not match the message")
+
+    attributes = []
+    offset = HEADER.size
+    while offset < len(data):
+        if offset + 4 > len(data):
+            raise ValueError("Truncated STUN attribute")
+        attr_type, attr_length = struct.unpack_from("!HH", data, offset)
+        value = data[offset + 4:offset + 4 + attr_length]
+        if len(value) != attr_length:
+            raise ValueError("Truncated STUN attribute")
+        attributes.append((attr_type, value))
+        offset += 4 + attr_length + (-attr_length % 4)
+    return msg_type, transaction_id, attributes
+
+
+def error_code(attributes: Sequence[Tuple[int, bytes]]) -> Optional[int]:
+    """Numeric ERROR-CODE (e.g. 401) from parsed attributes, if present"""
+    for attr_type, value in attributes:
+        if attr_type == ATTR_ERROR_CODE and len(value) >= 4:
+            return (value[2] & 0x07) * 100 + value[3]
+    return None
+
+
+def xor_address(value: bytes, transaction_id: bytes) -> Tuple[str, int]:
+    """
+    Decode an XOR-MAPPED-ADDRESS (or XOR-PEER/RELAYED-ADDRESS) value.
+
+    Returns:
+        (IP address, port)
+
+    Raises:
+        ValueError: If the family or length is invalid
+    """
+    if len(value) < 8:
+        raise ValueError("Truncated XOR address")
+    family, xport = struct.unpack_from("!xBH", value)
+    port = xport ^ (MAGIC_COOKIE >> 16)
+    key = struct.pack("!I", MAGIC_COOKIE) + transaction_id
+    if family == 0x01:
+        raw = bytes(a ^ b for a, b in zip(value[4:8], key))
+        return socket.inet_ntop(socket.AF_INET, raw), port
+    if family == 0x02 and len(value) >= 20:
+        raw = bytes(a ^ b for a, b in zip(value[4:20], key))
+        return socket.inet_ntop(socket.AF_INET6, raw), port
+    raise ValueError("Unknown address family")
+
+
+def encode_xor_address(host: str, port: int, transaction_id: bytes) -> bytes:
+    """Encode an XOR-*-ADDRESS attribute value (inverse of xor_address)"""
+    key = struct.pack("!I", MAGIC_COOKIE) + transaction_id
+    family, size = (socket.AF_INET6, 16) if ":" in host else (socket.AF_INET, 4)
+    raw = bytes(a ^ b for a, b in zip(socket.inet_pton(family, host), key[:size]))
+    return struct.pack("!xBH", 0x02 if size == 16 else 0x01, port ^ (MAGIC_COOKIE >> 16)) + raw
+
+
+###############################################################################
+# LISTENERS
+###############################################################################
+
+class ProbeTarget(NamedTuple):
+    """One coturn listener"""
+    transport: str        # "udp", "tcp" or "tls"
+    host: str
+    port: int
+
+    @property
+    def name(self) -> str:
+        """Label such as udp/3478"""
+        return f"{self.transport}/{self.port}"
+
+
+def parse_turnserver_conf(path: str) -> Dict[str, Any]:
+    """
+    Read coturn options; flags without a value map to True.
+
+    Args:
+        path: turnserver.conf path
+
+    Returns:
+        Dict of option name to its last value
+    """
+    options: Dict[str, Any] = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, sep, value = line.partition("=")
+            options[name.strip()] = value.strip().strip('"') if sep else True
+    return options
+
+
+def listeners_from_conf(
+    options: Dict[str, Any],
+    host: Optional[str] = None,
+    transports: Sequence[str] = TRANSPORTS
+) -> List[ProbeTarget]:
+    """
+    Listeners coturn opens for a configuration.
+
+    Follows coturn's defaults: the alternative ports are the main ports
+    plus one when unset or zero, and no-udp / no-tcp / no-tls drop a
+    transport.
+
+    Args:
+        options: Parsed turnserver.conf
+        host: Address to probe (default: listening-ip, or 127.0.0.1 when
+            coturn listens on every interface)
+        transports: Transports to include
+
+    Returns:
+        List of ProbeTarget, UDP then TCP then TLS
+    """
+    if host is None:
+        listening_ip = options.get("listening-ip")
+        host = listening_ip if isinstance(listening_ip, str) and listening_ip not in ("", "0.0.0.0") else "127.0.0.1"
+
+    def port(name: str, default: int) -> int:
+        value = options.get(name)
+        return int(value) if isinstance(value, str) and value.isdigit() and int(value) else default
+
+    plain = port("listening-port", DEFAULT_LISTENING_PORT)
+    tls = port("tls-listening-port", DEFAULT_TLS_LISTENING_PORT)
+    ports = {
+        "udp": (plain, port("alt-listening-port", plain + 1)),
+        "tcp": (plain, port("alt-listening-port", plain + 1)),
+        "tls": (tls, port("alt-tls-listening-port", tls + 1)),
+    }
+    return [
+        ProbeTarget(transport, host, number)
+        for transport in TRANSPORTS
+        if transport in transports and not options.get(f"no-{transport}")
+        for number in ports[transport]
+    ]
+
+
+###############################################################################
+# PROBES
+###############################################################################
+
+class ProbeResult(NamedTuple):
+    """Outcome of one Binding transaction"""
+    ok: bool
+    rtt: Optional[float]
+    reason: Optional[str]         # one of FAILURE_REASONS when not ok
+
+
+class _BindingProtocol(asyncio.DatagramProtocol):
+    def __init__(self, transaction_id: bytes, done: asyncio.Future):
+        self.transaction_id = transaction_id
+        self.done = done
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        # Stray datagrams (late replies to earlier probes) are ignored
+        if len(data) >= HEADER.size and data[8:20] == self.transaction_id and not self.done.done():
+            self.done.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.done.done():
+            self.done.set_exception(exc)
+
+
+async def _udp_exchange(target: ProbeTarget, request: bytes, transaction_id: bytes) -> bytes:
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _BindingProtocol(transaction_id, done),
+        remote_addr=(target.host, target.port)
+    )
+    try:
+        transport.sendto(request)
+        return await done
+    finally:
+        transport.close()
+
+
+async def read_stream_message(reader: asyncio.StreamReader) -> bytes:
+    """Read one STUN message from a TCP/TLS stream"""
+    header = await reader.readexactly(HEADER.size)
+    length = struct.unpack_from("!H", header, 2)[0]
+    return header + await reader.readexactly(length)
+
+
+async def _stream_exchange(target: ProbeTarget, request: bytes, ssl_context: Optional[ssl.SSLContext]) -> bytes:
+    reader, writer = await asyncio.open_connection(target.host, target.port, ssl=ssl_context)
+    try:
+        writer.write(request)
+        await writer.drain()
+        return await read_stream_message(reader)
+    finally:
+        writer.close()
+
+
+def unverified_tls_context() -> ssl.SSLContext:
+    """TLS client context that accepts any certificate (see module notes)"""
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+async def probe(
+    target: ProbeTarget,
+    timeout: float = DEFAULT_TIMEOUT,
+    ssl_context: Optional[ssl.SSLContext] = None
+) -> ProbeResult:
+    """
+    Send one Binding request and wait for the matching response.
+
+    For TCP and TLS the RTT includes connection setup (and the TLS
+    handshake), as a client opening a fresh connection would see it.
+
+    Args:
+        target: Listener to probe
+        timeout: Seconds allowed for the whole transaction
+        ssl_context: Context for TLS targets (default: unverified_tls_context())
+
+    Returns:
+        ProbeResult with the RTT on success or the failure reason
+    """
+    transaction_id = secrets.token_bytes(12)
+    request = build_message(BINDING_REQUEST, transaction_id)
+    if target.transport == "udp":
+        exchange = _udp_exchange(target, request, transaction_id)
+    else:
+        if target.transport == "tls" and ssl_context is None:
+            ssl_context = unverified_tls_context()
+        exchange = _stream_exchange(target, request, ssl_context if target.transport == "tls" else None)
+
+    start = time.perf_counter()
+    try:
+        data = await asyncio.wait_for(exchange, timeout)
+    except asyncio.TimeoutError:
+        return ProbeResult(False, None, "timeout")
+    except ConnectionRefusedError:
+        return ProbeResult(False, None, "refused")
+    except ssl.SSLError:
+        return ProbeResult(False, None, "tls")
+    except asyncio.IncompleteReadError:
+        return ProbeResult(False, None, "invalid")
+    except OSError:
+        return ProbeResult(False, None, "network")
+    rtt = time.perf_counter() - start
+
+    try:
+        msg_type, response_id, _ = parse_message(data)
+    except ValueError:
+        return ProbeResult(False, None, "invalid")
+    if response_id != transaction_id:
+        return ProbeResult(False, None, "invalid")
+    if msg_type != BINDING_SUCCESS:
+        return ProbeResult(False, None, "rejected")
+    return ProbeResult(True, rtt, None)
+
+
+###############################################################################
+# PROBER
+###############################################################################
+
+class ListenerState:
+    """Latest probe outcome for one listener"""
+
+    def __init__(self, target: ProbeTarget):
+        self.target = target
+        self.rtt: Optional[float] = None           # last successful RTT
+        self.ok: Optional[bool] = None             # outcome of the last probe
+        self.reason: Optional[str] = None
+        self.consecutive_failures = 0
+        self.failures: Dict[str, int] = {reason: 0 for reason in FAILURE_REASONS}
+
+
+class StunProber:
+    """
+    Periodic STUN Binding probes with a cached readiness verdict.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[ProbeTarget],
+        interval: float = DEFAULT_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+        slow_threshold: float = DEFAULT_SLOW_THRESHOLD,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        rtt_histogram: Any = None
+    ):
+        """
+        Args:
+            targets: Listeners to probe
+            interval: Seconds between probe rounds
+            timeout: Seconds allowed per probe
+            slow_threshold: RTT in seconds above which a listener is slow
+            failure_threshold: Consecutive failures before a listener is down
+            ssl_context: Context for TLS probes (default: unverified)
+            rtt_histogram: metrics.Histogram labelled by listener, observed
+                on every successful probe
+        """
+        if not targets:
+            raise ValueError("STUN prober needs at least one listener")
+        self.listeners = [ListenerState(target) for target in targets]
+        self.interval = interval
+        self.timeout = timeout
+        self.slow_threshold = slow_threshold
+        self.failure_threshold = max(1, failure_threshold)
+        self.ssl_context = ssl_context
+        self.rtt_histogram = rtt_histogram
+        self.rounds = 0
+        self.checked_at: Optional[float] = None
+
+        self._ready = False
+        self._status: Dict[str, Any] = self._build_status()
+        self._task: Optional[asyncio.Task] = None
+
+    ###########################################################################
+    # READ PATH
+    ###########################################################################
+
+    def status(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Cached result of the last round; never probes.
+
+        Args:
+            now: Override for the current UNIX time (default: time.time())
+
+        Returns:
+            Dict with ready, checked_at and per-listener state
+        """
+        if self._ready and self._is_stale(time.time() if now is None else now):
+            return {**self._status, "ready": False, "reason": "stale"}
+        return self._status
+
+    def _is_stale(self, now: float) -> bool:
+        return self.checked_at is None or now - self.checked_at > self.interval * STALE_ROUNDS + self.timeout
+
+    ###########################################################################
+    # PROBING
+    ###########################################################################
+
+    async def probe_once(self) -> Dict[str, Any]:
+        """
+        Probe every listener concurrently and refresh the cached status.
+
+        Returns:
+            The new status (as status() would return it)
+        """
+        results = await asyncio.gather(*(
+            probe(state.target, self.timeout, self.ssl_context) for state in self.listeners
+        ))
+        for state, result in zip(self.listeners, results):
+            state.ok = result.ok
+            if result.ok:
+                state.rtt = result.rtt
+                state.reason = None
+                state.consecutive_failures = 0
+                if self.rtt_histogram is not None:
+                    self.rtt_histogram.observe(result.rtt, state.target.name)
+            else:
+                state.reason = result.reason
+                state.consecutive_failures += 1
+                state.failures[result.reason] += 1
+        self.rounds += 1
+        self.checked_at = time.time()
+        self._status = self._build_status()
+        return self._status
+
+    def _build_status(self) -> Dict[str, Any]:
+        listeners = []
+        for state in self.listeners:
+            if state.ok is None:
+                verdict = "pending"
+            elif state.rtt is None or state.consecutive_failures >= self.failure_threshold:
+                verdict = "down"
+            elif state.rtt > self.slow_threshold:
+                verdict = "slow"
+            else:
+                verdict = "up"
+            listeners.append({
+                "listener": state.target.name,
+                "host": state.target.host,
+                "status": verdict,
+                "rtt_ms": None if state.rtt is None else round(state.rtt * 1000, 3),
+                "consecutive_failures": state.consecutive_failures,
+                "last_failure": state.reason,
+            })
+        self._ready = self.rounds > 0 and all(listener["status"] == "up" for listener in listeners)
+        return {"ready": self._ready, "checked_at": self.checked_at, "listeners": listeners}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"STUN probe round failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start background probing on the running event loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel background probing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    ###########################################################################
+    # STATISTICS
+    ###########################################################################
+
+    def failure_counts(self) -> List[Tuple[str, str, int]]:
+        """(listener, reason, count) for every listener and reason"""
+        return [
+            (state.target.name, reason, count)
+            for state in self.listeners
+            for reason, count in state.failures.items()
+        ]
+
+
+def prober_from_conf(
+    path: str,
+    host: Optional[str] = None,
+    transports: Sequence[str] = TRANSPORTS,
+    **kwargs: Any
+) -> StunProber:
+    """
+    Build a StunProber for the listeners configured in turnserver.conf.
+
+    Args:
+        path: turnserver.conf path
+        host: Address to probe (see listeners_from_conf)
+        transports: Transports to include
+        **kwargs: Passed to StunProber
+
+    Returns:
+        StunProber (not yet started)
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If no listener remains
+    """
+    return StunProber(listeners_from_conf(parse_turnserver_conf(path), host, transports), **kwargs)
@@ -0,0 +1,168 @@
+"""
+Tests for admission control
+
+Covers slot hand-over in FIFO order, shedding on a full queue, on high
+in-service latency and on queue timeout, Retry-After estimates, and the
+ASGI middleware's fast 503 and unguarded paths.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from admission import AdmissionController, AdmissionMiddleware, Overloaded
+
+
+###############################################################################
+# CONTROLLER
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_waiters_get_freed_slots_in_order():
+    """
+    Once every slot is taken, requests queue and are admitted in arrival
+    order as slots are released.
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=2, queue_timeout=1.0)
+    await controller.acquire()
+    order = []
+
+    async def waiter(name):
+        await controller.acquire()
+        order.append(name)
+
+    tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    assert controller.queued == 2
+
+    controller.release(0.01)
+    while not order:
+        await asyncio.sleep(0)
+    assert order == ["a"] and controller.in_flight == 1
+    controller.release(0.01)
+    await asyncio.gather(*tasks)
+    controller.release(0.01)
+
+    assert order == ["a", "b"]
+    assert controller.stats()["in_flight"] == 0 and controller.stats()["admitted"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_immediately():
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    await controller.acquire()
+
+    with pytest.raises(Overloaded) as exc_info:
+        await controller.acquire()
+
+    assert exc_info.value.reason == "queue_full"
+    assert controller.stats()["shed"] == {"queue_full": 1, "latency": 0, "timeout": 0}
+
+
+@pytest.mark.asyncio
+async def test_slow_service_sheds_instead_of_queueing():
+    """
+    With in-service latency above the target, a request that would have
+    to wait is shed; one that finds a free slot is still admitted.
+    """
+    controller = AdmissionController(max_concurrency=2, max_queue=10, target_latency=0.1)
+    await controller.acquire()
+    controller.release(2.0)
+    assert controller.latency > 0.1
+
+    await controller.acquire()
+    await controller.acquire()
+    with pytest.raises(Overloaded) as exc_info:
+        await controller.acquire()
+
+    assert exc_info.value.reason == "latency"
+    assert exc_info.value.retry_after >= 1
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_sheds_and_leaves_no_waiter():
+    controller = AdmissionController(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+    await controller.acquire()
+
+    with pytest.raises(Overloaded) as exc_info:
+        await controller.acquire()
+
+    assert exc_info.value.reason == "timeout"
+    assert controller.queued == 0
+    controller.release(0.0)
+    assert controller.in_flight == 0
+
+
+def test_retry_after_scales_with_backlog():
+    controller = AdmissionController(max_concurrency=2)
+    controller.in_flight = 2
+    controller.latency = 3.0
+
+    assert controller.retry_after() == 3
+    controller.latency = 0.0
+    assert controller.retry_after() == 1
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrency=0)
+
+
+###############################################################################
+# MIDDLEWARE
+###############################################################################
+
+async def call(middleware, path):
+    """Run one HTTP request through middleware; returns the sent messages"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "path": path}, receive, send)
+    return sent
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_guarded_paths_with_503():
+    """
+    A shed request gets 503, the API's JSON error body and Retry-After;
+    unguarded paths pass even when no slot is free.
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    await controller.acquire()
+    middleware = AdmissionMiddleware(ok_app, lambda: controller, ("/turn-credentials",))
+
+    shed = await call(middleware, "/turn-credentials/batch")
+    assert shed[0]["status"] == 503
+    assert dict(shed[0]["headers"])[b"retry-after"] == b"1"
+    assert json.loads(shed[1]["body"]) == {"error": "Service overloaded", "status_code": 503}
+
+    assert (await call(middleware, "/health"))[0]["status"] == 200
+
+
+@pytest.mark.asyncio
+async def test_middleware_releases_slot_after_response():
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    middleware = AdmissionMiddleware(ok_app, lambda: controller, ("/turn-credentials",))
+
+    for _ in range(3):
+        assert (await call(middleware, "/turn-credentials"))[0]["status"] == 200
+
+    assert controller.in_flight == 0 and controller.admitted == 3
+
+
+@pytest.mark.asyncio
+async def test_middleware_is_transparent_when_disabled():
+    middleware = AdmissionMiddleware(ok_app, lambda: None, ("/turn-credentials",))
+
+    assert (await call(middleware, "/turn-credentials"))[0]["status"] == 200
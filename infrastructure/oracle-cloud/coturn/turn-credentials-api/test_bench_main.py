@@ -0,0 +1,151 @@
+"""
+Tests for the TURN Credentials API benchmark suite
+
+Runs the suite with tiny request counts to verify the in-process driver,
+report format, and regression checks; timings themselves are not asserted.
+"""
+
+import json
+
+import pytest
+
+import main
+from bench_main import (
+    BENCH_API_KEY,
+    Scenario,
+    call_asgi,
+    check_thresholds,
+    compare_to_baseline,
+    main_cli,
+    percentile,
+    run_suite,
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+@pytest.fixture
+def small_report():
+    """Benchmark report from a minimal run"""
+    return run_suite(total_requests=20, concurrency=4, micro_iterations=20, warmup=2)
+
+
+###############################################################################
+# IN-PROCESS DRIVER
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_call_asgi_returns_status_and_body():
+    """
+    ASGI driver returns the same response a real client would see.
+    """
+    status_code, body = await call_asgi("GET", "/")
+
+    assert status_code == 200
+    assert json.loads(body)["service"] == "TURN Credentials API"
+
+
+###############################################################################
+# SUITE
+###############################################################################
+
+def test_run_suite_reports_every_scenario(small_report):
+    """
+    Report covers all HTTP scenarios and micro-benchmarks without errors.
+    """
+    assert set(small_report["http"]) == {
+        "post_credentials", "get_credentials", "health", "auth_failure"
+    }
+    for result in small_report["http"].values():
+        assert result["requests"] == 20
+        assert result["errors"] == 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert small_report["micro"]["generate_turn_credentials"]["iterations"] == 20
+    assert "speedup" in small_report["micro"]["credential_minting"]
+    json.dumps(small_report)
+
+
+def test_run_suite_restores_api_key():
+    """
+    Suite temporarily sets an API key and puts the original back.
+    """
+    original = main.API_KEY
+    run_suite(
+        total_requests=2, concurrency=1, micro_iterations=2, warmup=0,
+        scenarios=[Scenario("root", "GET", "/", 200)]
+    )
+    assert main.API_KEY == original != BENCH_API_KEY
+
+
+def test_scenario_counts_unexpected_status_as_error():
+    """
+    Requests returning an unexpected status are reported as errors.
+    """
+    report = run_suite(
+        total_requests=5, concurrency=2, micro_iterations=2, warmup=0,
+        scenarios=[Scenario("wrong", "GET", "/does-not-exist", 200)]
+    )
+    assert report["http"]["wrong"]["errors"] == 5
+
+
+###############################################################################
+# REGRESSION CHECKS
+###############################################################################
+
+def test_percentile_uses_nearest_rank():
+    """
+    Percentiles follow the nearest-rank definition.
+    """
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.99) == 0.0
+
+
+def test_check_thresholds_flags_violations(small_report):
+    """
+    Absolute limits produce one message per violated metric.
+    """
+    violations = check_thresholds(small_report, {
+        "health": {"min_rps": 1e12, "max_p99_ms": 1e6},
+        "missing": {"min_rps": 1},
+    })
+
+    assert len(violations) == 2
+    assert violations[0].startswith("health: rps=")
+    assert violations[1] == "missing: scenario missing from report"
+
+
+def test_compare_to_baseline_detects_slowdown(small_report):
+    """
+    Throughput drops and p99 increases beyond the tolerance are flagged.
+    """
+    faster = json.loads(json.dumps(small_report))
+    for result in faster["http"].values():
+        result["rps"] *= 10
+        result["p99_ms"] /= 10
+
+    assert compare_to_baseline(small_report, small_report) == []
+    regressions = compare_to_baseline(small_report, faster, max_regression=0.2)
+    assert len(regressions) == 2 * len(small_report["http"])
+
+
+def test_cli_writes_json_and_fails_on_threshold(tmp_path, capsys):
+    """
+    CLI writes a machine-readable report and exits 1 on violations.
+    """
+    output = tmp_path / "bench.json"
+    thresholds = tmp_path / "limits.json"
+    thresholds.write_text(json.dumps({"health": {"min_rps": 1e12}}))
+
+    exit_code = main_cli([
+        "-n", "5", "-c", "1", "--micro-iterations", "5",
+        "--format", "json", "-o", str(output), "--thresholds", str(thresholds)
+    ])
+
+    assert exit_code == 1
+    report = json.loads(output.read_text())
+    assert report["failures"] and report["failures"][0].startswith("health:")
+    assert json.loads(capsys.readouterr().out)["meta"]["requests"] == 5
@@ -0,0 +1,37 @@
+"""
+Tests for the compact SDP codec benchmark
+
+Runs the suite over the bundled corpus with a couple of iterations to
+verify the report shape and exit status; timings are not asserted.
+"""
+
+import json
+
+from bench_sdp import SIZE_COLUMNS, main_cli, run_suite
+
+
+def test_run_suite_reports_every_file():
+    """
+    Each corpus file gets every size column and a successful round trip.
+    """
+    report = run_suite(iterations=2)
+
+    assert report["meta"]["files"] == len(report["files"]) >= 4
+    for result in list(report["files"].values()) + [report["total"]]:
+        assert set(SIZE_COLUMNS) <= set(result)
+        assert result["round_trip"] is True
+        assert result["compact"] < result["raw"]
+    assert report["total"]["raw"] == sum(r["raw"] for r in report["files"].values())
+
+
+def test_main_cli_writes_json_report(tmp_path, capsys):
+    output = tmp_path / "sdp.json"
+
+    assert main_cli(["-n", "1", "--format", "json", "-o", str(output)]) == 0
+    assert json.loads(output.read_text())["total"]["round_trip"] is True
+    assert json.loads(capsys.readouterr().out)["meta"]["iterations"] == 1
+
+
+def test_main_cli_fails_on_empty_corpus(tmp_path, capsys):
+    assert main_cli(["--corpus", str(tmp_path), "-n", "1"]) == 1
+    assert "files=0" in capsys.readouterr().out
@@ -0,0 +1,69 @@
+"""
+Tests for the signaling call setup benchmark
+
+Runs a handful of in-process call setups to verify the ASGI WebSocket
+driver, the report format and the Firestore comparison; timings
+themselves are not asserted.
+"""
+
+import json
+
+import pytest
+
+import main
+from bench_signaling import PHASES, in_process_factory, main_cli, run_call, run_suite
+
+
+###############################################################################
+# IN-PROCESS DRIVER
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_run_call_completes_setup_in_process():
+    """
+    One call setup through the ASGI app reaches "answered" with every
+    candidate stored.
+    """
+    from unittest.mock import patch
+    from signaling_hub import SignalingHub
+
+    hub = SignalingHub()
+    with patch.object(main, "SIGNALING_ENABLED", True), patch.object(main, "signaling_hub", hub), \
+         patch.object(main, "API_KEY", ""):
+        result = await run_call(in_process_factory(), candidates=3, sdp_bytes=200)
+
+    assert set(result) == set(PHASES)
+    assert 0 < result["offer_to_answer"] <= result["setup"]
+    assert hub.stats()["messages"]["ice-candidate"] == 6
+    assert hub.stats()["peers"] == 0
+
+
+###############################################################################
+# REPORT
+###############################################################################
+
+def test_run_suite_compares_with_firestore_samples():
+    """
+    Firestore samples are summarized alongside the hub and a p50 speedup
+    is reported per phase.
+    """
+    firestore = {"offer_to_answer_ms": [300.0, 320.0], "setup_ms": [450.0, 500.0]}
+
+    report = run_suite(calls=6, concurrency=2, candidates=2, firestore=firestore)
+
+    assert report["hub"]["setup"]["requests"] == 6
+    assert report["hub"]["setup"]["errors"] == 0
+    assert report["firestore"]["setup"]["p50_ms"] == 450.0
+    assert set(report["speedup"]) == {"offer_to_answer_p50", "setup_p50"}
+
+
+def test_cli_writes_json_report(tmp_path, capsys):
+    """
+    --format json prints the report and -o writes the same to a file.
+    """
+    output = tmp_path / "signaling.json"
+
+    assert main_cli(["-n", "4", "-c", "2", "--format", "json", "-o", str(output)]) == 0
+
+    assert json.loads(capsys.readouterr().out)["meta"]["calls"] == 4
+    assert json.loads(output.read_text())["hub"]["offer_to_answer"]["requests"] == 4
@@ -0,0 +1,349 @@
+"""
+Tests for the TURN allocation load generator
+
+Runs the generator against a minimal TURN server stand-in on loopback
+(long-term credential challenge with the TURN REST password, Allocate
+with a real UDP relay, CreatePermission, ChannelBind, ChannelData relay
+and Refresh) over UDP and TCP, and checks the report: operation counts,
+relay accounting, failure codes for quota and authentication errors,
+timeouts with retransmission, and the CLI.
+"""
+
+import asyncio
+import json
+import socket
+import struct
+import threading
+
+import pytest
+
+import bench_turn
+from bench_turn import (
+    ALLOCATE,
+    ATTR_CHANNEL_NUMBER,
+    ATTR_DATA,
+    ATTR_LIFETIME,
+    ATTR_XOR_PEER_ADDRESS,
+    ATTR_XOR_RELAYED_ADDRESS,
+    CHANNEL_BIND,
+    CREATE_PERMISSION,
+    DATA_INDICATION,
+    ERROR,
+    REFRESH,
+    SUCCESS,
+    format_text,
+    main_cli,
+    run_suite,
+)
+from main import CredentialMinter
+from stun_probe import (
+    ATTR_ERROR_CODE,
+    ATTR_MESSAGE_INTEGRITY,
+    ATTR_NONCE,
+    ATTR_REALM,
+    ATTR_USERNAME,
+    build_message,
+    encode_xor_address,
+    long_term_key,
+    parse_message,
+    xor_address,
+)
+
+
+SECRET = "bench-turn-secret"
+REALM = b"bench"
+NONCE = b"0123456789abcdef"
+
+
+###############################################################################
+# STAND-IN
+###############################################################################
+
+class Allocation(asyncio.DatagramProtocol):
+    """A relay socket, its permissions and channels"""
+
+    def __init__(self, deliver, stream):
+        self.deliver = deliver
+        self.stream = stream
+        self.permissions = set()
+        self.channels = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if addr not in self.permissions:
+            return
+        for channel, peer in self.channels.items():
+            if peer == addr:
+                padding = b"\x00" * (-len(data) % 4) if self.stream else b""
+                self.deliver(struct.pack("!HH", channel, len(data)) + data + padding)
+                return
+        self.deliver(build_message(DATA_INDICATION, b"\x00" * 12, [
+            (ATTR_XOR_PEER_ADDRESS, encode_xor_address(addr[0], addr[1], b"\x00" * 12)), (ATTR_DATA, data),
+        ]))
+
+
+class TurnStandIn:
+    """Just enough of coturn with use-auth-secret for the load generator"""
+
+    def __init__(self, secret=SECRET, max_allocations=None):
+        self.minter = CredentialMinter(secret, "127.0.0.1", 3478)
+        self.max_allocations = max_allocations
+        self.allocations = {}          # client 5-tuple -> Allocation
+        self.pending = 0               # allocations being set up
+        self.peak = 0
+        self.requests = 0
+
+    def active(self):
+        return sum(1 for allocation in self.allocations.values() if allocation is not None)
+
+    def error(self, method, transaction_id, code, challenge=False):
+        attributes = [(ATTR_ERROR_CODE, struct.pack("!HBB", 0, code // 100, code % 100))]
+        if challenge:
+            attributes += [(ATTR_REALM, REALM), (ATTR_NONCE, NONCE)]
+        return build_message(method | ERROR, transaction_id, attributes)
+
+    def authenticated(self, msg_type, transaction_id, attributes):
+        names = [attr_type for attr_type, _ in attributes]
+        if ATTR_MESSAGE_INTEGRITY not in names:
+            return False
+        signed = attributes[:names.index(ATTR_MESSAGE_INTEGRITY)]
+        username = dict(signed).get(ATTR_USERNAME, b"").decode()
+        key = long_term_key(username, REALM.decode(), self.minter.sign(username))
+        expected = build_message(msg_type, transaction_id, signed, key=key)
+        return dict(attributes)[ATTR_MESSAGE_INTEGRITY] == expected[-20:]
+
+    async def handle(self, data, client, reply, stream=False):
+        if data[0] & 0xC0 == 0x40:
+            channel, length = struct.unpack_from("!HH", data)
+            allocation = self.allocations.get(client)
+            if allocation is not None and channel in allocation.channels:
+                allocation.transport.sendto(data[4:4 + length], allocation.channels[channel])
+            return
+
+        self.requests += 1
+        msg_type, transaction_id, attributes = parse_message(data)
+        if not self.authenticated(msg_type, transaction_id, attributes):
+            reply(self.error(msg_type, transaction_id, 401, challenge=True))
+            return
+        values = dict(attributes)
+        allocation = self.allocations.get(client)
+
+        if msg_type == ALLOCATE:
+            if self.max_allocations is not None and self.active() + self.pending >= self.max_allocations:
+                reply(self.error(msg_type, transaction_id, 486))
+                return
+            self.pending += 1
+            try:
+                transport, allocation = await asyncio.get_running_loop().create_datagram_endpoint(
+                    lambda: Allocation(reply, stream), local_addr=("127.0.0.1", 0)
+                )
+            finally:
+                self.pending -= 1
+            self.allocations[client] = allocation
+            self.peak = max(self.peak, self.active())
+            host, port = transport.get_extra_info("sockname")
+            response = [(ATTR_XOR_RELAYED_ADDRESS, encode_xor_address(host, port, transaction_id))]
+        elif allocation is None:
+            reply(self.error(msg_type, transaction_id, 437))
+            return
+        elif msg_type == CREATE_PERMISSION:
+            allocation.permissions.add(xor_address(values[ATTR_XOR_PEER_ADDRESS], transaction_id))
+            response = []
+        elif msg_type == CHANNEL_BIND:
+            peer = xor_address(values[ATTR_XOR_PEER_ADDRESS], transaction_id)
+            allocation.permissions.add(peer)
+            allocation.channels[struct.unpack_from("!H", values[ATTR_CHANNEL_NUMBER])[0]] = peer
+            response = []
+        elif msg_type == REFRESH:
+            if struct.unpack("!I", values[ATTR_LIFETIME])[0] == 0:
+                allocation.transport.close()
+                self.allocations[client] = None
+            response = []
+        else:
+            reply(self.error(msg_type, transaction_id, 400))
+            return
+        reply(build_message(msg_type | SUCCESS, transaction_id, response))
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        stand_in = self
+
+        class Udp(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                loop.create_task(stand_in.handle(data, addr, lambda out: self.transport.sendto(out, addr)))
+
+        async def tcp(reader, writer):
+            client = ("tcp",) + tuple(writer.get_extra_info("peername"))
+            try:
+                while True:
+                    head = await reader.readexactly(4)
+                    length = struct.unpack_from("!H", head, 2)[0]
+                    if head[0] & 0xC0 == 0x40:
+                        rest = await reader.readexactly(length + (-length % 4))
+                    else:
+                        rest = await reader.readexactly(16 + length)
+                    await self.handle(head + rest, client, writer.write, stream=True)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                writer.close()
+
+        self.udp, _ = await loop.create_datagram_endpoint(Udp, local_addr=("127.0.0.1", 0))
+        port = self.udp.get_extra_info("sockname")[1]
+        try:
+            self.tcp = await asyncio.start_server(tcp, "127.0.0.1", port)
+        except OSError:
+            self.udp.close()
+            raise
+        return port
+
+    async def stop(self):
+        self.udp.close()
+        self.tcp.close()
+        for allocation in self.allocations.values():
+            if allocation is not None:
+                allocation.transport.close()
+
+
+@pytest.fixture
+def turn_server():
+    """
+    Factory for stand-ins served from a background event loop, so the
+    load generator can run its own loop via asyncio.run.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def start(**kwargs):
+        server = TurnStandIn(**kwargs)
+        while True:
+            try:
+                port = asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+                break
+            except OSError:         # TCP port of the same number already taken
+                continue
+        servers.append(server)
+        return server, port
+
+    yield start
+    for server in servers:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+###############################################################################
+# LOAD
+###############################################################################
+
+@pytest.mark.parametrize("transport", ["udp", "tcp"])
+def test_pairs_allocate_relay_and_release(turn_server, transport):
+    """
+    Every pair completes; allocations are released, so a quota of two
+    pairs' worth is never exceeded while more pairs run in sequence.
+    """
+    server, port = turn_server(max_allocations=4)
+
+    report = run_suite(SECRET, port=port, transports=(transport,), pairs=3, concurrency=2,
+                       duration=0.2, rate=50, packet_size=64, timeout=2.0)
+    result = report["transports"][transport]
+
+    assert result["pairs"] == {"requested": 3, "completed": 3}
+    assert result["failures"] == {} and result["failed"] == 0
+    for operation in ("allocate", "create_permission", "channel_bind", "refresh"):
+        assert result["operations"][operation]["requests"] == 6
+        assert result["operations"][operation]["p50_ms"] > 0
+    relay = result["relay"]
+    assert relay["packets_sent"] == 3 * 2 * 10
+    assert relay["packets_received"] == relay["packets_sent"] and relay["loss"] == 0
+    assert relay["bytes_received"] == relay["packets_sent"] * 64
+    assert relay["throughput_mbps"] > 0 and relay["p99_ms"] > 0
+    assert server.active() == 0 and server.peak <= 4
+
+
+def test_quota_rejections_are_reported_by_code(turn_server):
+    """
+    With room for one allocation, the second client of each pair gets
+    486 (Allocation Quota Reached); the first one is still released.
+    """
+    server, port = turn_server(max_allocations=1)
+
+    result = run_suite(SECRET, port=port, pairs=2, concurrency=1, duration=0)["transports"]["udp"]
+
+    assert result["pairs"]["completed"] == 0
+    assert result["failures"] == {"allocate:486": 2}
+    assert result["operations"]["allocate"] == {**result["operations"]["allocate"], "requests": 2, "errors": 2}
+    assert server.active() == 0
+
+
+def test_wrong_secret_fails_authentication(turn_server):
+    _, port = turn_server(secret="another-secret")
+
+    result = run_suite(SECRET, port=port, pairs=1, concurrency=1, duration=0)["transports"]["udp"]
+
+    assert result["failures"] == {"allocate:401": 2}
+
+
+def test_silent_server_times_out_after_retransmits(monkeypatch):
+    """
+    UDP requests are retransmitted with a doubling RTO until the
+    transaction timeout.
+    """
+    monkeypatch.setattr(bench_turn, "INITIAL_RTO", 0.05)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+        result = run_suite(SECRET, port=port, pairs=1, concurrency=1, duration=0, timeout=0.3)["transports"]["udp"]
+
+        sock.setblocking(False)
+        received = 0
+        try:
+            while sock.recv(2048):
+                received += 1
+        except BlockingIOError:
+            pass
+
+    assert result["failures"] == {"allocate:timeout": 2}
+    assert received >= 2 * 3                # 0, 0.05, 0.15 s at least, per client
+
+
+###############################################################################
+# CLI
+###############################################################################
+
+def test_cli_writes_json_report(turn_server, tmp_path, capsys):
+    _, port = turn_server()
+    output = tmp_path / "turn.json"
+
+    status = main_cli([
+        "--port", str(port), "--secret", SECRET, "--transport", "udp,tcp", "-n", "2", "-c", "2",
+        "--duration", "0.1", "--rate", "20", "--format", "json", "-o", str(output),
+    ])
+
+    report = json.loads(capsys.readouterr().out)
+    assert status == 0
+    assert report == json.loads(output.read_text())
+    assert report["meta"]["target"] == f"127.0.0.1:{port}"
+    assert set(report["transports"]) == {"udp", "tcp"}
+    assert "allocate" in format_text(report) and "loss 0.00%" in format_text(report)
+
+
+def test_cli_fails_when_no_pair_completes(turn_server, capsys):
+    _, port = turn_server(max_allocations=0)
+
+    assert main_cli(["--port", str(port), "--secret", SECRET, "-n", "1", "--duration", "0"]) == 1
+    assert "allocate:486: 2" in capsys.readouterr().out
+
+
+def test_cli_requires_secret(monkeypatch):
+    monkeypatch.delenv("TURN_SECRET", raising=False)
+
+    with pytest.raises(SystemExit):
+        main_cli(["--secret", ""])
@@ -0,0 +1,177 @@
+"""
+Tests for the MessagePack and CBOR response encodings
+
+Covers byte-exact encodings against the MessagePack spec and the RFC 8949
+Appendix A examples, round trips of credential-shaped documents, decoder
+errors, pre-encoded map/array headers, and Accept header negotiation.
+"""
+
+import pytest
+
+from binary_codec import (
+    CBOR,
+    MSGPACK,
+    decode_cbor,
+    decode_msgpack,
+    encode_cbor,
+    encode_msgpack,
+    negotiate,
+)
+
+
+CREDENTIAL = {
+    "username": "1737910800:alice",
+    "password": "dGhpcyBpcyBub3QgYSByZWFsIHBhc3N3b3Jk",
+    "ttl": 86400,
+    "uris": [
+        "turn:turn.example.com:3478?transport=udp",
+        "turn:turn.example.com:3478?transport=tcp",
+        "turns:turn.example.com:5349?transport=tcp",
+    ],
+}
+
+
+###############################################################################
+# ENCODING
+###############################################################################
+
+@pytest.mark.parametrize("value, encoded", [
+    (0, "00"),
+    (127, "7f"),
+    (128, "cc80"),
+    (65535, "cdffff"),
+    (65536, "ce00010000"),
+    (2 ** 32, "cf0000000100000000"),
+    (-1, "ff"),
+    (-32, "e0"),
+    (-33, "d0df"),
+    (-129, "d1ff7f"),
+    (None, "c0"),
+    (False, "c2"),
+    (True, "c3"),
+    (1.5, "cb3ff8000000000000"),
+    ("", "a0"),
+    ("a" * 31, "bf" + "61" * 31),
+    ("a" * 32, "d920" + "61" * 32),
+    (b"\x01", "c40101"),
+    ([1, 2], "920102"),
+    (list(range(16)), "dc0010" + "".join(f"{i:02x}" for i in range(16))),
+    ({"compact": True, "schema": 0}, "82a7636f6d70616374c3a6736368656d6100"),
+])
+def test_msgpack_encodings_match_spec(value, encoded):
+    assert encode_msgpack(value).hex() == encoded
+
+
+@pytest.mark.parametrize("value, encoded", [
+    (0, "00"),
+    (23, "17"),
+    (24, "1818"),
+    (100, "1864"),
+    (1000, "1903e8"),
+    (1000000, "1a000f4240"),
+    (1000000000000, "1b000000e8d4a51000"),
+    (-1, "20"),
+    (-1000, "3903e7"),
+    (1.1, "fb3ff199999999999a"),
+    (False, "f4"),
+    (True, "f5"),
+    (None, "f6"),
+    (b"\x01\x02\x03\x04", "4401020304"),
+    ("", "60"),
+    ("IETF", "6449455446"),
+    ("ü", "62c3bc"),
+    ([1, [2, 3], [4, 5]], "8301820203820405"),
+    ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+])
+def test_cbor_encodings_match_rfc_8949_examples(value, encoded):
+    assert encode_cbor(value).hex() == encoded
+
+
+@pytest.mark.parametrize("codec", [MSGPACK, CBOR], ids=lambda codec: codec.name)
+def test_credential_round_trips_and_is_smaller_than_json(codec):
+    import json
+
+    encoded = codec.encode(CREDENTIAL)
+
+    assert codec.decode(encoded) == CREDENTIAL
+    assert len(encoded) < len(json.dumps(CREDENTIAL, separators=(",", ":")))
+
+
+@pytest.mark.parametrize("codec", [MSGPACK, CBOR], ids=lambda codec: codec.name)
+def test_tuples_encode_as_arrays_and_unknown_types_are_rejected(codec):
+    assert codec.encode(("a", 1)) == codec.encode(["a", 1])
+    with pytest.raises(TypeError):
+        codec.encode({"when": object()})
+    with pytest.raises(ValueError):
+        codec.encode(2 ** 64)
+
+
+@pytest.mark.parametrize("codec", [MSGPACK, CBOR], ids=lambda codec: codec.name)
+def test_headers_let_documents_be_assembled_from_parts(codec):
+    """
+    A map header followed by separately encoded pairs is the same as
+    encoding the whole map, which is how static prefixes are built.
+    """
+    document = {f"key{i}": list(range(i)) for i in range(20)}
+    parts = [codec.map_header(len(document))]
+    for key, items in document.items():
+        parts.append(codec.encode(key) + codec.array_header(len(items)) + b"".join(map(codec.encode, items)))
+
+    assert b"".join(parts) == codec.encode(document)
+
+
+###############################################################################
+# DECODING
+###############################################################################
+
+@pytest.mark.parametrize("codec", [MSGPACK, CBOR], ids=lambda codec: codec.name)
+def test_malformed_input_is_rejected(codec):
+    encoded = codec.encode(CREDENTIAL)
+
+    with pytest.raises(ValueError):
+        codec.decode(encoded[:-1])
+    with pytest.raises(ValueError):
+        codec.decode(encoded + b"\x00")
+    with pytest.raises(ValueError):
+        codec.decode(b"")
+
+
+def test_decoders_accept_shorter_floats():
+    assert decode_msgpack(bytes.fromhex("ca3fc00000")) == 1.5
+    assert decode_cbor(bytes.fromhex("f93e00")) == 1.5
+    assert decode_cbor(bytes.fromhex("fa47c35000")) == 100000.0
+
+
+def test_unsupported_items_are_rejected():
+    with pytest.raises(ValueError):
+        decode_msgpack(bytes.fromhex("d40100"))          # fixext 1
+    with pytest.raises(ValueError):
+        decode_cbor(bytes.fromhex("c11a514b67b0"))       # tag 1 (epoch time)
+    with pytest.raises(ValueError):
+        decode_cbor(bytes.fromhex("9f01ff"))             # indefinite-length array
+
+
+###############################################################################
+# NEGOTIATION
+###############################################################################
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, None),
+    ("", None),
+    ("*/*", None),
+    ("application/json", None),
+    ("application/msgpack", MSGPACK),
+    ("application/x-msgpack", MSGPACK),
+    ("application/vnd.msgpack", MSGPACK),
+    ("Application/CBOR", CBOR),
+    ("application/cbor, application/json;q=0.9", CBOR),
+    ("application/json, application/msgpack", None),
+    ("application/json;q=0.5, application/msgpack", MSGPACK),
+    ("application/msgpack;q=0.2, application/cbor;q=0.8, */*;q=0.1", CBOR),
+    ("application/msgpack;q=0, application/json", None),
+    ("application/msgpack;q=oops, application/json;q=0.1", None),
+    ("text/html, application/cbor;q=0.5", CBOR),
+    ("application/x-cbor-seq", None),
+])
+def test_negotiate(accept, expected):
+    assert negotiate(accept) == expected
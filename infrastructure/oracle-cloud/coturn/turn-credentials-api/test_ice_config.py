@@ -0,0 +1,201 @@
+"""
+Tests for the static ICE configuration
+
+Covers the snapshot built from the shipped turn-config.json (static
+fields, version hash), splicing a credential into it (as JSON and in the
+binary encodings), and reloading when the file changes, including a
+broken file keeping the last good version.
+"""
+
+import json
+import os
+
+import pytest
+
+from binary_codec import CODECS
+from ice_config import DEFAULT_PATH, IceConfig, default_path, build_snapshot, render_ice_config, render_ice_config_binary
+
+
+URIS = ["turn:turn.example.com:3478?transport=udp", "turns:turn.example.com:5349?transport=tcp"]
+
+
+def render(snapshot, known_version=None, username="1737910800:alice"):
+    return json.loads(render_ice_config(snapshot, username, "cGFzcw==", 3600, json.dumps(URIS), known_version))
+
+
+def write_config(path, **fields):
+    document = {"title": "t", "stun_servers": [{"urls": ["stun:a:3478"]}], "turn_servers": [{"name": "primary"}]}
+    document.update(fields)
+    path.write_text(json.dumps(document))
+
+
+###############################################################################
+# SNAPSHOT
+###############################################################################
+
+def test_snapshot_of_shipped_config():
+    """
+    The static part keeps the ICE settings clients need and drops schema
+    metadata and the credential placeholders.
+    """
+    with open(DEFAULT_PATH) as f:
+        document = json.load(f)
+    snapshot = build_snapshot(document)
+
+    static = json.loads(snapshot.static_json)
+    assert static["config_version"] == snapshot.version
+    assert static["ice_candidate_pool_size"] == document["ice_candidate_pool_size"]
+    assert static["stun_servers"] == document["stun_servers"]
+    assert not {"$schema", "$id", "title", "description", "turn_servers"} & set(static)
+    assert snapshot.static_json == snapshot.prefix + b"}"
+
+
+def test_version_tracks_content_not_key_order():
+    document = {"ice_transport_policy": "all", "ice_candidate_pool_size": 10}
+
+    assert build_snapshot(document).version == build_snapshot(dict(reversed(document.items()))).version
+    assert build_snapshot(document).version != build_snapshot({**document, "ice_candidate_pool_size": 5}).version
+    assert build_snapshot(document).version == build_snapshot({**document, "description": "x"}).version
+
+
+@pytest.mark.parametrize("document", [[], {"turn_servers": "turn:a"}, {"turn_servers": ["turn:a"]}])
+def test_malformed_documents_are_rejected(document):
+    with pytest.raises(ValueError):
+        build_snapshot(document)
+
+
+###############################################################################
+# RENDERING
+###############################################################################
+
+def test_credential_is_spliced_into_turn_server_entry():
+    with open(DEFAULT_PATH) as f:
+        snapshot = build_snapshot(json.load(f))
+
+    config = render(snapshot)
+
+    assert config == {
+        **json.loads(snapshot.static_json),
+        "turn_servers": [{
+            "name": "primary",
+            "credential_type": "password",
+            "priority": 1,
+            "require_auth": True,
+            "urls": URIS,
+            "username": "1737910800:alice",
+            "credential": "cGFzcw==",
+            "ttl": 3600,
+        }],
+    }
+
+
+def test_known_version_skips_static_fields():
+    snapshot = build_snapshot({"ice_candidate_pool_size": 10})
+
+    assert set(render(snapshot, known_version=snapshot.version)) == {"config_version", "turn_servers"}
+    assert "ice_candidate_pool_size" in render(snapshot, known_version="stale")
+
+
+def test_empty_document_and_escaped_username():
+    snapshot = build_snapshot({})
+
+    config = render(snapshot, username='1737910800:a"b')
+
+    assert config["turn_servers"][0]["username"] == '1737910800:a"b'
+    assert list(config) == ["config_version", "turn_servers"]
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: codec.name)
+@pytest.mark.parametrize("known", [False, True])
+def test_binary_rendering_matches_json(codec, known):
+    """
+    The pre-encoded binary prefixes decode to the same document, in the
+    same key order, as the JSON rendering.
+    """
+    with open(DEFAULT_PATH) as f:
+        snapshot = build_snapshot(json.load(f))
+    known_version = snapshot.version if known else None
+
+    encoded = render_ice_config_binary(snapshot, codec, '1737910800:a"b', "cGFzcw==", 3600, URIS, known_version)
+    expected = render(snapshot, known_version, username='1737910800:a"b')
+
+    decoded = codec.decode(encoded)
+    assert decoded == expected and list(decoded) == list(expected)
+    assert codec.decode(snapshot.encoded[codec.name].static) == json.loads(snapshot.static_json)
+    assert len(encoded) < len(json.dumps(expected, separators=(",", ":")))
+
+
+###############################################################################
+# RELOADING
+###############################################################################
+
+def test_default_path_in_checkout_and_flat_deploy(tmp_path):
+    """
+    A checkout serves shared/constants; the flat /opt/turn-api layout
+    written by setup.sh serves the copy next to the modules.
+    """
+    checkout = tmp_path / "repo" / "infrastructure" / "oracle-cloud" / "coturn" / "turn-credentials-api"
+    checkout.mkdir(parents=True)
+    shared = tmp_path / "repo" / "shared" / "constants"
+    shared.mkdir(parents=True)
+    write_config(shared / "turn-config.json")
+    deploy = tmp_path / "opt" / "turn-api"
+    deploy.mkdir(parents=True)
+    write_config(deploy / "turn-config.json")
+
+    assert default_path(str(checkout)) == str(shared / "turn-config.json")
+    assert default_path(str(deploy)) == str(deploy / "turn-config.json")
+    config = IceConfig(default_path(str(deploy)))
+    assert config.load() and config.current() is not None
+
+
+def test_changed_file_is_reloaded_after_check_interval(tmp_path):
+    path = tmp_path / "turn-config.json"
+    write_config(path, ice_candidate_pool_size=10)
+    config = IceConfig(str(path), check_interval=5.0)
+    assert config.load()
+    first = config.current(now=100.0)
+
+    write_config(path, ice_candidate_pool_size=4)
+    os.utime(path, ns=(0, 1))            # distinct mtime even on coarse clocks
+
+    assert config.current(now=101.0) is first
+    second = config.current(now=106.0)
+    assert second.version != first.version
+    assert json.loads(second.static_json)["ice_candidate_pool_size"] == 4
+    assert config.stats()["reloads"] == 2
+
+
+def test_unchanged_file_is_not_reparsed(tmp_path):
+    path = tmp_path / "turn-config.json"
+    write_config(path)
+    config = IceConfig(str(path), check_interval=0.0)
+    config.load()
+
+    for now in range(5):
+        config.current(now=float(now))
+
+    assert config.reloads == 1
+
+
+def test_broken_file_keeps_last_good_snapshot(tmp_path):
+    path = tmp_path / "turn-config.json"
+    write_config(path)
+    config = IceConfig(str(path), check_interval=0.0)
+    config.load()
+    good = config.snapshot
+
+    path.write_text("{not json")
+    os.utime(path, ns=(0, 1))
+
+    assert config.current(now=1.0) is good
+    assert config.current(now=2.0) is good
+    assert config.stats()["errors"] == 1           # retried only when it changes again
+
+
+def test_missing_file_serves_nothing(tmp_path):
+    config = IceConfig(str(tmp_path / "missing.json"))
+
+    assert config.load() is False
+    assert config.current() is None
+    assert config.stats() == {"path": str(tmp_path / "missing.json"), "version": None, "reloads": 0, "errors": 1}
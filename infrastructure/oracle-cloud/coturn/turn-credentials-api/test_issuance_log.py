@@ -0,0 +1,172 @@
+"""
+Tests for the issuance event log
+
+Covers queueing, batching, size-based rotation, sampling and the
+drop-instead-of-block behaviour when the queue is full.
+"""
+
+import json
+
+import pytest
+
+from issuance_log import IssuanceEventLog
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+@pytest.fixture
+def log_path(tmp_path):
+    """Path for an NDJSON event file"""
+    return str(tmp_path / "events" / "issuance.ndjson")
+
+
+def read_records(path):
+    """Parse every NDJSON record in path"""
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+###############################################################################
+# QUEUEING AND WRITING
+###############################################################################
+
+def test_disabled_log_is_a_no_op():
+    """
+    Without a path, emit() returns False and queues nothing.
+    """
+    log = IssuanceEventLog(path="")
+
+    assert log.enabled is False
+    assert log.emit("issued", user="alice") is False
+    assert log.stats()["queued"] == 0
+
+
+def test_flush_writes_ndjson_records_in_order(log_path):
+    """
+    Queued events are written as one JSON object per line.
+    """
+    log = IssuanceEventLog(path=log_path, batch_size=2)
+    log.start()
+    log.stop()  # creates the directory and stops the writer
+
+    for i in range(5):
+        log.emit("issued", user=f"user{i}", ttl=60)
+    assert log.flush() == 5
+
+    records = read_records(log_path)
+    assert [r["user"] for r in records] == [f"user{i}" for i in range(5)]
+    assert records[0]["event"] == "issued"
+    assert isinstance(records[0]["ts"], float)
+    assert log.stats()["written"] == 5
+
+
+def test_background_writer_flushes_on_stop(log_path):
+    """
+    Stopping the writer flushes events that were still queued.
+    """
+    log = IssuanceEventLog(path=log_path, flush_interval=60)
+    log.start()
+    log.emit("auth_failure", key_fp="deadbeef")
+    log.stop()
+
+    record = read_records(log_path)[0]
+    assert record["event"] == "auth_failure"
+    assert record["key_fp"] == "deadbeef"
+
+
+def test_full_queue_drops_instead_of_blocking(log_path):
+    """
+    Events beyond max_queue are dropped and counted.
+    """
+    log = IssuanceEventLog(path=log_path, max_queue=3)
+
+    results = [log.emit("issued", user=str(i)) for i in range(5)]
+
+    assert results == [True, True, True, False, False]
+    assert log.stats()["dropped"] == 2
+    assert log.stats()["queued"] == 3
+
+
+###############################################################################
+# SAMPLING
+###############################################################################
+
+def test_sampling_applies_only_to_sampled_events(log_path):
+    """
+    sample_rate thins sampled events; unsampled events are always kept.
+    """
+    log = IssuanceEventLog(path=log_path, sample_rate=0.0)
+
+    assert log.emit("issued", sampled=True, user="alice") is False
+    assert log.emit("auth_failure", key_fp="x") is True
+    assert log.stats()["sampled_out"] == 1
+
+
+def test_sampling_rate_keeps_expected_fraction(log_path):
+    """
+    A 25% sample rate keeps roughly a quarter of sampled events.
+    """
+    log = IssuanceEventLog(path=log_path, sample_rate=0.25, max_queue=100000)
+
+    kept = sum(log.emit("issued", sampled=True) for _ in range(20000))
+
+    assert 4000 < kept < 6000
+
+
+###############################################################################
+# ROTATION
+###############################################################################
+
+def test_rotation_keeps_backup_count_files(tmp_path):
+    """
+    Files rotate by size and only backup_count old files are kept.
+    """
+    path = str(tmp_path / "issuance.ndjson")
+    log = IssuanceEventLog(path=path, batch_size=1, max_bytes=200, backup_count=2)
+
+    for i in range(40):
+        log.emit("issued", user=f"user{i:03d}", ttl=3600)
+        log.flush()
+
+    assert log.stats()["rotations"] > 2
+    assert (tmp_path / "issuance.ndjson.1").exists()
+    assert (tmp_path / "issuance.ndjson.2").exists()
+    assert not (tmp_path / "issuance.ndjson.3").exists()
+    for name in ("issuance.ndjson", "issuance.ndjson.1", "issuance.ndjson.2"):
+        assert (tmp_path / name).stat().st_size <= 200
+    assert read_records(path)[-1]["user"] == "user039"
+
+
+def _write_from_worker(path, worker, count):
+    """Child process body: one writer per process on a shared path"""
+    log = IssuanceEventLog(path=path, batch_size=1, max_bytes=300, backup_count=1000)
+    for i in range(count):
+        log.emit("issued", user=f"w{worker}-{i}")
+        log.flush()
+
+
+def test_workers_sharing_a_path_never_lose_a_generation(tmp_path):
+    """
+    Processes writing and rotating one path concurrently keep every
+    record: a full file is rotated by exactly one of them.
+    """
+    import multiprocessing
+
+    path = str(tmp_path / "issuance.ndjson")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_from_worker, args=(path, w, 300)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+
+    users = [
+        record["user"]
+        for file in tmp_path.glob("issuance.ndjson*")
+        if not file.name.endswith(".lock")
+        for record in read_records(str(file))
+    ]
+    assert all(process.exitcode == 0 for process in workers)
+    assert len(users) == len(set(users)) == 1200
@@ -0,0 +1,253 @@
+"""
+Tests for the offline coturn log analyzer
+
+Covers parsing of session lines, splitting TURN usernames back into API
+usernames, chunk boundaries, merging across chunks and rotated files,
+session ids reused after coturn restarts, parallel scans and the
+CSV/JSON reports.
+"""
+
+import csv
+import json
+import os
+
+import pytest
+
+import log_analyzer
+from log_analyzer import (
+    analyze_logs,
+    chunk_boundaries,
+    main_cli,
+    parse_chunk,
+    split_turn_username,
+    summarize,
+    summarize_users,
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+def session_lines(sid, user, start, end, usage=(), closed=True):
+    """coturn lines for one session: new, allocate, usage reports, close"""
+    lines = [
+        f"{start}: session {sid}: new, realm=<turn.example.com>, username=<{user}>, lifetime=600",
+        f"{start}: session {sid}: realm <turn.example.com> user <{user}>: incoming packet ALLOCATE processed, success",
+        f"{start}: session {sid}: refreshed, realm=<turn.example.com>, username=<{user}>, lifetime=600",
+    ]
+    for ts, rb, sb in usage:
+        lines.append(
+            f"{ts}: session {sid}: usage: realm=<turn.example.com>, username=<{user}>, rp=1, rb={rb}, sp=1, sb={sb}"
+        )
+    if closed:
+        lines.append(
+            f"{end}: session {sid}: closed (2nd stage), user <{user}> realm <turn.example.com> "
+            f"origin <>, local 10.0.0.1:3478, remote 1.2.3.4:5000, reason: allocation timeout"
+        )
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Log with two users, three sessions and unrelated noise"""
+    path = tmp_path / "turnserver.log"
+    path.write_text(
+        "0: Listener address to use: 0.0.0.0\n"
+        + session_lines("001", "1737914000:alice", 10, 70, usage=[(40, 1000, 500)])
+        + session_lines("002", "1737917600:alice", 100, 130)
+        + "101: handle_udp_packet: error 401: Unauthorized\n"
+        + session_lines("003", "1737914000:bob", 120, 420, usage=[(200, 10, 20), (300, 30, 40)])
+    )
+    return str(path)
+
+
+###############################################################################
+# PARSING
+###############################################################################
+
+def test_split_turn_username_reverses_minting():
+    """
+    "expiry:username" splits into its parts; other names pass through.
+    """
+    assert split_turn_username("1737914000:alice") == (1737914000, "alice")
+    assert split_turn_username("1737914000:room:alice") == (1737914000, "room:alice")
+    assert split_turn_username("static-user") == (None, "static-user")
+
+
+def test_parse_chunk_aggregates_sessions(log_file):
+    """
+    Allocation, usage and close lines fold into one record per session.
+    """
+    with open(log_file, "rb") as f:
+        sessions = parse_chunk(f.read()).sessions()
+
+    assert sessions["001"] == ["1737914000:alice", 10, 70, 1, 1500, True]
+    assert sessions["003"][4] == 100
+    assert len(sessions) == 3
+
+
+def test_peer_usage_is_not_counted_twice():
+    """
+    "peer usage" lines repeat the relayed payload for the peer leg and
+    are not added to the session's relayed bytes.
+    """
+    data = session_lines("004", "1737914000:dave", 10, 70, usage=[(40, 1000, 500)]).replace(
+        "40: session 004: usage:",
+        "40: session 004: peer usage: realm=<turn.example.com>, username=<1737914000:dave>, "
+        "rp=1, rb=500, sp=1, sb=1000\n40: session 004: usage:"
+    )
+
+    assert "peer usage" in data
+    assert parse_chunk(data.encode()).sessions()["004"][4] == 1500
+
+
+def test_summaries_group_by_api_username(log_file):
+    """
+    Per-user rows join every credential minted for the same username.
+    """
+    sessions = analyze_logs([log_file], workers=1)
+    users = {row["user"]: row for row in summarize_users(sessions)}
+
+    assert users["alice"] == {
+        "user": "alice", "sessions": 2, "allocations": 2,
+        "credentials": 2, "relayed_bytes": 1500, "duration_seconds": 90,
+    }
+    summary = summarize(sessions)
+    assert summary["users"] == 2
+    assert summary["allocations"] == 3
+    assert summary["duration_p50_seconds"] == 60
+    assert summary["duration_p99_seconds"] == 300
+
+
+###############################################################################
+# CHUNKING AND MERGING
+###############################################################################
+
+def test_chunk_boundaries_fall_on_line_starts(log_file, monkeypatch):
+    """
+    Ranges cover the file exactly and never split a line.
+    """
+    monkeypatch.setattr(log_analyzer, "MIN_CHUNK_SIZE", 64)
+    bounds = chunk_boundaries(log_file, 8)
+    with open(log_file, "rb") as f:
+        data = f.read()
+
+    assert len(bounds) > 1
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(data)
+    for (_, end), (start, _) in zip(bounds, bounds[1:]):
+        assert end == start and data[end - 1:end] == b"\n"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_chunked_scan_matches_single_pass(log_file, monkeypatch, workers):
+    """
+    Sessions split across chunks merge to the same result as one pass,
+    with or without the process pool.
+    """
+    with open(log_file, "rb") as f:
+        expected = parse_chunk(f.read()).sessions()
+    monkeypatch.setattr(log_analyzer, "MIN_CHUNK_SIZE", 64)
+
+    assert analyze_logs([log_file], workers=workers) == expected
+
+
+def test_sessions_spanning_rotated_files_are_joined(tmp_path):
+    """
+    A session opened in the rotated file and closed in the live one is
+    one session with its start from the older file.
+    """
+    lines = session_lines("007", "1737914000:carol", 5, 905, usage=[(500, 7, 3)]).splitlines(True)
+    rotated, live = tmp_path / "turnserver.log.1", tmp_path / "turnserver.log"
+    rotated.write_text("".join(lines[:3]))
+    live.write_text("".join(lines[3:]))
+
+    sessions = analyze_logs([str(rotated), str(live)], workers=1)
+
+    assert sessions == {"007": ["1737914000:carol", 5, 905, 1, 10, True]}
+
+
+@pytest.fixture
+def restarted_log(tmp_path):
+    """
+    Three coturn runs (two restarts) reusing session 001, plus a run-1
+    session still open when coturn restarted.
+    """
+    path = tmp_path / "turnserver.log"
+    path.write_text(
+        session_lines("001", "1737914000:alice", 10, 70, usage=[(40, 1000, 500)])
+        + session_lines("009", "1737914000:erin", 80, None, usage=[(90, 5, 5)], closed=False)
+        + "0: Listener address to use: 0.0.0.0\n"
+        + session_lines("001", "1737999000:bob", 5, 35, usage=[(20, 10, 20)])
+        + "2: Listener address to use: 0.0.0.0\n"
+        + session_lines("001", "1738099000:carol", 3, 9)
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_session_ids_reused_after_restarts_stay_apart(restarted_log, monkeypatch, workers):
+    """
+    Timestamps going backwards mark a restart: each run's session 001 is
+    its own session, and the session open at the restart ends there.
+    """
+    monkeypatch.setattr(log_analyzer, "MIN_CHUNK_SIZE", 64)
+
+    sessions = analyze_logs([restarted_log], workers=workers)
+
+    assert sessions == {
+        "001": ["1737914000:alice", 10, 70, 1, 1500, True],
+        "009": ["1737914000:erin", 80, 90, 1, 10, False],
+        "001#2": ["1737999000:bob", 5, 35, 1, 30, True],
+        "001#3": ["1738099000:carol", 3, 9, 1, 0, True],
+    }
+    assert summarize(sessions)["sessions"] == 4
+    assert all(s[2] >= s[1] for s in sessions.values())
+
+
+def test_restart_between_rotated_files_and_new_line_for_open_id(tmp_path):
+    """
+    A restart at a file boundary is detected from the timestamps, and a
+    "new" line for an id that is still open starts a separate session.
+    """
+    first, second = tmp_path / "turnserver.log.1", tmp_path / "turnserver.log"
+    first.write_text(
+        session_lines("001", "1737914000:alice", 100, None, usage=[(150, 1, 1)], closed=False)
+        + session_lines("002", "1737914000:bob", 160, None, closed=False)
+        + session_lines("002", "1737914000:dan", 170, 200)
+    )
+    second.write_text(session_lines("001", "1737999000:carol", 5, 50))
+
+    sessions = analyze_logs([str(first), str(second)], workers=1)
+
+    assert sessions["001"] == ["1737914000:alice", 100, 150, 1, 2, False]
+    assert sessions["001#2"] == ["1737999000:carol", 5, 50, 1, 0, True]
+    assert sessions["002"][0] == "1737914000:bob"
+    assert sessions["002#2"] == ["1737914000:dan", 170, 200, 1, 0, True]
+
+
+###############################################################################
+# COMMAND LINE
+###############################################################################
+
+def test_cli_writes_reports(log_file, tmp_path, capsys):
+    """
+    -o writes users.csv, sessions.csv and summary.json.
+    """
+    output = str(tmp_path / "report")
+
+    assert main_cli([log_file, "-w", "1", "-o", output, "--format", "json"]) == 0
+
+    with open(os.path.join(output, "users.csv")) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["user"] for row in rows] == ["alice", "bob"]
+    with open(os.path.join(output, "sessions.csv")) as f:
+        assert len(list(csv.DictReader(f))) == 3
+    assert json.loads(capsys.readouterr().out)["sessions"] == 3
+
+
+def test_cli_rejects_missing_log(tmp_path):
+    """
+    A missing input file exits non-zero instead of reporting zeros.
+    """
+    assert main_cli([str(tmp_path / "absent.log")]) == 1
@@ -0,0 +1,179 @@
+"""
+Tests for the incremental coturn log tailer
+
+Covers event counting, reading only appended bytes, partial lines,
+checkpoint persistence and both logrotate styles (rename and
+copytruncate).
+"""
+
+import os
+
+import pytest
+
+from log_tailer import CoturnLogTailer, count_events, main_cli
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+ALLOCATION = "session 001: session allocated, realm=<turn.example.com>\n"
+AUTH_FAILURE = "session 002: incoming packet ALLOCATE processed, error 401: Unauthorized\n"
+ROUTINE = "session 003: refreshed, lifetime=600\n"
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """Path of a coturn log file"""
+    return str(tmp_path / "turnserver.log")
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    """Path of the tailer checkpoint"""
+    return str(tmp_path / "state" / "checkpoint.json")
+
+
+def append(path, text):
+    """Append text to a log file"""
+    with open(path, "a") as f:
+        f.write(text)
+
+
+###############################################################################
+# PARSING
+###############################################################################
+
+def test_count_events_counts_matching_lines_once():
+    """
+    Each line counts once per event type, even with several matches.
+    """
+    counts = count_events((ALLOCATION + AUTH_FAILURE + ROUTINE + "ERROR error Error\n").encode())
+
+    assert counts == {"lines": 4, "allocations": 1, "auth_failures": 1, "errors": 2}
+
+
+###############################################################################
+# INCREMENTAL READING
+###############################################################################
+
+def test_poll_reads_only_appended_bytes(log_path, checkpoint_path):
+    """
+    A second poll consumes exactly the bytes appended since the first.
+    """
+    append(log_path, ALLOCATION * 1000)
+    tailer = CoturnLogTailer(log_path, checkpoint_path)
+    tailer.poll()
+
+    append(log_path, AUTH_FAILURE)
+    assert tailer.poll() == len(AUTH_FAILURE)
+    assert tailer.poll() == 0
+    assert tailer.counters["allocations"] == 1000
+    assert tailer.counters["auth_failures"] == 1
+
+
+def test_partial_line_waits_until_complete(log_path, checkpoint_path):
+    """
+    A line still being written is not counted until its newline arrives.
+    """
+    tailer = CoturnLogTailer(log_path, checkpoint_path)
+    append(log_path, ALLOCATION + "session 004: session allo")
+    tailer.poll()
+    assert tailer.counters["allocations"] == 1
+
+    append(log_path, "cated\n")
+    tailer.poll()
+    assert tailer.counters["allocations"] == 2
+
+
+def test_checkpoint_resumes_across_runs(log_path, checkpoint_path):
+    """
+    run_once() persists offset and counters so a new process resumes.
+    """
+    append(log_path, ALLOCATION * 3)
+    CoturnLogTailer(log_path, checkpoint_path).run_once()
+
+    append(log_path, ALLOCATION)
+    tailer = CoturnLogTailer(log_path, checkpoint_path)
+    metrics = tailer.run_once()
+
+    assert tailer.bytes_read == len(ALLOCATION)
+    assert "turn_connections_total 4" in metrics
+
+
+def test_corrupt_checkpoint_starts_fresh(log_path, checkpoint_path):
+    """
+    An unreadable checkpoint is ignored rather than failing the scrape.
+    """
+    os.makedirs(os.path.dirname(checkpoint_path))
+    append(checkpoint_path, "{not json")
+    append(log_path, ALLOCATION)
+
+    assert "turn_connections_total 1" in CoturnLogTailer(log_path, checkpoint_path).run_once()
+
+
+###############################################################################
+# LOG ROTATION
+###############################################################################
+
+def test_rename_rotation_drains_old_file_first(log_path, checkpoint_path):
+    """
+    Lines written to the old file after the last poll are still counted
+    when logrotate renames it and a new file appears.
+    """
+    tailer = CoturnLogTailer(log_path, checkpoint_path)
+    append(log_path, ALLOCATION)
+    tailer.poll()
+
+    append(log_path, ALLOCATION)            # written just before rotation
+    os.rename(log_path, f"{log_path}.1")
+    append(log_path, AUTH_FAILURE)           # new file
+
+    tailer.poll()
+    assert tailer.counters["allocations"] == 2
+    assert tailer.counters["auth_failures"] == 1
+    assert tailer.counters["rotations"] == 1
+    assert tailer.offset == len(AUTH_FAILURE)
+
+
+def test_copytruncate_restarts_at_beginning(log_path, checkpoint_path):
+    """
+    A file that shrank was truncated in place; reading restarts at 0.
+    """
+    tailer = CoturnLogTailer(log_path, checkpoint_path)
+    append(log_path, ALLOCATION * 5)
+    tailer.poll()
+
+    with open(log_path, "w") as f:
+        f.write(AUTH_FAILURE)
+    tailer.poll()
+
+    assert tailer.counters["auth_failures"] == 1
+    assert tailer.counters["rotations"] == 1
+
+
+def test_missing_log_is_not_an_error(log_path, checkpoint_path):
+    """
+    Polling before coturn has created its log consumes nothing.
+    """
+    assert CoturnLogTailer(log_path, checkpoint_path).poll() == 0
+
+
+###############################################################################
+# COMMAND LINE
+###############################################################################
+
+def test_cli_writes_metrics_file(log_path, checkpoint_path, tmp_path):
+    """
+    --output writes the Prometheus exposition to a file.
+    """
+    output = str(tmp_path / "coturn.prom")
+    append(log_path, ALLOCATION + AUTH_FAILURE)
+
+    assert main_cli(["--log", log_path, "--checkpoint", checkpoint_path, "-o", output]) == 0
+
+    with open(output) as f:
+        body = f.read()
+    assert "# TYPE turn_connections_total counter" in body
+    assert "turn_auth_failures_total 1" in body
+    assert "turn_log_lines_total 2" in body
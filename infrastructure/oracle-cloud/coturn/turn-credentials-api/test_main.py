@@ -341,6 +341,1266 @@ def test_characterize_generated_uris_use_correct_server_and_port(mock_env, test_
     assert any(':5349' in uri for uri in credentials.uris)
 
 
+###############################################################################
+# CREDENTIAL MINTER
+###############################################################################
+
+@pytest.mark.parametrize("secret", ["short", "x" * 64, "long-secret-" * 10, ""])
+def test_minter_password_matches_reference_hmac(secret):
+    """
+    Precomputed key schedule produces the same password as hmac.new.
+    """
+    from main import CredentialMinter
+
+    minter = CredentialMinter(secret, "turn.example.com", 3478)
+    credential = minter.mint("alice", 600, now=1737910400)
+
+    assert credential.username == "1737911000:alice"
+    expected = base64.b64encode(hmac.new(
+        secret.encode(), credential.username.encode(), hashlib.sha1
+    ).digest()).decode()
+    assert credential.password == expected
+
+
+def test_minter_reuses_prebuilt_uri_tuple():
+    """
+    URIs are built once and shared, immutably, by every minted credential.
+    """
+    from main import CredentialMinter
+
+    minter = CredentialMinter("secret", "turn.example.com", 3478)
+    first = minter.mint("alice", 600)
+    second = minter.mint("bob", 600)
+
+    assert first.uris is second.uris is minter.uris
+    assert isinstance(minter.uris, tuple)
+    assert minter.uris == (
+        "turn:turn.example.com:3478?transport=udp",
+        "turn:turn.example.com:3478?transport=tcp",
+        "turns:turn.example.com:5349?transport=tcp",
+    )
+
+
+def test_minter_benchmark_reports_both_variants(mock_env):
+    """
+    Micro-benchmark reports per-call cost for baseline and engine.
+    """
+    from main import benchmark_credential_minting
+
+    result = benchmark_credential_minting(iterations=200)
+
+    assert result["iterations"] == 200
+    assert result["baseline_ns_per_call"] > 0
+    assert result["engine_ns_per_call"] > 0
+    assert result["speedup"] > 0
+
+
+###############################################################################
+# CREDENTIAL CACHE
+###############################################################################
+
+@pytest.fixture
+def credential_cache():
+    """Enabled, empty credential cache for the duration of a test"""
+    import main
+
+    main.credential_cache.clear()
+    with patch('main.CREDENTIAL_CACHE_ENABLED', True):
+        yield main.credential_cache
+    main.credential_cache.clear()
+
+
+def test_cache_returns_identical_credential_within_bucket():
+    """
+    Re-fetches in the same bucket get the same credential back.
+    """
+    from main import CredentialCache, CredentialMinter
+
+    minter = CredentialMinter("secret", "turn.example.com", 3478)
+    cache = CredentialCache(max_size=10, bucket_seconds=60)
+
+    first = cache.get_or_mint("alice", 600, minter, now=1200)
+    second = cache.get_or_mint("alice", 600, minter, now=1259)
+    third = cache.get_or_mint("alice", 600, minter, now=1260)
+
+    assert second is first
+    assert third.username == "1860:alice"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_keys_on_username_and_ttl():
+    """
+    Different usernames or TTLs never share an entry.
+    """
+    from main import CredentialCache, CredentialMinter
+
+    minter = CredentialMinter("secret", "turn.example.com", 3478)
+    cache = CredentialCache(max_size=10, bucket_seconds=60)
+
+    alice = cache.get_or_mint("alice", 600, minter, now=0)
+    bob = cache.get_or_mint("bob", 600, minter, now=0)
+    alice_long = cache.get_or_mint("alice", 3600, minter, now=0)
+
+    assert len({alice.username, bob.username, alice_long.username}) == 3
+    assert cache.stats()["misses"] == 3
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    Cache stays bounded and evicts the least recently used entry.
+    """
+    from main import CredentialCache, CredentialMinter
+
+    minter = CredentialMinter("secret", "turn.example.com", 3478)
+    cache = CredentialCache(max_size=2, bucket_seconds=60)
+
+    alice = cache.get_or_mint("alice", 600, minter, now=0)
+    cache.get_or_mint("bob", 600, minter, now=0)
+    cache.get_or_mint("alice", 600, minter, now=1)  # alice is now most recent
+    cache.get_or_mint("carol", 600, minter, now=2)  # evicts bob
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.get_or_mint("alice", 600, minter, now=3) is alice
+    cache.get_or_mint("bob", 600, minter, now=4)
+    assert cache.stats()["misses"] == 4
+
+
+def test_cache_serves_repeated_endpoint_requests(client, mock_env, credential_cache):
+    """
+    With the cache enabled, repeated fetches return the same credential.
+    """
+    first = client.post("/turn-credentials", json={"username": "alice", "ttl": 600}).json()
+    second = client.get("/turn-credentials?username=alice&ttl=600").json()
+
+    assert first == second
+    assert credential_cache.stats()["hits"] == 1
+
+
+def test_cache_bypassed_when_disabled(mock_env):
+    """
+    Cache is opt-in; without it every call mints.
+    """
+    import main
+
+    main.credential_cache.clear()
+    with patch('main.CREDENTIAL_CACHE_ENABLED', False):
+        generate_turn_credentials("alice", ttl=600)
+        generate_turn_credentials("alice", ttl=600)
+    assert main.credential_cache.stats()["misses"] == 0
+
+
+###############################################################################
+# FAST RESPONSE MODE
+###############################################################################
+
+@pytest.mark.parametrize("method, body", [
+    ("post", {"username": "alice.b-c_d", "ttl": 600}),
+    ("get", "username=alice.b-c_d&ttl=600"),
+    ("post", {"username": "bad name!", "ttl": 600}),
+    ("post", {"username": "", "ttl": 600}),
+    ("post", {"username": "alice", "ttl": 30}),
+    ("post", {"username": "alice", "ttl": True}),
+    ("post", {"ttl": 600}),
+    ("post", b'{"username": "alice"'),
+    ("post", b""),
+    ("post", b"[1]"),
+    ("get", "username=bad%20name!"),
+    ("get", "username=alice&ttl=30"),
+])
+def test_fast_mode_matches_response_model_wire_format(mock_env, method, body):
+    """
+    Fast mode produces byte-identical responses to the response_model
+    path, for invalid input as well as issued credentials.
+    """
+    client = TestClient(app, raise_server_exceptions=False)
+
+    def fetch():
+        with patch('main.time.time', return_value=1737910400.0):
+            if method == "get":
+                return client.get(f"/turn-credentials?{body}")
+            if isinstance(body, bytes):
+                return client.post(
+                    "/turn-credentials", content=body, headers={"Content-Type": "application/json"}
+                )
+            return client.post("/turn-credentials", json=body)
+
+    with patch('main.FAST_RESPONSE_MODE', False):
+        model_response = fetch()
+    with patch('main.FAST_RESPONSE_MODE', True):
+        fast_response = fetch()
+
+    assert fast_response.status_code == model_response.status_code
+    assert fast_response.content == model_response.content
+    assert fast_response.headers["content-type"] == model_response.headers["content-type"]
+
+
+def test_render_credentials_json_matches_model_dump_json(mock_env):
+    """
+    Hand-built JSON escapes strings exactly like pydantic does.
+    """
+    from main import MintedCredential, credential_minter, render_credentials_json
+
+    for credentials in (
+        credential_minter.mint("alice", 600),
+        credential_minter.mint("trailing-newline\n", 600),
+        MintedCredential("1:bob", "cGFzcw==", 60, ("turn:other.example.com:3478?transport=udp",)),
+    ):
+        model = TURNCredentials(
+            username=credentials.username,
+            password=credentials.password,
+            ttl=credentials.ttl,
+            uris=list(credentials.uris)
+        )
+        assert render_credentials_json(credentials) == model.model_dump_json(exclude_none=True).encode()
+
+
+def test_fast_mode_keeps_request_validation(client, mock_env, test_username):
+    """
+    Fast mode still rejects invalid POST bodies with 422.
+    """
+    with patch('main.FAST_RESPONSE_MODE', True):
+        assert client.post("/turn-credentials", json={"username": "", "ttl": 3600}).status_code == 422
+        assert client.post("/turn-credentials", json={"username": "user@#$%", "ttl": 3600}).status_code == 422
+        assert client.post("/turn-credentials", json={"username": test_username, "ttl": 30}).status_code == 422
+
+
+def test_fast_mode_post_skips_request_model_validation(client, mock_env):
+    """
+    A well-formed POST body is accepted in fast mode without running
+    CredentialsRequest validation.
+    """
+    with patch('main.FAST_RESPONSE_MODE', True), \
+         patch('main.CredentialsRequest.model_validate') as validate:
+        response = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+
+    assert response.status_code == 200
+    validate.assert_not_called()
+
+
+###############################################################################
+# HTTP CACHE HEADERS
+###############################################################################
+
+@pytest.fixture
+def http_cache():
+    """HTTP_CACHE_ENABLED with a fixed clock 40s into a 60s bucket"""
+    with patch('main.HTTP_CACHE_ENABLED', True), \
+         patch('main.time.time', return_value=1737910420.0):
+        yield
+
+
+@pytest.mark.parametrize("method", ["post", "get"])
+def test_credentials_carry_etag_and_cache_control(client, mock_env, http_cache, method):
+    """
+    Responses are minted as of the bucket start, so max-age is the TTL
+    minus the time already spent in the bucket.
+    """
+    if method == "post":
+        response = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+    else:
+        response = client.get("/turn-credentials?username=alice&ttl=600")
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "1737910980:alice"
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["cache-control"] == "private, max-age=560"
+    assert response.headers["vary"] == "X-API-Key, Accept"
+
+
+def test_credentials_are_deterministic_within_bucket(client, mock_env):
+    """
+    Any worker asked within the same bucket returns the same body and
+    ETag, without the per-process credential cache.
+    """
+    with patch('main.HTTP_CACHE_ENABLED', True), patch('main.CREDENTIAL_CACHE_ENABLED', False):
+        with patch('main.time.time', return_value=1737910381.0):
+            first = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+        with patch('main.time.time', return_value=1737910439.0):
+            second = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+        with patch('main.time.time', return_value=1737910440.0):
+            third = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert third.headers["etag"] != first.headers["etag"]
+
+
+@pytest.mark.parametrize("method", ["post", "get"])
+def test_matching_if_none_match_gets_304(client, mock_env, http_cache, method):
+    """
+    A refresh presenting the current ETag gets an empty 304 with the same
+    validators; a stale ETag gets the full credential.
+    """
+    def fetch(etag):
+        headers = {"If-None-Match": etag}
+        if method == "post":
+            return client.post("/turn-credentials", json={"username": "alice", "ttl": 600}, headers=headers)
+        return client.get("/turn-credentials?username=alice&ttl=600", headers=headers)
+
+    etag = fetch('"stale"').headers["etag"]
+    not_modified = fetch(f'W/"other", {etag}')
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.headers["cache-control"] == "private, max-age=560"
+    assert fetch('"stale"').status_code == 200
+    assert "turn_api_credentials_not_modified_total" in client.get("/metrics").text
+
+
+def test_http_cache_body_matches_response_model(client, mock_env):
+    """
+    The pre-rendered body is byte-identical to the response_model output.
+    """
+    with patch('main.time.time', return_value=1737910420.0):
+        with patch('main.HTTP_CACHE_ENABLED', True):
+            cached = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+        with patch('main.time.time', return_value=1737910380.0):
+            model = client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+
+    assert cached.content == model.content
+    assert "etag" not in model.headers
+
+
+def test_etag_matches():
+    from main import etag_matches
+
+    assert etag_matches('"a"', '"a"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches('"x", "a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"ab"', '"a"')
+
+
+###############################################################################
+# CREDENTIAL ROTATION
+###############################################################################
+
+def expected_password(turn_username):
+    import main
+
+    return base64.b64encode(
+        hmac.new(main.TURN_SECRET.encode(), turn_username.encode(), hashlib.sha1).digest()
+    ).decode()
+
+
+@pytest.mark.parametrize("mode", ["default", "fast", "http_cache"])
+def test_rotate_returns_overlapping_next_credential(client, mock_env, mode):
+    """
+    With rotate, the response also carries a successor minted as of
+    refresh_at (overlap seconds before expiry), identically in every
+    response mode.
+    """
+    with patch('main.FAST_RESPONSE_MODE', mode == "fast"), \
+         patch('main.HTTP_CACHE_ENABLED', mode == "http_cache"), \
+         patch('main.time.time', return_value=1737910380.0):
+        post = client.post("/turn-credentials", json={"username": "alice", "ttl": 600, "rotate": True})
+        get = client.get("/turn-credentials?username=alice&ttl=600&rotate=true")
+
+    assert post.status_code == 200 and get.content == post.content
+    body = post.json()
+    assert body["username"] == "1737910980:alice"
+    assert body["refresh_at"] == 1737910980 - 300
+    assert body["next"]["username"] == "1737911280:alice"
+    assert body["next"]["ttl"] == 600
+    assert body["next"]["password"] == expected_password("1737911280:alice")
+    assert body["next"]["uris"] == body["uris"]
+
+
+def test_rotation_is_opt_in(client, mock_env):
+    body = client.post("/turn-credentials", json={"username": "alice", "ttl": 600}).json()
+
+    assert set(body) == {"username", "password", "ttl", "uris"}
+
+
+def test_rotation_overlap_is_at_most_half_the_ttl(client, mock_env):
+    with patch('main.time.time', return_value=1737910380.0):
+        body = client.post("/turn-credentials", json={"username": "alice", "ttl": 60, "rotate": True}).json()
+
+    assert body["refresh_at"] == 1737910440 - 30
+    assert body["next"]["username"] == "1737910470:alice"
+
+
+def test_rotating_response_is_cacheable_until_refresh_at(client, mock_env, http_cache):
+    response = client.post("/turn-credentials", json={"username": "alice", "ttl": 600, "rotate": True})
+
+    assert response.json()["refresh_at"] == 1737910680
+    assert response.headers["cache-control"] == "private, max-age=260"
+
+
+def test_batch_items_may_rotate(client, mock_env):
+    response = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": "alice", "rotate": True}, {"username": "bob"}]}
+    )
+
+    first, second = response.json()["credentials"]
+    assert first["next"]["password"] == expected_password(first["next"]["username"])
+    assert "next" not in second and "refresh_at" not in second
+
+
+###############################################################################
+# BATCH ENDPOINT
+###############################################################################
+
+def test_batch_credentials_returns_credentials_in_request_order(client, mock_env):
+    """
+    Batch endpoint mints one credential per request, preserving order.
+    """
+    usernames = [f"participant{i}" for i in range(5)]
+    response = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": name, "ttl": 600} for name in usernames]}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    credentials = response.json()["credentials"]
+    assert [c["username"].split(':')[1] for c in credentials] == usernames
+    assert all(c["ttl"] == 600 for c in credentials)
+
+
+def test_batch_credentials_passwords_match_single_endpoint_scheme(client, mock_env):
+    """
+    Batch credentials use the same HMAC-SHA1 scheme as single issuance.
+    """
+    import main
+
+    response = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": "alice"}, {"username": "bob", "ttl": 120}]}
+    )
+
+    assert response.status_code == 200
+    for credential in response.json()["credentials"]:
+        expected = base64.b64encode(hmac.new(
+            main.TURN_SECRET.encode(),
+            credential["username"].encode(),
+            hashlib.sha1
+        ).digest()).decode()
+        assert credential["password"] == expected
+        assert credential["uris"] == generate_turn_credentials("x", ttl=60).uris
+
+
+def test_batch_credentials_streams_multiple_chunks(client, mock_env):
+    """
+    Batches larger than one stream chunk still form a single JSON document.
+    """
+    with patch('main.BATCH_STREAM_CHUNK', 4):
+        response = client.post(
+            "/turn-credentials/batch",
+            json={"requests": [{"username": f"user{i}"} for i in range(25)]}
+        )
+
+    assert response.status_code == 200
+    assert len(response.json()["credentials"]) == 25
+
+
+def test_batch_credentials_validates_every_item(client, mock_env):
+    """
+    One invalid entry rejects the whole batch before anything is minted.
+    """
+    response = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": "valid"}, {"username": "bad user!"}]}
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": "valid", "ttl": 30}]}
+    )
+    assert response.status_code == 422
+
+
+def test_null_ttl_defaults_before_streaming_starts(client, mock_env):
+    """
+    An explicit null TTL gets DEFAULT_TTL on both endpoints instead of
+    failing inside the batch stream after the 200 headers are sent.
+    """
+    import main
+
+    single = client.post("/turn-credentials", json={"username": "a", "ttl": None})
+    batch = client.post(
+        "/turn-credentials/batch",
+        json={"requests": [{"username": "a", "ttl": None}]}
+    )
+
+    assert single.status_code == 200
+    assert single.json()["ttl"] == main.DEFAULT_TTL
+    assert batch.status_code == 200
+    assert batch.json()["credentials"][0]["ttl"] == main.DEFAULT_TTL
+
+
+def test_batch_credentials_rejects_empty_and_oversized_batches(client, mock_env):
+    """
+    Batch size is bounded by MAX_BATCH_SIZE.
+    """
+    import main
+
+    response = client.post("/turn-credentials/batch", json={"requests": []})
+    assert response.status_code == 422
+
+    oversized = [{"username": f"user{i}"} for i in range(main.MAX_BATCH_SIZE + 1)]
+    response = client.post("/turn-credentials/batch", json={"requests": oversized})
+    assert response.status_code == 422
+
+
+def test_batch_credentials_checks_api_key_once(client, mock_env):
+    """
+    Batch endpoint is protected by the same API key as single issuance.
+    """
+    with patch('main.API_KEY', 'expected-key'):
+        response = client.post(
+            "/turn-credentials/batch",
+            json={"requests": [{"username": "alice"}]},
+            headers={"X-API-Key": "wrong-key"}
+        )
+        assert response.status_code == 401
+
+        response = client.post(
+            "/turn-credentials/batch",
+            json={"requests": [{"username": "alice"}]},
+            headers={"X-API-Key": "expected-key"}
+        )
+        assert response.status_code == 200
+
+
+###############################################################################
+# METRICS ENDPOINT
+###############################################################################
+
+def test_metrics_endpoint_exposes_prometheus_text(client, mock_env):
+    """
+    /metrics serves the text exposition format with per-route series.
+    """
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'turn_api_requests_total{route="/health",method="GET",status="200"}' in response.text
+    assert 'turn_api_request_duration_seconds_bucket{route="/health",le="+Inf"}' in response.text
+    assert "turn_api_credential_cache_entries" in response.text
+
+
+def test_metrics_count_credentials_by_ttl_bucket(client, mock_env):
+    """
+    Issued credentials are counted per TTL bucket, including batches.
+    """
+    import main
+
+    before_1h = main.credentials_issued_counter.value("1h")
+    before_24h = main.credentials_issued_counter.value("24h")
+
+    client.post("/turn-credentials", json={"username": "alice", "ttl": 3600})
+    client.post("/turn-credentials/batch", json={"requests": [
+        {"username": "bob", "ttl": 600}, {"username": "carol", "ttl": 86400}
+    ]})
+
+    assert main.credentials_issued_counter.value("1h") == before_1h + 2
+    assert main.credentials_issued_counter.value("24h") == before_24h + 1
+
+
+def test_metrics_count_auth_failures_and_handler_errors(client, mock_env):
+    """
+    Rejected API keys and exception handler responses are counted.
+    """
+    import main
+
+    auth_before = main.auth_failures_counter.value()
+    errors_before = main.errors_counter.value("http_exception", "401")
+
+    with patch('main.API_KEY', 'expected-key'):
+        client.get("/turn-credentials?username=alice", headers={"X-API-Key": "wrong"})
+
+    assert main.auth_failures_counter.value() == auth_before + 1
+    assert main.errors_counter.value("http_exception", "401") == errors_before + 1
+
+
+def test_metrics_label_unknown_paths_as_unmatched(client, mock_env):
+    """
+    Unrouted paths share one label so cardinality stays bounded.
+    """
+    import main
+
+    before = main.request_counter.value("unmatched", "GET", "404")
+    client.get("/no-such-path-1")
+    client.get("/no-such-path-2")
+
+    assert main.request_counter.value("unmatched", "GET", "404") == before + 2
+
+
+def test_metrics_aggregate_other_workers_when_shared(client, mock_env):
+    """
+    With shared metrics, /metrics adds the rows other workers published;
+    ?worker=true still shows this worker alone.
+    """
+    import multiprocessing
+    import main
+    from shared_metrics import SharedMetrics
+
+    shared = SharedMetrics(slots=2048, max_workers=4)
+
+    def other_worker():
+        main.rate_limited_counter.set(main.rate_limited_counter.value("user") + 1000, "user")
+        shared.publish(main.metrics_registry.metrics)
+
+    process = multiprocessing.get_context("fork").Process(target=other_worker)
+    process.start()
+    process.join()
+
+    local = main.rate_limited_counter.value("user")
+    with patch('main.shared_metrics', shared):
+        fleet = client.get("/metrics").text
+        worker = client.get("/metrics?worker=true").text
+
+    assert f'turn_api_rate_limited_total{{scope="user"}} {int(2 * local + 1000)}' in fleet
+    assert f'turn_api_rate_limited_total{{scope="user"}} {int(local)}' in worker
+    assert 'turn_api_shared_metrics_slots{state="used"}' in fleet
+
+
+###############################################################################
+# ISSUANCE EVENT LOG
+###############################################################################
+
+@pytest.fixture
+def issuance_log(tmp_path):
+    """Enabled issuance event log writing to a temporary file"""
+    from issuance_log import IssuanceEventLog
+
+    log = IssuanceEventLog(path=str(tmp_path / "issuance.ndjson"))
+    with patch('main.issuance_log', log):
+        yield log
+
+
+def test_issuance_events_replace_per_request_log_lines(client, mock_env, issuance_log, caplog):
+    """
+    With the event log enabled, issuance is queued instead of logged.
+    """
+    import json
+    import logging
+
+    with caplog.at_level(logging.INFO, logger="main"):
+        client.post("/turn-credentials", json={"username": "alice", "ttl": 600})
+        client.post("/turn-credentials/batch", json={"requests": [{"username": "bob"}]})
+
+    assert "CREDENTIALS_ISSUED:" not in caplog.text
+    assert "Generated credentials" not in caplog.text
+
+    issuance_log.flush()
+    with open(issuance_log.path) as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["user"], r["source"]) for r in records] == [("alice", "single"), ("bob", "batch")]
+    assert records[0]["turn_username"].endswith(":alice")
+
+
+def test_rejected_api_key_is_never_logged(client, mock_env, caplog):
+    """
+    Invalid API key attempts log a fingerprint, not the key itself.
+    """
+    import logging
+
+    with patch('main.API_KEY', 'expected-key'), caplog.at_level(logging.WARNING, logger="main"):
+        client.get("/turn-credentials?username=alice", headers={"X-API-Key": "leaked-secret-key"})
+
+    assert "leaked-secret-key" not in caplog.text
+    assert "key fingerprint=" in caplog.text
+
+
+def test_rejected_api_key_goes_to_event_log(client, mock_env, issuance_log):
+    """
+    With the event log enabled, auth failures are recorded as events.
+    """
+    from main import api_key_fingerprint
+
+    with patch('main.API_KEY', 'expected-key'):
+        client.get("/turn-credentials?username=alice", headers={"X-API-Key": "wrong"})
+
+    event, _, fields = issuance_log._queue[-1]
+    assert event == "auth_failure"
+    assert fields == {"key_fp": api_key_fingerprint("wrong")}
+
+
+###############################################################################
+# TURN SERVER POOL
+###############################################################################
+
+@pytest.fixture
+def turn_pool():
+    """Two-node pool where b.example.com reports the lower load"""
+    import asyncio
+    from turn_pool import NodeStatus, TurnServerPool, parse_turn_servers
+
+    loads = {"a.example.com": 40, "b.example.com": 5}
+
+    async def source(node):
+        return NodeStatus(loads[node.host], True)
+
+    pool = TurnServerPool(parse_turn_servers("a.example.com,b.example.com", 3478), source)
+    asyncio.run(pool.refresh())
+    with patch('main.turn_pool', pool):
+        yield pool
+
+
+@pytest.mark.parametrize("fast_mode", [False, True])
+def test_pool_orders_response_uris_by_load(client, mock_env, turn_pool, fast_mode):
+    """
+    With a pool configured, both response modes list the least-loaded
+    node first and the metrics expose each node's load.
+    """
+    with patch('main.FAST_RESPONSE_MODE', fast_mode):
+        response = client.post("/turn-credentials", json={"username": "alice"})
+
+    assert response.json()["uris"] == [
+        "turn:b.example.com:3478?transport=udp",
+        "turn:b.example.com:3478?transport=tcp",
+        "turns:b.example.com:5349?transport=tcp",
+        "turn:a.example.com:3478?transport=udp",
+        "turn:a.example.com:3478?transport=tcp",
+        "turns:a.example.com:5349?transport=tcp",
+    ]
+
+    metrics = client.get("/metrics").text
+    assert 'turn_api_turn_node_load{node="b.example.com:3478"} 5' in metrics
+    assert 'turn_api_turn_node_healthy{node="a.example.com:3478"} 1' in metrics
+
+
+def test_cached_credentials_follow_pool_health(client, mock_env, turn_pool):
+    """
+    With the cache and the pool both enabled, a cache hit does not count
+    an assignment, and a cached credential whose node went unhealthy is
+    re-minted for a healthy node.
+    """
+    import asyncio
+    from turn_pool import NodeStatus
+
+    import main
+
+    main.credential_cache.clear()
+    with patch('main.CREDENTIAL_CACHE_ENABLED', True):
+        first = client.post("/turn-credentials", json={"username": "alice"}).json()
+        assigned = {node["node"]: node["assigned"] for node in turn_pool.snapshot()}
+        again = client.post("/turn-credentials", json={"username": "alice"}).json()
+
+        assert again == first
+        assert {node["node"]: node["assigned"] for node in turn_pool.snapshot()} == assigned
+
+        async def b_down(node):
+            return NodeStatus(5, node.host != "b.example.com")
+
+        turn_pool.load_source = b_down
+        asyncio.run(turn_pool.refresh())
+        moved = client.post("/turn-credentials", json={"username": "alice"}).json()
+
+    assert first["uris"][0].startswith("turn:b.example.com")
+    assert moved["uris"][0].startswith("turn:a.example.com")
+    assert main.credential_cache.stats()["hits"] == 1
+    main.credential_cache.clear()
+
+
+###############################################################################
+# RATE LIMITING
+###############################################################################
+
+@pytest.fixture
+def rate_limits():
+    """Enable rate limiting with fresh buckets: 2 per user, 3 per key"""
+    from rate_limit import TokenBucketLimiter
+
+    user_limiter = TokenBucketLimiter(rate=0.01, burst=2)
+    key_limiter = TokenBucketLimiter(rate=0.01, burst=3)
+    with patch('main.RATE_LIMIT_ENABLED', True), \
+         patch('main.user_rate_limiter', user_limiter), \
+         patch('main.key_rate_limiter', key_limiter):
+        yield user_limiter, key_limiter
+
+
+def test_user_over_limit_gets_429_with_retry_after(client, mock_env, rate_limits):
+    """
+    A username past its burst gets 429 and Retry-After while other users
+    are still served.
+    """
+    for _ in range(2):
+        assert client.post("/turn-credentials", json={"username": "looper"}).status_code == 200
+
+    response = client.get("/turn-credentials?username=looper")
+    assert response.status_code == 429
+    assert response.json() == {"error": "Rate limit exceeded", "status_code": 429}
+    assert int(response.headers["Retry-After"]) >= 1
+
+    assert client.post("/turn-credentials", json={"username": "alice"}).status_code == 200
+    assert 'turn_api_rate_limited_total{scope="user"} 1' in client.get("/metrics").text
+
+
+def test_api_key_limit_charges_one_token_per_credential(client, mock_env, rate_limits):
+    """
+    A batch costs the API key one token per requested credential.
+    """
+    headers = {"X-API-Key": "backend-key"}
+    batch = {"requests": [{"username": "u1"}, {"username": "u2"}]}
+
+    assert client.post("/turn-credentials/batch", json=batch, headers=headers).status_code == 200
+    assert client.post("/turn-credentials/batch", json=batch, headers=headers).status_code == 429
+    assert client.post("/turn-credentials", json={"username": "u3"}, headers=headers).status_code == 200
+
+
+def test_rejected_batch_charges_no_bucket(client, mock_env, rate_limits):
+    """
+    A batch whose last username is throttled is rejected as a whole:
+    neither the key nor the earlier users lose tokens, and it counts as
+    one rejection.
+    """
+    user_limiter, key_limiter = rate_limits
+    headers = {"X-API-Key": "backend-key"}
+    for _ in range(2):
+        assert client.post("/turn-credentials", json={"username": "looper"}).status_code == 200
+
+    batch = {"requests": [{"username": "u1"}, {"username": "u2"}, {"username": "looper"}]}
+    assert client.post("/turn-credentials/batch", json=batch, headers=headers).status_code == 429
+
+    # Full bursts left: the key still has 3 tokens, each earlier user 2
+    assert key_limiter.peek("backend-key", 3) == 0.0
+    assert user_limiter.peek("u1", 2) == 0.0
+    assert user_limiter.peek("u2", 2) == 0.0
+    assert user_limiter.stats()["rejected"] == 1 and key_limiter.stats()["rejected"] == 0
+    assert client.post("/turn-credentials/batch", json={"requests": batch["requests"][:2]},
+                       headers=headers).status_code == 200
+
+
+def test_rate_limiting_is_off_by_default(client, mock_env):
+    """
+    Without RATE_LIMIT_ENABLED no request is throttled.
+    """
+    for _ in range(20):
+        assert client.post("/turn-credentials", json={"username": "looper"}).status_code == 200
+
+
+###############################################################################
+# ADMISSION CONTROL
+###############################################################################
+
+@pytest.fixture
+def admission():
+    """Enable admission control with one slot, no queue, already taken"""
+    from admission import AdmissionController
+
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    controller.in_flight = 1
+    with patch('main.ADMISSION_ENABLED', True), patch('main.admission_controller', controller):
+        yield controller
+
+
+def test_overloaded_credential_routes_shed_with_503(client, mock_env, admission):
+    """
+    With no slot free, every credential route fails fast with 503 and
+    Retry-After, while /health still answers; sheds show in /metrics.
+    """
+    for method, path, body in (
+        ("post", "/turn-credentials", {"username": "alice"}),
+        ("get", "/turn-credentials?username=alice", None),
+        ("post", "/turn-credentials/batch", {"requests": [{"username": "alice"}]}),
+    ):
+        response = client.request(method, path, json=body)
+        assert response.status_code == 503
+        assert response.json() == {"error": "Service overloaded", "status_code": 503}
+        assert int(response.headers["Retry-After"]) >= 1
+
+    assert client.get("/health").status_code == 200
+    metrics = client.get("/metrics").text
+    assert 'turn_api_admission_shed_total{reason="queue_full"} 3' in metrics
+    assert "turn_api_admission_in_flight 1" in metrics
+
+
+def test_admitted_requests_release_their_slot(client, mock_env, admission):
+    admission.in_flight = 0
+
+    for _ in range(3):
+        assert client.post("/turn-credentials", json={"username": "alice"}).status_code == 200
+
+    assert admission.in_flight == 0 and admission.admitted == 3
+
+
+###############################################################################
+# READINESS
+###############################################################################
+
+def test_ready_without_prober_is_always_ready(client, mock_env):
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "checked_at": None, "listeners": []}
+
+
+def test_ready_serves_cached_probe_result(client, mock_env):
+    """
+    /ready answers 503 from the last round without probing again, and
+    the failure shows in /metrics.
+    """
+    import asyncio
+    import socket
+    from stun_probe import ProbeTarget, StunProber
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    prober = StunProber([ProbeTarget("udp", "127.0.0.1", port)], timeout=0.05, failure_threshold=1)
+    asyncio.run(prober.probe_once())
+
+    with patch('main.stun_prober', prober):
+        first = client.get("/ready")
+        second = client.get("/ready")
+        metrics = client.get("/metrics").text
+
+    assert first.status_code == second.status_code == 503
+    assert first.json()["listeners"][0]["status"] == "down"
+    assert prober.rounds == 1
+    assert "turn_api_ready 0" in metrics
+    assert f'turn_api_stun_probe_failures_total{{listener="udp/{port}",reason=' in metrics
+
+
+###############################################################################
+# ICE CONFIG
+###############################################################################
+
+def test_ice_config_returns_static_part_with_credential(client, mock_env, test_secret):
+    """
+    One call returns the shipped configuration with a valid credential
+    in turn_servers; a client holding the version gets the credential only.
+    """
+    import json
+    from main import ice_config
+
+    response = client.post("/ice-config", json={"username": "alice", "ttl": 3600})
+
+    assert response.status_code == 200
+    config = response.json()
+    static = json.loads(ice_config.snapshot.static_json)
+    assert {key: value for key, value in config.items() if key != "turn_servers"} == static
+    server = config["turn_servers"][0]
+    assert server["username"].endswith(":alice") and server["ttl"] == 3600
+    expected = base64.b64encode(
+        hmac.new(test_secret.encode(), server["username"].encode(), hashlib.sha1).digest()
+    ).decode()
+    assert server["credential"] == expected
+    assert server["urls"] == client.post("/turn-credentials", json={"username": "alice"}).json()["uris"]
+
+    slim = client.post(f"/ice-config?known_version={config['config_version']}", json={"username": "alice"})
+    assert set(slim.json()) == {"config_version", "turn_servers"}
+
+
+def test_ice_config_rejects_invalid_request(client, mock_env):
+    assert client.post("/ice-config", json={"username": "bad user!"}).status_code == 422
+
+
+def test_ice_config_static_revalidates_with_etag(client, mock_env):
+    response = client.get("/ice-config/static")
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+    assert etag == f'"{response.json()["config_version"]}"'
+    assert client.get("/ice-config/static", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_ice_config_unavailable_without_file(client, mock_env, tmp_path):
+    from ice_config import IceConfig
+
+    with patch('main.ice_config', IceConfig(str(tmp_path / "missing.json"))):
+        assert client.post("/ice-config", json={"username": "alice"}).status_code == 503
+        assert client.get("/ice-config/static").status_code == 503
+
+
+###############################################################################
+# BINARY ENCODINGS
+###############################################################################
+
+@pytest.mark.parametrize("codec", ["msgpack", "cbor"])
+@pytest.mark.parametrize("mode", ["default", "fast", "http_cache"])
+@pytest.mark.parametrize("method", ["post", "get"])
+def test_credentials_in_binary_encoding_match_json(client, mock_env, codec, mode, method):
+    """
+    In every response mode a binary body decodes to the JSON document,
+    rotating pairs included.
+    """
+    from binary_codec import CBOR, MSGPACK
+
+    codec = {"msgpack": MSGPACK, "cbor": CBOR}[codec]
+
+    def fetch(accept):
+        headers = {"Accept": accept}
+        if method == "post":
+            return client.post(
+                "/turn-credentials", json={"username": "alice", "ttl": 600, "rotate": True}, headers=headers
+            )
+        return client.get("/turn-credentials?username=alice&ttl=600&rotate=true", headers=headers)
+
+    with patch('main.time.time', return_value=1737910420.0), \
+         patch('main.FAST_RESPONSE_MODE', mode == "fast"), \
+         patch('main.HTTP_CACHE_ENABLED', mode == "http_cache"):
+        binary = fetch(codec.media_type)
+        json_response = fetch("application/json")
+
+    assert binary.status_code == 200
+    assert binary.headers["content-type"] == codec.media_type
+    assert "Accept" in binary.headers["vary"]
+    decoded = codec.decode(binary.content)
+    assert decoded == json_response.json()
+    assert list(decoded) == list(json_response.json())
+    assert len(binary.content) < len(json_response.content)
+
+
+def test_binary_encodings_get_their_own_etag(client, mock_env, http_cache):
+    """
+    Each encoding has its own ETag, and only its own ETag revalidates it.
+    """
+    def fetch(accept, etag='"stale"'):
+        return client.post(
+            "/turn-credentials",
+            json={"username": "alice", "ttl": 600},
+            headers={"Accept": accept, "If-None-Match": etag}
+        )
+
+    json_etag = fetch("application/json").headers["etag"]
+    msgpack_etag = fetch("application/msgpack").headers["etag"]
+
+    assert msgpack_etag != json_etag
+    assert fetch("application/msgpack", msgpack_etag).status_code == 304
+    assert fetch("application/msgpack", json_etag).status_code == 200
+
+
+def test_unsupported_accept_falls_back_to_json(client, mock_env):
+    from main import response_encoding_counter
+
+    before = response_encoding_counter.value("json")
+    for accept in ("*/*", "text/html", "application/msgpack;q=0.1, application/json"):
+        response = client.post("/turn-credentials", json={"username": "alice"}, headers={"Accept": accept})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+
+    assert response_encoding_counter.value("json") == before + 3
+    assert "turn_api_response_encoding_total" in client.get("/metrics").text
+
+
+@pytest.mark.parametrize("media_type", ["application/msgpack", "application/cbor"])
+def test_batch_credentials_stream_in_binary_encoding(client, mock_env, media_type):
+    """
+    A binary batch streams over several chunks and still decodes to the
+    JSON document.
+    """
+    from binary_codec import negotiate
+
+    body = {"requests": [{"username": f"user{i}", "rotate": i % 2 == 0} for i in range(25)]}
+    with patch('main.time.time', return_value=1737910420.0), patch('main.BATCH_STREAM_CHUNK', 4):
+        binary = client.post("/turn-credentials/batch", json=body, headers={"Accept": media_type})
+        json_response = client.post("/turn-credentials/batch", json=body)
+
+    assert binary.status_code == 200
+    assert binary.headers["content-type"] == media_type
+    assert negotiate(media_type).decode(binary.content) == json_response.json()
+
+
+@pytest.mark.parametrize("media_type", ["application/msgpack", "application/cbor"])
+def test_ice_config_in_binary_encoding(client, mock_env, media_type):
+    from binary_codec import negotiate
+
+    codec = negotiate(media_type)
+    headers = {"Accept": media_type}
+    with patch('main.time.time', return_value=1737910420.0):
+        binary = client.post("/ice-config", json={"username": "alice"}, headers=headers)
+        json_response = client.post("/ice-config", json={"username": "alice"})
+    version = json_response.json()["config_version"]
+    slim = client.post(f"/ice-config?known_version={version}", json={"username": "alice"}, headers=headers)
+    static = client.get("/ice-config/static", headers=headers)
+
+    assert binary.headers["content-type"] == media_type
+    assert codec.decode(binary.content) == json_response.json()
+    assert set(codec.decode(slim.content)) == {"config_version", "turn_servers"}
+    assert codec.decode(static.content) == client.get("/ice-config/static").json()
+    assert static.headers["etag"] == f'"{version}.{codec.name}"'
+    assert client.get(
+        "/ice-config/static", headers={**headers, "If-None-Match": static.headers["etag"]}
+    ).status_code == 304
+
+
+@pytest.mark.parametrize("rotate", [False, True])
+def test_encoding_benchmark_compares_size_and_encode_time(mock_env, rotate):
+    """
+    Both binary encodings are smaller than JSON; encode cost is reported
+    per encoding and stays in the microsecond range.
+    """
+    from main import benchmark_response_encodings
+
+    result = benchmark_response_encodings(iterations=200, rotate=rotate)
+
+    assert set(result) == {"json", "msgpack", "cbor"}
+    assert result["msgpack"]["bytes"] < result["json"]["bytes"]
+    assert result["cbor"]["bytes"] < result["json"]["bytes"]
+    # JSON saves the quotes, colons and commas around every field
+    assert result["json"]["bytes"] - result["msgpack"]["bytes"] >= (30 if rotate else 15)
+    for encoding in result.values():
+        assert 0 < encoding["ns_per_call"] < 1_000_000
+
+
+###############################################################################
+# QUALITY STATS INGESTION
+###############################################################################
+
+@pytest.fixture
+def quality_stats():
+    """Empty quality stats store"""
+    from quality_stats import QualityStatsStore
+
+    store = QualityStatsStore(window=60)
+    with patch('main.quality_stats', store):
+        yield store
+
+
+def test_stats_endpoint_stores_compact_samples(client, mock_env, quality_stats):
+    """
+    POST /stats appends positional samples to the session's ring buffer.
+    """
+    samples = [[1737910400000 + i * 1000, 45.5, 0.2, 1.2e6, 1280, 720, i * 100, i * 90, i * 30, i * 30]
+               for i in range(5)]
+    response = client.post("/stats", json={
+        "session_id": "call-42", "platform": "android",
+        "turn_node": "turn1.example.com:3478", "samples": samples,
+    })
+
+    assert response.status_code == 202
+    assert response.json()["accepted"] == 5
+    series = quality_stats.get("call-42")
+    assert (series.platform, series.turn_node, series.count) == ("android", "turn1.example.com:3478", 5)
+    assert 'turn_api_quality_stats_samples_total 5' in client.get("/metrics").text
+
+
+def test_session_stats_endpoint_reads_ring_buffer(client, mock_env, quality_stats):
+    """
+    GET /stats/sessions/{id} returns the session's retained samples.
+    """
+    samples = [[1737910400000 + i * 1000, 45.5, 0.25, 1.2e6, 1280, 720, i, i, i, i] for i in range(3)]
+    client.post("/stats", json={"session_id": "call-7", "platform": "ios", "samples": samples})
+
+    response = client.get("/stats/sessions/call-7?last=2")
+    missing = client.get("/stats/sessions/call-unknown")
+
+    assert response.status_code == 200
+    assert response.json()["platform"] == "ios"
+    assert response.json()["samples"] == samples[1:]
+    assert missing.status_code == 404
+
+
+@pytest.mark.parametrize("payload", [
+    {"session_id": "call-1", "samples": [[1, 2, 3]]},
+    {"session_id": "call 1", "samples": [[0] * 10]},
+    {"session_id": "call-1", "platform": "Android OS", "samples": [[0] * 10]},
+    {"session_id": "call-1", "samples": []},
+])
+def test_stats_endpoint_rejects_malformed_reports(client, mock_env, quality_stats, payload):
+    """
+    Wrong sample width, unsafe ids and empty batches are rejected.
+    """
+    response = client.post("/stats", json=payload)
+
+    assert response.status_code in (400, 422)
+    assert len(quality_stats) == 0
+
+
+def test_ingested_stats_feed_rollups_and_summary(client, mock_env, quality_stats):
+    """
+    Samples posted to /stats are queryable as rollups and percentiles
+    grouped by platform.
+    """
+    import time
+    from quality_rollups import QualityRollups
+
+    now_ms = int(time.time()) * 1000
+    with patch('main.quality_rollups', QualityRollups()):
+        client.post("/stats", json={
+            "session_id": "call-1", "platform": "ios",
+            "samples": [[now_ms - 1000, 40, 0.1, 2e6, 1280, 720, 0, 0, 0, 0],
+                        [now_ms, 240, 6.0, 1e5, 640, 360, 0, 0, 0, 0]],
+        })
+        rollups = client.get("/stats/rollups?resolution=1m&group_by=platform").json()
+        summary = client.get("/stats/summary?group_by=platform&window=300").json()
+        invalid = client.get("/stats/rollups?resolution=5m")
+
+    assert sum(b["count"] for b in rollups["groups"]["ios"]) == 2
+    ios = summary["groups"]["ios"]
+    assert ios["count"] == 2
+    assert ios["states"] == {"excellent": 1, "good": 0, "fair": 0, "poor": 1}
+    assert ios["score_avg"] == 50.0
+    assert invalid.status_code == 400
+
+
+###############################################################################
+# SIGNALING HUB
+###############################################################################
+
+@pytest.fixture
+def signaling_hub():
+    """Enable signaling with an empty hub"""
+    from signaling_hub import SignalingHub
+
+    hub = SignalingHub()
+    with patch('main.SIGNALING_ENABLED', True), patch('main.signaling_hub', hub):
+        yield hub
+
+
+def test_signaling_socket_relays_offer_and_answer(mock_env, signaling_hub):
+    """
+    Two WebSockets on the same session exchange offer, answer and ICE
+    candidates through the hub.
+    """
+    # Entering the client runs both sockets on one event loop, as uvicorn
+    # does; a bare TestClient gives each socket its own loop and wakeups
+    # between peers are lost
+    with TestClient(app) as client, \
+         client.websocket_connect("/signaling/call-1") as caller, \
+         client.websocket_connect("/signaling/call-1") as callee:
+        caller.send_json({"type": "join", "userId": "alice", "callerId": "alice", "calleeId": "bob"})
+        assert caller.receive_json()["role"] == "caller"
+        callee.send_json({"type": "join", "userId": "bob"})
+        assert callee.receive_json()["session"]["status"] == "pending"
+
+        caller.send_json({"type": "offer", "sdp": "v=0"})
+        assert callee.receive_json()["type"] == "offer"
+        callee.send_json({"type": "answer", "sdp": "v=0"})
+        assert caller.receive_json()["calleeId"] == "bob"
+        callee.send_json({"type": "ice-candidate", "sdpMid": "0", "sdpMLineIndex": 0, "sdpCandidate": "candidate:1"})
+        assert caller.receive_json()["candidates"][0]["sdpCandidate"] == "candidate:1"
+        caller.send_json({"type": "answer", "sdp": "v=0"})
+        assert caller.receive_json()["code"] == "E304"
+
+        assert signaling_hub.get("call-1").status == "answered"
+        metrics = client.get("/metrics").text
+    assert 'turn_api_signaling_messages_total{type="offer"} 1' in metrics
+    assert 'turn_api_signaling_errors_total{code="E304"} 1' in metrics
+
+
+def test_signaling_socket_requires_flag_and_api_key(client, mock_env, signaling_hub):
+    """
+    The socket is refused when signaling is disabled or the API key is wrong.
+    """
+    from starlette.websockets import WebSocketDisconnect
+
+    with patch('main.API_KEY', 'secret-key'):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect("/signaling/call-1", headers={"X-API-Key": "wrong"}):
+                pass
+        assert refused.value.code == 1008
+        with client.websocket_connect("/signaling/call-1?api_key=secret-key") as socket:
+            socket.send_json({"type": "join", "userId": "alice", "callerId": "alice", "calleeId": "bob"})
+            assert socket.receive_json()["type"] == "joined"
+
+    with patch('main.SIGNALING_ENABLED', False):
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/signaling/call-1"):
+                pass
+
+
 ###############################################################################
 # BEHAVIOR SNAPSHOT: Complete Credential Response
 ###############################################################################
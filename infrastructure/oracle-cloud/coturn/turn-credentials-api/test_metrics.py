@@ -0,0 +1,150 @@
+"""
+Tests for the Prometheus metrics primitives
+
+Covers the text exposition format, histogram bucketing and the ASGI
+middleware's route labelling.
+"""
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, MetricsRegistry
+
+
+###############################################################################
+# METRIC TYPES
+###############################################################################
+
+def test_counter_renders_labelled_series():
+    """
+    Counters render HELP, TYPE and one line per label combination.
+    """
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests", ("route", "status")))
+    counter.inc("/health", "200")
+    counter.inc("/health", "200")
+    counter.inc("/turn-credentials", "401", amount=3)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/health",status="200"} 2\n'
+        'requests_total{route="/turn-credentials",status="401"} 3\n'
+    )
+    assert counter.total() == 5
+
+
+def test_unlabelled_gauge_renders_bare_sample():
+    """
+    Metrics without labels render without braces.
+    """
+    registry = MetricsRegistry()
+    gauge = registry.register(Gauge("cache_entries", "Entries"))
+    gauge.set(42)
+
+    assert registry.render().splitlines()[-1] == "cache_entries 42"
+    assert "# TYPE cache_entries gauge" in registry.render()
+
+
+def test_label_values_are_escaped():
+    """
+    Backslashes, quotes and newlines in label values are escaped.
+    """
+    counter = Counter("c", "c", ("value",))
+    counter.inc('a\\b"c\nd')
+
+    assert counter.samples()[0][1] == '{value="a\\\\b\\"c\\nd"}'
+
+
+def test_histogram_buckets_are_cumulative():
+    """
+    Histogram buckets are cumulative with +Inf, _sum and _count.
+    """
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "/")
+
+    samples = {(name, labels): value for name, labels, value in histogram.samples()}
+    assert samples[("latency_seconds_bucket", '{route="/",le="0.1"}')] == 2
+    assert samples[("latency_seconds_bucket", '{route="/",le="1"}')] == 3
+    assert samples[("latency_seconds_bucket", '{route="/",le="+Inf"}')] == 4
+    assert samples[("latency_seconds_count", '{route="/"}')] == 4
+    assert samples[("latency_seconds_sum", '{route="/"}')] == pytest.approx(2.65)
+    assert histogram.count("/") == 4
+
+
+def test_series_round_trip_and_gauge_aggregate():
+    """
+    series()/set_series() copy values in and out; gauges only accept a
+    known cross-worker aggregate.
+    """
+    histogram = Histogram("h", "h", ("route",), buckets=(1.0,))
+    histogram.observe(0.5, "/")
+    copy = Histogram("h", "h", ("route",), buckets=(1.0,))
+    copy.set_series(histogram.series())
+
+    assert copy.samples() == histogram.samples()
+    assert Gauge("g", "g", aggregate="max").aggregate == "max"
+    with pytest.raises(ValueError):
+        Gauge("g", "g", aggregate="avg")
+
+
+def test_registry_runs_collectors_before_render():
+    """
+    Collectors refresh mirrored values on every scrape.
+    """
+    registry = MetricsRegistry()
+    gauge = registry.register(Gauge("external", "Mirrored value"))
+    source = {"value": 1}
+    registry.add_collector(lambda: gauge.set(source["value"]))
+
+    assert "external 1" in registry.render()
+    source["value"] = 7
+    assert "external 7" in registry.render()
+
+
+###############################################################################
+# ASGI MIDDLEWARE
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_middleware_records_route_status_and_latency():
+    """
+    Middleware labels requests by route template and response status.
+    """
+    requests = Counter("requests_total", "", ("route", "method", "status"))
+    latency = Histogram("latency_seconds", "", ("route",))
+
+    async def app(scope, receive, send):
+        scope["endpoint"] = "handler"
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(
+        app, requests, latency,
+        route_label=lambda scope: {"handler": "/things/{id}"}.get(scope.get("endpoint"))
+    )
+    await middleware({"type": "http", "method": "DELETE"}, None, send)
+
+    assert requests.value("/things/{id}", "DELETE", "204") == 1
+    assert latency.count("/things/{id}") == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_counts_exceptions_as_500_unmatched():
+    """
+    Requests that raise before routing are recorded as unmatched 500s.
+    """
+    requests = Counter("requests_total", "", ("route", "method", "status"))
+    latency = Histogram("latency_seconds", "", ("route",))
+
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = MetricsMiddleware(app, requests, latency, route_label=lambda scope: None)
+    with pytest.raises(RuntimeError):
+        await middleware({"type": "http", "method": "GET"}, None, None)
+
+    assert requests.value("unmatched", "GET", "500") == 1
@@ -0,0 +1,211 @@
+"""
+Tests for the fleet quality rollups
+
+Covers parity of the vectorized score with the SDKs'
+calculateQualityScore/getQualityState, incremental bucketing at several
+resolutions, grouping by platform and TURN node, percentiles from the
+bucket histograms and the bounds on stale or future samples.
+"""
+
+import numpy as np
+import pytest
+
+from quality_rollups import (
+    OVERFLOW_GROUP,
+    QUALITY_STATES,
+    QualityRollups,
+    quality_scores,
+    quality_state_indices,
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+NOW = 1_737_910_800.0  # aligned to an hour boundary
+
+
+def sdk_quality_score(rtt, packet_loss, bitrate):
+    """Line-by-line port of RTCStatsReport.calculateQualityScore() (Android)"""
+    score = 100
+    if rtt < 50:
+        score -= 0
+    elif rtt < 100:
+        score -= 10
+    elif rtt < 200:
+        score -= 30
+    else:
+        score -= 50
+    if packet_loss < 1.0:
+        score -= 0
+    elif packet_loss < 3.0:
+        score -= 10
+    elif packet_loss < 5.0:
+        score -= 20
+    else:
+        score -= 40
+    if bitrate > 1_000_000:
+        score -= 0
+    elif bitrate > 500_000:
+        score -= 5
+    elif bitrate > 250_000:
+        score -= 15
+    else:
+        score -= 25
+    return max(score, 0)
+
+
+def sdk_quality_state(score):
+    """Port of RTCStatsReport.getQualityState()"""
+    if score >= 85:
+        return "excellent"
+    if score >= 70:
+        return "good"
+    if score >= 50:
+        return "fair"
+    return "poor"
+
+
+def add_samples(rollups, seconds, rtt, loss=0.0, bitrate=2e6, **kwargs):
+    """Add one sample per entry of seconds (offsets from NOW)"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    n = len(seconds)
+    return rollups.add(
+        (NOW + seconds) * 1000,
+        np.broadcast_to(rtt, n),
+        np.broadcast_to(loss, n),
+        np.broadcast_to(bitrate, n),
+        now=NOW + max(seconds.max(), 0),
+        **kwargs
+    )
+
+
+###############################################################################
+# SCORING PARITY
+###############################################################################
+
+def test_vectorized_score_matches_sdk_at_every_threshold():
+    """
+    Scores and states match the SDK implementation on a grid covering
+    each threshold and both sides of it.
+    """
+    rtts = [0, 49.9, 50, 99.9, 100, 199.9, 200, 1000]
+    losses = [0, 0.99, 1.0, 2.99, 3.0, 4.99, 5.0, 50]
+    bitrates = [0, 250_000, 250_001, 500_000, 500_001, 1_000_000, 1_000_001, 5e6]
+    grid = np.array(np.meshgrid(rtts, losses, bitrates)).reshape(3, -1)
+
+    scores = quality_scores(*grid)
+    states = quality_state_indices(scores)
+
+    expected = [sdk_quality_score(*sample) for sample in grid.T]
+    assert scores.tolist() == expected
+    assert [QUALITY_STATES[i] for i in states] == [sdk_quality_state(s) for s in expected]
+
+
+###############################################################################
+# ROLLUPS
+###############################################################################
+
+def test_rollups_bucket_samples_at_each_resolution():
+    """
+    Samples land in 1s buckets individually and in one 1m bucket.
+    """
+    rollups = QualityRollups()
+    add_samples(rollups, [0, 0, 1, 2], rtt=[40, 60, 40, 250])
+
+    per_second = rollups.rollup("1s", now=NOW + 2)["all"]
+    assert [(b["start"] - int(NOW), b["count"]) for b in per_second] == [(0, 2), (1, 1), (2, 1)]
+    assert per_second[0]["rtt_avg"] == 50.0
+
+    per_minute = rollups.rollup("1m", now=NOW + 2)["all"]
+    assert len(per_minute) == 1 and per_minute[0]["count"] == 4
+    assert per_minute[0]["states"] == {"excellent": 3, "good": 0, "fair": 1, "poor": 0}
+
+
+def test_rollups_group_by_platform_and_turn_node():
+    """
+    Each batch is counted for the fleet, its platform and its TURN node.
+    """
+    rollups = QualityRollups()
+    add_samples(rollups, [0, 1], rtt=30, platform="android", turn_node="turn1:3478")
+    add_samples(rollups, [0], rtt=300, platform="ios")
+
+    by_platform = rollups.summary("platform", window=60, now=NOW + 1)
+    assert {k: v["count"] for k, v in by_platform.items()} == {"android": 2, "ios": 1}
+    assert by_platform["ios"]["score_avg"] == 50.0
+
+    assert list(rollups.summary("turn_node", window=60, now=NOW + 1)) == ["turn1:3478"]
+    assert rollups.summary("all", window=60, now=NOW + 1)["all"]["count"] == 3
+
+
+def test_summary_percentiles_are_within_one_bin():
+    """
+    p50/p95/p99 from the merged histograms approximate exact percentiles
+    to within one log-scale bin.
+    """
+    rng = np.random.default_rng(7)
+    rtt = rng.lognormal(mean=4.0, sigma=0.6, size=5000)
+    rollups = QualityRollups()
+    add_samples(rollups, rng.integers(0, 600, size=5000), rtt=rtt)
+
+    summary = rollups.summary(window=3600, now=NOW + 600)["all"]
+
+    assert summary["resolution"] == "1m"
+    for pct in (50, 95, 99):
+        exact = np.percentile(rtt, pct, method="inverted_cdf")
+        assert summary[f"rtt_p{pct}"] == pytest.approx(exact, rel=0.12)
+
+
+def test_old_buckets_are_reused_and_stale_samples_dropped():
+    """
+    A ring slot is reset when a newer bucket claims it; samples older
+    than the retention or too far in the future are rejected.
+    """
+    rollups = QualityRollups(resolutions=(("1s", 1, 10),))
+    add_samples(rollups, [0], rtt=40)
+    add_samples(rollups, [10], rtt=80)   # same slot as second 0
+
+    buckets = rollups.rollup("1s", now=NOW + 10)["all"]
+    assert [(b["start"] - int(NOW), b["rtt_avg"]) for b in buckets] == [(10, 80.0)]
+
+    assert rollups.add(np.array([(NOW - 3600) * 1000]), [40], [0], [2e6], now=NOW + 10) == 0
+    assert rollups.add(np.array([(NOW + 3600) * 1000]), [40], [0], [2e6], now=NOW + 10) == 0
+    assert rollups.stats()["samples_rejected"] == 2
+
+
+def test_group_count_is_bounded():
+    """
+    Distinct values beyond max_groups share the overflow group.
+    """
+    rollups = QualityRollups(max_groups=2)
+    for platform in ("android", "ios", "web", "tv"):
+        add_samples(rollups, [0], rtt=40, platform=platform)
+
+    assert sorted(rollups.summary("platform", window=60, now=NOW)) == ["android", "ios", OVERFLOW_GROUP]
+
+
+def test_buffer_memory_stays_within_documented_bound():
+    """
+    Filling every group allowed by the default cap preallocates no more
+    than max_buffer_bytes, about 9.3 MiB.
+    """
+    rollups = QualityRollups()
+    for i in range(20):
+        add_samples(rollups, [0], rtt=40, platform=f"p{i}", turn_node=f"node{i}")
+    stats = rollups.stats()
+
+    assert stats["groups"] == 1 + 2 * (rollups.max_groups + 1)
+    assert stats["buffer_bytes"] == stats["max_buffer_bytes"]
+    assert stats["max_buffer_bytes"] < 10 * 1024 * 1024
+
+
+def test_unknown_dimension_or_resolution_is_rejected():
+    """
+    Invalid query parameters raise ValueError.
+    """
+    rollups = QualityRollups()
+    with pytest.raises(ValueError):
+        rollups.rollup("5m")
+    with pytest.raises(ValueError):
+        rollups.summary("country")
@@ -0,0 +1,152 @@
+"""
+Tests for the client quality stats store
+
+Covers columnar ring buffer writes and wrap-around, sample validation,
+and the window, session-count and idle bounds on memory.
+"""
+
+import pytest
+
+from quality_stats import BYTES_PER_SAMPLE, FIELD_NAMES, QualityStatsStore, SessionSeries
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+def sample(ts, rtt=40.0, loss=0.5, bitrate=1_500_000.0):
+    """One RTCStatsReport sample in positional form"""
+    return [ts, rtt, loss, bitrate, 1280, 720, ts * 10, ts * 20, ts, ts]
+
+
+###############################################################################
+# RING BUFFER
+###############################################################################
+
+def test_series_keeps_samples_in_order_until_full():
+    """
+    Before wrapping, columns return samples in arrival order.
+    """
+    series = SessionSeries("call-1", "android", "", capacity=5)
+    series.append([sample(1), sample(2)])
+    series.append([sample(3)])
+
+    assert list(series.column("timestamp")) == [1, 2, 3]
+    assert list(series.column("width")) == [1280] * 3
+    assert series.count == 3
+
+
+def test_series_overwrites_oldest_when_full():
+    """
+    Once full, new samples replace the oldest and order is preserved
+    across the wrap point.
+    """
+    series = SessionSeries("call-1", "ios", "", capacity=4)
+    series.append([sample(i) for i in range(1, 4)])
+    series.append([sample(i) for i in range(4, 7)])
+
+    assert list(series.column("timestamp")) == [3, 4, 5, 6]
+    assert list(series.column("bytes_sent")) == [60, 80, 100, 120]
+
+
+def test_rows_read_back_samples_across_the_wrap_point():
+    """
+    rows() returns ingested samples positionally, oldest first, and last
+    limits them to the newest.
+    """
+    series = SessionSeries("call-1", "ios", "", capacity=4)
+    series.append([sample(i) for i in range(1, 7)])
+
+    assert series.rows() == [sample(i) for i in range(3, 7)]
+    assert series.rows(last=2) == [sample(5), sample(6)]
+    assert series.rows(last=10) == series.rows()
+
+
+def test_batch_larger_than_window_keeps_newest():
+    """
+    A batch longer than the window keeps only its newest samples.
+    """
+    series = SessionSeries("call-1", "ios", "", capacity=3)
+    series.append([sample(i) for i in range(10)])
+
+    assert list(series.column("timestamp")) == [7, 8, 9]
+
+
+def test_float32_columns_store_rounded_values():
+    """
+    Metric columns are single precision; timestamps stay exact.
+    """
+    series = SessionSeries("call-1", "web", "", capacity=2)
+    series.append([sample(1737910400123, rtt=42.25)])
+
+    assert series.column("timestamp")[0] == 1737910400123
+    assert series.column("rtt")[0] == pytest.approx(42.25)
+
+
+@pytest.mark.parametrize("row", [
+    [1, 2, 3],                                   # too short
+    [1, 40, 0, 1e6, -1, 720, 0, 0, 0, 0],        # negative width
+])
+def test_malformed_samples_are_rejected_without_partial_writes(row):
+    """
+    A bad sample raises ValueError and leaves the buffer unchanged.
+    """
+    series = SessionSeries("call-1", "android", "", capacity=4)
+    series.append([sample(1)])
+
+    with pytest.raises(ValueError):
+        series.append([sample(2), row])
+
+    assert list(series.column("timestamp")) == [1]
+
+
+###############################################################################
+# STORE BOUNDS
+###############################################################################
+
+def test_store_bounds_sessions_and_reports_memory():
+    """
+    Beyond max_sessions the least recently updated session is dropped,
+    and buffer_bytes reflects the preallocated windows.
+    """
+    store = QualityStatsStore(window=10, max_sessions=2, idle_seconds=1000)
+    for name in ("a", "b", "c"):
+        store.ingest(name, [sample(1)], now=0.0)
+
+    assert store.get("a") is None
+    stats = store.stats()
+    assert stats["sessions"] == 2
+    assert stats["sessions_evicted"] == 1
+    assert stats["buffer_bytes"] == 2 * 10 * BYTES_PER_SAMPLE
+
+
+def test_idle_sessions_are_evicted():
+    """
+    Sessions that stopped reporting are dropped on a later ingest.
+    """
+    store = QualityStatsStore(window=10, idle_seconds=60)
+    store.ingest("ended", [sample(1)], now=0.0)
+    store.ingest("live", [sample(1)], now=100.0)
+
+    assert [series.session_id for series in store.sessions()] == ["live"]
+
+
+def test_invalid_first_batch_does_not_create_session():
+    """
+    A session is only stored once it has sent a valid batch.
+    """
+    store = QualityStatsStore()
+    with pytest.raises(ValueError):
+        store.ingest("call-1", [[1, 2]])
+
+    assert len(store) == 0
+
+
+def test_field_order_matches_sdk_report():
+    """
+    Positional order follows the SDKs' RTCStatsReport constructor.
+    """
+    assert FIELD_NAMES == (
+        "timestamp", "rtt", "packet_loss", "bitrate", "width", "height",
+        "bytes_received", "bytes_sent", "frames_decoded", "frames_encoded",
+    )
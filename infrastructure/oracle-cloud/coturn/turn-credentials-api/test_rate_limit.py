@@ -0,0 +1,134 @@
+"""
+Tests for the token-bucket rate limiter
+
+Covers burst and refill behaviour, Retry-After estimates, per-key
+isolation and eviction of idle and excess buckets. Time is passed in
+explicitly so no test sleeps.
+"""
+
+import pytest
+
+from rate_limit import TokenBucketLimiter
+
+
+###############################################################################
+# TOKEN BUCKETS
+###############################################################################
+
+def test_burst_then_reject_with_retry_after():
+    """
+    A new key may spend its whole burst at once; the next request is
+    rejected with the time until one token has refilled.
+    """
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+
+    assert [limiter.acquire("alice", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("alice", now=0.0) == pytest.approx(0.5)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_tokens_refill_over_time_up_to_burst():
+    """
+    Tokens accrue at rate per second and never exceed burst.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=2, idle_seconds=1000)
+    limiter.acquire("alice", cost=2, now=0.0)
+
+    assert limiter.acquire("alice", now=0.5) > 0
+    assert limiter.acquire("alice", now=1.0) == 0.0
+    assert limiter.acquire("alice", cost=2, now=100.0) == 0.0
+    assert limiter.acquire("alice", now=100.0) > 0
+
+
+def test_keys_are_limited_independently():
+    """
+    Exhausting one key does not affect another.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=1)
+    limiter.acquire("abuser", now=0.0)
+
+    assert limiter.acquire("abuser", now=0.0) > 0
+    assert limiter.acquire("alice", now=0.0) == 0.0
+
+
+def test_cost_above_burst_can_never_succeed():
+    """
+    A request costing more than the bucket holds gets an infinite wait.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=5)
+
+    assert limiter.acquire("key", cost=6, now=0.0) == float("inf")
+
+
+def test_peek_neither_takes_tokens_nor_counts():
+    """
+    peek reports the same wait acquire would, without changing the
+    bucket or the counters; reject counts a rejection explicitly.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    limiter.acquire("alice", cost=2, now=0.0)
+
+    assert limiter.peek("alice", now=0.5) == pytest.approx(0.5)
+    assert limiter.peek("alice", now=1.0) == 0.0
+    assert limiter.peek("bob", cost=2, now=0.0) == 0.0
+    assert limiter.peek("bob", cost=3, now=0.0) == float("inf")
+    assert limiter.stats() == {"buckets": 1, "allowed": 1, "rejected": 0, "evicted": 0}
+    assert limiter.acquire("alice", now=1.0) == 0.0
+
+    limiter.reject()
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_invalid_configuration_is_rejected():
+    """
+    Zero rate or a burst below one token cannot admit any request.
+    """
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(rate=0, burst=10)
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(rate=1, burst=0.5)
+
+
+###############################################################################
+# EVICTION
+###############################################################################
+
+def test_idle_buckets_are_evicted():
+    """
+    Buckets untouched for idle_seconds are dropped on a later request.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=10)  # idle after 10s
+    for i in range(100):
+        limiter.acquire(f"user{i}", now=0.0)
+
+    limiter.acquire("late", now=11.0)
+
+    assert len(limiter) == 1
+    assert limiter.stats()["evicted"] == 100
+
+
+def test_recently_used_buckets_survive_eviction():
+    """
+    Touching a bucket moves it to the back of the eviction order.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=10)
+    limiter.acquire("old", now=0.0)
+    limiter.acquire("active", now=0.0)
+    limiter.acquire("old", now=5.0)
+
+    limiter.acquire("late", now=12.0)
+
+    assert len(limiter) == 2  # "active" (idle since 0.0) was evicted
+
+
+def test_max_buckets_bounds_memory():
+    """
+    Beyond max_buckets the least recently used bucket is dropped even if
+    it is not idle yet.
+    """
+    limiter = TokenBucketLimiter(rate=1, burst=10, max_buckets=50)
+    for i in range(200):
+        limiter.acquire(f"user{i}", now=0.0)
+
+    assert len(limiter) == 50
+    assert limiter.stats()["evicted"] == 150
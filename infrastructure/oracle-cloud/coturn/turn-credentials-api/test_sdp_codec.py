@@ -0,0 +1,165 @@
+"""
+Tests for the compact SDP codec
+
+Covers lossless round-trips over the captured corpus and edge-case
+inputs, streaming in arbitrary chunk sizes on both sides, the text form,
+rejection of corrupt input, and that the dictionary actually pays off.
+"""
+
+import pytest
+
+import sdp_codec
+from bench_sdp import DEFAULT_CORPUS, load_corpus
+from sdp_codec import SdpDecoder, SdpEncoder, decode, decode_text, encode, encode_text, is_compact
+
+CORPUS = load_corpus(DEFAULT_CORPUS)
+
+
+###############################################################################
+# ROUND TRIP
+###############################################################################
+
+def test_corpus_is_present():
+    """
+    The benchmark corpus ships with the module.
+    """
+    assert len(CORPUS) >= 4
+    assert all(sdp.startswith("v=0\r\n") for sdp in CORPUS.values())
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_corpus_round_trips(name):
+    """
+    Every captured SDP decodes to exactly the original text, in both the
+    binary and the text form.
+    """
+    sdp = CORPUS[name]
+
+    assert decode(encode(sdp)) == sdp
+    assert decode_text(encode_text(sdp)) == sdp
+
+
+@pytest.mark.parametrize("sdp", [
+    "",
+    "v=0",
+    "v=0\n",
+    "v=0\r\n\r\n",
+    "a=x\r",
+    "a=x\r\r\n",
+    "a=mid:007\r\n",                                   # non-canonical integer
+    "a=fingerprint:sha-256 ab:CD\r\n",                 # lowercase hex
+    "a=rtcp-fb:96 nack\na=rtcp-fb:96 nack\r\n",         # mixed terminators
+    "s=éè\r\na=ice-ufrag:☺\r\n",
+    "o=- 123456789012345678901234567890 2 IN IP4 127.0.0.1\r\n",
+])
+def test_edge_cases_round_trip(sdp):
+    """
+    Inputs the dictionary must not normalize come back byte for byte.
+    """
+    assert decode(encode(sdp)) == sdp
+
+
+###############################################################################
+# STREAMING
+###############################################################################
+
+@pytest.mark.parametrize("chunk", [1, 3, 17, 4096])
+def test_streaming_matches_one_shot(chunk):
+    """
+    Feeding text and bytes in any chunk size produces the same bytes and
+    text as the one-shot helpers.
+    """
+    sdp = CORPUS["chrome_offer.sdp"]
+    expected = encode(sdp)
+
+    encoder = SdpEncoder()
+    data = b"".join(encoder.feed(sdp[i:i + chunk]) for i in range(0, len(sdp), chunk)) + encoder.finish()
+    assert data == expected
+
+    decoder = SdpDecoder()
+    text = "".join(decoder.feed(data[i:i + chunk]) for i in range(0, len(data), chunk))
+    decoder.finish()
+    assert text == sdp
+
+
+def test_decoder_emits_lines_as_they_complete():
+    """
+    Output is produced per completed token, not held back until END.
+    """
+    data = encode("v=0\r\ns=-\r\n")
+    decoder = SdpDecoder()
+
+    assert decoder.feed(data[:3]) == "v=0\r\n"
+    assert decoder.feed(data[3:]) == "s=-\r\n"
+
+
+def test_encoder_rejects_use_after_finish():
+    encoder = SdpEncoder()
+    encoder.finish()
+
+    with pytest.raises(ValueError):
+        encoder.feed("v=0")
+
+
+###############################################################################
+# CORRUPT INPUT
+###############################################################################
+
+@pytest.mark.parametrize("data, message", [
+    (b"", "Truncated"),
+    (b"\x00\x01", "Not a compact SDP"),
+    (bytes([sdp_codec.MAGIC, 99]), "Unsupported"),
+    (encode("v=0\r\n")[:-1], "Truncated"),
+    (bytes([sdp_codec.MAGIC, sdp_codec.VERSION, 0xFE, 0x07]), "Unknown dictionary entry"),
+    (bytes([sdp_codec.MAGIC, sdp_codec.VERSION, 0x04, 0x05]), "out of range"),
+    (bytes([sdp_codec.MAGIC, sdp_codec.VERSION, 0x03, 0x09]), "terminator"),
+    (encode("v=0\r\n") + b"\x00", "after end"),
+])
+def test_corrupt_input_is_rejected(data, message):
+    """
+    Truncation, bad header and unknown ops raise ValueError.
+    """
+    with pytest.raises(ValueError, match=message):
+        decode(data)
+
+
+def test_text_form_prefix_and_errors():
+    text = encode_text("v=0\r\n")
+
+    assert is_compact(text) and not is_compact("v=0\r\n")
+    assert "=" not in text[len(sdp_codec.TEXT_PREFIX):]
+    with pytest.raises(ValueError):
+        decode_text("v=0\r\n")
+    with pytest.raises(ValueError):
+        decode_text(sdp_codec.TEXT_PREFIX + "!!!")
+
+
+###############################################################################
+# COMPRESSION
+###############################################################################
+
+def test_dictionary_entries_are_unique():
+    """
+    A duplicate entry would waste an op code and never be matched.
+    """
+    assert len(set(sdp_codec.DICTIONARY)) == len(sdp_codec.DICTIONARY)
+
+
+def test_corpus_compresses_at_least_2x():
+    """
+    Real browser SDPs shrink to well under half their raw size.
+    """
+    raw = sum(len(sdp.encode()) for sdp in CORPUS.values())
+    compact = sum(len(encode(sdp)) for sdp in CORPUS.values())
+
+    assert raw / compact >= 2.0
+
+
+def test_repeated_lines_use_back_references():
+    """
+    The second copy of a non-dictionary line costs a few bytes, not its
+    length again.
+    """
+    line = "a=x-google-flag:conference-with-a-long-value\r\n"
+
+    assert len(encode(line * 2)) - len(encode(line)) <= 3
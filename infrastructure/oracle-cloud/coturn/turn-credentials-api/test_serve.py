@@ -0,0 +1,78 @@
+"""
+Tests for the production launcher
+
+Covers host-based worker sizing and the gunicorn/uvicorn settings; the
+server itself is not started.
+"""
+
+from serve import TurnApiWorker, gunicorn_options, total_memory_mb, worker_count
+
+
+###############################################################################
+# HOST SIZING
+###############################################################################
+
+def test_worker_count_uses_one_worker_per_core():
+    """
+    With ample memory, every usable core gets a worker.
+    """
+    assert worker_count(cpus=4, memory_mb=24 * 1024, override=0) == 4
+
+
+def test_worker_count_is_capped_by_memory():
+    """
+    On a 1 GB instance memory, not cores, limits the pool.
+    """
+    # 50% of 1024 MiB at 80 MiB per worker
+    assert worker_count(cpus=8, memory_mb=1024, override=0) == 6
+    assert worker_count(cpus=8, memory_mb=100, override=0) == 1
+
+
+def test_worker_count_honours_override():
+    """
+    An explicit API_WORKERS value wins over host sizing.
+    """
+    assert worker_count(cpus=1, memory_mb=256, override=3) == 3
+
+
+def test_total_memory_mb_parses_meminfo(tmp_path):
+    """
+    MemTotal is read from /proc/meminfo in MiB.
+    """
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal:        1003520 kB\nMemFree:          200000 kB\n")
+
+    assert total_memory_mb(str(meminfo)) == 980
+    assert total_memory_mb(str(tmp_path / "missing")) is None
+
+
+###############################################################################
+# GUNICORN SETTINGS
+###############################################################################
+
+def test_gunicorn_options_preload_and_tuned_worker():
+    """
+    Production settings preload the app and use the tuned uvicorn worker.
+    """
+    from gunicorn.config import Config
+
+    options = gunicorn_options()
+    config = Config()
+    for key, value in options.items():
+        if value is not None:
+            config.set(key, value)
+
+    assert config.preload_app is True
+    assert config.worker_class is TurnApiWorker
+    assert config.workers >= 1
+    assert config.keepalive == options["keepalive"]
+
+
+def test_worker_keep_alive_outlasts_nginx():
+    """
+    Worker keep-alive exceeds nginx's 60s upstream keepalive_timeout.
+    """
+    assert TurnApiWorker.CONFIG_KWARGS["timeout_keep_alive"] > 60
+    assert TurnApiWorker.CONFIG_KWARGS["loop"] == "auto"
+    assert TurnApiWorker.CONFIG_KWARGS["http"] == "auto"
+    assert TurnApiWorker.CONFIG_KWARGS["proxy_headers"] is True
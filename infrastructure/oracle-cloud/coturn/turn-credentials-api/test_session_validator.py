@@ -0,0 +1,267 @@
+"""
+Tests for the bulk session document validator
+
+Covers the compiled schema checks and their error codes, the state
+machine consistency rules, streaming over byte ranges, parallel scans
+matching a single pass, the violations file and the command line.
+"""
+
+import copy
+import io
+import json
+
+import pytest
+
+import log_analyzer
+from session_validator import (
+    DEFAULT_ERROR_CODES,
+    DEFAULT_SCHEMA,
+    SessionValidator,
+    compile_schema,
+    get_validator,
+    load_error_codes,
+    main_cli,
+    parse_date_time,
+    validate_files,
+    validate_stream,
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+SESSION = {
+    "session_id": "2f6c1e8a-3d9b-4e7a-b5c2-0f4d8e1a6c37",
+    "caller_id": "alice",
+    "callee_id": "bob",
+    "status": "connected",
+    "created_at": "2025-01-26T12:00:00Z",
+    "updated_at": "2025-01-26T12:00:09.5Z",
+    "offer": {"sdp": "v=0\r\n", "type": "offer", "created_at": "2025-01-26T12:00:01Z"},
+    "answer": {"sdp": "v=0\r\n", "type": "answer", "created_at": "2025-01-26T21:00:02+09:00"},
+    "ice_candidates": {
+        "caller": [{"candidate": "candidate:1 1 udp 1 10.0.0.1 5000 typ host", "sdpMid": "0", "sdpMLineIndex": 0}],
+        "callee": [],
+    },
+    "turn_credentials": {"username": "1737914000:alice", "password": "x", "ttl": 3600, "uris": ["turn:t:3478"]},
+}
+
+
+def session(**changes):
+    """SESSION with top-level fields replaced (None deletes)"""
+    doc = copy.deepcopy(SESSION)
+    for key, value in changes.items():
+        if value is None:
+            doc.pop(key, None)
+        else:
+            doc[key] = value
+    return doc
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return get_validator(DEFAULT_SCHEMA, DEFAULT_ERROR_CODES)
+
+
+def errors(validator, doc):
+    return sorted((name, path) for name, path, _ in validator.validate(doc))
+
+
+@pytest.fixture
+def export(tmp_path):
+    """NDJSON export of 60 documents, every third one invalid"""
+    path = tmp_path / "sessions.ndjson"
+    with open(path, "w") as f:
+        for i in range(60):
+            doc = session(caller_id=f"user-{i}")
+            if i % 3 == 0:
+                doc["status"] = "ringing"
+            f.write(json.dumps(doc) + "\n")
+    return str(path)
+
+
+###############################################################################
+# COMPILED SCHEMA
+###############################################################################
+
+def test_valid_document_has_no_violations(validator):
+    assert validator.validate(SESSION) == []
+
+
+@pytest.mark.parametrize("doc, expected", [
+    (session(status="ringing"), [("INVALID_SESSION_STATE", "status")]),
+    (session(callee_id=None), [("INVALID_SESSION_STATE", "callee_id")]),
+    (session(session_id="not-a-uuid"), [("INVALID_SESSION_STATE", "session_id")]),
+    (session(created_at="yesterday"), [("INVALID_SESSION_STATE", "created_at")]),
+    (session(offer={"sdp": "", "type": "offer", "created_at": "2025-01-26T12:00:01Z"}),
+     [("INVALID_SDP", "offer.sdp")]),
+    (session(offer={"sdp": "x" * 100001, "type": "offer", "created_at": "2025-01-26T12:00:01Z"}),
+     [("SDP_TOO_LARGE", "offer.sdp")]),
+    (session(answer={"sdp": "v=0", "type": "offer", "created_at": "2025-01-26T12:00:02Z"}),
+     [("INVALID_SDP", "answer.type")]),
+    (session(ice_candidates={"callee": [{"candidate": "c", "sdpMid": "0", "sdpMLineIndex": True}]}),
+     [("INVALID_ICE_CANDIDATE", "ice_candidates.callee[0].sdpMLineIndex")]),
+    (session(turn_credentials={"username": "u", "password": "p", "ttl": 30, "uris": []}),
+     [("INVALID_SESSION_STATE", "turn_credentials.ttl")]),
+    ([SESSION], [("INVALID_SESSION_STATE", "")]),
+])
+def test_schema_violations_map_to_error_names(validator, doc, expected):
+    """
+    Each schema rule reports the error-codes.json name for its field.
+    """
+    assert errors(validator, doc) == expected
+
+
+def test_error_names_resolve_to_shared_codes(validator):
+    """
+    Every name the validator can emit exists in error-codes.json.
+    """
+    codes = load_error_codes()
+    for name in ("INVALID_SESSION_STATE", "INVALID_SDP", "SDP_TOO_LARGE", "INVALID_ICE_CANDIDATE"):
+        assert name in codes
+    assert validator.error_codes["SDP_TOO_LARGE"] == "E102"
+
+
+def test_unsupported_schema_keyword_is_rejected():
+    """
+    A schema change the compiler does not understand fails loudly
+    instead of going unchecked.
+    """
+    with pytest.raises(ValueError, match="pattern"):
+        compile_schema({"type": "object", "properties": {"a": {"type": "string", "pattern": "x"}}})
+
+
+def test_validator_is_compiled_once_per_process():
+    assert get_validator(DEFAULT_SCHEMA, DEFAULT_ERROR_CODES) is get_validator(DEFAULT_SCHEMA, DEFAULT_ERROR_CODES)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2025-01-26T12:00:00Z", 1737892800.0),
+    ("2025-01-26T21:00:00.25+09:00", 1737892800.25),
+    ("2025-02-30T12:00:00Z", None),
+    ("2025-01-26", None),
+])
+def test_parse_date_time(value, expected):
+    assert parse_date_time(value) == expected
+
+
+###############################################################################
+# STATE CONSISTENCY
+###############################################################################
+
+@pytest.mark.parametrize("doc, expected", [
+    (session(status="offered", answer=None), []),
+    (session(status="answered", answer=None), [("INVALID_SESSION_STATE", "answer")]),
+    (session(status="pending"), [("INVALID_SESSION_STATE", "answer"), ("INVALID_SESSION_STATE", "offer")]),
+    (session(status="ended", offer=None, answer=None), []),
+    (session(updated_at="2025-01-26T11:59:59Z"),
+     [("INVALID_SESSION_STATE", "updated_at")] * 3),
+])
+def test_status_and_timestamps_must_be_consistent(validator, doc, expected):
+    """
+    Status implies which SDPs exist; timestamps never run backwards.
+    """
+    assert errors(validator, doc) == expected
+
+
+def test_answer_before_offer_is_reported(validator):
+    doc = session(answer={"sdp": "v=0", "type": "answer", "created_at": "2025-01-26T12:00:00.5Z"})
+
+    assert errors(validator, doc) == [("INVALID_SESSION_STATE", "answer.created_at")]
+
+
+###############################################################################
+# STREAMING AND PARALLEL SCAN
+###############################################################################
+
+def test_validate_stream_reports_offsets_and_codes(validator):
+    """
+    Invalid JSON and schema violations are reported with the byte offset
+    of their line and the shared codes; blank lines are skipped.
+    """
+    good = json.dumps(SESSION).encode() + b"\n"
+    bad = json.dumps(session(status="ringing")).encode() + b"\n"
+    stream = io.BytesIO(good + b"\n" + bad + b"{not json\n")
+    sink = io.StringIO()
+
+    result = validate_stream(stream, validator, sink=sink)
+
+    assert result["documents"] == 3 and result["invalid"] == 2
+    assert result["violations"] == {"E004": 2}
+    records = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert records[0]["offset"] == len(good) + 1
+    assert records[0]["session_id"] == SESSION["session_id"] and records[0]["path"] == "status"
+    assert records[1]["offset"] == len(good) + 1 + len(bad) and records[1]["session_id"] is None
+
+
+def test_validate_stream_stops_at_range_end(validator):
+    line = json.dumps(session(status="ringing")).encode() + b"\n"
+    stream = io.BytesIO(line * 3)
+
+    assert validate_stream(stream, validator, 0, len(line) * 2)["documents"] == 2
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_scan_matches_single_pass(export, tmp_path, monkeypatch, workers):
+    """
+    Splitting the export into ranges gives the same counts and the same
+    violations file, in input order, with or without the process pool.
+    """
+    output = tmp_path / "violations.ndjson"
+    monkeypatch.setattr(log_analyzer, "MIN_CHUNK_SIZE", 2048)
+
+    result = validate_files([export], workers=workers, output=str(output), max_samples=5)
+
+    assert result["documents"] == 60 and result["invalid"] == 20
+    assert result["violations"] == {"E004": 20}
+    assert len(result["samples"]) == 5
+    offsets = [json.loads(line)["offset"] for line in output.read_text().splitlines()]
+    assert len(offsets) == 20 and offsets == sorted(offsets)
+    assert [s["offset"] for s in result["samples"]] == offsets[:5]
+
+
+###############################################################################
+# COMMAND LINE
+###############################################################################
+
+def test_cli_exit_status_reflects_validity(export, tmp_path, capsys):
+    valid = tmp_path / "valid.ndjson"
+    valid.write_text(json.dumps(SESSION) + "\n")
+
+    assert main_cli([str(valid), "-w", "1"]) == 0
+    capsys.readouterr()
+    assert main_cli([export, "-w", "1", "--format", "json"]) == 1
+    assert json.loads(capsys.readouterr().out)["invalid"] == 20
+
+
+def test_cli_reads_stdin(monkeypatch, capsys):
+    stdin = io.TextIOWrapper(io.BytesIO(json.dumps(SESSION).encode() + b"\n"))
+    monkeypatch.setattr("sys.stdin", stdin)
+
+    assert main_cli(["-"]) == 0
+    assert "documents                    1" in capsys.readouterr().out
+
+
+def test_cli_rejects_missing_file(tmp_path):
+    assert main_cli([str(tmp_path / "absent.ndjson")]) == 1
+
+
+def test_validator_can_be_built_from_objects():
+    validator = SessionValidator({"type": "object", "required": ["a"]}, {"INVALID_SESSION_STATE": "E004"})
+
+    assert validator.validate_line(b"{}", 7) == [{
+        "offset": 7, "session_id": None, "code": "E004", "error": "INVALID_SESSION_STATE",
+        "path": "a", "message": "missing required field",
+    }]
+
+
+def test_deeply_nested_line_is_reported_not_raised():
+    validator = SessionValidator({"type": "object"}, {"INVALID_SESSION_STATE": "E004"})
+
+    violations = validator.validate_line(b"[" * 100000, 0)
+
+    assert [(v["error"], v["message"]) for v in violations] == [
+        ("INVALID_SESSION_STATE", "invalid JSON: nested too deeply")
+    ]
+    assert validator.validate_line(b"{}", 1) == []
@@ -0,0 +1,180 @@
+"""
+Tests for shared-memory metrics
+
+Workers are real forked processes writing into a region allocated before
+the fork, as under gunicorn with preload_app. Covers summing counters
+and histograms, gauge aggregates over live workers, counters surviving
+worker restarts, slot exhaustion, and the rendered fleet-wide view.
+"""
+
+import asyncio
+import multiprocessing
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+from shared_metrics import SharedMetrics
+
+
+FORK = multiprocessing.get_context("fork")
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    registry.register(Counter("requests_total", "Requests", ("route",)))
+    registry.register(Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+    registry.register(Gauge("sessions", "Sessions"))
+    registry.register(Gauge("ready", "Ready", aggregate="min"))
+    registry.register(Gauge("node_load", "Load", ("node",), aggregate="max"))
+    return registry
+
+
+def metric(metrics, name):
+    return next(m for m in metrics if m.name == name)
+
+
+def run_worker(shared, registry, requests, sessions, ready, load, hold=None, published=None):
+    """Fork one worker that records values, publishes them and (optionally) stays alive"""
+    def work():
+        counter, histogram, sessions_gauge, ready_gauge, load_gauge = registry.metrics
+        counter.inc("/turn-credentials", amount=requests)
+        for _ in range(requests):
+            histogram.observe(0.05, "/turn-credentials")
+        sessions_gauge.set(sessions)
+        ready_gauge.set(ready)
+        load_gauge.set(load, "turn-a")
+        shared.publish(registry.metrics)
+        if published is not None:
+            published.release()
+        if hold is not None:
+            hold.wait(10)
+
+    process = FORK.Process(target=work)
+    process.start()
+    return process
+
+
+@pytest.fixture
+def shared():
+    return SharedMetrics(slots=64, max_workers=4)
+
+
+###############################################################################
+# AGGREGATION
+###############################################################################
+
+def test_live_workers_are_aggregated(shared):
+    """
+    Counters and histograms sum over workers; gauges combine by their
+    aggregate while the workers are alive.
+    """
+    registry = make_registry()
+    hold, published = FORK.Event(), FORK.Semaphore(0)
+    workers = [
+        run_worker(shared, registry, requests=3, sessions=2, ready=1, load=40, hold=hold, published=published),
+        run_worker(shared, registry, requests=5, sessions=1, ready=0, load=42, hold=hold, published=published),
+    ]
+    assert published.acquire(timeout=10) and published.acquire(timeout=10)
+    assert shared.stats()["workers"] == 2
+
+    view = shared.aggregate(registry.metrics)
+    hold.set()
+    for worker in workers:
+        worker.join()
+
+    assert metric(view, "requests_total").value("/turn-credentials") == 8
+    assert metric(view, "latency_seconds").count("/turn-credentials") == 8
+    assert metric(view, "sessions").value() == 3
+    assert metric(view, "ready").value() == 0
+    assert metric(view, "node_load").value("turn-a") == 42
+    assert metric(registry.metrics, "requests_total").total() == 0     # parent's own values untouched
+
+
+def test_exited_workers_keep_counters_but_drop_gauges(shared):
+    registry = make_registry()
+    run_worker(shared, registry, requests=4, sessions=7, ready=1, load=10).join()
+
+    view = shared.aggregate(registry.metrics)
+
+    assert metric(view, "requests_total").value("/turn-credentials") == 4
+    assert metric(view, "sessions").series() == {}
+    assert shared.stats()["workers"] == 0
+
+
+def test_restarted_worker_takes_over_row_without_losing_counts():
+    """
+    A replacement worker claims the dead worker's row; the old counts
+    move to the retired row, so the fleet total never goes down.
+    """
+    shared = SharedMetrics(slots=64, max_workers=1)
+    registry = make_registry()
+    run_worker(shared, registry, requests=4, sessions=1, ready=1, load=1).join()
+    run_worker(shared, registry, requests=2, sessions=1, ready=1, load=1).join()
+    run_worker(shared, registry, requests=1, sessions=1, ready=1, load=1).join()
+
+    view = shared.aggregate(registry.metrics)
+
+    assert metric(view, "requests_total").value("/turn-credentials") == 7
+    assert metric(view, "latency_seconds").count("/turn-credentials") == 7
+
+
+def test_republishing_overwrites_instead_of_adding(shared):
+    registry = make_registry()
+    counter = metric(registry.metrics, "requests_total")
+    counter.inc("/health", amount=2)
+    shared.publish(registry.metrics)
+    counter.inc("/health")
+    shared.publish(registry.metrics)
+
+    assert metric(shared.aggregate(registry.metrics), "requests_total").value("/health") == 3
+
+
+def test_series_without_a_slot_stay_local():
+    shared = SharedMetrics(slots=3, max_workers=1)
+    registry = make_registry()
+    counter = metric(registry.metrics, "requests_total")
+    for route in ("/a", "/b", "/c", "/d"):
+        counter.inc(route)
+
+    shared.publish(registry.metrics)
+
+    assert metric(shared.aggregate(registry.metrics), "requests_total").series() == {
+        ("/a",): 1, ("/b",): 1, ("/c",): 1
+    }
+    assert shared.stats()["dropped"] == 1 and shared.stats()["used"] == 3
+
+
+###############################################################################
+# RENDERING
+###############################################################################
+
+def test_single_worker_view_matches_local_render(shared):
+    registry = make_registry()
+    counter, histogram, sessions, ready, load = registry.metrics
+    counter.inc("/health", amount=2)
+    histogram.observe(0.5, "/health")
+    sessions.set(3)
+    ready.set(1)
+    registry.add_collector(lambda: load.set(12, "turn-a"))
+
+    assert shared.render(registry) == registry.render()
+
+
+@pytest.mark.asyncio
+async def test_background_publishing_and_final_publish(shared):
+    registry = make_registry()
+    counter = metric(registry.metrics, "requests_total")
+
+    shared.start(registry, interval=0.01)
+    counter.inc("/health")
+    while metric(shared.aggregate(registry.metrics), "requests_total").value("/health") != 1:
+        await asyncio.sleep(0.01)
+    counter.inc("/health")
+    await shared.stop(registry)
+
+    assert metric(shared.aggregate(registry.metrics), "requests_total").value("/health") == 2
+
+
+def test_invalid_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        SharedMetrics(slots=0)
@@ -0,0 +1,356 @@
+"""
+Tests for the WebSocket signaling hub
+
+Covers the session state machine, fan-out and the late-join snapshot,
+message validation with the shared error codes, ICE candidate
+coalescing, slow-consumer backpressure and session expiry. Peers use
+in-memory send/close coroutines, so no sockets are involved.
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+import sdp_codec
+from signaling_hub import (
+    CLOSE_TRY_AGAIN_LATER,
+    ERROR_CODES,
+    MAX_SDP_LENGTH,
+    SignalingHub,
+)
+
+ERROR_CODES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "shared", "constants", "error-codes.json"
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+NOW = 1_737_910_800.0
+OFFER_SDP = "v=0\r\no=- 1 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\n"
+
+
+class FakeSocket:
+    """Records frames and the close code a Peer produces"""
+
+    def __init__(self):
+        self.frames = []
+        self.closed_with = None
+
+    async def send(self, text):
+        self.frames.append(json.loads(text))
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+def attach(hub, session_id="call-1"):
+    socket = FakeSocket()
+    return hub.attach(session_id, socket.send, socket.close), socket
+
+
+def send(hub, peer, now=NOW, **message):
+    hub.receive(peer, json.dumps(message), now=now)
+
+
+def take(peer):
+    """Pop every queued message"""
+    messages = list(peer.outbox)
+    peer.outbox.clear()
+    return messages
+
+
+def candidate(n):
+    return {"sdpMid": "0", "sdpMLineIndex": 0, "sdpCandidate": f"candidate:{n} 1 udp 1 10.0.0.1 {5000 + n} typ host"}
+
+
+@pytest.fixture
+def call():
+    """Hub with caller and callee joined to call-1"""
+    hub = SignalingHub()
+    caller, _ = attach(hub)
+    callee, _ = attach(hub)
+    send(hub, caller, type="join", userId="alice", callerId="alice", calleeId="bob")
+    send(hub, callee, type="join", userId="bob")
+    take(caller), take(callee)
+    return hub, caller, callee
+
+
+###############################################################################
+# STATE MACHINE
+###############################################################################
+
+def test_full_setup_walks_the_state_machine():
+    """
+    join -> offer -> answer -> connected, each forwarded to the other
+    peer in SignalingMessage shape; setup time is reported once.
+    """
+    setups = []
+    hub = SignalingHub(on_setup=setups.append)
+    caller, _ = attach(hub)
+    callee, _ = attach(hub)
+
+    send(hub, caller, type="join", userId="alice", callerId="alice", calleeId="bob")
+    joined = take(caller)[0]
+    assert joined["role"] == "caller" and joined["session"]["status"] == "pending"
+
+    send(hub, callee, type="join", userId="bob")
+    assert take(callee)[0]["role"] == "callee"
+
+    send(hub, caller, type="offer", sdp=OFFER_SDP)
+    offer = take(callee)[0]
+    assert offer["type"] == "offer" and offer["callerId"] == "alice" and offer["sdp"] == OFFER_SDP
+    assert take(caller) == []
+
+    send(hub, callee, now=NOW + 0.2, type="answer", sdp=OFFER_SDP)
+    assert take(caller)[0]["calleeId"] == "bob"
+
+    send(hub, caller, now=NOW + 0.5, type="connected")
+    send(hub, callee, now=NOW + 0.6, type="connected")
+    assert hub.get("call-1").status == "connected"
+    assert setups == [pytest.approx(0.5)]
+
+    send(hub, callee, now=NOW + 60, type="hangup", reason="bye")
+    hangup = take(caller)[-1]
+    assert hangup["type"] == "hangup" and hangup["reason"] == "bye"
+    assert hub.get("call-1").status == "ended"
+
+
+def test_late_joiner_receives_session_document(call):
+    """
+    A peer joining after the offer gets it, and stored candidates, in the
+    joined snapshot shaped like webrtc_session.schema.json.
+    """
+    hub, caller, callee = call
+    send(hub, caller, type="offer", sdp=OFFER_SDP)
+    send(hub, caller, type="ice-candidate", **candidate(1))
+
+    rejoin, _ = attach(hub)
+    send(hub, rejoin, type="join", userId="bob")
+    document = take(rejoin)[0]["session"]
+
+    assert document["status"] == "offered"
+    assert document["offer"]["type"] == "offer" and document["offer"]["sdp"] == OFFER_SDP
+    assert document["ice_candidates"]["caller"] == [
+        {"candidate": candidate(1)["sdpCandidate"], "sdpMid": "0", "sdpMLineIndex": 0}
+    ]
+    assert document["created_at"].endswith("Z")
+
+
+def test_compact_sdp_is_relayed_as_sent(call):
+    """
+    An offer in the compact sdp_codec text form is forwarded unchanged;
+    the callee decodes it back to the original SDP.
+    """
+    hub, caller, callee = call
+    compact = sdp_codec.encode_text(OFFER_SDP)
+
+    send(hub, caller, type="offer", sdp=compact)
+
+    offer = take(callee)[0]
+    assert offer["sdp"] == compact
+    assert sdp_codec.decode_text(offer["sdp"]) == OFFER_SDP
+
+
+@pytest.mark.parametrize("sender, message, code", [
+    ("callee", {"type": "answer", "sdp": OFFER_SDP}, "E004"),    # answer before offer
+    ("callee", {"type": "offer", "sdp": OFFER_SDP}, "E304"),     # wrong role
+    ("caller", {"type": "connected"}, "E004"),
+    ("caller", {"type": "renegotiate"}, "E004"),
+    ("caller", {"type": "offer", "sdp": ""}, "E101"),
+    ("caller", {"type": "offer", "sdp": "x" * (MAX_SDP_LENGTH + 1)}, "E102"),
+    ("caller", {"type": "offer", "sdp": sdp_codec.TEXT_PREFIX + "AAAA"}, "E101"),
+    ("caller", {"type": "offer", "sdp": sdp_codec.encode_text("a=x\n" * (MAX_SDP_LENGTH // 4 + 1))}, "E102"),
+    ("caller", {"type": "ice-candidate", "sdpMid": "0", "sdpMLineIndex": -1, "sdpCandidate": "c"}, "E103"),
+    ("caller", {"type": "ice-candidates", "candidates": []}, "E103"),
+])
+def test_invalid_messages_get_shared_error_codes(call, sender, message, code):
+    """
+    Rejected messages are answered with an error to the sender only and
+    leave the session unchanged.
+    """
+    hub, caller, callee = call
+    peer, other = (caller, callee) if sender == "caller" else (callee, caller)
+
+    send(hub, peer, **message)
+
+    error = take(peer)[0]
+    assert error["type"] == "error" and error["code"] == code
+    assert take(other) == []
+    assert hub.get("call-1").status == "pending"
+    assert hub.stats()["errors"] == {code: 1}
+
+
+def test_join_errors():
+    """
+    Unknown sessions, outsiders, mismatched participants and messages
+    before join are refused.
+    """
+    hub = SignalingHub()
+    peer, _ = attach(hub)
+
+    send(hub, peer, type="join", userId="alice")
+    send(hub, peer, type="offer", sdp=OFFER_SDP)
+    send(hub, peer, type="join", userId="alice", callerId="alice", calleeId="bob")
+    outsider, _ = attach(hub)
+    send(hub, outsider, type="join", userId="mallory")
+    impostor, _ = attach(hub)
+    send(hub, impostor, type="join", userId="bob", callerId="mallory", calleeId="bob")
+
+    assert [m.get("code") for m in take(peer)] == ["E001", "E305", None]
+    assert take(outsider)[0]["code"] == "E305"
+    assert take(impostor)[0]["code"] == "E003"
+
+
+def test_error_codes_match_shared_constants():
+    """
+    The hub's copy of the error codes agrees with
+    shared/constants/error-codes.json.
+    """
+    with open(ERROR_CODES_PATH) as f:
+        groups = json.load(f)["errors"]
+    shared = {name: entry for group in groups.values() for name, entry in group.items()}
+
+    for name, entry in ERROR_CODES.items():
+        assert shared[name]["code"] == entry["code"]
+        assert shared[name]["message"] == entry["message"]
+
+
+###############################################################################
+# FAN-OUT AND BACKPRESSURE
+###############################################################################
+
+def test_messages_fan_out_to_every_other_peer(call):
+    """
+    A second callee device receives the offer too; the sender does not.
+    """
+    hub, caller, callee = call
+    second, _ = attach(hub)
+    send(hub, second, type="join", userId="bob")
+    take(second)
+
+    send(hub, caller, type="offer", sdp=OFFER_SDP)
+
+    assert [m["type"] for m in take(callee)] == ["offer"]
+    assert [m["type"] for m in take(second)] == ["offer"]
+    assert take(caller) == []
+
+
+def test_queued_candidates_are_coalesced(call):
+    """
+    Candidates arriving while a batch waits in the outbox join that
+    batch; the writer sends them as one message.
+    """
+    hub, caller, callee = call
+    send(hub, caller, type="offer", sdp=OFFER_SDP)
+    for n in range(5):
+        send(hub, caller, type="ice-candidate", **candidate(n))
+    send(hub, caller, type="ice-candidates", candidates=[candidate(5), candidate(6)])
+
+    queued = list(callee.outbox)
+    assert [m["type"] for m in queued] == ["offer", "ice-candidates"]
+    assert len(queued[1]["candidates"]) == 7
+    assert hub.stats()["candidates_coalesced"] == 6
+    # The stored session is unaffected by the per-peer batch
+    assert len(hub.get("call-1").ice_candidates["caller"]) == 7
+
+
+@pytest.mark.asyncio
+async def test_writer_sends_queued_messages_in_order():
+    """
+    pump() drains the outbox over the send coroutine.
+    """
+    hub = SignalingHub()
+    caller, socket = attach(hub)
+    writer = asyncio.create_task(caller.pump())
+
+    send(hub, caller, type="join", userId="alice", callerId="alice", calleeId="bob")
+    send(hub, caller, type="offer", sdp="")
+    await asyncio.sleep(0)
+
+    assert [frame["type"] for frame in socket.frames] == ["joined", "error"]
+    hub.detach(caller)
+    await asyncio.wait_for(writer, 1)
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_closed():
+    """
+    A peer whose outbox overflows is closed with 1013 and leaves the
+    room; the sender is unaffected.
+    """
+    hub = SignalingHub(queue_size=2)
+    caller, _ = attach(hub)
+    callee, callee_socket = attach(hub)
+    send(hub, caller, type="join", userId="alice", callerId="alice", calleeId="bob")
+    send(hub, callee, type="join", userId="bob")
+    writer = asyncio.create_task(callee.pump())
+    take(caller)
+
+    send(hub, caller, type="offer", sdp=OFFER_SDP)           # joined + offer fill the outbox
+    send(hub, caller, type="ice-candidate", **candidate(1))  # overflows
+    await asyncio.wait_for(writer, 1)
+
+    assert callee_socket.closed_with == CLOSE_TRY_AGAIN_LATER
+    assert hub.get("call-1").peers == [caller]
+    assert hub.stats()["slow_consumers"] == 1
+    assert take(caller) == []
+
+
+###############################################################################
+# LIFETIME
+###############################################################################
+
+def test_stalled_setup_expires(call):
+    """
+    A session that is not connected within session_ttl ends with E002,
+    reported to every peer.
+    """
+    hub, caller, callee = call
+    send(hub, caller, type="offer", sdp=OFFER_SDP)
+    take(callee)
+
+    send(hub, caller, now=NOW + hub.session_ttl + 1, type="ice-candidate", **candidate(1))
+
+    assert take(caller)[-1]["code"] == "E002"
+    assert take(callee)[-1]["code"] == "E002"
+    session = hub.get("call-1")
+    assert session.status == "ended" and session.error["code"] == "E002"
+
+
+def test_rooms_are_dropped_when_empty():
+    """
+    An ended room goes with its last peer; an abandoned one after
+    session_ttl.
+    """
+    hub = SignalingHub()
+    caller, _ = attach(hub)
+    send(hub, caller, type="join", userId="alice", callerId="alice", calleeId="bob")
+    send(hub, caller, type="hangup")
+    hub.detach(caller, now=NOW)
+    assert len(hub) == 0
+
+    abandoned, _ = attach(hub, "call-2")
+    send(hub, abandoned, type="join", userId="alice", callerId="alice", calleeId="bob")
+    hub.detach(abandoned, now=NOW)
+    assert len(hub) == 1
+    hub.sweep(NOW + hub.session_ttl + 1)
+    assert len(hub) == 0
+    assert hub.stats()["peers"] == 0
+
+
+def test_session_limit():
+    """
+    Beyond max_sessions new rooms are refused with E404.
+    """
+    hub = SignalingHub(max_sessions=1)
+    first, _ = attach(hub, "call-1")
+    second, _ = attach(hub, "call-2")
+    send(hub, first, type="join", userId="alice", callerId="alice", calleeId="bob")
+    send(hub, second, type="join", userId="carol", callerId="carol", calleeId="dave")
+
+    assert take(second)[0]["code"] == "E404"
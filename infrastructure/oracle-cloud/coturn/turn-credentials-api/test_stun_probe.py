@@ -0,0 +1,312 @@
+"""
+Tests for the STUN listener prober
+
+Covers the STUN message codec, listener discovery from turnserver.conf,
+probes against local UDP and TCP stand-ins for coturn (success, silence,
+refusal, error responses, a TLS handshake failure), and the cached
+readiness verdict with its RTT histogram.
+"""
+
+import asyncio
+import os
+import socket
+
+import pytest
+import pytest_asyncio
+
+from metrics import Histogram
+from stun_probe import (
+    ATTR_ERROR_CODE,
+    ATTR_XOR_MAPPED_ADDRESS,
+    BINDING_ERROR,
+    BINDING_REQUEST,
+    BINDING_SUCCESS,
+    ProbeTarget,
+    StunProber,
+    build_message,
+    encode_xor_address,
+    error_code,
+    listeners_from_conf,
+    parse_message,
+    parse_turnserver_conf,
+    probe,
+    prober_from_conf,
+    read_stream_message,
+    xor_address,
+)
+
+
+REPO_CONF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "turnserver.conf")
+
+
+###############################################################################
+# STAND-INS
+###############################################################################
+
+def binding_response(request: bytes, addr, reject: bool = False) -> bytes:
+    """What coturn answers to a Binding request"""
+    msg_type, transaction_id, _ = parse_message(request)
+    assert msg_type == BINDING_REQUEST
+    if reject:
+        return build_message(BINDING_ERROR, transaction_id, [(ATTR_ERROR_CODE, b"\x00\x00\x04\x00Bad Request")])
+    return build_message(
+        BINDING_SUCCESS, transaction_id,
+        [(ATTR_XOR_MAPPED_ADDRESS, encode_xor_address(addr[0], addr[1], transaction_id))]
+    )
+
+
+class UdpStandIn(asyncio.DatagramProtocol):
+    def __init__(self, delay: float = 0.0, silent: bool = False, reject: bool = False):
+        self.delay, self.silent, self.reject = delay, silent, reject
+        self.requests = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.requests += 1
+        if not self.silent:
+            asyncio.get_running_loop().call_later(
+                self.delay, self.transport.sendto, binding_response(data, addr, self.reject), addr
+            )
+
+
+@pytest_asyncio.fixture
+async def udp_server():
+    """Factory for local UDP STUN servers; returns (protocol, port)"""
+    transports = []
+
+    async def start(**kwargs):
+        transport, protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: UdpStandIn(**kwargs), local_addr=("127.0.0.1", 0)
+        )
+        transports.append(transport)
+        return protocol, transport.get_extra_info("sockname")[1]
+
+    yield start
+    for transport in transports:
+        transport.close()
+
+
+@pytest_asyncio.fixture
+async def tcp_server():
+    """Local TCP STUN server answering every Binding request; yields its port"""
+    async def handle(reader, writer):
+        request = await read_stream_message(reader)
+        writer.write(binding_response(request, writer.get_extra_info("peername")))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+def free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+###############################################################################
+# MESSAGES
+###############################################################################
+
+def test_message_round_trip_with_padding():
+    transaction_id = bytes(range(12))
+    data = build_message(BINDING_SUCCESS, transaction_id, [(0x8022, b"coturn"), (ATTR_ERROR_CODE, b"\x00\x00\x04\x01")])
+
+    assert len(data) % 4 == 0
+    assert parse_message(data) == (BINDING_SUCCESS, transaction_id, [(0x8022, b"coturn"), (ATTR_ERROR_CODE, b"\x00\x00\x04\x01")])
+    assert error_code(parse_message(data)[2]) == 401
+
+
+@pytest.mark.parametrize("host", ["203.0.113.7", "2001:db8::1"])
+def test_xor_address_round_trip(host):
+    transaction_id = b"\x01" * 12
+
+    assert xor_address(encode_xor_address(host, 50000, transaction_id), transaction_id) == (host, 50000)
+
+
+@pytest.mark.parametrize("data", [
+    b"\x00" * 10,
+    build_message(BINDING_SUCCESS, b"\x00" * 12)[:4] + b"\x00\x00\x00\x00" + b"\x00" * 12,
+    build_message(BINDING_SUCCESS, b"\x00" * 12, [(1, b"abcd")])[:-2],
+])
+def test_malformed_messages_are_rejected(data):
+    with pytest.raises(ValueError):
+        parse_message(data)
+
+
+###############################################################################
+# LISTENERS
+###############################################################################
+
+def test_listeners_from_repo_turnserver_conf():
+    """
+    The shipped configuration yields UDP and TCP on 3478/3479 and TLS on
+    5349/5350, probed on loopback since coturn listens on 0.0.0.0.
+    """
+    options = parse_turnserver_conf(REPO_CONF)
+
+    assert [(t.name, t.host) for t in listeners_from_conf(options)] == [
+        ("udp/3478", "127.0.0.1"), ("udp/3479", "127.0.0.1"),
+        ("tcp/3478", "127.0.0.1"), ("tcp/3479", "127.0.0.1"),
+        ("tls/5349", "127.0.0.1"), ("tls/5350", "127.0.0.1"),
+    ]
+
+
+def test_listeners_follow_coturn_defaults_and_disabled_transports():
+    options = {"listening-port": "3480", "alt-listening-port": "0", "listening-ip": "10.0.0.2", "no-tls": True}
+
+    assert listeners_from_conf(options) == [
+        ProbeTarget("udp", "10.0.0.2", 3480), ProbeTarget("udp", "10.0.0.2", 3481),
+        ProbeTarget("tcp", "10.0.0.2", 3480), ProbeTarget("tcp", "10.0.0.2", 3481),
+    ]
+    assert [t.name for t in listeners_from_conf({}, host="h", transports=["tls"])] == ["tls/5349", "tls/5350"]
+
+
+###############################################################################
+# PROBES
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_udp_probe_measures_rtt(udp_server):
+    _, port = await udp_server(delay=0.02)
+
+    result = await probe(ProbeTarget("udp", "127.0.0.1", port), timeout=1.0)
+
+    assert result.ok and result.reason is None
+    assert 0.015 <= result.rtt < 1.0
+
+
+@pytest.mark.asyncio
+async def test_tcp_probe(tcp_server):
+    result = await probe(ProbeTarget("tcp", "127.0.0.1", tcp_server), timeout=1.0)
+
+    assert result.ok and result.rtt > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kwargs, reason", [
+    ({"silent": True}, "timeout"),
+    ({"reject": True}, "rejected"),
+])
+async def test_udp_probe_failures(udp_server, kwargs, reason):
+    _, port = await udp_server(**kwargs)
+
+    result = await probe(ProbeTarget("udp", "127.0.0.1", port), timeout=0.1)
+
+    assert result == (False, None, reason)
+
+
+@pytest.mark.asyncio
+async def test_probe_of_closed_ports():
+    """
+    Nothing listening: TCP is refused outright, UDP is refused via ICMP
+    or times out, depending on the platform.
+    """
+    tcp = await probe(ProbeTarget("tcp", "127.0.0.1", free_udp_port()), timeout=0.5)
+    udp = await probe(ProbeTarget("udp", "127.0.0.1", free_udp_port()), timeout=0.2)
+
+    assert tcp.reason == "refused"
+    assert udp.reason in ("refused", "timeout")
+
+
+@pytest.mark.asyncio
+async def test_tls_probe_against_plain_listener_fails(tcp_server):
+    result = await probe(ProbeTarget("tls", "127.0.0.1", tcp_server), timeout=1.0)
+
+    assert not result.ok and result.reason in ("tls", "invalid", "network")
+
+
+###############################################################################
+# PROBER
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_prober_caches_readiness_and_records_rtt(udp_server):
+    """
+    The verdict only changes when a round runs; reading it never probes.
+    """
+    protocol, port = await udp_server()
+    histogram = Histogram("rtt", "rtt", ("listener",))
+    prober = StunProber([ProbeTarget("udp", "127.0.0.1", port)], timeout=0.5, rtt_histogram=histogram)
+
+    assert prober.status()["ready"] is False
+    assert prober.status()["listeners"][0]["status"] == "pending"
+
+    await prober.probe_once()
+    for _ in range(5):
+        status = prober.status()
+
+    assert status["ready"] is True and status["listeners"][0]["status"] == "up"
+    assert protocol.requests == 1
+    assert histogram.count(f"udp/{port}") == 1
+
+
+@pytest.mark.asyncio
+async def test_listener_goes_down_after_consecutive_failures(udp_server):
+    protocol, port = await udp_server()
+    prober = StunProber([ProbeTarget("udp", "127.0.0.1", port)], timeout=0.05, failure_threshold=2)
+    await prober.probe_once()
+
+    protocol.silent = True
+    assert (await prober.probe_once())["ready"] is True           # one loss is tolerated
+    status = await prober.probe_once()
+
+    assert status["ready"] is False and status["listeners"][0]["status"] == "down"
+    assert (f"udp/{port}", "timeout", 2) in prober.failure_counts()
+
+    protocol.silent = False
+    assert (await prober.probe_once())["ready"] is True
+
+
+@pytest.mark.asyncio
+async def test_slow_listener_is_not_ready(udp_server):
+    _, fast = await udp_server()
+    _, slow = await udp_server(delay=0.05)
+    prober = StunProber(
+        [ProbeTarget("udp", "127.0.0.1", fast), ProbeTarget("udp", "127.0.0.1", slow)],
+        timeout=1.0, slow_threshold=0.03
+    )
+
+    status = await prober.probe_once()
+
+    assert status["ready"] is False
+    assert [listener["status"] for listener in status["listeners"]] == ["up", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_readiness_lapses_when_rounds_stop(udp_server):
+    _, port = await udp_server()
+    prober = StunProber([ProbeTarget("udp", "127.0.0.1", port)], interval=5.0, timeout=0.5)
+    await prober.probe_once()
+
+    assert prober.status(now=prober.checked_at + 10)["ready"] is True
+    assert prober.status(now=prober.checked_at + 60) == {**prober.status(), "ready": False, "reason": "stale"}
+
+
+@pytest.mark.asyncio
+async def test_background_probing_starts_and_stops(udp_server):
+    protocol, port = await udp_server()
+    prober = StunProber([ProbeTarget("udp", "127.0.0.1", port)], interval=0.01, timeout=0.5)
+
+    prober.start()
+    while prober.rounds < 2:
+        await asyncio.sleep(0.01)
+    await prober.stop()
+
+    assert protocol.requests >= 2 and prober.status()["ready"] is True
+
+
+def test_prober_from_conf(tmp_path):
+    conf = tmp_path / "turnserver.conf"
+    conf.write_text("listening-port=3478\nno-tcp\nno-tls\n")
+
+    prober = prober_from_conf(str(conf), host="127.0.0.1")
+
+    assert [state.target.name for state in prober.listeners] == ["udp/3478", "udp/3479"]
+    with pytest.raises(ValueError):
+        prober_from_conf(str(conf), transports=["tls"])
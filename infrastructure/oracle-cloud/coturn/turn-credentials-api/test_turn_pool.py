@@ -0,0 +1,258 @@
+"""
+Tests for the TURN server pool
+
+Covers node parsing, load ordering, unhealthy-node exclusion, the
+per-response cap, spreading between refreshes and the Prometheus load
+source. Load sources are local stand-ins; no coturn node is contacted.
+"""
+
+import asyncio
+
+import pytest
+
+from turn_pool import (
+    NodeStatus,
+    TurnNode,
+    TurnServerPool,
+    parse_prometheus_value,
+    parse_turn_servers,
+    prometheus_load_source,
+)
+
+
+###############################################################################
+# TEST FIXTURES
+###############################################################################
+
+def static_source(statuses):
+    """Load source answering from a {host: NodeStatus} dict"""
+    async def source(node):
+        status = statuses[node.host]
+        if isinstance(status, Exception):
+            raise status
+        return status
+    return source
+
+
+def hosts(uris):
+    """Distinct hosts in URI order"""
+    seen = []
+    for uri in uris:
+        host = uri.split(":")[1]
+        if host not in seen:
+            seen.append(host)
+    return seen
+
+
+@pytest.fixture
+def nodes():
+    """Three pool nodes on the default port"""
+    return parse_turn_servers("a.example.com,b.example.com,c.example.com", 3478)
+
+
+###############################################################################
+# NODE CONFIGURATION
+###############################################################################
+
+def test_parse_turn_servers_applies_default_port():
+    """
+    Entries without a port use the default; explicit ports are kept.
+    """
+    parsed = parse_turn_servers(" a.example.com , b.example.com:3479,,", 3478)
+
+    assert [(n.host, n.port) for n in parsed] == [("a.example.com", 3478), ("b.example.com", 3479)]
+    assert parsed[1].uris == (
+        "turn:b.example.com:3479?transport=udp",
+        "turn:b.example.com:3479?transport=tcp",
+        "turns:b.example.com:5349?transport=tcp",
+    )
+
+
+def test_empty_pool_is_rejected():
+    """
+    A pool without nodes is a configuration error.
+    """
+    with pytest.raises(ValueError):
+        TurnServerPool([], static_source({}))
+
+
+###############################################################################
+# ORDERING
+###############################################################################
+
+@pytest.mark.asyncio
+async def test_uris_are_ordered_by_load(nodes):
+    """
+    After a refresh the least-loaded node is listed first.
+    """
+    pool = TurnServerPool(nodes, static_source({
+        "a.example.com": NodeStatus(30, True),
+        "b.example.com": NodeStatus(10, True),
+        "c.example.com": NodeStatus(20, True),
+    }), assignment_weight=0)
+    await pool.refresh()
+
+    assert hosts(pool.select_uris()) == ["b.example.com", "c.example.com", "a.example.com"]
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_and_failing_nodes_are_excluded(nodes):
+    """
+    Nodes reporting unhealthy or whose probe raises are left out.
+    """
+    pool = TurnServerPool(nodes, static_source({
+        "a.example.com": NodeStatus(0, False),
+        "b.example.com": OSError("connection refused"),
+        "c.example.com": NodeStatus(50, True),
+    }))
+    await pool.refresh()
+
+    assert hosts(pool.select_uris()) == ["c.example.com"]
+    assert pool.refresh_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_is_current_follows_primary_node_health(nodes):
+    """
+    URIs stay current while their first node is selectable and stop
+    being current once it goes unhealthy.
+    """
+    statuses = {
+        "a.example.com": NodeStatus(10, True),
+        "b.example.com": NodeStatus(0, True),
+        "c.example.com": NodeStatus(20, True),
+    }
+    pool = TurnServerPool(nodes, static_source(statuses))
+    await pool.refresh()
+    uris = pool.select_uris()
+
+    statuses["a.example.com"] = NodeStatus(90, True)
+    await pool.refresh()
+    assert pool.is_current(uris)
+
+    statuses["b.example.com"] = NodeStatus(0, False)
+    await pool.refresh()
+    assert not pool.is_current(uris)
+    assert pool.is_current(pool.select_uris())
+    assert not pool.is_current(())
+
+
+@pytest.mark.asyncio
+async def test_all_nodes_unhealthy_falls_back_to_every_node(nodes):
+    """
+    A pool with no healthy node still hands out URIs rather than none.
+    """
+    pool = TurnServerPool(nodes, static_source({
+        host: NodeStatus(0, False) for host in ("a.example.com", "b.example.com", "c.example.com")
+    }))
+    await pool.refresh()
+
+    assert len(hosts(pool.select_uris())) == 3
+
+
+@pytest.mark.asyncio
+async def test_max_nodes_caps_each_response(nodes):
+    """
+    max_nodes limits how many nodes one credential lists.
+    """
+    pool = TurnServerPool(nodes, static_source({
+        "a.example.com": NodeStatus(1, True),
+        "b.example.com": NodeStatus(2, True),
+        "c.example.com": NodeStatus(3, True),
+    }), max_nodes=2, assignment_weight=0)
+    await pool.refresh()
+
+    uris = pool.select_uris()
+    assert hosts(uris) == ["a.example.com", "b.example.com"]
+    assert len(uris) == 6
+
+
+@pytest.mark.asyncio
+async def test_assignments_spread_load_between_refreshes(nodes):
+    """
+    Credentials handed out since the last refresh count toward a node's
+    load, so a burst is spread instead of all landing on one node.
+    """
+    pool = TurnServerPool(nodes, static_source({
+        "a.example.com": NodeStatus(0, True),
+        "b.example.com": NodeStatus(2, True),
+        "c.example.com": NodeStatus(100, True),
+    }))
+    await pool.refresh()
+
+    primaries = [hosts(pool.select_uris())[0] for _ in range(6)]
+    assert primaries.count("a.example.com") == 4
+    assert primaries.count("b.example.com") == 2
+
+    await pool.refresh()
+    assert [s["assigned"] for s in pool.snapshot()] == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_picks_up_load_changes(nodes):
+    """
+    start() refreshes periodically until stop() is awaited.
+    """
+    statuses = {
+        "a.example.com": NodeStatus(0, True),
+        "b.example.com": NodeStatus(10, True),
+        "c.example.com": NodeStatus(10, True),
+    }
+    pool = TurnServerPool(nodes, static_source(statuses), refresh_interval=0.01, assignment_weight=0)
+    pool.start()
+    try:
+        await asyncio.sleep(0.05)
+        assert hosts(pool.select_uris())[0] == "a.example.com"
+
+        statuses["a.example.com"] = NodeStatus(0, False)
+        await asyncio.sleep(0.05)
+        assert "a.example.com" not in hosts(pool.select_uris())
+    finally:
+        await pool.stop()
+
+    assert pool.refreshes >= 2
+
+
+###############################################################################
+# PROMETHEUS LOAD SOURCE
+###############################################################################
+
+def test_parse_prometheus_value_sums_labelled_samples():
+    """
+    Every sample of the metric is summed; similarly named metrics are not.
+    """
+    body = "\n".join([
+        "# TYPE turn_total_allocations gauge",
+        'turn_total_allocations{type="UDP"} 4',
+        'turn_total_allocations{type="TCP"} 3',
+        "turn_total_allocations_peak 99",
+    ])
+
+    assert parse_prometheus_value(body, "turn_total_allocations") == 7.0
+    assert parse_prometheus_value(body, "turn_missing") is None
+
+
+@pytest.mark.asyncio
+async def test_prometheus_load_source_scrapes_exporter():
+    """
+    The load source reads the metric from a local stand-in exporter and
+    marks an unreachable exporter unhealthy.
+    """
+    async def exporter(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.0 200 OK\r\n\r\nturn_total_allocations 12\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(exporter, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        status = await prometheus_load_source(port=port)(TurnNode("127.0.0.1", 3478))
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert status == NodeStatus(12.0, True)
+
+    unreachable = await prometheus_load_source(port=port, timeout=0.5)(TurnNode("127.0.0.1", 3478))
+    assert unreachable.healthy is False
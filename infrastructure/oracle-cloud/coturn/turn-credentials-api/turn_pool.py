@@ -0,0 +1,351 @@
+"""
+TURN Server Pool for TURN Credentials API
+
+Tracks a pool of coturn nodes that share one static-auth-secret and
+orders the URIs handed to clients by node load, so relay traffic spreads
+across nodes without any client change.
+
+Node load and health are refreshed in the background by a pluggable
+async load source; the request path only reads precomputed URI tuples.
+Between refreshes, each credential handed out is counted against its
+primary node so a burst does not pile onto the node that was least
+loaded at the last refresh.
+
+The default load source scrapes coturn's Prometheus exporter
+(turnserver --prometheus, port 9641) for turn_total_allocations.
+
+Author: WebRTC-Lite
+Version: 1.0.0
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+DEFAULT_REFRESH_INTERVAL = 5.0
+DEFAULT_ASSIGNMENT_WEIGHT = 1.0
+DEFAULT_PROMETHEUS_PORT = 9641
+DEFAULT_LOAD_METRIC = "turn_total_allocations"
+DEFAULT_PROBE_TIMEOUT = 2.0
+
+
+###############################################################################
+# NODES
+###############################################################################
+
+class NodeStatus(NamedTuple):
+    """Result of one load/health probe"""
+    load: float
+    healthy: bool
+
+
+class TurnNode:
+    """One coturn node and its most recent load and health"""
+
+    def __init__(self, host: str, port: int, tls_port: int = 5349):
+        """
+        Args:
+            host: Node hostname or IP used in the URIs
+            port: Plain UDP/TCP listening port
+            tls_port: TLS listening port
+        """
+        self.host = host
+        self.port = port
+        self.tls_port = tls_port
+        self.uris: Tuple[str, ...] = (
+            f"turn:{host}:{port}?transport=udp",
+            f"turn:{host}:{port}?transport=tcp",
+            f"turns:{host}:{tls_port}?transport=tcp",
+        )
+        self.load = 0.0
+        self.healthy = True
+        self.assigned = 0
+        self.last_refresh: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        """host:port identifier"""
+        return f"{self.host}:{self.port}"
+
+    def __repr__(self) -> str:
+        return f"TurnNode({self.name}, load={self.load}, healthy={self.healthy})"
+
+
+def parse_turn_servers(spec: str, default_port: int, tls_port: int = 5349) -> List[TurnNode]:
+    """
+    Parse a TURN_SERVERS value such as "turn1.example.com,turn2.example.com:3479".
+
+    Args:
+        spec: Comma-separated host[:port] list
+        default_port: Port used when an entry has none
+        tls_port: TLS port for every node
+
+    Returns:
+        List of TurnNode in configuration order
+    """
+    nodes = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.rpartition(":") if entry.count(":") == 1 else (entry, "", "")
+        nodes.append(TurnNode(host, int(port) if port else default_port, tls_port))
+    return nodes
+
+
+###############################################################################
+# LOAD SOURCES
+###############################################################################
+
+LoadSource = Callable[[TurnNode], Awaitable[NodeStatus]]
+
+
+def parse_prometheus_value(body: str, metric: str) -> Optional[float]:
+    """
+    Sum every sample of metric in a Prometheus text exposition body.
+
+    Args:
+        body: Exposition text
+        metric: Metric name, matched with or without labels
+
+    Returns:
+        float sum, or None if the metric is absent
+    """
+    total = None
+    for line in body.splitlines():
+        if not line.startswith(metric):
+            continue
+        name, _, rest = line.partition(" ")
+        if name != metric and not name.startswith(metric + "{"):
+            continue
+        if "}" in line:
+            rest = line.rsplit("}", 1)[1]
+        try:
+            value = float(rest.split()[0])
+        except (IndexError, ValueError):
+            continue
+        total = (total or 0.0) + value
+    return total
+
+
+def prometheus_load_source(
+    port: int = DEFAULT_PROMETHEUS_PORT,
+    metric: str = DEFAULT_LOAD_METRIC,
+    timeout: float = DEFAULT_PROBE_TIMEOUT
+) -> LoadSource:
+    """
+    Build a load source that scrapes coturn's Prometheus exporter.
+
+    A node is unhealthy when the scrape fails or the metric is missing.
+
+    Args:
+        port: Exporter port on each node
+        metric: Metric used as the node's load
+        timeout: Seconds allowed per scrape
+
+    Returns:
+        Async callable mapping a TurnNode to its NodeStatus
+    """
+    async def fetch(node: TurnNode) -> NodeStatus:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(node.host, port), timeout
+            )
+            try:
+                writer.write(
+                    f"GET /metrics HTTP/1.0\r\nHost: {node.host}\r\n\r\n".encode()
+                )
+                await writer.drain()
+                raw = await asyncio.wait_for(reader.read(), timeout)
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError):
+            return NodeStatus(load=float("inf"), healthy=False)
+
+        head, _, body = raw.decode(errors="replace").partition("\r\n\r\n")
+        if " 200 " not in head.split("\r\n", 1)[0] + " ":
+            return NodeStatus(load=float("inf"), healthy=False)
+        value = parse_prometheus_value(body, metric)
+        if value is None:
+            return NodeStatus(load=float("inf"), healthy=False)
+        return NodeStatus(load=value, healthy=True)
+
+    return fetch
+
+
+###############################################################################
+# POOL
+###############################################################################
+
+class TurnServerPool:
+    """
+    Load-ordered view of a set of TURN nodes.
+
+    After every refresh the pool precomputes, for each healthy node, the
+    URI tuple that lists that node first followed by the other healthy
+    nodes in load order. select_uris() then only picks the node with the
+    lowest estimated load (reported load plus credentials assigned since
+    the refresh) and returns its precomputed tuple.
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence[TurnNode],
+        load_source: LoadSource,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        max_nodes: int = 0,
+        assignment_weight: float = DEFAULT_ASSIGNMENT_WEIGHT
+    ):
+        """
+        Args:
+            nodes: Pool members
+            load_source: Async probe returning each node's NodeStatus
+            refresh_interval: Seconds between background refreshes
+            max_nodes: Nodes listed per response (0 = all healthy nodes)
+            assignment_weight: Load added to a node per credential assigned
+        """
+        if not nodes:
+            raise ValueError("TURN server pool needs at least one node")
+        self.nodes = list(nodes)
+        self.load_source = load_source
+        self.refresh_interval = refresh_interval
+        self.max_nodes = max_nodes
+        self.assignment_weight = assignment_weight
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+        self._candidates: List[TurnNode] = list(self.nodes)
+        self._uris_by_primary: Dict[str, Tuple[str, ...]] = {}
+        self._primary_uris: frozenset = frozenset()
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild()
+
+    ###########################################################################
+    # REQUEST PATH
+    ###########################################################################
+
+    def select_uris(self) -> Tuple[str, ...]:
+        """
+        URIs for one credential, least-loaded node first.
+
+        Returns:
+            Tuple of URIs (shared, immutable; do not modify)
+        """
+        candidates = self._candidates
+        primary = candidates[0]
+        if len(candidates) > 1:
+            weight = self.assignment_weight
+            best = primary.load + primary.assigned * weight
+            for node in candidates:
+                estimate = node.load + node.assigned * weight
+                if estimate < best:
+                    primary, best = node, estimate
+        primary.assigned += 1
+        return self._uris_by_primary[primary.name]
+
+    def is_current(self, uris: Tuple[str, ...]) -> bool:
+        """
+        Whether URIs handed out earlier still lead with a selectable node.
+
+        Used to decide if a cached credential may be served again: once
+        its primary node has gone unhealthy the credential is re-minted
+        with a fresh selection.
+
+        Args:
+            uris: URI tuple previously returned by select_uris()
+
+        Returns:
+            bool: True if the first node in uris is still a candidate
+        """
+        return bool(uris) and uris[0] in self._primary_uris
+
+    ###########################################################################
+    # REFRESH
+    ###########################################################################
+
+    async def refresh(self) -> None:
+        """Probe every node concurrently and recompute the URI orderings"""
+        results = await asyncio.gather(
+            *(self.load_source(node) for node in self.nodes),
+            return_exceptions=True
+        )
+        now = time.time()
+        for node, result in zip(self.nodes, results):
+            if isinstance(result, BaseException):
+                self.refresh_failures += 1
+                logger.warning(f"TURN node {node.name} probe failed: {str(result)}")
+                node.load, node.healthy = float("inf"), False
+            else:
+                node.load, node.healthy = result.load, result.healthy
+            node.assigned = 0
+            node.last_refresh = now
+        self.refreshes += 1
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        healthy = [node for node in self.nodes if node.healthy]
+        # With no healthy node, keep handing out every node rather than none
+        ordered = sorted(healthy or self.nodes, key=lambda node: node.load)
+        limit = self.max_nodes if self.max_nodes > 0 else len(ordered)
+
+        uris_by_primary = {}
+        for primary in ordered:
+            others = [node for node in ordered if node is not primary]
+            chosen = [primary] + others[:limit - 1]
+            uris_by_primary[primary.name] = tuple(uri for node in chosen for uri in node.uris)
+
+        self._uris_by_primary = uris_by_primary
+        self._primary_uris = frozenset(node.uris[0] for node in ordered)
+        self._candidates = ordered
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.error(f"TURN pool refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start background refreshes on the running event loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel background refreshes"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    ###########################################################################
+    # STATISTICS
+    ###########################################################################
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """
+        Per-node state for diagnostics and metrics.
+
+        Returns:
+            List of dicts with node, load, healthy, and assigned
+        """
+        return [
+            {
+                "node": node.name,
+                "load": node.load,
+                "healthy": node.healthy,
+                "assigned": node.assigned,
+            }
+            for node in self.nodes
+        ]
@@ -240,6 +240,8 @@ resource "oci_core_instance" "turn_server" {
     user_data = base64encode(templatefile("${path.module}/cloud-init.yaml", {
       domain_name = var.turn_domain_name
       email = var.letsencrypt_email
+      api_micro_cache = var.api_micro_cache
+      api_micro_cache_seconds = var.api_micro_cache_seconds
     }))
   }
 
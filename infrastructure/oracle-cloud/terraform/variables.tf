@@ -112,6 +112,18 @@ variable "letsencrypt_email" {
   default     = "admin@example.com"
 }
 
+variable "api_micro_cache" {
+  description = "Cache identical /turn-credentials requests in nginx for a few seconds"
+  type        = bool
+  default     = false
+}
+
+variable "api_micro_cache_seconds" {
+  description = "Lifetime of nginx micro-cache entries for /turn-credentials"
+  type        = number
+  default     = 5
+}
+
 ###############################################################################
 # STORAGE CONFIGURATION
 ###############################################################################